@@ -3,6 +3,7 @@ import importlib.util
 import logging
 import multiprocessing as mp
 import os
+import shutil
 import signal
 import sys
 import time
@@ -12,12 +13,25 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-import psutil
-
 from core.CortexBus import bus
+from core.execution_accounting import (
+    ResourceLimitExceeded, ResourceLimits, ResourceUsage, execution_accounting, exit_status_for,
+    measure_self, memory_exceeded, sample_process,
+)
+from core.lazy_services import lazy_import, lazy_service
+from core.file_manager import works_manager
+from core.sandbox_workspace import get_workspace_pool
+from core.result_transport import (
+    cleanup_spills, move_outputs, restore_spilled, spill_dir_for, spill_large_values,
+)
+
+psutil = lazy_import("psutil")
 
 logger = logging.getLogger("AgentLifecycleManager")
 
+# Cada cuánto muestrea el padre el consumo del hijo mientras espera
+USAGE_SAMPLE_INTERVAL = 0.5
+
 
 @dataclass
 class AgentInfo:
@@ -28,6 +42,17 @@ class AgentInfo:
     session_id: str
     result_queue: Any = field(default=None)
     max_lifetime: int = 300
+    spill_dir: Optional[str] = None
+    sandbox_dir: Optional[str] = None
+    # Contabilidad de recursos (sólo procesos sandbox)
+    limits: Optional[Dict[str, Any]] = None
+    process: Any = None
+    last_sample: Optional[Dict[str, Any]] = None
+    last_sampled_at: float = 0.0
+    usage_report: Optional[Dict[str, Any]] = None
+    exit_status: Optional[str] = None
+    exitcode: Optional[int] = None
+    usage: Optional[ResourceUsage] = None
 
 
 class AgentLifecycleManager:
@@ -50,12 +75,20 @@ class AgentLifecycleManager:
         self.live_dir = self.data_dir / "skills_vault" / "live"
         self.live_dir.mkdir(parents=True, exist_ok=True)
         
+        # Valores grandes de los resultados (fuera del sandbox, mismo filesystem)
+        self.results_dir = self.data_dir / "temp_results"
+        try:
+            cleanup_spills(self.results_dir)
+        except OSError:
+            pass
+        
+        # Workspaces de sandbox reciclados (recoge los huérfanos al crearse)
+        self.workspaces = get_workspace_pool(self.data_dir / "temp_sandbox")
+        
         self.active_agents: Dict[int, AgentInfo] = {}
         self._results_buffer: Dict[str, Dict[str, Any]] = {}
         self._retry_callbacks: Dict[str, Any] = {}
 
-        bus.subscribe("skill.RETRY_REQUEST", self._on_retry_request)
-
     async def execute_skill(self, skill_name: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Ejecutar skill directamente y retornar resultado"""
         try:
@@ -241,18 +274,10 @@ class AgentLifecycleManager:
         
         skill_name = skill_path.stem
         
-        # Crear directorio sandbox temporal en ubicación fija
-        import tempfile
-        temp_base = self.data_dir / "temp_sandbox"
-        temp_base.mkdir(parents=True, exist_ok=True)
-        
-        sandbox_dir = Path(tempfile.mkdtemp(prefix=f"skill_{skill_name}_", dir=str(temp_base)))
+        # Workspace del pool: ya existe y trae output/ creado
+        sandbox_dir = self.workspaces.acquire()
         
-        # Crear directorio output en el sandbox para que el skill pueda guardar archivos
-        sandbox_output_dir = sandbox_dir / "output"
-        sandbox_output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Copiar skill.py al sandbox
+        # Enlazar skill.py al sandbox (copia compartida de sólo lectura)
         sandbox_skill_path = sandbox_dir / "skill.py"
         try:
             # Leer código original
@@ -265,13 +290,14 @@ class AgentLifecycleManager:
             corrected_code = corrected_code.replace("'output\\", f"'{sandbox_output_str}/")
             corrected_code = corrected_code.replace('"output\\', f'"{sandbox_output_str}/')
             
-            # Escribir código corregido
-            sandbox_skill_path.write_text(corrected_code, encoding='utf-8')
+            # El workspace reciclado conserva su ruta, así que el código
+            # corregido se repite entre ejecuciones y se comparte
+            self.workspaces.share(sandbox_dir, "skill.py", corrected_code.encode('utf-8'))
         except Exception as e:
             logger.error(f"Error corrigiendo rutas en skill: {e}")
-            # Fallback: copiar sin modificar
+            # Fallback: enlazar sin modificar
             try:
-                shutil.copy2(skill_path, sandbox_skill_path)
+                self.workspaces.share(sandbox_dir, "skill.py", src=skill_path)
             except Exception as e2:
                 logger.error(f"Error copiando skill: {e2}")
                 sandbox_skill_path = skill_path
@@ -284,8 +310,8 @@ class AgentLifecycleManager:
                 import json
                 manifest = json.loads(live_manifest.read_text(encoding="utf-8"))
                 permissions = manifest.get("permissions", [])
-                # Copiar manifest al sandbox
-                shutil.copy2(live_manifest, sandbox_dir / "manifest.json")
+                # Enlazar manifest al sandbox
+                self.workspaces.share(sandbox_dir, "manifest.json", src=live_manifest)
             except Exception:
                 pass
         
@@ -295,6 +321,7 @@ class AgentLifecycleManager:
         context["sandbox_dir"] = str(sandbox_dir)
 
         session_id = str(uuid.uuid4())
+        spill_dir = spill_dir_for(self.results_dir, session_id)
         ctx = mp.get_context("spawn")
         q = ctx.Queue()
         
@@ -307,10 +334,14 @@ class AgentLifecycleManager:
             paths_to_add.append(user_site)
         
         new_pythonpath = os.pathsep.join(paths_to_add + ([pythonpath] if pythonpath else []))
+
+        # Límites RLIMIT que el hijo se aplica antes de cargar la skill
+        limits = ResourceLimits.from_security_limits().to_dict()
         
         proc = ctx.Process(
             target=_wrapped_execute,
-            args=(str(sandbox_skill_path), context, session_id, q, new_pythonpath, str(sandbox_dir)),
+            args=(str(sandbox_skill_path), context, session_id, q, new_pythonpath, str(sandbox_dir), str(spill_dir),
+                  limits),
             name=f"skill-{skill_name}-{session_id[:8]}",
         )
         proc.start()
@@ -323,6 +354,9 @@ class AgentLifecycleManager:
             spawned_at=time.time(),
             session_id=session_id,
             result_queue=q,
+            spill_dir=str(spill_dir),
+            sandbox_dir=str(sandbox_dir),
+            limits=limits,
         )
 
         bus.publish_sync(
@@ -386,6 +420,11 @@ class AgentLifecycleManager:
 
             result = await asyncio.wait_for(self._wait_for_result(pid, session_id), timeout=actual_timeout)
             self._kill_agent(pid)
+            works = await asyncio.to_thread(
+                self._register_outputs, skill_name, session_id, result.get("output_files") or []
+            )
+            for work in works:
+                works_manager.publish_completed(work)
 
             result_summary = str(result.get("result", ""))[:100]
             await bus.publish(
@@ -401,6 +440,8 @@ class AgentLifecycleManager:
                 "session_id": session_id,
                 "pid": pid,
                 "duration": time.time() - agent.spawned_at,
+                "usage": agent.usage.to_dict() if agent.usage else None,
+                "works": [w.id for w in works],
             }
 
         except FileNotFoundError as e:
@@ -430,6 +471,9 @@ class AgentLifecycleManager:
 
         except asyncio.TimeoutError:
             if pid is not None:
+                timed_out = self.active_agents.get(pid)
+                if timed_out is not None:
+                    timed_out.exit_status = "timeout"
                 self._force_kill(pid)
 
             if session_id:
@@ -500,7 +544,8 @@ class AgentLifecycleManager:
 
     async def _wait_for_result(self, pid: int, session_id: str) -> Dict[str, Any]:
         start = time.time()
-        q = self.active_agents[pid].result_queue
+        agent = self.active_agents[pid]
+        q = agent.result_queue
 
         while pid in self.active_agents:
             if q is not None:
@@ -508,6 +553,8 @@ class AgentLifecycleManager:
                     while True:
                         msg = q.get_nowait()
                         if isinstance(msg, dict) and msg.get("session_id"):
+                            self._note_exit(agent, msg)
+                            msg = self._restore_result(agent, msg)
                             self._results_buffer[msg["session_id"]] = msg
                             bus.publish_sync("agent.RESULT", msg, sender="AgentLifecycleManager")
                 except Exception:
@@ -516,6 +563,12 @@ class AgentLifecycleManager:
             if session_id in self._results_buffer:
                 return self._results_buffer.pop(session_id)
 
+            self._sample_usage(agent)
+            if agent.exit_status == "memory_limit":
+                # Presupuesto de memoria superado (RSS muestreado): cortar ya
+                self._force_kill(pid)
+                raise ResourceLimitExceeded("memoria")
+
             if not self._is_process_alive(pid):
                 if session_id in self._results_buffer:
                     return self._results_buffer.pop(session_id)
@@ -527,6 +580,75 @@ class AgentLifecycleManager:
 
         return {}
 
+    def _note_exit(self, agent: AgentInfo, msg: Dict[str, Any]) -> None:
+        """Guardar el consumo y el estado de salida que informa el hijo"""
+        agent.usage_report = msg.get("usage")
+        agent.exit_status = msg.get("exit_status") or ("ok" if msg.get("success") else "error")
+
+    def _sample_usage(self, agent: AgentInfo) -> None:
+        """
+        Muestrear el hijo desde el padre: respaldo del consumo si muere sin
+        informar y control del presupuesto de memoria por RSS
+        """
+        if agent.limits is None:
+            return
+        now = time.monotonic()
+        if now - agent.last_sampled_at < USAGE_SAMPLE_INTERVAL:
+            return
+        agent.last_sampled_at = now
+        try:
+            if agent.process is None:
+                agent.process = psutil.Process(agent.pid)
+            sample = sample_process(agent.process, agent.last_sample)
+        except Exception:
+            sample = None
+        if sample is not None:
+            agent.last_sample = sample
+            if memory_exceeded(agent.limits, sample):
+                logger.warning(f"{agent.skill_name} supera su memoria: {sample['rss_mb']:.0f} MB de RSS")
+                agent.exit_status = "memory_limit"
+
+    def _record_usage(self, agent: AgentInfo) -> None:
+        """Registrar el consumo de una ejecución sandbox al terminar"""
+        if agent.limits is None or agent.usage is not None:
+            return
+        status = agent.exit_status or "crashed"
+        agent.usage = ResourceUsage.from_reports(
+            agent.skill_name,
+            wall_seconds=time.time() - agent.spawned_at,
+            exit_status=status,
+            child=agent.usage_report,
+            samples=agent.last_sample,
+            exitcode=agent.exitcode,
+        )
+        try:
+            execution_accounting.record(agent.usage)
+        except Exception as e:
+            logger.error(f"Error registrando consumo de {agent.skill_name}: {e}")
+
+    def _register_outputs(self, skill_name: str, session_id: str, paths: list) -> list:
+        """
+        Registrar como trabajos los archivos que dejó la skill: cada uno entra
+        al almacén de blobs por rename (sin copiar) y en su sitio queda un
+        enlace; WorksManager es el dueño de la referencia (delete_work la libera).
+        Se ejecuta en un thread: work.COMPLETED lo publica quien llama.
+        """
+        works = []
+        for path in paths:
+            work = works_manager.save_output(path, skill_name, skill_name,
+                                             metadata={"session_id": session_id}, notify=False)
+            if work is not None:
+                works.append(work)
+        return works
+
+    def _restore_result(self, agent: AgentInfo, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolver los valores volcados por el worker (lectura con mmap) y borrar el volcado"""
+        if not agent.spill_dir or not Path(agent.spill_dir).exists():
+            return msg
+        msg = restore_spilled(msg)
+        shutil.rmtree(agent.spill_dir, ignore_errors=True)
+        return msg
+
     def _is_process_alive(self, pid: int) -> bool:
         try:
             proc = psutil.Process(pid)
@@ -541,7 +663,7 @@ class AgentLifecycleManager:
             proc = psutil.Process(pid)
             proc.terminate()
             try:
-                proc.wait(timeout=5)
+                self.active_agents[pid].exitcode = proc.wait(timeout=5)
             except psutil.TimeoutExpired:
                 self._force_kill(pid)
                 return
@@ -568,6 +690,10 @@ class AgentLifecycleManager:
     def _cleanup(self, pid: int):
         if pid in self.active_agents:
             agent = self.active_agents.pop(pid)
+            self._record_usage(agent)
+            if agent.sandbox_dir:
+                # El hijo ya no existe: vaciar y reciclar en segundo plano
+                self.workspaces.release(agent.sandbox_dir)
             try:
                 if agent.result_queue is not None:
                     try:
@@ -578,20 +704,32 @@ class AgentLifecycleManager:
                 pass
             bus.publish_sync(
                 "agent.KILLED",
-                {"pid": pid, "session_id": agent.session_id, "skill": agent.skill_name},
+                {
+                    "pid": pid,
+                    "session_id": agent.session_id,
+                    "skill": agent.skill_name,
+                    "usage": agent.usage.to_dict() if agent.usage else None,
+                },
                 sender="AgentLifecycleManager",
             )
 
 
-def _wrapped_execute(skill_path, context, session_id, q, pythonpath_val, sandbox_dir=None):
-    """Wrapper que setea PYTHONPATH y sandbox_dir antes de ejecutar la skill"""
+def _wrapped_execute(skill_path, context, session_id, q, pythonpath_val, sandbox_dir=None, spill_dir=None,
+                     limits=None):
+    """Wrapper que setea PYTHONPATH, sandbox_dir y límites RLIMIT antes de ejecutar la skill"""
     if pythonpath_val:
         import os
         os.environ['PYTHONPATH'] = pythonpath_val
-    _execute_skill_wrapper(skill_path, context, session_id, q, sandbox_dir)
+    if limits:
+        try:
+            ResourceLimits(**limits).apply()
+        except Exception as e:
+            logger.warning(f"No se pudieron aplicar los límites de recursos: {e}")
+    _execute_skill_wrapper(skill_path, context, session_id, q, sandbox_dir, spill_dir)
 
 
-def _execute_skill_wrapper(skill_path: str, context: Dict[str, Any], session_id: str, result_queue, sandbox_dir: str = None):
+def _execute_skill_wrapper(skill_path: str, context: Dict[str, Any], session_id: str, result_queue,
+                           sandbox_dir: str = None, spill_dir: str = None):
     """
     Wrapper de ejecución de skills con sandbox de seguridad.
     Aplica las mismas protecciones que SkillSafetyGate en producción.
@@ -743,24 +881,6 @@ def _execute_skill_wrapper(skill_path: str, context: Dict[str, Any], session_id:
         else:
             result = execute_func(context)
 
-        payload = {
-            "session_id": session_id,
-            "skill": skill_name,
-            "result": result,
-            "success": True,
-            "timestamp": time.time(),
-        }
-
-        try:
-            result_queue.put(payload)
-        except Exception:
-            pass
-
-        try:
-            bus.publish_sync("agent.RESULT", payload, sender="SkillWorker")
-        except Exception:
-            pass
-        
         # ============ LIMPIEZA ============
         
         # Restaurar working directory
@@ -791,7 +911,7 @@ def _execute_skill_wrapper(skill_path: str, context: Dict[str, Any], session_id:
         # 8. Restaurar sys.path
         sys.path = original_syspath
         
-        # 9. Copiar archivos generados del sandbox al directorio de salida permanente
+        # 9. Mover archivos generados del sandbox al directorio de salida permanente
         sandbox_dir_p = None
         try:
             if sandbox_dir:
@@ -799,34 +919,52 @@ def _execute_skill_wrapper(skill_path: str, context: Dict[str, Any], session_id:
         except Exception:
             sandbox_dir_p = None
 
+        output_files = []
         if sandbox_dir_p is not None and (sandbox_dir_p / "output").exists():
             try:
-                sandbox_output = sandbox_dir_p / "output"
                 # Usar output_dir del contexto o default relativo al skill_dir
                 final_output = Path(context.get("output_dir", str(Path(skill_dir).parent / "output")))
-                final_output.mkdir(parents=True, exist_ok=True)
-                
-                # Copiar todos los archivos del sandbox output al directorio final
-                for item in sandbox_output.iterdir():
-                    if item.is_file():
-                        dest = final_output / item.name
-                        shutil.copy2(item, dest)
-                        logger.info(f"Archivo copiado: {item.name} -> {dest}")
+                # Mover (rename, sin copiar bytes) los archivos del sandbox output
+                # al directorio final antes de avisar al padre, que mata el
+                # proceso en cuanto recibe el resultado
+                output_files = move_outputs(sandbox_dir_p / "output", final_output)
+                for dest in output_files:
+                    logger.info(f"Archivo movido: {dest}")
             except Exception as e:
-                logger.error(f"Error copiando archivos del sandbox: {e}")
+                logger.error(f"Error moviendo archivos del sandbox: {e}")
         
-        # 10. Limpiar sandbox temporal (solo si es un dir temporal)
+        # Resultados pequeños por la cola; los valores grandes van volcados
+        # a un archivo mapeado y en la cola sólo viaja la referencia
+        if spill_dir:
+            try:
+                result = spill_large_values(result, Path(spill_dir))
+            except Exception as e:
+                logger.error(f"Error volcando resultado grande: {e}")
+        
+        payload = {
+            "session_id": session_id,
+            "skill": skill_name,
+            "result": result,
+            "success": True,
+            "exit_status": "ok",
+            "usage": measure_self(),
+            "timestamp": time.time(),
+        }
+        if output_files:
+            payload["output_files"] = output_files
+
         try:
-            skill_dir_p = Path(skill_dir)
+            result_queue.put(payload)
         except Exception:
-            skill_dir_p = None
+            pass
 
-        if sandbox_dir_p is not None and skill_dir_p is not None and sandbox_dir_p != skill_dir_p:
-            try:
-                shutil.rmtree(str(sandbox_dir_p), ignore_errors=True)
-                logger.info(f"Sandbox limpiado: {sandbox_dir_p}")
-            except Exception as e:
-                logger.error(f"Error limpiando sandbox: {e}")
+        try:
+            bus.publish_sync("agent.RESULT", payload, sender="SkillWorker")
+        except Exception:
+            pass
+        
+        # 10. El sandbox lo vacía y recicla el padre (WorkspacePool) al
+        #     terminar el proceso, aunque éste muera antes de llegar aquí
         
         # 11. Forzar garbage collection
         try:
@@ -841,6 +979,8 @@ def _execute_skill_wrapper(skill_path: str, context: Dict[str, Any], session_id:
             "skill": Path(skill_path).stem if 'skill_path' in locals() else "unknown",
             "error": str(e),
             "success": False,
+            "exit_status": exit_status_for(e),
+            "usage": measure_self(),
             "timestamp": time.time(),
         }
 
@@ -855,4 +995,12 @@ def _execute_skill_wrapper(skill_path: str, context: Dict[str, Any], session_id:
             pass
 
 
-agent_manager = AgentLifecycleManager()
+agent_manager = lazy_service("agent_manager", AgentLifecycleManager)
+
+
+async def _on_retry_request(data: Dict[str, Any]) -> None:
+    """Los reintentos llegan por el bus aunque el manager aún no se haya construido"""
+    await agent_manager._on_retry_request(data)
+
+
+bus.subscribe("skill.RETRY_REQUEST", _on_retry_request)
@@ -5,19 +5,24 @@ Sistema de backup configurable para MiIA-Product-20
 - Integración con Google Drive
 - Integración con Dropbox
 - Exportar/Importar configuración
+- Backups incrementales: sólo se comprimen los archivos que cambiaron
+  (ver core/backup_archive.py), en un hilo y con nivel configurable; si hay
+  proveedor en la nube cada backup es completo (se sube un único ZIP)
+- Subidas por bloques, reanudables, con progreso en el bus (backup.UPLOAD_PROGRESS)
 """
 import os
 import json
 import shutil
 import logging
-import zipfile
 import asyncio
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from core.backup_archive import BackupArchiver, DEFAULT_COMPRESSION_LEVEL
+
 logger = logging.getLogger("MiIABackup")
 
 class BackupProvider(Enum):
@@ -39,6 +44,11 @@ class BackupConfig:
     backup_skills: bool = True
     backup_settings: bool = True
     backup_history: bool = False  # Historial de chat/logs
+    # Incremental: cada N backups se hace uno completo (acota la cadena)
+    incremental: bool = True
+    full_backup_every: int = 7
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL  # 0-9 (zlib)
+    upload_chunk_mb: int = 8
     # Google Drive
     google_credentials: Optional[str] = None
     google_folder_id: Optional[str] = None
@@ -65,6 +75,7 @@ class BackupManager:
         self.BACKUP_DIR.mkdir(exist_ok=True)
         self.config = self._load_config()
         self._scheduler_task = None
+        self.archiver = BackupArchiver(self.BACKUP_DIR, self.config.compression_level)
         
     def _load_config(self) -> BackupConfig:
         """Cargar configuración de backup"""
@@ -94,10 +105,20 @@ class BackupManager:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_name = f"miia_backup_{timestamp}"
         local_path = self.BACKUP_DIR / f"{backup_name}.zip"
+        # Dos backups en el mismo segundo no pueden pisarse: el segundo referencia al primero
+        suffix = 1
+        while local_path.exists():
+            backup_name = f"miia_backup_{timestamp}_{suffix}"
+            local_path = self.BACKUP_DIR / f"{backup_name}.zip"
+            suffix += 1
         
         try:
-            # 1. Crear archivo ZIP local
-            files_backed = await self._create_local_zip(local_path)
+            # 1. Crear archivo ZIP local (sólo lo que cambió desde el anterior).
+            # Lo que se sube a la nube es sólo este ZIP: tiene que ser completo,
+            # un incremental allí no se podría restaurar sin el resto de la cadena
+            full = self._cloud_upload_enabled() or await asyncio.to_thread(self._needs_full_backup)
+            archive = await self._create_local_zip(local_path, full=full)
+            files_backed = archive.files
             
             # 2. Subir a proveedor seleccionado
             upload_result = None
@@ -119,6 +140,7 @@ class BackupManager:
                 "backup_name": backup_name,
                 "local_path": str(local_path),
                 "files_backed": files_backed,
+                "archive": archive.to_dict(),
                 "cloud_upload": upload_result,
                 "timestamp": self.config.last_backup
             }
@@ -127,68 +149,99 @@ class BackupManager:
             logger.error(f"Error creando backup: {e}")
             return {"success": False, "error": str(e)}
     
-    async def _create_local_zip(self, zip_path: Path) -> List[str]:
-        """Crear archivo ZIP con los archivos a respaldar"""
-        files_backed = []
+    def _cloud_upload_enabled(self) -> bool:
+        """Hay un proveedor configurado al que se subirá el backup"""
+        return bool(
+            (self.config.provider == "google_drive" and self.config.google_credentials)
+            or (self.config.provider == "dropbox" and self.config.dropbox_token)
+        )
+    
+    def _needs_full_backup(self) -> bool:
+        """Completo si no es incremental, no hay backups o la cadena llegó a full_backup_every"""
+        if not self.config.incremental or not self.archiver.archives():
+            return True
+        return self.archiver.chain_length() >= max(0, self.config.full_backup_every - 1)
+    
+    def _collect_sources(self) -> List[Tuple[str, Path]]:
+        """(nombre en el ZIP, ruta) de los archivos a respaldar"""
+        sources = []
+        # Configuración de usuario
+        if self.config.backup_settings:
+            user_config = self.CONFIG_DIR
+            if user_config.exists():
+                for file in user_config.rglob("*"):
+                    if file.is_file():
+                        sources.append((f"user_config/{file.relative_to(user_config)}", file))
         
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-            # Configuración de usuario
-            if self.config.backup_settings:
-                user_config = self.CONFIG_DIR
-                if user_config.exists():
-                    for file in user_config.rglob("*"):
-                        if file.is_file():
-                            arcname = f"user_config/{file.relative_to(user_config)}"
-                            zf.write(file, arcname)
-                            files_backed.append(arcname)
-            
-            # Skills personalizadas
-            if self.config.backup_skills:
-                skills_dir = Path("skills_user")
-                if skills_dir.exists():
-                    for file in skills_dir.rglob("*.py"):
-                        arcname = f"skills/{file.relative_to(skills_dir)}"
-                        zf.write(file, arcname)
-                        files_backed.append(arcname)
-            
-            # Configuración del sistema
-            if self.config.backup_tokens:
-                # Guardar indicador de que hay tokens (no los tokens en sí por seguridad)
-                zf.writestr("tokens_indicator.txt", "Tokens configurados")
-                files_backed.append("tokens_indicator.txt")
+        # Skills personalizadas
+        if self.config.backup_skills:
+            skills_dir = Path("skills_user")
+            if skills_dir.exists():
+                for file in skills_dir.rglob("*.py"):
+                    sources.append((f"skills/{file.relative_to(skills_dir)}", file))
+        return sources
+    
+    async def _create_local_zip(self, zip_path: Path, full: bool = False, record: bool = True):
+        """Crear archivo ZIP con los archivos a respaldar (compresión en un hilo)"""
+        extra = {}
+        if self.config.backup_tokens:
+            # Guardar indicador de que hay tokens (no los tokens en sí por seguridad)
+            extra["tokens_indicator.txt"] = b"Tokens configurados"
         
-        return files_backed
+        self.archiver.compression_level = max(0, min(9, int(self.config.compression_level)))
+        sources = await asyncio.to_thread(self._collect_sources)
+        result = await asyncio.to_thread(self.archiver.create, zip_path, sources, extra, full, record)
+        logger.info(
+            f"Backup {zip_path.name}: {len(result.stored)} archivos guardados, "
+            f"{len(result.reused)} reutilizados{' (completo)' if full else ''}"
+        )
+        return result
+    
+    def _upload_progress(self, backup_name: str, provider: str) -> Callable[[int, int], None]:
+        """Callback de progreso (llamable desde el hilo de subida) que publica en el bus"""
+        loop = asyncio.get_running_loop()
+        
+        def progress(sent: int, total: int) -> None:
+            from core.CortexBus import bus
+            payload = {
+                "backup_name": backup_name,
+                "provider": provider,
+                "sent": sent,
+                "total": total,
+                "percent": round(100.0 * sent / total, 1) if total else 100.0,
+            }
+            asyncio.run_coroutine_threadsafe(
+                bus.publish("backup.UPLOAD_PROGRESS", payload, sender="BackupManager"), loop
+            )
+        
+        return progress
     
     async def _upload_to_google_drive(self, local_path: Path, backup_name: str) -> Dict[str, Any]:
-        """Subir backup a Google Drive"""
+        """Subir backup a Google Drive (subida reanudable por bloques)"""
         try:
-            # Aquí iría la integración real con Google Drive API
-            # Por ahora simulamos el proceso
+            from core.CloudStorageIntegrations import GoogleDriveIntegration
             logger.info(f"Subiendo {backup_name} a Google Drive...")
-            await asyncio.sleep(2)  # Simular upload
-            
-            return {
-                "success": True,
-                "provider": "google_drive",
-                "file_id": f"gdrive_{backup_name}",
-                "message": "Backup subido a Google Drive"
-            }
+            result = await GoogleDriveIntegration.upload_file(
+                self.config.google_credentials, local_path, self.config.google_folder_id,
+                chunk_size=self.config.upload_chunk_mb * 1024 * 1024,
+                progress=self._upload_progress(backup_name, "google_drive"),
+            )
+            return {"provider": "google_drive", **result}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     async def _upload_to_dropbox(self, local_path: Path, backup_name: str) -> Dict[str, Any]:
-        """Subir backup a Dropbox"""
+        """Subir backup a Dropbox (sesión de subida por bloques, reanudable)"""
         try:
-            # Aquí iría la integración real con Dropbox API
+            from core.CloudStorageIntegrations import DropboxIntegration, UploadSessionStore
             logger.info(f"Subiendo {backup_name} a Dropbox...")
-            await asyncio.sleep(2)  # Simular upload
-            
-            return {
-                "success": True,
-                "provider": "dropbox",
-                "path": f"{self.config.dropbox_folder}/{backup_name}.zip",
-                "message": "Backup subido a Dropbox"
-            }
+            result = await DropboxIntegration.upload_file(
+                self.config.dropbox_token, local_path, self.config.dropbox_folder,
+                chunk_size=self.config.upload_chunk_mb * 1024 * 1024,
+                progress=self._upload_progress(backup_name, "dropbox"),
+                sessions=UploadSessionStore(self.BACKUP_DIR / "upload_sessions.json"),
+            )
+            return {"provider": "dropbox", "path": result.get("file_path"), **result}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
@@ -213,18 +266,13 @@ class BackupManager:
         return next_backup.isoformat()
     
     async def _cleanup_old_backups(self):
-        """Eliminar backups antiguos según max_backups"""
-        backups = sorted(self.BACKUP_DIR.glob("miia_backup_*.zip"), 
-                        key=lambda p: p.stat().st_mtime, 
-                        reverse=True)
-        
-        # Mantener solo los últimos N backups
-        for old_backup in backups[self.config.max_backups:]:
-            try:
-                old_backup.unlink()
-                logger.info(f"Backup antiguo eliminado: {old_backup}")
-            except Exception as e:
-                logger.warning(f"No se pudo eliminar {old_backup}: {e}")
+        """
+        Eliminar backups antiguos según max_backups (se conservan los que
+        los últimos N necesitan para restaurarse)
+        """
+        removed = await asyncio.to_thread(self.archiver.prune, self.config.max_backups)
+        for old_backup in removed:
+            logger.info(f"Backup antiguo eliminado: {old_backup}")
     
     async def start_auto_backup(self):
         """Iniciar scheduler de backup automático"""
@@ -281,7 +329,8 @@ class BackupManager:
             export_name = f"miia_config_export_{timestamp}.zip"
             export_path = self.BACKUP_DIR / export_name
             
-            await self._create_local_zip(export_path)
+            # Autocontenido y fuera de la cadena de backups
+            await self._create_local_zip(export_path, full=True, record=False)
             
             return {
                 "success": True,
@@ -295,18 +344,14 @@ class BackupManager:
     async def import_config(self, zip_path: Path) -> Dict[str, Any]:
         """Importar configuración desde archivo ZIP"""
         try:
-            # Extraer y validar
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                # Validar estructura
-                files = zf.namelist()
-                
-                # Restaurar configuración de usuario
-                for member in files:
-                    if member.startswith("user_config/"):
-                        target = self.CONFIG_DIR / member.replace("user_config/", "")
-                        target.parent.mkdir(parents=True, exist_ok=True)
-                        with zf.open(member) as src, open(target, 'wb') as dst:
-                            dst.write(src.read())
+            # Un backup incremental trae también los archivos que guardan backups anteriores
+            files = await asyncio.to_thread(self.archiver.members, zip_path)
+            
+            # Restaurar configuración de usuario
+            for member in files:
+                if member.startswith("user_config/"):
+                    target = self.CONFIG_DIR / member.replace("user_config/", "", 1)
+                    await asyncio.to_thread(self.archiver.extract, zip_path, member, target)
             
             return {
                 "success": True,
@@ -336,7 +381,8 @@ def update_backup_config(config_data: Dict[str, Any]) -> Dict[str, Any]:
         allowed_fields = [
             'provider', 'auto_backup', 'backup_frequency', 'backup_time',
             'max_backups', 'backup_tokens', 'backup_skills', 'backup_settings',
-            'backup_history', 'dropbox_folder'
+            'backup_history', 'dropbox_folder', 'incremental', 'full_backup_every',
+            'compression_level', 'upload_chunk_mb'
         ]
         
         for field in allowed_fields:
@@ -17,7 +17,7 @@ from dataclasses import dataclass
 logger = logging.getLogger("BotConfigManager")
 
 # Usar el mismo sistema de credenciales que LLM
-from core.llm_extension import SecureCredentialStore
+from core.llm_extension import credential_store
 
 # Importar servicio de Telegram (si está disponible)
 try:
@@ -63,7 +63,7 @@ class BotConfigurationManager:
     """
     
     def __init__(self):
-        self.credential_store = SecureCredentialStore(app_name="miia-product-20")
+        self.credential_store = credential_store
         self.config_file = Path.home() / ".config" / "miia-product-20" / "bot_config.json"
         self.config_file.parent.mkdir(parents=True, exist_ok=True)
         self._config = self._load_config()
@@ -3,18 +3,93 @@ MiIA Cloud Storage Integrations
 Integraciones reales con Google Drive, Dropbox, OneDrive para backup
 - Verificación de conexión automática
 - Flujo: MiIA guía → Usuario configura → MiIA verifica
+- Subidas por bloques (memoria acotada a un bloque), reanudables y con
+  callback de progreso; las llamadas bloqueantes de los SDK van en un hilo
 """
 import os
 import json
+import time
 import logging
+import threading
 import aiohttp
 import asyncio
 from pathlib import Path
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, Optional
+from datetime import datetime
 
 logger = logging.getLogger("MiIACloudStorage")
 
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_RETRIES = 3
+# Múltiplos de bloque que exigen las APIs
+GOOGLE_CHUNK_MULTIPLE = 256 * 1024
+ONEDRIVE_CHUNK_MULTIPLE = 320 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _chunk_size(requested: int, multiple: int) -> int:
+    return max(multiple, (int(requested) // multiple) * multiple)
+
+
+def _report(progress: Optional[ProgressCallback], sent: int, total: int) -> None:
+    if progress is None:
+        return
+    try:
+        progress(sent, total)
+    except Exception as e:
+        logger.debug(f"Callback de progreso falló: {e}")
+
+
+class UploadSessionStore:
+    """
+    Sesiones de subida a medias, guardadas en un JSON para reanudarlas tras
+    un corte. Una sesión sólo vale para el mismo archivo (tamaño y mtime)
+    """
+
+    MAX_AGE = 6 * 24 * 3600  # Dropbox caduca las sesiones a los 7 días
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def get(self, key: str, st: os.stat_result) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._load().get(key)
+        if not entry:
+            return None
+        if entry.get("size") != st.st_size or entry.get("mtime_ns") != st.st_mtime_ns:
+            return None
+        if time.time() - entry.get("updated", 0) > self.MAX_AGE:
+            return None
+        return entry
+
+    def save(self, key: str, st: os.stat_result, **state: Any) -> None:
+        with self._lock:
+            data = self._load()
+            data[key] = {**state, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "updated": time.time()}
+            self._write(data)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            data = self._load()
+            if data.pop(key, None) is not None:
+                self._write(data)
+
 
 class GoogleDriveIntegration:
     """
@@ -56,7 +131,7 @@ class GoogleDriveIntegration:
                     "action": "Compartir carpeta de Drive",
                     "description": "Crea una carpeta en Drive y compártela con el email de la cuenta de servicio"
                 },
-n                {
+                {
                     "number": 5,
                     "action": "Pegar credenciales en MiIA",
                     "description": "Copia el contenido del archivo JSON descargado y pégalo aquí"
@@ -74,10 +149,8 @@ n                {
         Verificar que las credenciales de Google Drive funcionan
         """
         try:
-            import base64
             from google.oauth2 import service_account
             from googleapiclient.discovery import build
-            from googleapiclient.errors import HttpError
             
             # Parsear credenciales
             creds_data = json.loads(credentials_json)
@@ -130,41 +203,61 @@ n                {
                 }
     
     @staticmethod
-    async def upload_file(credentials_json: str, file_path: Path, folder_id: Optional[str] = None) -> Dict[str, Any]:
-        """Subir archivo a Google Drive"""
+    def _upload_sync(credentials_json: str, file_path: Path, folder_id: Optional[str],
+                     chunk_size: int, progress: Optional[ProgressCallback]) -> Dict[str, Any]:
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+        from googleapiclient.http import MediaFileUpload
+        
+        creds_data = json.loads(credentials_json)
+        credentials = service_account.Credentials.from_service_account_info(
+            creds_data,
+            scopes=['https://www.googleapis.com/auth/drive.file']
+        )
+        
+        service = build('drive', 'v3', credentials=credentials)
+        
+        file_metadata = {
+            'name': file_path.name,
+            'mimeType': 'application/zip'
+        }
+        
+        if folder_id:
+            file_metadata['parents'] = [folder_id]
+        
+        # Subida reanudable: se envía y se lee un bloque cada vez
+        media = MediaFileUpload(
+            str(file_path),
+            mimetype='application/zip',
+            chunksize=_chunk_size(chunk_size, GOOGLE_CHUNK_MULTIPLE),
+            resumable=True
+        )
+        
+        request = service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id, name, webViewLink'
+        )
+        total = os.path.getsize(file_path)
+        file = None
+        while file is None:
+            status, file = request.next_chunk(num_retries=UPLOAD_RETRIES)
+            if status is not None:
+                _report(progress, status.resumable_progress, total)
+        _report(progress, total, total)
+        return file
+    
+    @staticmethod
+    async def upload_file(credentials_json: str, file_path: Path, folder_id: Optional[str] = None,
+                          chunk_size: int = UPLOAD_CHUNK_SIZE,
+                          progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Subir archivo a Google Drive por bloques (el SDK es bloqueante: va en un hilo)"""
         try:
-            from google.oauth2 import service_account
-            from googleapiclient.discovery import build
-            from googleapiclient.http import MediaFileUpload
-            
-            creds_data = json.loads(credentials_json)
-            credentials = service_account.Credentials.from_service_account_info(
-                creds_data,
-                scopes=['https://www.googleapis.com/auth/drive.file']
+            file = await asyncio.to_thread(
+                GoogleDriveIntegration._upload_sync, credentials_json, Path(file_path), folder_id,
+                chunk_size, progress
             )
             
-            service = build('drive', 'v3', credentials=credentials)
-            
-            file_metadata = {
-                'name': file_path.name,
-                'mimeType': 'application/zip'
-            }
-            
-            if folder_id:
-                file_metadata['parents'] = [folder_id]
-            
-            media = MediaFileUpload(
-                str(file_path),
-                mimetype='application/zip',
-                resumable=True
-            )
-            
-            file = service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id, name, webViewLink'
-            ).execute()
-            
             return {
                 "success": True,
                 "file_id": file.get('id'),
@@ -287,60 +380,106 @@ class DropboxIntegration:
             }
     
     @staticmethod
-    async def upload_file(access_token: str, file_path: Path, folder_path: str = "/MiIA-Backups") -> Dict[str, Any]:
-        """Subir archivo a Dropbox"""
+    def _upload_sync(access_token: str, file_path: Path, folder_path: str, chunk_size: int,
+                     progress: Optional[ProgressCallback], sessions: Optional[UploadSessionStore]) -> Dict[str, Any]:
+        import dropbox
+        from dropbox.files import CommitInfo, UploadSessionCursor, WriteMode
+        
+        dbx = dropbox.Dropbox(access_token)
+        
+        # Crear carpeta si no existe
         try:
-            import dropbox
-            from dropbox.files import WriteMode
-            
-            dbx = dropbox.Dropbox(access_token)
-            
-            # Crear carpeta si no existe
-            try:
-                dbx.files_create_folder_v2(folder_path)
-            except dropbox.exceptions.ApiError as e:
-                if e.error.is_path() and e.error.get_path().is_conflict():
-                    pass  # Carpeta ya existe
-                else:
-                    raise
-            
-            # Subir archivo
-            dest_path = f"{folder_path}/{file_path.name}"
-            
-            with open(file_path, 'rb') as f:
-                file_size = os.path.getsize(file_path)
+            dbx.files_create_folder_v2(folder_path)
+        except dropbox.exceptions.ApiError as e:
+            if e.error.is_path() and e.error.get_path().is_conflict():
+                pass  # Carpeta ya existe
+            else:
+                raise
+        
+        # Subir archivo
+        dest_path = f"{folder_path}/{file_path.name}"
+        key = f"dropbox:{dest_path}"
+        st = os.stat(file_path)
+        file_size = st.st_size
+        
+        with open(file_path, 'rb') as f:
+            if file_size <= chunk_size:
+                # Upload simple (un solo bloque)
+                dbx.files_upload(f.read(), dest_path, mode=WriteMode.overwrite)
+            else:
+                # Sesión de subida: un bloque en memoria cada vez; el cursor se
+                # guarda tras cada bloque para reanudar si se corta
+                commit = CommitInfo(path=dest_path, mode=WriteMode.overwrite)
+                saved = sessions.get(key, st) if sessions else None
+                cursor = UploadSessionCursor(session_id=saved["session_id"], offset=saved["offset"]) if saved else None
+                if cursor is not None:
+                    logger.info(f"Reanudando subida de {file_path.name} desde {cursor.offset} bytes")
                 
-                if file_size <= 150 * 1024 * 1024:  # 150 MB
-                    # Upload simple
-                    dbx.files_upload(f.read(), dest_path, mode=WriteMode.overwrite)
-                else:
-                    # Upload por sesiones (archivos grandes)
-                    upload_session_start_result = dbx.files_upload_session_start(f.read(1024*1024*100))
-                    cursor = dropbox.files.UploadSessionCursor(
-                        session_id=upload_session_start_result.session_id,
-                        offset=f.tell()
-                    )
-                    commit = dropbox.files.CommitInfo(path=dest_path, mode=WriteMode.overwrite)
-                    
-                    while f.tell() < file_size:
-                        if (file_size - f.tell()) <= 1024*1024*100:
-                            dbx.files_upload_session_finish(f.read(1024*1024*100), cursor, commit)
-                        else:
-                            dbx.files_upload_session_append_v2(f.read(1024*1024*100), cursor)
+                while True:
+                    if cursor is None:
+                        f.seek(0)
+                        started = dbx.files_upload_session_start(f.read(chunk_size))
+                        cursor = UploadSessionCursor(session_id=started.session_id, offset=f.tell())
+                    else:
+                        f.seek(cursor.offset)
+                        remaining = file_size - cursor.offset
+                        try:
+                            if remaining <= chunk_size:
+                                dbx.files_upload_session_finish(f.read(remaining), cursor, commit)
+                                break
+                            dbx.files_upload_session_append_v2(f.read(chunk_size), cursor)
                             cursor.offset = f.tell()
-            
-            # Obtener link compartido
-            try:
-                shared_link = dbx.sharing_create_shared_link_with_settings(dest_path)
-                link_url = shared_link.url
-            except:
-                link_url = None
+                        except dropbox.exceptions.ApiError as e:
+                            error = e.error
+                            lookup = error.get_lookup_failed() if hasattr(error, "is_lookup_failed") and \
+                                error.is_lookup_failed() else error
+                            if hasattr(lookup, "is_incorrect_offset") and lookup.is_incorrect_offset():
+                                # El servidor ya tenía más (o menos) de lo guardado
+                                cursor.offset = lookup.get_incorrect_offset().correct_offset
+                                continue
+                            if hasattr(lookup, "is_not_found") and lookup.is_not_found():
+                                # Sesión caducada: empezar de nuevo
+                                cursor = None
+                                continue
+                            raise
+                    if sessions is not None:
+                        sessions.save(key, st, session_id=cursor.session_id, offset=cursor.offset)
+                    _report(progress, cursor.offset, file_size)
+                
+                if sessions is not None:
+                    sessions.discard(key)
+        _report(progress, file_size, file_size)
+        
+        # Obtener link compartido
+        try:
+            shared_link = dbx.sharing_create_shared_link_with_settings(dest_path)
+            link_url = shared_link.url
+        except:
+            link_url = None
+        
+        return {"dest_path": dest_path, "file_size": file_size, "link_url": link_url}
+    
+    @staticmethod
+    async def upload_file(access_token: str, file_path: Path, folder_path: str = "/MiIA-Backups",
+                          chunk_size: int = UPLOAD_CHUNK_SIZE, progress: Optional[ProgressCallback] = None,
+                          sessions: Optional[UploadSessionStore] = None) -> Dict[str, Any]:
+        """
+        Subir archivo a Dropbox por bloques de `chunk_size` (el SDK es
+        bloqueante: va en un hilo). Con `sessions`, una subida cortada se
+        reanuda donde se quedó
+        """
+        try:
+            file_path = Path(file_path)
+            result = await asyncio.to_thread(
+                DropboxIntegration._upload_sync, access_token, file_path, folder_path, chunk_size,
+                progress, sessions
+            )
             
             return {
                 "success": True,
-                "file_path": dest_path,
-                "file_size": file_size,
-                "shared_link": link_url,
+                "file_path": result["dest_path"],
+                "file_size": result["file_size"],
+                "shared_link": result["link_url"],
                 "message": f"✅ Archivo subido a Dropbox: {file_path.name}"
             }
             
@@ -460,10 +599,59 @@ class OneDriveIntegration:
                 "details": "Verifica tus credenciales de Azure AD"
             }
     
+    @staticmethod
+    async def _upload_session(session: aiohttp.ClientSession, access_token: str, folder_id: str,
+                              file_path: Path, chunk_size: int, progress: Optional[ProgressCallback],
+                              sessions: Optional[UploadSessionStore]) -> aiohttp.ClientResponse:
+        """
+        Subida por bloques con sesión de subida de Graph; la URL de la sesión
+        se guarda para reanudar desde el siguiente rango que espera el servidor
+        """
+        chunk_size = _chunk_size(chunk_size, ONEDRIVE_CHUNK_MULTIPLE)
+        st = os.stat(file_path)
+        total = st.st_size
+        key = f"onedrive:{folder_id}/{file_path.name}"
+        
+        upload_url, offset = None, 0
+        saved = sessions.get(key, st) if sessions else None
+        if saved:
+            async with session.get(saved["upload_url"]) as status_response:
+                if status_response.status == 200:
+                    ranges = (await status_response.json()).get("nextExpectedRanges") or ["0-"]
+                    upload_url, offset = saved["upload_url"], int(ranges[0].split("-")[0])
+        if upload_url is None:
+            session_url = (f"https://graph.microsoft.com/v1.0/me/drive/items/{folder_id}:/"
+                           f"{file_path.name}:/createUploadSession")
+            async with session.post(session_url, headers={"Authorization": f"Bearer {access_token}"},
+                                    json={"item": {"@microsoft.graph.conflictBehavior": "replace"}}) as created:
+                upload_url = (await created.json())["uploadUrl"]
+            if sessions is not None:
+                sessions.save(key, st, upload_url=upload_url)
+        
+        with open(file_path, 'rb') as f:
+            while True:
+                f.seek(offset)
+                chunk = await asyncio.to_thread(f.read, chunk_size)
+                end = offset + len(chunk) - 1
+                headers = {"Content-Length": str(len(chunk)), "Content-Range": f"bytes {offset}-{end}/{total}"}
+                # La URL de la sesión ya va autenticada: sin Authorization
+                response = await session.put(upload_url, headers=headers, data=chunk)
+                if response.status != 202:
+                    if sessions is not None and response.status in (200, 201):
+                        sessions.discard(key)
+                    _report(progress, total if response.status in (200, 201) else offset, total)
+                    return response
+                ranges = (await response.json()).get("nextExpectedRanges") or [f"{end + 1}-"]
+                response.release()
+                offset = int(ranges[0].split("-")[0])
+                _report(progress, offset, total)
+    
     @staticmethod
     async def upload_file(client_id: str, client_secret: str, tenant_id: str, 
-                         file_path: Path, folder_path: str = "MiIA-Backups") -> Dict[str, Any]:
-        """Subir archivo a OneDrive"""
+                         file_path: Path, folder_path: str = "MiIA-Backups",
+                         chunk_size: int = UPLOAD_CHUNK_SIZE, progress: Optional[ProgressCallback] = None,
+                         sessions: Optional[UploadSessionStore] = None) -> Dict[str, Any]:
+        """Subir archivo a OneDrive por bloques (reanudable con `sessions`)"""
         try:
             # Obtener token (reutilizar lógica anterior)
             token_url = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
@@ -479,11 +667,6 @@ class OneDriveIntegration:
                     token_result = await response.json()
                     access_token = token_result.get("access_token")
                 
-                headers = {
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/octet-stream"
-                }
-                
                 # Crear/verificar carpeta
                 folder_url = f"https://graph.microsoft.com/v1.0/me/drive/root/children"
                 folder_payload = {
@@ -499,12 +682,10 @@ class OneDriveIntegration:
                     folder_id = folder_result.get("id")
                 
                 # Subir archivo
-                upload_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{folder_id}:/{file_path.name}:/content"
-                
-                with open(file_path, 'rb') as f:
-                    file_content = f.read()
-                
-                async with session.put(upload_url, headers=headers, data=file_content) as upload_response:
+                upload_response = await OneDriveIntegration._upload_session(
+                    session, access_token, folder_id, Path(file_path), chunk_size, progress, sessions
+                )
+                async with upload_response:
                     if upload_response.status in [200, 201]:
                         file_info = await upload_response.json()
                         return {
@@ -4,8 +4,11 @@ import logging
 from collections import defaultdict
 from datetime import datetime
 import inspect
+import time
 from typing import Any, Callable, Dict, List, Optional
 
+from core.loop_profiler import loop_profiler, subscriber_name
+
 logger = logging.getLogger("CortexBus")
 
 
@@ -108,6 +111,8 @@ class CortexBus:
                 else:
                     try:
                         loop = asyncio.get_event_loop()
+                        if loop_profiler.enabled:
+                            callback = self._timed_sync(callback, topic)
                         tasks.append(loop.run_in_executor(None, callback, data))
                     except RuntimeError:
                         callback(data)
@@ -118,6 +123,9 @@ class CortexBus:
             await asyncio.gather(*tasks, return_exceptions=True)
 
     async def _safe_async_call(self, coro_func: Callable, data: Any, topic: str):
+        if loop_profiler.enabled:
+            await self._profiled_async_call(coro_func, data, topic)
+            return
         try:
             result = coro_func(data)
             if asyncio.iscoroutine(result):
@@ -125,5 +133,31 @@ class CortexBus:
         except Exception as e:
             logger.error(f"Error callback async {topic}: {e}")
 
+    async def _profiled_async_call(self, coro_func: Callable, data: Any, topic: str):
+        """Igual que _safe_async_call, atribuyendo el tiempo al suscriptor"""
+        name = subscriber_name(coro_func)
+        start = time.perf_counter()
+        with loop_profiler.label(f"bus:{topic}:{name}"):
+            try:
+                result = coro_func(data)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error callback async {topic}: {e}")
+            finally:
+                loop_profiler.record_subscriber(topic, name, (time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def _timed_sync(callback: Callable, topic: str) -> Callable:
+        name = subscriber_name(callback)
+
+        def run(data):
+            start = time.perf_counter()
+            try:
+                return callback(data)
+            finally:
+                loop_profiler.record_subscriber(topic, name, (time.perf_counter() - start) * 1000)
+        return run
+
 
 bus = CortexBus()
@@ -9,11 +9,39 @@ from typing import Optional, Dict, Any, List, AsyncGenerator
 from dataclasses import dataclass, asdict
 from enum import Enum
 import asyncio
-import aiohttp
 from pathlib import Path
 
+from core.lazy_services import lazy_import, lazy_service
+
+aiohttp = lazy_import("aiohttp")
+
 logger = logging.getLogger("LLMManager")
 
+# Pool keep-alive compartido por todos los providers
+CONNECTOR_LIMIT = 64
+CONNECTOR_LIMIT_PER_HOST = 16
+KEEPALIVE_TIMEOUT = 75
+DNS_CACHE_TTL = 300
+
+ROUTING_MODES = ("single", "failover", "hedge", "race")
+
+DEFAULT_CACHE_SETTINGS = {
+    "enabled": True,
+    "semantic": False,      # nivel casi-duplicado: opt-in
+    "similarity": 0.92,
+    "ttl_hours": 168,
+    "max_mb": 32,
+}
+
+
+class LLMProviderError(Exception):
+    """Fallo de un provider (HTTP != 200, red, timeout). El mensaje es el que ve el usuario."""
+
+    def __init__(self, message: str, provider: str = "", status: Optional[int] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.status = status
+
 class ProviderType(Enum):
     OPENAI = "openai"
     GEMINI = "gemini"
@@ -152,7 +180,34 @@ class LLMManager:
         self.active_provider: Optional[ProviderType] = None
         self._session: Optional[aiohttp.ClientSession] = None
         
+        # Router multi-provider (modo "single" = comportamiento clásico)
+        self.routing_mode: str = "single"
+        self.routing_providers: List[str] = []
+        self.hedge_delay_ms: int = 1500
+        
+        # Caché de completions
+        self.cache_settings: Dict[str, Any] = dict(DEFAULT_CACHE_SETTINGS)
+        
+        # Ollama: slots paralelos (0 = OLLAMA_NUM_PARALLEL) y keep_alive del modelo
+        self.ollama_settings: Dict[str, Any] = {"parallel": 0, "keep_alive": "30m"}
+        
         self._load_config()
+        
+        from core.llm_router import LLMRouter
+        from core.llm_cache import CompletionCache
+        from core.ollama_scheduler import OllamaScheduler
+        self.router = LLMRouter(self, hedge_delay_ms=self.hedge_delay_ms)
+        self.ollama_scheduler = OllamaScheduler(
+            max_parallel=int(self.ollama_settings.get("parallel") or 0) or None,
+            keep_alive=str(self.ollama_settings.get("keep_alive") or "30m"),
+        )
+        self.cache = CompletionCache(
+            self.config_path.parent / "llm_cache.json",
+            max_bytes=int(self.cache_settings["max_mb"] * 1024 * 1024),
+            ttl_seconds=float(self.cache_settings["ttl_hours"]) * 3600,
+            semantic=bool(self.cache_settings["semantic"]),
+            similarity_threshold=float(self.cache_settings["similarity"]),
+        )
     
     def _load_config(self):
         """Cargar configuración desde archivo"""
@@ -165,7 +220,7 @@ class LLMManager:
                 for key, val in data.get("providers", {}).items():
                     try:
                         provider_type = ProviderType(key)
-                        self.providers[provider_type] = ProviderConfig(**val)
+                        self.providers[provider_type] = ProviderConfig(**{**val, "provider": provider_type})
                     except (ValueError, TypeError) as e:
                         logger.warning(f"Error cargando provider {key}: {e}")
                 
@@ -173,6 +228,18 @@ class LLMManager:
                 active = data.get("active_provider")
                 if active:
                     self.active_provider = ProviderType(active)
+                
+                routing = data.get("routing") or {}
+                if routing.get("mode") in ROUTING_MODES:
+                    self.routing_mode = routing["mode"]
+                self.routing_providers = list(routing.get("providers") or [])
+                self.hedge_delay_ms = int(routing.get("hedge_delay_ms") or self.hedge_delay_ms)
+                
+                for key, val in (data.get("cache") or {}).items():
+                    if key in DEFAULT_CACHE_SETTINGS:
+                        self.cache_settings[key] = val
+                
+                self.ollama_settings.update(data.get("ollama") or {})
                     
             except Exception as e:
                 logger.error(f"Error cargando config LLM: {e}")
@@ -204,20 +271,37 @@ class LLMManager:
         try:
             data = {
                 "providers": {
-                    k.value: asdict(v) for k, v in self.providers.items()
+                    k.value: {**asdict(v), "provider": k.value} for k, v in self.providers.items()
                 },
                 "active_provider": self.active_provider.value if self.active_provider else None,
+                "routing": {
+                    "mode": self.routing_mode,
+                    "providers": self.routing_providers,
+                    "hedge_delay_ms": self.hedge_delay_ms,
+                },
+                "cache": self.cache_settings,
+                "ollama": self.ollama_settings,
             }
             with open(self.config_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
         except Exception as e:
             logger.error(f"Error guardando config LLM: {e}")
     
-    async def _get_session(self) -> aiohttp.ClientSession:
+    async def _get_session(self) -> "aiohttp.ClientSession":
         """Obtener o crear sesión HTTP"""
         if self._session is None or self._session.closed:
+            # Conexiones keep-alive reutilizadas entre peticiones (TLS incluido),
+            # con tope por host para que un provider lento no acapare el pool
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTOR_LIMIT,
+                limit_per_host=CONNECTOR_LIMIT_PER_HOST,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                enable_cleanup_closed=True,
+            )
             self._session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=120),
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=120, sock_connect=10),
                 headers={"User-Agent": "MiIA-Product-20/1.0"}
             )
         return self._session
@@ -257,6 +341,55 @@ class LLMManager:
         self._save_config()
         return True
     
+    def set_routing(
+        self,
+        mode: str,
+        providers: Optional[List[str]] = None,
+        hedge_delay_ms: Optional[int] = None,
+    ) -> bool:
+        """Configurar el router: single | failover | hedge | race"""
+        if mode not in ROUTING_MODES:
+            return False
+        self.routing_mode = mode
+        if providers is not None:
+            self.routing_providers = [p for p in providers if p in {t.value for t in ProviderType}]
+        if hedge_delay_ms is not None:
+            self.hedge_delay_ms = max(0, int(hedge_delay_ms))
+            self.router.hedge_delay_ms = self.hedge_delay_ms
+        self._save_config()
+        return True
+    
+    def set_cache_settings(self, **settings) -> Dict[str, Any]:
+        """Actualizar la caché de completions (enabled, semantic, similarity, ttl_hours, max_mb)"""
+        for key, val in settings.items():
+            if key not in DEFAULT_CACHE_SETTINGS or val is None:
+                continue
+            default = DEFAULT_CACHE_SETTINGS[key]
+            if isinstance(default, bool) and not isinstance(val, bool):
+                val = str(val).strip().lower() in ("1", "true", "yes", "on")
+            self.cache_settings[key] = type(default)(val)
+        self.cache.semantic = bool(self.cache_settings["semantic"])
+        self.cache.similarity_threshold = float(self.cache_settings["similarity"])
+        self.cache.ttl_seconds = float(self.cache_settings["ttl_hours"]) * 3600
+        self.cache.max_bytes = int(self.cache_settings["max_mb"] * 1024 * 1024)
+        self._save_config()
+        return dict(self.cache_settings)
+    
+    def routable_providers(self) -> List[ProviderType]:
+        """Providers utilizables por el router (local, o remoto con API key)"""
+        implemented = {ProviderType.OPENAI, ProviderType.GEMINI, ProviderType.GROQ}
+        allowed = set(self.routing_providers)
+        result = []
+        for ptype, config in self.providers.items():
+            if allowed and ptype.value not in allowed:
+                continue
+            if config.is_local:
+                if ptype == ProviderType.OLLAMA or config.enabled:
+                    result.append(ptype)
+            elif ptype in implemented and config.api_key:
+                result.append(ptype)
+        return result
+    
     def get_active_config(self) -> Optional[ProviderConfig]:
         """Obtener configuración del provider activo"""
         if self.active_provider:
@@ -328,30 +461,103 @@ class LLMManager:
         system: str = "",
         max_tokens: int = 2000,
         temperature: float = 0.7,
-        stream: bool = False
+        stream: bool = False,
+        use_cache: Optional[bool] = None,
+        raise_errors: bool = False,
     ) -> AsyncGenerator[str, None]:
-        """Generar texto con el provider activo"""
+        """
+        Generar texto con el provider activo (o con el router si está activado).
+        Por defecto un fallo del provider se emite como texto; con
+        raise_errors=True se lanza LLMProviderError.
+        use_cache=None sólo cachea llamadas deterministas (temperature 0): una
+        respuesta muestreada (chat) no debe repetirse idéntica durante el TTL.
+        True/False lo fuerzan desde quien llama.
+        """
         
-        if not self.active_provider:
-            yield "Error: No hay provider LLM configurado. Configura uno en la configuración."
+        if use_cache is None:
+            use_cache = temperature == 0
+        cache_on = use_cache and self.cache_settings.get("enabled", True)
+        if cache_on:
+            provider, model = self._cache_identity()
+            hit = self.cache.get(provider, model, system, prompt, temperature, max_tokens)
+            if hit is not None:
+                self._report_cache(provider, model, prompt, hit.response, hit.tier)
+                yield hit.response
+                return
+        
+        parts: List[str] = []
+        try:
+            async for chunk in self._generate_live(prompt, system, max_tokens, temperature, stream):
+                parts.append(chunk)
+                yield chunk
+        except LLMProviderError as e:
+            if raise_errors:
+                raise
+            yield str(e)
             return
         
-        config = self.providers[self.active_provider]
+        # Sólo respuestas completas y sin error llegan a la caché
+        if cache_on and parts:
+            response = "".join(parts)
+            self.cache.put(provider, model, system, prompt, temperature, max_tokens, response)
+            self._report_cache(provider, model, prompt, response, "miss")
+    
+    async def _generate_live(
+        self, prompt: str, system: str, max_tokens: int, temperature: float, stream: bool
+    ) -> AsyncGenerator[str, None]:
+        """Generar contra el provider (o el router), sin caché. Lanza LLMProviderError."""
+        if self.routing_mode != "single":
+            async for chunk in self.router.generate(prompt, system, max_tokens, temperature, stream, raise_errors=True):
+                yield chunk
+            return
+        
+        if not self.active_provider:
+            raise LLMProviderError("Error: No hay provider LLM configurado. Configura uno en la configuración.")
+        
+        async for chunk in self._stream_provider(self.active_provider, prompt, system, max_tokens, temperature, stream):
+            yield chunk
+    
+    def _cache_identity(self) -> tuple:
+        """(provider, model) con que se indexa la caché"""
+        if self.routing_mode != "single":
+            # El router elige provider por petición: se comparte entre todos los enrutados
+            return f"router:{','.join(sorted(p.value for p in self.routable_providers()))}", ""
+        config = self.get_active_config()
+        if config is None:
+            return "none", ""
+        return config.provider.value, config.model
+    
+    def _report_cache(self, provider: str, model: str, prompt: str, response: str, tier: str) -> None:
+        """Pasar aciertos/fallos de caché a la contabilidad del gateway"""
+        try:
+            from core.SecureLLMGateway import secure_gateway
+            from core.prompt_builder import estimate_tokens
+            secure_gateway.record_cache_event(
+                provider, model, tier, estimate_tokens(prompt), estimate_tokens(response)
+            )
+        except Exception as e:
+            logger.debug(f"No se pudo registrar el evento de caché: {e}")
+    
+    def _stream_provider(
+        self, provider: ProviderType, prompt: str, system: str,
+        max_tokens: int, temperature: float, stream: bool
+    ) -> AsyncGenerator[str, None]:
+        """Generador del provider indicado. Lanza LLMProviderError si falla."""
+        config = self.providers[provider]
         
         if config.is_local:
-            async for chunk in self._generate_ollama(config, prompt, system, max_tokens, temperature, stream):
-                yield chunk
-        elif self.active_provider == ProviderType.OPENAI:
-            async for chunk in self._generate_openai(config, prompt, system, max_tokens, temperature, stream):
-                yield chunk
-        elif self.active_provider == ProviderType.GEMINI:
-            async for chunk in self._generate_gemini(config, prompt, system, max_tokens, temperature, stream):
-                yield chunk
-        elif self.active_provider == ProviderType.GROQ:
-            async for chunk in self._generate_openai_compatible(config, prompt, system, max_tokens, temperature, stream):
-                yield chunk
-        else:
-            yield f"Provider {config.provider.name} no implementado aún"
+            return self._generate_ollama(config, prompt, system, max_tokens, temperature, stream)
+        elif provider == ProviderType.OPENAI:
+            return self._generate_openai(config, prompt, system, max_tokens, temperature, stream)
+        elif provider == ProviderType.GEMINI:
+            return self._generate_gemini(config, prompt, system, max_tokens, temperature, stream)
+        elif provider == ProviderType.GROQ:
+            return self._generate_openai_compatible(config, prompt, system, max_tokens, temperature, stream)
+        return self._not_implemented(config)
+    
+    async def _not_implemented(self, config: ProviderConfig) -> AsyncGenerator[str, None]:
+        raise LLMProviderError(f"Provider {config.provider.name} no implementado aún", config.provider.value)
+        yield  # convierte la función en generador asíncrono
     
     async def _generate_openai(
         self, config: ProviderConfig, prompt: str, system: str,
@@ -386,8 +592,7 @@ class LLMManager:
             ) as resp:
                 if resp.status != 200:
                     error = await resp.text()
-                    yield f"Error OpenAI: {resp.status} - {error}"
-                    return
+                    raise LLMProviderError(f"Error OpenAI: {resp.status} - {error}", config.provider.value, resp.status)
                 
                 if stream:
                     async for line in resp.content:
@@ -408,8 +613,10 @@ class LLMManager:
                     content = data.get('choices', [{}])[0].get('message', {}).get('content', '')
                     yield content
                     
+        except LLMProviderError:
+            raise
         except Exception as e:
-            yield f"Error: {str(e)}"
+            raise LLMProviderError(f"Error: {str(e)}", config.provider.value) from e
     
     async def _generate_openai_compatible(
         self, config: ProviderConfig, prompt: str, system: str,
@@ -446,8 +653,7 @@ class LLMManager:
             async with session.post(url, json=payload) as resp:
                 if resp.status != 200:
                     error = await resp.text()
-                    yield f"Error Gemini: {resp.status} - {error}"
-                    return
+                    raise LLMProviderError(f"Error Gemini: {resp.status} - {error}", config.provider.value, resp.status)
                 
                 data = await resp.json()
                 candidates = data.get('candidates', [])
@@ -455,16 +661,18 @@ class LLMManager:
                     content = candidates[0].get('content', {}).get('parts', [{}])[0].get('text', '')
                     yield content
                 else:
-                    yield "Error: No se recibió respuesta de Gemini"
+                    raise LLMProviderError("Error: No se recibió respuesta de Gemini", config.provider.value)
                     
+        except LLMProviderError:
+            raise
         except Exception as e:
-            yield f"Error: {str(e)}"
+            raise LLMProviderError(f"Error: {str(e)}", config.provider.value) from e
     
     async def _generate_ollama(
         self, config: ProviderConfig, prompt: str, system: str,
         max_tokens: int, temperature: float, stream: bool
     ) -> AsyncGenerator[str, None]:
-        """Generar con Ollama local"""
+        """Generar con Ollama local (pasa por el planificador de slots)"""
         try:
             session = await self._get_session()
             
@@ -476,45 +684,66 @@ class LLMManager:
                 "options": {
                     "temperature": temperature,
                     "num_predict": max_tokens,
-                }
+                },
+                **self.ollama_scheduler.payload_options(),
             }
             
-            async with session.post(
-                f"{config.base_url}/api/generate",
-                json=payload
-            ) as resp:
-                if resp.status != 200:
-                    error = await resp.text()
-                    yield f"Error Ollama: {resp.status} - {error}"
-                    return
-                
-                if stream:
-                    async for line in resp.content:
-                        try:
-                            data = json.loads(line.decode('utf-8'))
+            async with self.ollama_scheduler.slot(config.model):
+                async with session.post(
+                    f"{config.base_url}/api/generate",
+                    json=payload
+                ) as resp:
+                    if resp.status != 200:
+                        error = await resp.text()
+                        raise LLMProviderError(f"Error Ollama: {resp.status} - {error}", config.provider.value, resp.status)
+                    
+                    if stream:
+                        async for line in resp.content:
+                            try:
+                                data = json.loads(line)
+                            except ValueError:
+                                continue
                             if not data.get('done'):
                                 yield data.get('response', '')
-                        except:
-                            pass
-                else:
-                    # Ollama siempre stream, acumulamos
-                    full_response = ""
-                    async for line in resp.content:
-                        try:
-                            data = json.loads(line.decode('utf-8'))
-                            full_response += data.get('response', '')
-                        except:
-                            pass
-                    yield full_response
+                    else:
+                        # Con o sin stream en el servidor, se acumula en lista y se une una vez
+                        parts = []
+                        async for line in resp.content:
+                            try:
+                                parts.append(json.loads(line).get('response', ''))
+                            except ValueError:
+                                continue
+                        yield "".join(parts)
                     
+        except LLMProviderError:
+            raise
         except Exception as e:
-            yield f"Error Ollama: {str(e)}. ¿Está Ollama corriendo?"
+            raise LLMProviderError(f"Error Ollama: {str(e)}. ¿Está Ollama corriendo?", config.provider.value) from e
+    
+    async def preload_local_model(self, provider: Optional[ProviderType] = None) -> bool:
+        """Cargar en memoria el modelo local (activo por defecto) antes del primer uso"""
+        ptype = provider or self.active_provider
+        config = self.providers.get(ptype) if ptype else None
+        if config is None or not config.is_local:
+            return False
+        session = await self._get_session()
+        return await self.ollama_scheduler.preload(session, config.base_url, config.model)
+    
+    async def unload_local_model(self, provider: Optional[ProviderType] = None) -> bool:
+        """Liberar la memoria del modelo local"""
+        ptype = provider or self.active_provider
+        config = self.providers.get(ptype) if ptype else None
+        if config is None or not config.is_local:
+            return False
+        session = await self._get_session()
+        return await self.ollama_scheduler.unload(session, config.base_url, config.model)
     
     async def close(self):
-        """Cerrar sesiones"""
+        """Cerrar sesiones y volcar la caché a disco"""
+        await self.cache.persist_async()
         if self._session and not self._session.closed:
             await self._session.close()
 
 
 # Instancia global
-llm_manager = LLMManager()
+llm_manager = lazy_service("llm_manager", LLMManager)
@@ -4,7 +4,8 @@ Sistema de actualización automática para MiIA-Product-20
 - Verifica nuevas versiones
 - Descarga e instala actualizaciones
 - Preserva configuración del usuario
-- Soporta rollback si falla
+- Soporta rollback si falla (snapshots incrementales por contenido:
+  core/snapshot_store.py)
 """
 import os
 import sys
@@ -15,14 +16,23 @@ import zipfile
 import logging
 import subprocess
 from pathlib import Path
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import aiohttp
 import asyncio
 
+from core.snapshot_store import SnapshotStore
+
 logger = logging.getLogger("MiIAUpdater")
 
+# Raíces del snapshot que el rollback nunca restaura ni limpia (se preservan):
+# ~/.config/miia-product-20 guarda credenciales cifradas, su clave, el token del
+# bot y preferencias que el usuario cambia después del snapshot. Restaurarlas
+# devolvería tokens revocados o borraría credenciales nuevas (y descifrar con una
+# clave vieja dejaría el almacén ilegible). Se guardan en el snapshot sólo como copia.
+PRESERVED_ROOTS = ("user_config",)
+
 # Configuración de actualización
 UPDATE_CONFIG = {
     "repository": "https://github.com/miia-product/miia-product-20",
@@ -31,6 +41,8 @@ UPDATE_CONFIG = {
     "auto_check": True,
     "auto_download": False,  # Solo descarga, no instala automáticamente
     "backup_before_update": True,
+    "snapshot_retention": 5,  # Snapshots que se conservan
+    "verify_snapshots": True,  # Re-hashear los objetos al verificar (no sólo tamaño)
 }
 
 @dataclass
@@ -82,6 +94,7 @@ class MiIAUpdater:
         # Crear directorios necesarios
         self.UPDATE_DIR.mkdir(exist_ok=True)
         self.BACKUP_DIR.mkdir(exist_ok=True)
+        self.snapshots = SnapshotStore(self.BACKUP_DIR / "snapshots")
     
     def _get_current_version(self) -> str:
         """Obtener versión actual instalada"""
@@ -242,40 +255,38 @@ class MiIAUpdater:
             logger.error(f"Error descargando: {e}")
             return {"success": False, "error": str(e)}
     
+    def _snapshot_roots(self) -> Dict[str, Path]:
+        """Qué entra en un snapshot: código, skills, config, config de usuario y versión"""
+        roots = {name: Path(name) for name in ("core", "skills", "config")}
+        roots["user_config"] = Path.home() / ".config" / "miia-product-20"
+        roots["version.json"] = self.VERSION_FILE
+        return {label: path for label, path in roots.items() if path.exists()}
+    
     def backup_current_installation(self) -> Dict[str, Any]:
         """
-        Crear backup de la instalación actual antes de actualizar
+        Crear snapshot de la instalación actual antes de actualizar
+        Sólo se copian los archivos que cambiaron desde el snapshot anterior;
+        el resto se enlaza (hardlink) al contenido ya guardado
         """
         try:
             backup_name = f"backup_{self.current_version}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            backup_path = self.BACKUP_DIR / backup_name
             
-            logger.info(f"Creando backup en {backup_path}")
+            logger.info(f"Creando snapshot {backup_name}")
+            info = self.snapshots.create(backup_name, self._snapshot_roots(),
+                                         meta={"version": self.current_version})
             
-            # Directorios a respaldar
-            dirs_to_backup = [
-                "core",
-                "skills",
-                "config",
-            ]
+            check = self.snapshots.verify(backup_name, deep=UPDATE_CONFIG["verify_snapshots"])
+            if not check["ok"]:
+                return {"success": False, "error": f"Snapshot inválido: {check}"}
             
-            backup_path.mkdir(parents=True, exist_ok=True)
-            
-            for dir_name in dirs_to_backup:
-                src = Path(dir_name)
-                if src.exists():
-                    dst = backup_path / dir_name
-                    shutil.copytree(src, dst, ignore=shutil.ignore_patterns('*.pyc', '__pycache__'))
-            
-            # Respaldar archivos de configuración del usuario
-            user_config = Path.home() / ".config" / "miia-product-20"
-            if user_config.exists():
-                dst = backup_path / "user_config"
-                shutil.copytree(user_config, dst)
+            self.snapshots.prune(UPDATE_CONFIG["snapshot_retention"])
             
             return {
                 "success": True,
-                "backup_path": str(backup_path),
+                "backup_path": info["path"],
+                "files": info["files"],
+                "files_copied": info["stored"],
+                "files_linked": info["reused"],
                 "message": "Backup creado correctamente"
             }
             
@@ -283,6 +294,10 @@ class MiIAUpdater:
             logger.error(f"Error creando backup: {e}")
             return {"success": False, "error": str(e)}
     
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Snapshots disponibles para rollback (más reciente primero)"""
+        return self.snapshots.list()
+    
     async def install_update(self) -> Dict[str, Any]:
         """
         Instalar la actualización descargada
@@ -294,7 +309,7 @@ class MiIAUpdater:
         
         try:
             # 1. Crear backup
-            backup_result = self.backup_current_installation()
+            backup_result = await asyncio.to_thread(self.backup_current_installation)
             if not backup_result["success"]:
                 return backup_result
             
@@ -340,7 +355,22 @@ class MiIAUpdater:
             
             logger.info(f"Revirtiendo desde {backup}")
             
-            # Restaurar archivos desde backup
+            if self.snapshots.read_manifest(backup) is not None:
+                # Snapshot: sólo se copian los archivos que difieren. La configuración
+                # de usuario queda en el snapshot pero el rollback no la toca
+                stats = self.snapshots.restore(backup, exclude=PRESERVED_ROOTS)
+                self.current_version = self._get_current_version()
+                self.update_status.current_version = self.current_version
+                return {
+                    "success": True,
+                    "message": "Rollback completado correctamente",
+                    "restored_version": self.current_version,
+                    "files_restored": stats["restored"],
+                    "files_removed": stats["removed"],
+                    "files_unchanged": stats["unchanged"]
+                }
+            
+            # Backups antiguos (copia completa)
             for item in backup.iterdir():
                 if item.is_dir():
                     dst = Path(item.name)
@@ -26,6 +26,7 @@ from enum import Enum
 
 from core.logging_config import get_logger
 from core.config import get_settings
+from core.lazy_services import lazy_service
 
 logger = get_logger("MININA.MemoryCore")
 
@@ -264,13 +265,30 @@ class MININAMemoryCore:
         session = self._stm_cache[session_id]
         return session.interactions[-limit:]
     
-    def get_recent_context_str(self, session_id: str, limit: int = 5) -> str:
-        """Obtiene contexto reciente formateado como string."""
+    def get_recent_context_str(self, session_id: str, limit: int = 5,
+                               max_tokens: Optional[int] = None) -> str:
+        """
+        Obtiene contexto reciente formateado como string.
+        
+        Con max_tokens se conservan los turnos más recientes que quepan en
+        ese presupuesto (estimación local de tokens).
+        """
         interactions = self.get_stm_context(session_id, limit)
         lines = []
         for inter in interactions:
             role = "Usuario" if inter['role'] == 'user' else "MININA"
             lines.append(f"{role}: {inter['content']}")
+        if max_tokens is not None:
+            from core.prompt_builder import estimate_tokens
+            kept: List[str] = []
+            used = 0
+            for line in reversed(lines):
+                cost = estimate_tokens(line) + 1
+                if used + cost > max_tokens:
+                    break
+                kept.append(line)
+                used += cost
+            lines = list(reversed(kept))
         return "\n".join(lines)
     
     def clear_session(self, session_id: str):
@@ -812,4 +830,4 @@ class MININAMemoryCore:
 
 
 # Instancia global
-memory_core = MININAMemoryCore()
+memory_core = lazy_service("memory_core", MININAMemoryCore)
@@ -1,127 +1,268 @@
 """
 Secure Credential Storage for API Keys
 Encriptación simple para almacenamiento local de credenciales
+
+Un único store para credenciales de servicios y API keys de LLM
+(core.llm_extension lo reexporta). Las lecturas van contra una vista
+descifrada en memoria: `has_key`/`get_api_key` en el camino de /api/chat
+no tocan disco ni cripto. Las escrituras marcan el store como sucio y un
+temporizador las agrupa en una sola reescritura cifrada (archivo temporal +
+os.replace) unos instantes después; `flush()` fuerza la escritura y se
+ejecuta también al salir del proceso.
+
+La clave derivada del machine-id (PBKDF2, 480k iteraciones) y el cifrador
+de cada archivo de clave se cachean por proceso.
 """
+import atexit
 import os
 import json
 import base64
 import hashlib
+import importlib.util
+import logging
+import threading
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from typing import Any, Dict, List, Optional
+
+from core.lazy_services import lazy_service
+
+logger = logging.getLogger("SecureCredentials")
+
+# Comprobar si hay cryptography sin importarlo (se importa al inicializar el store)
+CRYPTO_AVAILABLE = importlib.util.find_spec("cryptography") is not None
+
+# Segundos que se esperan para agrupar escrituras antes de reescribir el archivo
+FLUSH_DELAY = 0.5
+KDF_ITERATIONS = 480000
+
+_ciphers: Dict[str, Any] = {}
+_ciphers_lock = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def derive_key(machine_id: str) -> bytes:
+    """Clave Fernet derivada del machine-id (cara: se calcula una vez por proceso)"""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=machine_id.encode(),
+        iterations=KDF_ITERATIONS,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(b"miia-secret-v1"))
+
 
 class SecureCredentialStore:
     """Almacenamiento seguro de credenciales con encriptación"""
-    
-    def __init__(self, app_name: str = "miia-product-20"):
+
+    def __init__(self, app_name: str = "miia-product-20", config_dir: Optional[Path] = None,
+                 flush_delay: float = FLUSH_DELAY):
         self.app_name = app_name
-        self.config_dir = Path.home() / ".config" / app_name
+        self.config_dir = Path(config_dir) if config_dir else Path.home() / ".config" / app_name
         self.config_dir.mkdir(parents=True, exist_ok=True)
-        
+
         self.key_file = self.config_dir / ".key"
         self.creds_file = self.config_dir / "credentials.enc"
-        
-        self._key = None
+        self.flush_delay = flush_delay
+
         self._fernet = None
-        self._credentials = {}
-        
-        self._init_encryption()
+        self._credentials: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._writes = 0
+        self._flushes = 0
+
+        if CRYPTO_AVAILABLE:
+            self._init_encryption()
+        else:
+            logger.warning("cryptography no disponible, usando almacenamiento sin encriptar")
         self._load_credentials()
-    
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------------
+    # Cifrado y persistencia
+    # ------------------------------------------------------------------
+
     def _init_encryption(self):
-        """Inicializar o cargar clave de encriptación"""
-        if self.key_file.exists():
-            # Cargar clave existente
-            with open(self.key_file, 'rb') as f:
-                self._key = f.read()
-        else:
-            # Generar nueva clave basada en machine-id (única por PC)
-            machine_id = self._get_machine_id()
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=machine_id.encode(),
-                iterations=480000,
-            )
-            key = base64.urlsafe_b64encode(kdf.derive(b"miia-secret-v1"))
-            self._key = key
-            
-            # Guardar clave (esto es seguro porque está vinculada al machine-id)
-            with open(self.key_file, 'wb') as f:
-                f.write(key)
-        
-        self._fernet = Fernet(self._key)
-    
+        """Inicializar o cargar clave de encriptación (cacheado por archivo de clave)"""
+        cache_key = str(self.key_file.resolve())
+        with _ciphers_lock:
+            fernet = _ciphers.get(cache_key)
+            if fernet is None:
+                # cryptography es pesado: sólo se importa al construir el store
+                from cryptography.fernet import Fernet
+
+                if self.key_file.exists():
+                    # Cargar clave existente
+                    with open(self.key_file, 'rb') as f:
+                        key = f.read()
+                else:
+                    # Generar nueva clave basada en machine-id (única por PC)
+                    key = derive_key(self._get_machine_id())
+                    # Guardar clave (esto es seguro porque está vinculada al machine-id)
+                    with open(self.key_file, 'wb') as f:
+                        f.write(key)
+                fernet = _ciphers[cache_key] = Fernet(key)
+        self._fernet = fernet
+
     def _get_machine_id(self) -> str:
         """Obtener identificador único de la máquina"""
         # En Windows, usar MachineGuid del registro
         try:
             import winreg
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE,
                 r"SOFTWARE\Microsoft\Cryptography") as key:
                 return winreg.QueryValueEx(key, "MachineGuid")[0]
         except:
             # Fallback: usar nombre de equipo + usuario
             return f"{os.environ.get('COMPUTERNAME', 'unknown')}-{os.environ.get('USERNAME', 'user')}"
-    
+
     def _load_credentials(self):
-        """Cargar credenciales encriptadas"""
-        if self.creds_file.exists():
-            try:
-                with open(self.creds_file, 'rb') as f:
-                    encrypted_data = f.read()
-                
-                decrypted = self._fernet.decrypt(encrypted_data)
-                self._credentials = json.loads(decrypted.decode('utf-8'))
-            except Exception as e:
-                print(f"Advertencia: No se pudieron cargar credenciales: {e}")
-                self._credentials = {}
-    
-    def _save_credentials(self):
-        """Guardar credenciales encriptadas"""
+        """Cargar credenciales a la vista en memoria"""
+        if not self.creds_file.exists():
+            return
         try:
-            data = json.dumps(self._credentials).encode('utf-8')
-            encrypted = self._fernet.encrypt(data)
-            
-            with open(self.creds_file, 'wb') as f:
-                f.write(encrypted)
-            return True
+            with open(self.creds_file, 'rb') as f:
+                raw = f.read()
+            if self._fernet:
+                raw = self._fernet.decrypt(raw)
+            self._credentials = json.loads(raw.decode('utf-8'))
         except Exception as e:
-            print(f"Error guardando credenciales: {e}")
-            return False
-    
+            logger.warning(f"No se pudieron cargar credenciales: {e}")
+            self._credentials = {}
+            # No pisar un archivo ilegible (otra clave, sin cryptography...) en la próxima escritura
+            backup = self.creds_file.with_suffix(".enc.bak")
+            try:
+                os.replace(self.creds_file, backup)
+                logger.warning(f"Archivo de credenciales ilegible movido a {backup}")
+            except OSError:
+                pass
+
+    def _mark_dirty(self) -> None:
+        """Registrar un cambio y programar la escritura agrupada (con el lock tomado)"""
+        self._dirty = True
+        self._writes += 1
+        if self.flush_delay <= 0:
+            self.flush()
+            return
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """Escribir ya los cambios pendientes (cifrado + reemplazo atómico)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return True
+            data = json.dumps(self._credentials).encode('utf-8')
+            self._dirty = False
+            try:
+                if self._fernet:
+                    data = self._fernet.encrypt(data)
+                tmp = self.creds_file.with_suffix(".enc.tmp")
+                fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.creds_file)
+                self._flushes += 1
+                return True
+            except Exception as e:
+                logger.error(f"Error guardando credenciales: {e}")
+                self._dirty = True
+                return False
+
+    # ------------------------------------------------------------------
+    # Credenciales por servicio
+    # ------------------------------------------------------------------
+
     def set_credential(self, service: str, key: str, value: str) -> bool:
         """Guardar credencial"""
-        if service not in self._credentials:
-            self._credentials[service] = {}
-        
-        self._credentials[service][key] = value
-        return self._save_credentials()
-    
+        with self._lock:
+            entry = dict(self._credentials.get(service, {}))
+            entry[key] = value
+            self._credentials[service] = entry
+            self._mark_dirty()
+        return True
+
     def get_credential(self, service: str, key: str) -> Optional[str]:
         """Obtener credencial"""
         return self._credentials.get(service, {}).get(key)
-    
+
     def delete_credential(self, service: str, key: str) -> bool:
         """Eliminar credencial"""
-        if service in self._credentials and key in self._credentials[service]:
-            del self._credentials[service][key]
-            return self._save_credentials()
-        return False
-    
+        with self._lock:
+            entry = self._credentials.get(service)
+            if not entry or key not in entry:
+                return False
+            entry = dict(entry)
+            del entry[key]
+            self._credentials[service] = entry
+            self._mark_dirty()
+        return True
+
     def delete_service(self, service: str) -> bool:
         """Eliminar todas las credenciales de un servicio"""
-        if service in self._credentials:
-            del self._credentials[service]
-            return self._save_credentials()
-        return False
-    
+        with self._lock:
+            if self._credentials.pop(service, None) is None:
+                return False
+            self._mark_dirty()
+        return True
+
     def list_services(self) -> list:
         """Listar servicios con credenciales"""
         return list(self._credentials.keys())
 
+    # ------------------------------------------------------------------
+    # API keys de providers LLM
+    # ------------------------------------------------------------------
+
+    def set_api_key(self, provider: str, api_key: str) -> bool:
+        """Guardar API key"""
+        with self._lock:
+            entry = dict(self._credentials.get(provider, {}))
+            entry['api_key'] = api_key
+            entry['updated_at'] = datetime.now().isoformat()
+            self._credentials[provider] = entry
+            self._mark_dirty()
+        return True
+
+    def get_api_key(self, provider: str) -> Optional[str]:
+        """Obtener API key"""
+        return self._credentials.get(provider, {}).get('api_key')
+
+    def delete_api_key(self, provider: str) -> bool:
+        """Eliminar API key"""
+        return self.delete_service(provider)
+
+    def has_key(self, provider: str) -> bool:
+        """Verificar si existe API key"""
+        return bool(self.get_api_key(provider))
+
+    def list_providers(self) -> List[str]:
+        """Listar providers con credenciales"""
+        return [k for k, v in self._credentials.items() if v.get('api_key')]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "services": len(self._credentials),
+                "encrypted": self._fernet is not None,
+                "pending": self._dirty,
+                "writes": self._writes,
+                "flushes": self._flushes,
+            }
+
 
 # Instancia global
-credential_store = SecureCredentialStore()
+credential_store = lazy_service("credential_store", SecureCredentialStore)
@@ -16,6 +16,8 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 from enum import Enum
 
+from core.prompt_builder import estimate_tokens
+
 logger = logging.getLogger("SecureLLMGateway")
 
 class APIRiskLevel(Enum):
@@ -77,6 +79,16 @@ class SecureLLMGateway:
             'ollama-local': {'input': 0, 'output': 0, 'risk': APIRiskLevel.SAFE},
         }
         
+        # Contabilidad de la caché de completions (LLMManager)
+        self.cache_usage: Dict[str, Any] = {
+            'hits': 0,
+            'semantic_hits': 0,
+            'misses': 0,
+            'saved_tokens': 0,
+            'saved_usd': 0.0,
+            'by_provider': {},
+        }
+        
         self._load_config()
     
     def _load_config(self):
@@ -114,6 +126,7 @@ class SecureLLMGateway:
             'daily_budget_usd': config.get('daily_budget_usd', 1.0),
             'today_usage_usd': self._get_today_usage(user_id),
             'today_queries': self._get_today_queries(user_id),
+            'cache': self.get_cache_usage(),
             'risk_preferences': config.get('risk_preferences', {
                 'allow_safe': True,
                 'allow_low': False,
@@ -293,7 +306,7 @@ class SecureLLMGateway:
         
         # Aquí iría la llamada real a la API
         # Por ahora simulamos
-        tokens_input = len(query.split()) * 2  # Estimación simple
+        tokens_input = estimate_tokens(query)
         tokens_output = 100  # Estimación
         actual_cost = self._calculate_actual_cost(provider, tokens_input, tokens_output)
         
@@ -571,11 +584,43 @@ class SecureLLMGateway:
             'message': f"✅ Usarás {self._get_provider_info(selected_provider)['name']}. Procediendo..."
         }
     
+    def record_cache_event(self, provider: str, model: str, tier: str,
+                           tokens_in: int, tokens_out: int) -> None:
+        """
+        Registrar un acierto ("exact"/"semantic") o fallo ("miss") de la caché
+        de completions. En los aciertos se contabiliza el coste evitado.
+        """
+        usage = self.cache_usage
+        per = usage['by_provider'].setdefault(provider, {'hits': 0, 'misses': 0, 'saved_usd': 0.0})
+        if tier == 'miss':
+            usage['misses'] += 1
+            per['misses'] += 1
+            return
+        
+        saved = 0.0
+        if provider not in ('ollama', 'qwen_local', 'phi4_local'):
+            saved = self._calculate_actual_cost(provider, tokens_in, tokens_out)
+        usage['semantic_hits' if tier == 'semantic' else 'hits'] += 1
+        usage['saved_tokens'] += tokens_in + tokens_out
+        usage['saved_usd'] = round(usage['saved_usd'] + saved, 6)
+        per['hits'] += 1
+        per['saved_usd'] = round(per['saved_usd'] + saved, 6)
+    
+    def get_cache_usage(self) -> Dict[str, Any]:
+        """Aciertos de caché y coste ahorrado desde el arranque"""
+        usage = self.cache_usage
+        lookups = usage['hits'] + usage['semantic_hits'] + usage['misses']
+        return {
+            **usage,
+            'by_provider': {k: dict(v) for k, v in usage['by_provider'].items()},
+            'hit_rate': round((usage['hits'] + usage['semantic_hits']) / lookups, 3) if lookups else 0.0,
+        }
+    
     def _estimate_cost(self, provider: str, query: str) -> float:
         """Estimar costo de una consulta"""
         for key, data in self.pricing.items():
             if provider.lower() in key.lower():
-                tokens = len(query.split()) * 2  # Estimación
+                tokens = estimate_tokens(query)
                 return (tokens / 1000) * data['input']
         return 0.001  # Default
     
@@ -7,20 +7,33 @@ necesitan para operar. Las credenciales:
 - Se inyectan temporalmente en memoria durante la ejecución
 - Se limpian automáticamente después de cada uso
 - Están aisladas por skill y por sesión
+
+Las sesiones se reparten en shards con su propio lock, para que skills
+concurrentes no compitan por un lock global. La expiración es exacta: un
+heap ordenado por `expires_at` y un hilo que duerme hasta el siguiente
+vencimiento (las entradas de sesiones ya liberadas se descartan al salir
+del heap; como el TTL está acotado por `_max_ttl`, el heap también).
 """
 
 import os
 import time
+import heapq
 import secrets
 import hashlib
 import threading
-from typing import Dict, Optional, Any, List
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Any, List, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger("SkillCredentialVault")
 
+VAULT_SHARDS = 16
+ACCESS_LOG_SIZE = 1000
+# Sesiones desconocidas con intentos fallidos que se recuerdan por shard
+MAX_TRACKED_FAILURES = 1024
+
 
 @dataclass
 class CredentialSet:
@@ -34,7 +47,7 @@ class CredentialSet:
     auto_cleaned: bool = False
     
     def is_expired(self) -> bool:
-        return time.time() > self.expires_at
+        return time.time() >= self.expires_at
     
     def mask_value(self, key: str, value: str) -> str:
         """Enmascara un valor para logging seguro"""
@@ -43,6 +56,18 @@ class CredentialSet:
         return value[:2] + "****" + value[-2:]
 
 
+class _VaultShard:
+    """Sesiones, contadores y lock de una porción del vault"""
+
+    __slots__ = ("lock", "sessions", "access_count", "failed_attempts")
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.sessions: Dict[str, CredentialSet] = {}
+        self.access_count: Dict[str, int] = {}
+        self.failed_attempts: "OrderedDict[str, int]" = OrderedDict()
+
+
 class SkillCredentialVault:
     """
     Vault de credenciales temporales para skills
@@ -70,18 +95,23 @@ class SkillCredentialVault:
         if self._initialized:
             return
         
-        self._vault: Dict[str, CredentialSet] = {}
-        self._access_log: List[Dict] = []
-        self._failed_attempts: Dict[str, int] = {}  # Contador de intentos fallidos por session
+        self._shards = [_VaultShard() for _ in range(VAULT_SHARDS)]
+        self._access_log: Deque[Dict] = deque(maxlen=ACCESS_LOG_SIZE)
         self._max_failed_attempts = 3  # Máximo intentos fallidos antes de bloquear
-        self._access_count: Dict[str, int] = {}  # Contador de accesos exitosos
         self._max_access_count = 10  # Máximo accesos permitidos por sesión
-        self._cleanup_interval = 60  # segundos
         self._max_ttl = 600  # 10 minutos máximo
-        self._lock = threading.RLock()
-        
-        # Iniciar thread de limpieza automática
-        self._cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
+
+        # Contadores para get_stats sin recorrer las sesiones
+        self._stats_lock = threading.Lock()
+        self._counters = {"stored": 0, "accesses": 0, "failed": 0, "blocked": 0, "expired": 0, "released": 0}
+
+        # Heap de (expires_at, session_id) y condición para despertar al hilo de expiración
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._expiry_cond = threading.Condition(threading.Lock())
+
+        # Iniciar thread de expiración
+        self._cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True,
+                                                name="credential-vault-expiry")
         self._cleanup_thread.start()
         
         self._initialized = True
@@ -92,6 +122,13 @@ class SkillCredentialVault:
         timestamp = str(int(time.time() * 1000))
         random_part = secrets.token_hex(8)
         return f"{skill_id}_{timestamp}_{random_part}"
+
+    def _shard(self, session_id: str) -> _VaultShard:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._counters[name] += amount
     
     def store_credentials(
         self, 
@@ -110,29 +147,33 @@ class SkillCredentialVault:
         Returns:
             session_id: ID único de sesión para recuperar las credenciales
         """
-        with self._lock:
-            # Limitar TTL
-            ttl = min(ttl_seconds, self._max_ttl)
-            
-            session_id = self._generate_session_id(skill_id)
-            
-            cred_set = CredentialSet(
-                skill_id=skill_id,
-                session_id=session_id,
-                credentials=credentials.copy(),
-                created_at=time.time(),
-                expires_at=time.time() + ttl,
-                used=False,
-                auto_cleaned=False
-            )
-            
-            self._vault[session_id] = cred_set
-            
-            # Log seguro (sin valores reales)
-            safe_creds = {k: cred_set.mask_value(k, v) for k, v in credentials.items()}
-            logger.info(f"Credenciales almacenadas para skill '{skill_id}', session '{session_id[:20]}...', campos: {list(safe_creds.keys())}")
-            
-            return session_id
+        # Limitar TTL
+        ttl = min(ttl_seconds, self._max_ttl)
+
+        session_id = self._generate_session_id(skill_id)
+        now = time.time()
+
+        cred_set = CredentialSet(
+            skill_id=skill_id,
+            session_id=session_id,
+            credentials=credentials.copy(),
+            created_at=now,
+            expires_at=now + ttl,
+            used=False,
+            auto_cleaned=False
+        )
+
+        shard = self._shard(session_id)
+        with shard.lock:
+            shard.sessions[session_id] = cred_set
+        self._count("stored")
+        self._schedule_expiry(cred_set.expires_at, session_id)
+
+        # Log seguro (sin valores reales)
+        safe_creds = {k: cred_set.mask_value(k, v) for k, v in credentials.items()}
+        logger.info(f"Credenciales almacenadas para skill '{skill_id}', session '{session_id[:20]}...', campos: {list(safe_creds.keys())}")
+
+        return session_id
     
     def get_credentials(self, session_id: str, skill_id: str, user_id: str = "unknown") -> Optional[Dict[str, str]]:
         """
@@ -146,63 +187,77 @@ class SkillCredentialVault:
         Returns:
             Dict con credenciales o None si no existe/expiró/bloqueado
         """
-        with self._lock:
-            # Verificar intentos fallidos
-            failed_count = self._failed_attempts.get(session_id, 0)
-            if failed_count >= self._max_failed_attempts:
-                logger.error(f"Session {session_id[:20]}... BLOQUEADA por {failed_count} intentos fallidos")
-                self._notify_user(user_id, skill_id, "blocked", f"Bloqueado por {failed_count} intentos fallidos")
-                return None
-            
-            cred_set = self._vault.get(session_id)
-            
-            if not cred_set:
-                self._failed_attempts[session_id] = failed_count + 1
-                logger.warning(f"Intento de acceso a credenciales inexistentes: {session_id[:20]}... (intento {failed_count + 1}/{self._max_failed_attempts})")
-                self._notify_user(user_id, skill_id, "failed", f"Intento de acceso a credenciales inexistentes ({failed_count + 1}/{self._max_failed_attempts})")
-                return None
-            
-            if cred_set.skill_id != skill_id:
-                self._failed_attempts[session_id] = failed_count + 1
-                logger.error(f"Skill ID no coincide! Esperado: {cred_set.skill_id}, Recibido: {skill_id} (intento {failed_count + 1}/{self._max_failed_attempts})")
-                self._notify_user(user_id, skill_id, "failed", f"Skill ID no coincide ({failed_count + 1}/{self._max_failed_attempts})")
-                return None
-            
-            if cred_set.is_expired():
-                logger.warning(f"Credenciales expiradas para session {session_id[:20]}...")
-                self._secure_delete(session_id)
-                self._notify_user(user_id, skill_id, "expired", "Credenciales expiradas")
-                return None
-            
-            # Verificar límite de accesos
-            access_count = self._access_count.get(session_id, 0)
-            if access_count >= self._max_access_count:
-                logger.error(f"Session {session_id[:20]}... alcanzó límite de {self._max_access_count} accesos")
-                self._secure_delete(session_id)
-                self._notify_user(user_id, skill_id, "limit_reached", f"Límite de {self._max_access_count} accesos alcanzado")
-                return None
-            
-            # Marcar como usada y contar acceso
-            cred_set.used = True
-            self._access_count[session_id] = access_count + 1
-            
-            # Log de acceso
-            self._access_log.append({
-                "timestamp": time.time(),
-                "skill_id": skill_id,
-                "session_id": session_id[:20] + "...",
-                "user_id": user_id,
-                "action": "access",
-                "access_number": access_count + 1
-            })
-            
-            # Notificar al usuario del acceso
-            self._notify_user(user_id, skill_id, "access", f"Acceso #{access_count + 1} a credenciales")
-            
-            logger.info(f"Credenciales accedidas por skill '{skill_id}' (acceso {access_count + 1}/{self._max_access_count})")
-            
-            return cred_set.credentials.copy()
-    
+        shard = self._shard(session_id)
+        # Las notificaciones se publican fuera del lock del shard
+        with shard.lock:
+            result, event, message = self._check_access(shard, session_id, skill_id, user_id)
+        self._notify_user(user_id, skill_id, event, message)
+        return result
+
+    def _check_access(self, shard: _VaultShard, session_id: str, skill_id: str,
+                      user_id: str) -> Tuple[Optional[Dict[str, str]], str, str]:
+        """Validar y registrar un acceso con el lock del shard tomado"""
+        # Verificar intentos fallidos
+        failed_count = shard.failed_attempts.get(session_id, 0)
+        if failed_count >= self._max_failed_attempts:
+            logger.error(f"Session {session_id[:20]}... BLOQUEADA por {failed_count} intentos fallidos")
+            return None, "blocked", f"Bloqueado por {failed_count} intentos fallidos"
+
+        cred_set = shard.sessions.get(session_id)
+
+        if not cred_set:
+            self._record_failure(shard, session_id, failed_count)
+            logger.warning(f"Intento de acceso a credenciales inexistentes: {session_id[:20]}... (intento {failed_count + 1}/{self._max_failed_attempts})")
+            return None, "failed", f"Intento de acceso a credenciales inexistentes ({failed_count + 1}/{self._max_failed_attempts})"
+
+        if cred_set.skill_id != skill_id:
+            self._record_failure(shard, session_id, failed_count)
+            logger.error(f"Skill ID no coincide! Esperado: {cred_set.skill_id}, Recibido: {skill_id} (intento {failed_count + 1}/{self._max_failed_attempts})")
+            return None, "failed", f"Skill ID no coincide ({failed_count + 1}/{self._max_failed_attempts})"
+
+        if cred_set.is_expired():
+            logger.warning(f"Credenciales expiradas para session {session_id[:20]}...")
+            if self._secure_delete(shard, session_id):
+                self._count("expired")
+            return None, "expired", "Credenciales expiradas"
+
+        # Verificar límite de accesos
+        access_count = shard.access_count.get(session_id, 0)
+        if access_count >= self._max_access_count:
+            logger.error(f"Session {session_id[:20]}... alcanzó límite de {self._max_access_count} accesos")
+            self._secure_delete(shard, session_id)
+            return None, "limit_reached", f"Límite de {self._max_access_count} accesos alcanzado"
+
+        # Marcar como usada y contar acceso
+        cred_set.used = True
+        shard.access_count[session_id] = access_count + 1
+        self._count("accesses")
+
+        # Log de acceso (ring buffer: sólo los últimos ACCESS_LOG_SIZE)
+        self._access_log.append({
+            "timestamp": time.time(),
+            "skill_id": skill_id,
+            "session_id": session_id[:20] + "...",
+            "user_id": user_id,
+            "action": "access",
+            "access_number": access_count + 1
+        })
+
+        logger.info(f"Credenciales accedidas por skill '{skill_id}' (acceso {access_count + 1}/{self._max_access_count})")
+
+        return cred_set.credentials.copy(), "access", f"Acceso #{access_count + 1} a credenciales"
+
+    def _record_failure(self, shard: _VaultShard, session_id: str, failed_count: int) -> None:
+        shard.failed_attempts[session_id] = failed_count + 1
+        shard.failed_attempts.move_to_end(session_id)
+        if len(shard.failed_attempts) > MAX_TRACKED_FAILURES:
+            _, evicted = shard.failed_attempts.popitem(last=False)
+            if evicted >= self._max_failed_attempts:
+                self._count("blocked", -1)
+        self._count("failed")
+        if failed_count + 1 == self._max_failed_attempts:
+            self._count("blocked")
+
     def _notify_user(self, user_id: str, skill_id: str, event_type: str, message: str):
         """
         Notifica al usuario sobre eventos de credenciales vía CortexBus
@@ -233,16 +288,22 @@ class SkillCredentialVault:
         Returns:
             True si se limpiaron correctamente
         """
-        with self._lock:
-            return self._secure_delete(session_id)
-    
-    def _secure_delete(self, session_id: str) -> bool:
+        shard = self._shard(session_id)
+        with shard.lock:
+            released = self._secure_delete(shard, session_id)
+        if released:
+            self._count("released")
+        return released
+
+    def _secure_delete(self, shard: _VaultShard, session_id: str) -> bool:
         """
         Elimina credenciales de forma segura sobrescribiendo memoria
+        (con el lock del shard tomado)
         """
-        cred_set = self._vault.get(session_id)
+        cred_set = shard.sessions.get(session_id)
         if not cred_set:
             return False
+        shard.access_count.pop(session_id, None)
         
         try:
             # Sobrescribir valores con patrones aleatorios antes de eliminar
@@ -258,7 +319,7 @@ class SkillCredentialVault:
             cred_set.credentials.clear()
             
             # Eliminar del vault
-            del self._vault[session_id]
+            del shard.sessions[session_id]
             
             logger.info(f"Credenciales eliminadas de forma segura: {session_id[:20]}...")
             return True
@@ -266,48 +327,89 @@ class SkillCredentialVault:
         except Exception as e:
             logger.error(f"Error en limpieza segura: {e}")
             # Forzar eliminación incluso si falla la sobrescritura
-            self._vault.pop(session_id, None)
+            shard.sessions.pop(session_id, None)
             return False
     
+    def _schedule_expiry(self, expires_at: float, session_id: str) -> None:
+        with self._expiry_cond:
+            heapq.heappush(self._expiry_heap, (expires_at, session_id))
+            # Sólo hace falta despertar al hilo si el primer vencimiento se adelantó
+            if self._expiry_heap[0][1] == session_id:
+                self._expiry_cond.notify()
+
+    def _pop_due(self, now: float) -> List[str]:
+        due = []
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            due.append(heapq.heappop(self._expiry_heap)[1])
+        return due
+
     def _cleanup_loop(self):
-        """Thread de limpieza automática de credenciales expiradas"""
+        """Thread de expiración: duerme hasta el siguiente vencimiento del heap"""
         while True:
             try:
-                time.sleep(self._cleanup_interval)
-                self._cleanup_expired()
+                with self._expiry_cond:
+                    due = self._pop_due(time.time())
+                    while not due:
+                        timeout = self._expiry_heap[0][0] - time.time() if self._expiry_heap else None
+                        self._expiry_cond.wait(timeout)
+                        due = self._pop_due(time.time())
+                self._expire(due)
             except Exception as e:
                 logger.error(f"Error en cleanup loop: {e}")
-    
-    def _cleanup_expired(self):
-        """Limpia credenciales expiradas"""
-        with self._lock:
-            expired_sessions = [
-                sid for sid, cred in self._vault.items() 
-                if cred.is_expired()
-            ]
-            
-            for session_id in expired_sessions:
+
+    def _expire(self, session_ids: List[str]) -> int:
+        expired = 0
+        for session_id in session_ids:
+            shard = self._shard(session_id)
+            with shard.lock:
+                cred = shard.sessions.get(session_id)
+                # Entradas de sesiones ya liberadas se ignoran
+                if cred is None or not cred.is_expired():
+                    continue
                 logger.info(f"Auto-limpieza de credenciales expiradas: {session_id[:20]}...")
-                self._secure_delete(session_id)
-    
+                if self._secure_delete(shard, session_id):
+                    expired += 1
+        if expired:
+            self._count("expired", expired)
+        return expired
+
+    def _cleanup_expired(self) -> int:
+        """Limpia ya las credenciales vencidas (sin esperar al hilo)"""
+        with self._expiry_cond:
+            due = self._pop_due(time.time())
+        return self._expire(due)
+
+    def get_access_log(self, limit: Optional[int] = None) -> List[Dict]:
+        """Últimos accesos registrados, del más antiguo al más reciente"""
+        entries = list(self._access_log)
+        return entries[-limit:] if limit else entries
+
     def get_stats(self) -> Dict[str, Any]:
         """Retorna estadísticas del vault (para monitoreo)"""
-        with self._lock:
-            active = len(self._vault)
-            expired = sum(1 for c in self._vault.values() if c.is_expired())
-            
-            return {
-                "active_sessions": active,
-                "expired_sessions": expired,
-                "total_access_logged": len(self._access_log),
-                "failed_attempts_total": sum(self._failed_attempts.values()),
-                "blocked_sessions": sum(1 for s, c in self._failed_attempts.items() if c >= self._max_failed_attempts),
-                "max_failed_attempts": self._max_failed_attempts,
-                "max_access_count": self._max_access_count,
-                "cleanup_interval": self._cleanup_interval,
-                "max_ttl": self._max_ttl
-            }
-    
+        active = sum(len(shard.sessions) for shard in self._shards)
+        with self._stats_lock:
+            counters = dict(self._counters)
+        with self._expiry_cond:
+            scheduled = len(self._expiry_heap)
+            next_expiry = self._expiry_heap[0][0] if self._expiry_heap else None
+
+        return {
+            "active_sessions": active,
+            "expired_sessions": counters["expired"],
+            "released_sessions": counters["released"],
+            "stored_sessions": counters["stored"],
+            "total_access_logged": counters["accesses"],
+            "access_log_size": len(self._access_log),
+            "failed_attempts_total": counters["failed"],
+            "blocked_sessions": counters["blocked"],
+            "scheduled_expirations": scheduled,
+            "next_expiry_in": round(max(0.0, next_expiry - time.time()), 3) if next_expiry else None,
+            "shards": len(self._shards),
+            "max_failed_attempts": self._max_failed_attempts,
+            "max_access_count": self._max_access_count,
+            "max_ttl": self._max_ttl
+        }
+
     def validate_skill_credential_request(self, skill_id: str, requested_permissions: List[str]) -> Dict[str, Any]:
         """
         Valida si una skill puede solicitar credenciales basado en sus permisos
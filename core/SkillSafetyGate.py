@@ -13,6 +13,7 @@ from typing import Any, Dict, List, Optional, Tuple
 # Importar validador de pureza
 sys.path.insert(0, str(Path(__file__).parent))
 from security.skill_purity_validator import SkillPurityValidator, PurityReport
+from core.sandbox_workspace import get_workspace_pool, sim_temp_root
 
 
 @dataclass
@@ -500,43 +501,44 @@ class SkillSafetyGate:
         except Exception:
             pass
 
-        tmp_root = Path(os.environ.get("MIIA_SKILL_SIM_TMP", ""))
-        if not str(tmp_root).strip():
-            tmp_root = Path(os.getenv("TEMP", "."))
-        extract_dir = tmp_root / "miia_skill_sim" / f"extract_{time.time_ns()}"
-        sandbox_dir = tmp_root / "miia_skill_sim" / f"sandbox_{time.time_ns()}"
+        # El directorio de extracción es del llamador (SkillVault lo mueve a
+        # live o lo descarta); el sandbox del simulador sale del pool
+        pool = get_workspace_pool(sim_temp_root() / "miia_skill_sim")
+        extract_dir = pool.base_dir / f"extract_{time.time_ns()}"
         extract_dir.mkdir(parents=True, exist_ok=True)
-        sandbox_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Crear directorio output básico para que skills puedan guardar archivos
-        # Esto es preparación de entorno, NO modificación de código
-        (sandbox_dir / "output").mkdir(parents=True, exist_ok=True)
 
         try:
             with zipfile.ZipFile(zip_path, "r") as z:
                 ok_members, member_reasons = _safe_zip_members(z)
                 if not ok_members:
+                    pool.discard(extract_dir)
                     return SafetyReport(False, "", "", "", [], member_reasons), None
                 z.extractall(extract_dir)
         except Exception as e:
+            pool.discard(extract_dir)
             return SafetyReport(False, "", "", "", [], [f"No se pudo extraer zip: {e}"]), None
 
         prep = self.prepare_extracted_dir(extract_dir)
         if not prep.ok:
             return prep, extract_dir
 
-        rep = self.validate_extracted_dir(extract_dir, sandbox_dir=sandbox_dir)
+        rep = self.validate_extracted_dir(extract_dir)
         return rep, extract_dir
 
     def validate_extracted_dir(self, extracted_dir: Path, sandbox_dir: Optional[Path] = None) -> SafetyReport:
-        reasons: List[str] = []
+        if sandbox_dir is not None:
+            return self._validate_extracted_dir(extracted_dir, sandbox_dir)
 
-        if sandbox_dir is None:
-            tmp_root = Path(os.environ.get("MIIA_SKILL_SIM_TMP", ""))
-            if not str(tmp_root).strip():
-                tmp_root = Path(os.getenv("TEMP", "."))
-            sandbox_dir = tmp_root / "miia_skill_sim" / f"sandbox_{time.time_ns()}"
-            sandbox_dir.mkdir(parents=True, exist_ok=True)
+        # Sin sandbox del llamador: workspace del pool, devuelto al terminar
+        pool = get_workspace_pool(sim_temp_root() / "miia_skill_sim")
+        workspace = pool.acquire()
+        try:
+            return self._validate_extracted_dir(extracted_dir, workspace)
+        finally:
+            pool.release(workspace)
+
+    def _validate_extracted_dir(self, extracted_dir: Path, sandbox_dir: Path) -> SafetyReport:
+        reasons: List[str] = []
 
         skill_id, name, version, permissions, manifest_reasons = _read_manifest(extracted_dir)
         reasons.extend(manifest_reasons)
@@ -9,6 +9,8 @@ from pathlib import Path
 from typing import Optional, Tuple
 
 from core.SkillSafetyGate import SafetyReport, SkillSafetyGate
+from core.lazy_services import lazy_service
+from core.sandbox_workspace import get_workspace_pool
 
 
 @dataclass
@@ -100,6 +102,8 @@ class SkillVault:
             # Validar
             report, extracted_dir = self.gate.validate_zip_detailed(staged)
             if not report.ok:
+                if extracted_dir:
+                    get_workspace_pool(extracted_dir.parent).discard(extracted_dir)
                 # Mover a cuarentena externa
                 qdir = self._quarantine_external(staged, report)
                 return {"success": False, "error": f"Validación fallida. En cuarentena: {qdir}", "report": report.to_dict()}
@@ -633,4 +637,4 @@ class SkillVault:
         manifest_path = self.live_dir / category / skill_id / "manifest.json"
         return self._read_manifest(manifest_path, skill_id)
 
-vault = SkillVault()
+vault = lazy_service("vault", SkillVault)
@@ -5,6 +5,8 @@ Sistema de supervisión y recuperación automática para MiIA-Product-20
 - Reinicia servicios automáticamente
 - Notifica al usuario con mensajes simples
 - Guarda reportes técnicos para debugging
+- Muestrea recursos en un hilo propio (sin bloquear el event loop) y mide
+  el lag del event loop y los intervalos de heartbeat de cada servicio
 """
 import os
 import sys
@@ -19,10 +21,223 @@ from typing import Dict, Any, Optional, List, Callable
 from dataclasses import dataclass, asdict
 from enum import Enum
 import threading
-import psutil
+import bisect
+from collections import deque
+
+from core.lazy_services import lazy_import, lazy_service
+
+psutil = lazy_import("psutil")
 
 logger = logging.getLogger("MiIAWatchdog")
 
+RESOURCE_SAMPLE_INTERVAL = 1.0   # segundos entre muestras del hilo de recursos
+RESOURCE_WINDOW = 300            # muestras guardadas (~5 min)
+LOOP_LAG_INTERVAL = 0.5          # cada cuánto se mide el lag del event loop
+LOOP_LAG_WINDOW = 240
+
+# Límites superiores de los buckets de latencia (ms)
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+                      10000, 30000, 60000, 120000)
+
+
+class LatencyHistogram:
+    """Histograma de latencias con buckets fijos (memoria constante)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # el último es +inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+            self.count += 1
+            self.total_ms += value_ms
+            self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Límite superior del bucket que contiene el percentil (acotado al máximo visto)"""
+        if not self.count:
+            return None
+        target = pct / 100.0 * self.count
+        running = 0
+        for i, c in enumerate(self.counts):
+            running += c
+            if running >= target and c:
+                return min(float(self.buckets[i]), self.max_ms) if i < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            buckets = {
+                (f"le_{b}" if i < len(self.buckets) else "inf"): c
+                for i, (b, c) in enumerate(zip(self.buckets + (None,), self.counts)) if c
+            }
+            return {
+                "count": self.count,
+                "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+                "p50_ms": self.percentile(50),
+                "p95_ms": self.percentile(95),
+                "p99_ms": self.percentile(99),
+                "max_ms": round(self.max_ms, 2),
+                "buckets": buckets,
+            }
+
+
+@dataclass
+class ResourceSample:
+    """Muestra de recursos del sistema"""
+    timestamp: float
+    cpu_percent: float
+    memory_percent: float
+    disk_percent: float
+    process_rss_mb: float
+
+
+_process = None
+
+
+def _psutil_sample() -> ResourceSample:
+    """Muestra sin bloquear: cpu_percent(None) usa el delta desde la anterior"""
+    global _process
+    if _process is None:
+        _process = psutil.Process()
+    return ResourceSample(
+        timestamp=time.time(),
+        cpu_percent=psutil.cpu_percent(interval=None),
+        memory_percent=psutil.virtual_memory().percent,
+        disk_percent=psutil.disk_usage('/').percent,
+        process_rss_mb=_process.memory_info().rss / (1024 ** 2),
+    )
+
+
+class ResourceSampler:
+    """
+    Hilo de muestreo de recursos con buffer circular. Es el único que llama a
+    psutil.cpu_percent: el resto de la aplicación lee la última muestra.
+    """
+
+    def __init__(self, interval: float = RESOURCE_SAMPLE_INTERVAL, window: int = RESOURCE_WINDOW,
+                 sample_fn: Optional[Callable[[], ResourceSample]] = None):
+        self.interval = interval
+        self._samples: deque = deque(maxlen=window)
+        self._sample_fn = sample_fn or _psutil_sample
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Arrancar el hilo (idempotente)"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ResourceSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+        self._thread = None
+
+    def _run(self) -> None:
+        if self._sample_fn is _psutil_sample:
+            try:
+                psutil.cpu_percent(interval=None)  # cebar la medición por deltas
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Muestreo de recursos desactivado: {e}")
+                return
+        while not self._stop.wait(self.interval):
+            self.sample_once()
+
+    def sample_once(self) -> Optional[ResourceSample]:
+        try:
+            sample = self._sample_fn()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            return None
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def latest(self) -> Optional[ResourceSample]:
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def recent(self, seconds: Optional[float] = None) -> List[ResourceSample]:
+        with self._lock:
+            samples = list(self._samples)
+        if seconds is None:
+            return samples
+        cutoff = time.time() - seconds
+        return [s for s in samples if s.timestamp >= cutoff]
+
+    def summary(self, series: int = 60) -> Dict[str, Any]:
+        samples = self.recent()
+        latest = samples[-1] if samples else None
+        result: Dict[str, Any] = {
+            "running": self.running,
+            "interval_s": self.interval,
+            "samples": len(samples),
+            "latest": asdict(latest) if latest else None,
+            "errors": self.errors,
+        }
+        if samples:
+            cpu = [s.cpu_percent for s in samples]
+            mem = [s.memory_percent for s in samples]
+            result["window"] = {
+                "cpu_avg": round(sum(cpu) / len(cpu), 1),
+                "cpu_max": max(cpu),
+                "memory_avg": round(sum(mem) / len(mem), 1),
+                "memory_max": max(mem),
+            }
+            result["series"] = [
+                [round(s.timestamp, 1), s.cpu_percent, s.memory_percent] for s in samples[-series:]
+            ]
+        return result
+
+
+class LoopLagMonitor:
+    """Mide cuánto se retrasa el event loop respecto a un sleep programado"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, window: int = LOOP_LAG_WINDOW):
+        self.interval = interval
+        self.histogram = LatencyHistogram()
+        self.recent: deque = deque(maxlen=window)
+        self.last_ms = 0.0
+
+    def record(self, lag_ms: float) -> None:
+        lag_ms = max(0.0, lag_ms)
+        self.last_ms = lag_ms
+        self.recent.append(lag_ms)
+        self.histogram.observe(lag_ms)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record((loop.time() - start - self.interval) * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = list(self.recent)
+        return {
+            "last_ms": round(self.last_ms, 2),
+            "recent_max_ms": round(max(recent), 2) if recent else 0.0,
+            "histogram": self.histogram.to_dict(),
+        }
+
 class ServiceStatus(Enum):
     """Estados posibles de un servicio"""
     HEALTHY = "healthy"           # Funcionando correctamente
@@ -67,6 +282,7 @@ class MiIAWatchdog:
     HEARTBEAT_TIMEOUT = 30  # segundos sin heartbeat = servicio caído
     MAX_RESTARTS = 5        # máximo reinicios antes de modo seguro
     RESTART_WINDOW = 300    # ventana de tiempo para contar reinicios (5 min)
+    RESOURCE_ALERT_PERCENT = 90
     
     def __init__(self):
         self.services: Dict[str, ServiceInfo] = {}
@@ -74,8 +290,15 @@ class MiIAWatchdog:
         self._running = False
         self._monitor_task = None
         self._cleanup_task = None
+        self._loop_lag_task = None
         self._callbacks: List[Callable] = []
         
+        # Instrumentación
+        self.resources = ResourceSampler()
+        self.loop_lag = LoopLagMonitor()
+        self.heartbeat_intervals: Dict[str, LatencyHistogram] = {}
+        self._resource_alerts: set = set()
+        
         # Directorio para reportes
         self.reports_dir = Path.home() / ".config" / "miia-product-20" / "error_reports"
         self.reports_dir.mkdir(parents=True, exist_ok=True)
@@ -92,13 +315,17 @@ class MiIAWatchdog:
             restart_count=0
         )
         self.services[name] = service
+        self.heartbeat_intervals[name] = LatencyHistogram()
         logger.info(f"✅ Servicio registrado: {name}")
         return service
     
     def heartbeat(self, service_name: str):
         """Actualizar heartbeat de un servicio"""
         if service_name in self.services:
-            self.services[service_name].last_heartbeat = time.time()
+            now = time.time()
+            gap_ms = (now - self.services[service_name].last_heartbeat) * 1000
+            self.heartbeat_intervals.setdefault(service_name, LatencyHistogram()).observe(gap_ms)
+            self.services[service_name].last_heartbeat = now
             if self.services[service_name].status != ServiceStatus.HEALTHY:
                 self.services[service_name].status = ServiceStatus.HEALTHY
                 logger.info(f"💚 Servicio {service_name} recuperado")
@@ -209,8 +436,10 @@ class MiIAWatchdog:
             return
         
         self._running = True
+        self.resources.start()
         self._monitor_task = asyncio.create_task(self._monitor_loop())
         self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        self._loop_lag_task = asyncio.create_task(self.loop_lag.run())
         
         logger.info("🔍 Watchdog iniciado")
     
@@ -218,10 +447,10 @@ class MiIAWatchdog:
         """Detener monitoreo"""
         self._running = False
         
-        if self._monitor_task:
-            self._monitor_task.cancel()
-        if self._cleanup_task:
-            self._cleanup_task.cancel()
+        for task in (self._monitor_task, self._cleanup_task, self._loop_lag_task):
+            if task:
+                task.cancel()
+        self.resources.stop()
         
         logger.info("🛑 Watchdog detenido")
     
@@ -247,8 +476,8 @@ class MiIAWatchdog:
                                 # Notificar
                                 self._notify_service_down(name)
                 
-                # Verificar uso de recursos del sistema
-                await self._check_system_resources()
+                # Verificar uso de recursos (última muestra del hilo, no bloquea)
+                self._check_system_resources()
                 
                 await asyncio.sleep(5)  # Revisar cada 5 segundos
                 
@@ -271,21 +500,25 @@ class MiIAWatchdog:
                 await asyncio.sleep(3600)
     
     def _check_system_resources(self):
-        """Verificar recursos del sistema"""
-        try:
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            
-            if cpu_percent > 90:
-                logger.warning(f"⚠️ CPU alta: {cpu_percent}%")
-                self._notify_resource_warning("CPU", cpu_percent)
-            
-            if memory.percent > 90:
-                logger.warning(f"⚠️ Memoria alta: {memory.percent}%")
-                self._notify_resource_warning("Memoria", memory.percent)
-                
-        except Exception as e:
-            logger.error(f"Error verificando recursos: {e}")
+        """Verificar recursos del sistema con la última muestra del sampler"""
+        sample = self.resources.latest()
+        if sample is None:
+            return
+        for resource, value in (("CPU", sample.cpu_percent), ("Memoria", sample.memory_percent)):
+            if value > self.RESOURCE_ALERT_PERCENT:
+                # Avisar una vez al cruzar el umbral, no en cada vuelta
+                if resource not in self._resource_alerts:
+                    self._resource_alerts.add(resource)
+                    logger.warning(f"⚠️ {resource} alta: {value}%")
+                    self._notify_resource_warning(resource, value)
+            else:
+                self._resource_alerts.discard(resource)
+    
+    def latest_resources(self) -> Optional[Dict[str, Any]]:
+        """Última muestra de recursos (arranca el sampler si hace falta)"""
+        self.resources.start()
+        sample = self.resources.latest()
+        return asdict(sample) if sample else None
     
     def _notify_service_down(self, service_name: str):
         """Notificar que un servicio está caído"""
@@ -324,10 +557,14 @@ class MiIAWatchdog:
     def _get_system_state(self) -> Dict[str, Any]:
         """Obtener estado actual del sistema"""
         try:
+            sample = self.resources.latest()
+            if sample is None:
+                # Sin sampler en marcha: medición puntual sin intervalo
+                sample = _psutil_sample()
             return {
-                "cpu_percent": psutil.cpu_percent(interval=0.1),
-                "memory_percent": psutil.virtual_memory().percent,
-                "disk_percent": psutil.disk_usage('/').percent,
+                "cpu_percent": sample.cpu_percent,
+                "memory_percent": sample.memory_percent,
+                "disk_percent": sample.disk_percent,
                 "timestamp": datetime.now().isoformat(),
                 "services_status": {
                     name: {
@@ -428,7 +665,12 @@ class MiIAWatchdog:
             "recent_errors": recent_errors,
             "reports_count": len(self.error_reports),
             "reports_retention_days": 7,
-            "all_healthy": len(failed_services) == 0
+            "all_healthy": len(failed_services) == 0,
+            "resources": self.resources.summary(),
+            "event_loop": self.loop_lag.to_dict(),
+            "heartbeats": {
+                name: hist.to_dict() for name, hist in self.heartbeat_intervals.items()
+            },
         }
     
     def get_detailed_reports(self, limit: int = 50) -> List[Dict[str, Any]]:
@@ -451,7 +693,7 @@ class MiIAWatchdog:
 
 
 # Instancia global del watchdog
-watchdog = MiIAWatchdog()
+watchdog = lazy_service("watchdog", MiIAWatchdog)
 
 
 # Funciones de conveniencia
@@ -27,6 +27,7 @@ from core.CommandEngine.engine import CommandEngine
 from core.UserObservabilityStore import store
 from core.UserFeedbackManager import feedback_manager
 from core.SkillVault import vault
+from core.outbound_dispatcher import get_dispatcher
 
 logger = logging.getLogger("TelegramBot")
 
@@ -90,6 +91,9 @@ class TelegramBotService:
 
         self._myskills_offset: Dict[int, int] = {}
 
+        # Envíos a todos los chats: límites anti-flood, reintentos y agrupación
+        self._outbound = get_dispatcher("telegram")
+
         # Seguridad HIGH: aprobación + PIN
         self._pending_security_actions: Dict[str, Dict[str, Any]] = {}
         self._waiting_pin_token: Dict[int, str] = {}
@@ -116,6 +120,7 @@ class TelegramBotService:
         self.app.add_handler(CommandHandler("setpin", self._cmd_setpin))
         self.app.add_handler(CommandHandler("vault", self._cmd_vault))
         self.app.add_handler(CommandHandler("builder", self._cmd_builder))
+        self.app.add_handler(CommandHandler("ask", self._cmd_ask))
         self.app.add_handler(CallbackQueryHandler(self._on_callback))
         self.app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self._on_message))
         self.app.add_handler(MessageHandler(filters.Document.ALL, self._on_document))
@@ -133,6 +138,10 @@ class TelegramBotService:
     async def stop(self) -> None:
         if self.app is None:
             return
+        try:
+            await self._outbound.flush_all()
+        except Exception:
+            pass
         try:
             await self.app.updater.stop()
         except Exception:
@@ -177,7 +186,8 @@ class TelegramBotService:
                 "Ejemplos:\n"
                 "- usa skill clock\n"
                 "- usa skill echo hola\n"
-                "- usa skill web_browser example.com\n\n"
+                "- usa skill web_browser example.com\n"
+                "- /ask <pregunta> (respuesta del LLM en vivo)\n\n"
                 "Tips:\n"
                 "- Cuando una skill falle, verás botón de Reintentar."
             ),
@@ -427,6 +437,40 @@ class TelegramBotService:
             text=f"Estado OK. Reintentos pendientes: {len(pending)}",
         )
 
+    async def _cmd_ask(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Preguntar al LLM activo; la respuesta se va editando mientras se genera"""
+        chat_id = update.effective_chat.id
+        if self._allowed_chat_ids is not None and chat_id not in self._allowed_chat_ids:
+            await context.bot.send_message(chat_id=chat_id, text="Acceso no autorizado.")
+            return
+        prompt = " ".join(context.args or []).strip()
+        if not prompt:
+            await context.bot.send_message(chat_id=chat_id, text="Uso: /ask <pregunta>")
+            return
+
+        from core.llm_streaming import ThrottledMessageEditor, stream_chat
+
+        async def _send(text: str):
+            return await context.bot.send_message(chat_id=chat_id, text=text)
+
+        async def _edit(msg, text: str):
+            try:
+                await context.bot.edit_message_text(chat_id=chat_id, message_id=msg.message_id, text=text)
+            except Exception as e:
+                # "message is not modified" o rate limit puntual: el siguiente flush lo corrige
+                logger.debug(f"edit_message_text: {e}")
+
+        editor = ThrottledMessageEditor(_send, _edit)
+        try:
+            async for chunk in stream_chat(f"telegram:{chat_id}", prompt):
+                await editor.feed(chunk)
+            text = await editor.flush()
+            if not text.strip():
+                await context.bot.send_message(chat_id=chat_id, text="No obtuve respuesta del LLM.")
+        except Exception as e:
+            logger.error(f"Error en /ask: {e}")
+            await context.bot.send_message(chat_id=chat_id, text=f"Error generando respuesta: {e}")
+
     async def _on_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         chat_id = update.effective_chat.id
         text = (update.message.text or "").strip()
@@ -1172,21 +1216,32 @@ class TelegramBotService:
             except Exception:
                 pass
 
-    async def _send_to_all(self, text: str) -> None:
+    def _broadcast_targets(self) -> list[int]:
+        targets = list(self._chat_ids)
+        if self._allowed_chat_ids is not None:
+            targets = [cid for cid in targets if cid in self._allowed_chat_ids]
+        return targets
+
+    async def _send_to_all(self, text: str, coalesce: bool = False) -> None:
         if not text:
             return
         if self.app is None:
             return
 
-        targets = list(self._chat_ids)
-        if self._allowed_chat_ids is not None:
-            targets = [cid for cid in targets if cid in self._allowed_chat_ids]
+        bot = self.app.bot
+        targets = self._broadcast_targets()
+        if coalesce:
+            # Ráfagas de progreso: un mensaje por chat que se va editando
+            for chat_id in targets:
+                self._outbound.coalesce(
+                    chat_id,
+                    text,
+                    send=lambda t, cid=chat_id: bot.send_message(chat_id=cid, text=t),
+                    edit=lambda message, t: message.edit_text(t),
+                )
+            return
 
-        for chat_id in targets:
-            try:
-                await self.app.bot.send_message(chat_id=chat_id, text=text)
-            except Exception:
-                pass
+        await self._outbound.broadcast(targets, lambda cid: bot.send_message(chat_id=cid, text=text))
 
     async def _show_desktop_menu(self, chat_id: int) -> None:
         self._pc_page_offset[chat_id] = 0
@@ -1555,7 +1610,7 @@ class TelegramBotService:
     async def _on_user_speak(self, data: Dict[str, Any]) -> None:
         msg = (data or {}).get("message")
         if msg:
-            await self._send_to_all(str(msg))
+            await self._send_to_all(str(msg), coalesce=True)
 
     async def _on_user_ui_message(self, data: Dict[str, Any]) -> None:
         msg = (data or {}).get("message")
@@ -1577,15 +1632,12 @@ class TelegramBotService:
 
         text = f"Reintento disponible para: {skill}\nSession: {session_id[:8]}..."
 
-        targets = list(self._chat_ids)
-        if self._allowed_chat_ids is not None:
-            targets = [cid for cid in targets if cid in self._allowed_chat_ids]
-
-        for chat_id in targets:
-            try:
-                await self.app.bot.send_message(chat_id=chat_id, text=text, reply_markup=keyboard)
-            except Exception:
-                pass
+        bot = self.app.bot
+        await self._outbound.broadcast(
+            self._broadcast_targets(),
+            lambda cid: bot.send_message(chat_id=cid, text=text, reply_markup=keyboard),
+            key=f"retry:{session_id}",
+        )
 
     async def _on_credential_event(self, data: Dict[str, Any]) -> None:
         """
@@ -1630,11 +1682,11 @@ class TelegramBotService:
         
         text = f"{emoji} **{prefix}**\n\nSkill: `{skill_id}`\n{message}"
         
+        bot = self.app.bot
         try:
-            await self.app.bot.send_message(
-                chat_id=chat_id,
-                text=text,
-                parse_mode="Markdown"
+            await self._outbound.submit(
+                chat_id,
+                lambda: bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown"),
             )
         except Exception as e:
             logger.error(f"Error enviando notificación de credenciales: {e}")
@@ -7,16 +7,21 @@ import asyncio
 import json
 import logging
 import os
+import shutil
+import tempfile
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Set
+from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
 from core.CortexBus import bus
+from core.outbound_dispatcher import RecentKeys, get_dispatcher
 from core.ui.api_client import api_client
 
 logger = logging.getLogger("TelegramNotifications")
 
+NOTIFIED_WORKS_MAX = 2048
+
 
 @dataclass
 class NotificationConfig:
@@ -66,8 +71,11 @@ class TelegramNotificationService:
         # Referencia al bot (se asigna desde TelegramBotService)
         self._bot = None
         
-        # Works ya notificados (para evitar duplicados)
-        self._notified_works: Set[str] = set()
+        # Works ya notificados (para evitar duplicados), acotado en memoria
+        self._notified_works = RecentKeys(NOTIFIED_WORKS_MAX)
+        
+        # Límites anti-flood compartidos con el resto de envíos del bot
+        self._outbound = get_dispatcher("telegram")
         
         # Archivo de configuración
         self._config_path = Path("data/telegram_notifications.json")
@@ -151,6 +159,20 @@ class TelegramNotificationService:
     # HANDLERS DE EVENTOS
     # =========================================================================
     
+    def _enabled_chats(self, flag: Optional[str] = None) -> List[int]:
+        return [
+            chat_id for chat_id, config in self._configs.items()
+            if config.enabled and (flag is None or getattr(config, flag))
+        ]
+    
+    async def _broadcast(self, chat_ids: List[int], text: str) -> Dict[str, int]:
+        """Enviar a varios chats en paralelo respetando los límites de Telegram"""
+        bot = self._bot
+        return await self._outbound.broadcast(
+            chat_ids,
+            lambda chat_id: bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown"),
+        )
+    
     async def _on_work_completed(self, data: Dict[str, Any]) -> None:
         """Handler para cuando se completa un work"""
         if not self._bot:
@@ -159,28 +181,19 @@ class TelegramNotificationService:
         work_id = data.get("work_id")
         work_name = data.get("work_name", "Archivo")
         
-        if work_id in self._notified_works:
+        if not self._notified_works.add(work_id):
             return
-        self._notified_works.add(work_id)
         
         # Notificar a todos los chats configurados
-        for chat_id, config in self._configs.items():
-            if not config.enabled:
-                continue
-            
-            if config.notify_works_completed:
-                try:
-                    await self._bot.send_message(
-                        chat_id=chat_id,
-                        text=f"📄 *Work completado:*\n_{work_name}_",
-                        parse_mode="Markdown"
-                    )
-                except Exception as e:
-                    logger.error(f"Error notificando work a {chat_id}: {e}")
-            
-            # Enviar archivo automáticamente si está configurado
-            if config.notify_auto_send_works:
-                await self._send_work_to_chat(chat_id, work_id)
+        await self._broadcast(
+            self._enabled_chats("notify_works_completed"),
+            f"📄 *Work completado:*\n_{work_name}_",
+        )
+        
+        # Enviar archivo automáticamente si está configurado
+        auto_send = self._enabled_chats("notify_auto_send_works")
+        if auto_send:
+            await self._send_work_to_chats(auto_send, work_id)
     
     async def _on_skill_executed(self, data: Dict[str, Any]) -> None:
         """Handler para cuando se ejecuta una skill"""
@@ -188,19 +201,7 @@ class TelegramNotificationService:
             return
             
         skill_name = data.get("skill_name", "unknown")
-        
-        for chat_id, config in self._configs.items():
-            if not config.enabled or not config.notify_skills_executed:
-                continue
-            
-            try:
-                await self._bot.send_message(
-                    chat_id=chat_id,
-                    text=f"⚡ Skill ejecutada: *{skill_name}*",
-                    parse_mode="Markdown"
-                )
-            except Exception as e:
-                logger.error(f"Error notificando skill a {chat_id}: {e}")
+        await self._broadcast(self._enabled_chats("notify_skills_executed"), f"⚡ Skill ejecutada: *{skill_name}*")
     
     async def _on_skill_error(self, data: Dict[str, Any]) -> None:
         """Handler para errores de skills"""
@@ -209,19 +210,10 @@ class TelegramNotificationService:
             
         skill_name = data.get("skill_name", "unknown")
         error = data.get("error", "Error desconocido")
-        
-        for chat_id, config in self._configs.items():
-            if not config.enabled or not config.notify_errors:
-                continue
-            
-            try:
-                await self._bot.send_message(
-                    chat_id=chat_id,
-                    text=f"❌ *Error en skill {skill_name}:*\n{error[:200]}",
-                    parse_mode="Markdown"
-                )
-            except Exception as e:
-                logger.error(f"Error notificando error a {chat_id}: {e}")
+        await self._broadcast(
+            self._enabled_chats("notify_errors"),
+            f"❌ *Error en skill {skill_name}:*\n{error[:200]}",
+        )
     
     async def _on_orchestrator_completed(self, data: Dict[str, Any]) -> None:
         """Handler para cuando completa el orquestador"""
@@ -232,30 +224,26 @@ class TelegramNotificationService:
         success = data.get("success", False)
         works = data.get("works", [])
         
-        for chat_id, config in self._configs.items():
-            if not config.enabled:
-                continue
-            
-            status = "✅ Completado" if success else "❌ Fallido"
-            
-            try:
-                await self._bot.send_message(
-                    chat_id=chat_id,
-                    text=f"🎯 *Orquestador:* {status}\n_{objective[:100]}_",
-                    parse_mode="Markdown"
-                )
-                
-                # Enviar works si está configurado
-                if success and config.notify_auto_send_works:
-                    for work_id in works:
-                        await self._send_work_to_chat(chat_id, work_id)
-                        
-            except Exception as e:
-                logger.error(f"Error notificando orquestador a {chat_id}: {e}")
+        status = "✅ Completado" if success else "❌ Fallido"
+        await self._broadcast(self._enabled_chats(), f"🎯 *Orquestador:* {status}\n_{objective[:100]}_")
+        
+        # Enviar works si está configurado
+        if success:
+            auto_send = self._enabled_chats("notify_auto_send_works")
+            if auto_send:
+                for work_id in works:
+                    await self._send_work_to_chats(auto_send, work_id)
     
     async def _send_work_to_chat(self, chat_id: int, work_id: str) -> None:
         """Enviar un work específico a un chat"""
-        if not self._bot:
+        await self._send_work_to_chats([chat_id], work_id)
+
+    async def _send_work_to_chats(self, chat_ids: List[int], work_id: str) -> None:
+        """
+        Enviar un work a varios chats: se descarga una sola vez a un directorio
+        temporal propio y se borra cuando han terminado todos los envíos
+        """
+        if not self._bot or not chat_ids:
             return
             
         try:
@@ -270,24 +258,32 @@ class TelegramNotificationService:
             if not work:
                 return
             
-            # Descargar archivo temporalmente
-            import tempfile
-            tmp_path = Path(tempfile.gettempdir()) / work.get('original_name', 'file')
-            
-            if api_client.download_work(work_id, tmp_path):
-                # Enviar archivo
+            name = Path(work.get('original_name') or 'file').name
+            tmp_dir = Path(tempfile.mkdtemp(prefix="miia_work_"))
+        except Exception as e:
+            logger.error(f"Error preparando work {work_id}: {e}")
+            return
+
+        try:
+            tmp_path = tmp_dir / name
+            if not await asyncio.to_thread(api_client.download_work, work_id, tmp_path):
+                return
+
+            async def send(chat_id: int):
+                # Cada intento (reintento por flood wait) abre el archivo de nuevo:
+                # el anterior ya se leyó hasta el final
                 with open(tmp_path, "rb") as f:
-                    await self._bot.send_document(
+                    return await self._bot.send_document(
                         chat_id=chat_id,
                         document=f,
                         caption=f"📄 {work.get('original_name')}"
                     )
-                
-                # Limpiar
-                tmp_path.unlink(missing_ok=True)
-                
-        except Exception as e:
-            logger.error(f"Error enviando work {work_id} a {chat_id}: {e}")
+
+            # Los fallos por chat los cuenta y registra el despachador
+            await self._outbound.broadcast(chat_ids, send)
+        finally:
+            # Limpiar (todos los envíos han terminado)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
     
     # =========================================================================
     # MÉTODOS PÚBLICOS
@@ -307,10 +303,9 @@ class TelegramNotificationService:
             return False
         
         try:
-            await self._bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                parse_mode="Markdown"
+            await self._outbound.submit(
+                chat_id,
+                lambda: self._bot.send_message(chat_id=chat_id, text=message, parse_mode="Markdown"),
             )
             return True
         except Exception as e:
@@ -322,23 +317,14 @@ class TelegramNotificationService:
         if not self._bot:
             return
             
-        for chat_id, config in self._configs.items():
-            if not config.enabled:
-                continue
-            
-            if config.only_important and not important:
-                continue
-            
-            try:
-                asyncio.create_task(
-                    self._bot.send_message(
-                        chat_id=chat_id,
-                        text=message,
-                        parse_mode="Markdown"
-                    )
-                )
-            except Exception as e:
-                logger.error(f"Error en broadcast a {chat_id}: {e}")
+        targets = [
+            chat_id for chat_id in self._enabled_chats()
+            if important or not self._configs[chat_id].only_important
+        ]
+        try:
+            asyncio.get_running_loop().create_task(self._broadcast(targets, message))
+        except RuntimeError as e:
+            logger.error(f"Error en broadcast: {e}")
     
     def get_stats(self) -> Dict[str, Any]:
         """Obtener estadísticas del servicio"""
@@ -350,7 +336,8 @@ class TelegramNotificationService:
             "total_chats": total,
             "enabled": enabled,
             "auto_send_works": auto_send,
-            "works_notified": len(self._notified_works)
+            "works_notified": len(self._notified_works),
+            "outbound": self._outbound.get_stats(),
         }
 
 
@@ -5,7 +5,7 @@ import os
 from typing import Any, Dict, Optional
 from datetime import datetime
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -38,6 +38,40 @@ async def broadcast_message(message: dict):
         if ws in ws_connections:
             ws_connections.remove(ws)
 
+
+def _select_chat_provider(requested_provider: str) -> bool:
+    """
+    Activar el provider pedido por el frontend (si tiene key) y decidir si el
+    chat debe responder directamente con LLMManager.
+    """
+    from core.LLMManager import llm_manager, ProviderType
+    from core.llm_extension import credential_store
+
+    provider_map = {
+        "ollama": ProviderType.OLLAMA,
+        "groq": ProviderType.GROQ,
+        "openai": ProviderType.OPENAI,
+        "gemini": ProviderType.GEMINI,
+    }
+
+    # Si el frontend envía provider (ej groq) y hay key, activarlo para esta respuesta.
+    if requested_provider in {"groq", "openai", "gemini"} and credential_store.has_key(requested_provider):
+        ptype = provider_map[requested_provider]
+        try:
+            llm_manager.set_api_key(ptype, credential_store.get_api_key(requested_provider) or "")
+            llm_manager.set_active_provider(ptype)
+        except Exception:
+            pass
+
+    active = llm_manager.active_provider
+    active_is_callable = active is not None and (llm_manager.get_active_config() is not None)
+    return bool(active_is_callable and (
+        requested_provider
+        or credential_store.has_key("groq")
+        or credential_store.has_key("openai")
+        or credential_store.has_key("gemini")
+    ))
+
 # HTML Template profesional con paneles
 HTML_TEMPLATE = r'''<!DOCTYPE html>
 <html lang="es">
@@ -1554,10 +1588,15 @@ def execute(context):
                 const data = JSON.parse(e.data);
                 if (data.type === "voice_status") updateVoiceStatus(data.active);
                 if (data.type === "log") addLog(data.message);
+                if (data.type === "dashboard_delta") applyDashboardDelta(data.changes);
+                if (data.type === "chat_chunk" || data.type === "chat_done" || data.type === "chat_error") {
+                    handleChatStreamMessage(data);
+                }
             };
             
             ws.onclose = () => {
                 wsConnecting = false;
+                finishChatStreams();
                 if (!wsEnabled || wsManualClose) {
                     return;
                 }
@@ -1807,6 +1846,7 @@ def execute(context):
         // ============ DASHBOARD FUNCTIONS ============
         
         let dashboardInterval = null;
+        let dashboardState = null;
         
         async function updateDashboard() {
             try {
@@ -1818,6 +1858,24 @@ def execute(context):
                     return;
                 }
                 
+                dashboardState = data;
+                renderDashboard(data);
+            } catch (e) {
+                console.error('Error actualizando dashboard:', e);
+            }
+        }
+        
+        // Deltas empujados por el servidor via /ws (sólo los campos que cambiaron)
+        function applyDashboardDelta(changes) {
+            if (!dashboardState || !changes) return;
+            Object.assign(dashboardState, changes);
+            if (document.getElementById('panel-dashboard').classList.contains('active')) {
+                renderDashboard(dashboardState);
+            }
+        }
+        
+        function renderDashboard(data) {
+            try {
                 // Actualizar timestamp
                 const lastUpdateEl = document.getElementById('last-update');
                 if (lastUpdateEl) {
@@ -1881,13 +1939,14 @@ def execute(context):
                 }
                 
             } catch (e) {
-                console.error('Error actualizando dashboard:', e);
+                console.error('Error renderizando dashboard:', e);
             }
         }
         
         function startDashboardRefresh() {
             updateDashboard();
-            dashboardInterval = setInterval(updateDashboard, 5000);
+            // Los cambios llegan por WebSocket; el polling sólo resincroniza
+            dashboardInterval = setInterval(updateDashboard, 30000);
         }
         
         function stopDashboardRefresh() {
@@ -2150,6 +2209,41 @@ def execute(context):
             }
         }
         
+        // Respuestas en streaming por WebSocket: request_id -> {text, bubble, resolve}
+        let chatStreams = {};
+        
+        function streamChatViaWs(text, provider) {
+            return new Promise((resolve) => {
+                const requestId = "chat-" + Date.now() + "-" + Math.random().toString(16).slice(2);
+                const messages = document.getElementById("chat-messages");
+                const bubble = messages.lastElementChild ? messages.lastElementChild.querySelector("p") : null;
+                chatStreams[requestId] = {text: "", bubble: bubble, resolve: resolve};
+                ws.send(JSON.stringify({action: "chat_stream", request_id: requestId, message: text, provider: provider}));
+            });
+        }
+        
+        function handleChatStreamMessage(data) {
+            const st = chatStreams[data.request_id];
+            if (!st) return;
+            if (data.type === "chat_chunk") {
+                st.text += data.text;
+                if (st.bubble) st.bubble.textContent = st.text;
+                const messages = document.getElementById("chat-messages");
+                messages.scrollTop = messages.scrollHeight;
+                return;
+            }
+            delete chatStreams[data.request_id];
+            st.resolve(data.type === "chat_done" && st.text.length > 0);
+        }
+        
+        function finishChatStreams() {
+            // Conexión perdida: lo recibido hasta ahora se queda como respuesta
+            for (const [requestId, st] of Object.entries(chatStreams)) {
+                delete chatStreams[requestId];
+                st.resolve(st.text.length > 0);
+            }
+        }
+        
         async function sendChat() {
             const input = document.getElementById("chat-input");
             const text = input.value.trim();
@@ -2165,6 +2259,12 @@ def execute(context):
             try {
                 // Llamar al backend
                 const provider = getSelectedProvider();
+                
+                // Sin flujo de aprobación pendiente: respuesta en streaming por WebSocket
+                if (ws && ws.readyState === WebSocket.OPEN && !currentSessionId && !menuSessionId) {
+                    if (await streamChatViaWs(text, provider)) return;
+                }
+                
                 const response = await fetch("/api/chat", {
                     method: "POST",
                     headers: {"Content-Type": "application/json"},
@@ -4016,8 +4116,22 @@ def execute(context):
             const container = document.getElementById('creaciones-container');
             
             try {
-                const response = await fetch('/api/output/files');
-                const data = await response.json();
+                // Seguir next_cursor hasta tener todas las páginas
+                let data = null;
+                let cursor = null;
+                do {
+                    const url = '/api/output/files?limit=500' + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '');
+                    const page = await (await fetch(url)).json();
+                    if (!page.success) { data = page; break; }
+                    if (data === null) {
+                        data = page;
+                    } else {
+                        for (const [cat, files] of Object.entries(page.categories)) {
+                            data.categories[cat] = (data.categories[cat] || []).concat(files);
+                        }
+                    }
+                    cursor = page.next_cursor;
+                } while (cursor);
                 
                 if (!data.success) {
                     container.innerHTML = `
@@ -4031,7 +4145,7 @@ def execute(context):
                 // Actualizar contadores
                 for (const [cat, files] of Object.entries(data.categories)) {
                     const countEl = document.getElementById(`count-${cat.toLowerCase()}`);
-                    if (countEl) countEl.textContent = files.length;
+                    if (countEl) countEl.textContent = (data.counts && data.counts[cat] !== undefined) ? data.counts[cat] : files.length;
                 }
                 
                 // Renderizar categorías
@@ -4242,14 +4356,46 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    @app.middleware("http")
+    async def _profile_route(request: Request, call_next):
+        """Atribuir a la ruta HTTP los bloqueos del loop (sólo con el perfilador activo)"""
+        from core.loop_profiler import loop_profiler
+        if not loop_profiler.enabled:
+            return await call_next(request)
+        with loop_profiler.label(f"http:{request.method} {request.url.path}"):
+            return await call_next(request)
+    
     @app.get("/", response_class=HTMLResponse)
     async def index():
         return HTML_TEMPLATE
     
+    async def _ws_chat_stream(websocket: WebSocket, request_id: str, data: dict):
+        """Generar una respuesta y reenviar cada chunk por el websocket"""
+        from core.llm_streaming import stream_chat
+
+        requested_provider = str(data.get("provider") or "").strip().lower()
+        chat_session = f"webui:{data.get('user_id', 'default')}"
+        try:
+            if not _select_chat_provider(requested_provider):
+                await websocket.send_json({"type": "chat_error", "request_id": request_id,
+                                           "error": "No hay provider LLM activo"})
+                return
+            async for chunk in stream_chat(chat_session, str(data.get("message", ""))):
+                await websocket.send_json({"type": "chat_chunk", "request_id": request_id, "text": chunk})
+            await websocket.send_json({"type": "chat_done", "request_id": request_id})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            try:
+                await websocket.send_json({"type": "chat_error", "request_id": request_id, "error": str(e)})
+            except Exception:
+                pass
+
     @app.websocket("/ws")
     async def websocket_endpoint(websocket: WebSocket):
         await websocket.accept()
         ws_connections.append(websocket)
+        chat_tasks: Dict[str, asyncio.Task] = {}
         try:
             await websocket.send_json({"type": "status", "voice_active": ui_state["voice_active"]})
             while True:
@@ -4277,7 +4423,21 @@ def create_app() -> FastAPI:
                     await bus.publish("pc_control.ACTION", {"action": "go_home"}, sender="WebUI")
                 elif data.get("action") == "pc_refresh":
                     await bus.publish("pc_control.ACTION", {"action": "refresh"}, sender="WebUI")
+                elif data.get("action") == "chat_stream":
+                    request_id = str(data.get("request_id") or f"chat-{len(chat_tasks)}-{datetime.now().timestamp()}")
+                    task = asyncio.create_task(_ws_chat_stream(websocket, request_id, data))
+                    chat_tasks[request_id] = task
+                    task.add_done_callback(lambda _t, rid=request_id: chat_tasks.pop(rid, None))
+                elif data.get("action") == "chat_cancel":
+                    task = chat_tasks.get(str(data.get("request_id") or ""))
+                    if task:
+                        task.cancel()
         except WebSocketDisconnect:
+            pass
+        finally:
+            # Cancelar generaciones en curso: nadie va a leer esos chunks
+            for task in list(chat_tasks.values()):
+                task.cancel()
             if websocket in ws_connections:
                 ws_connections.remove(websocket)
     
@@ -4356,159 +4516,100 @@ def create_app() -> FastAPI:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    @app.get("/api/dashboard/status")
-    async def get_dashboard_status():
-        """Obtener estado real del dashboard"""
-        try:
-            from core.SkillVault import vault
-            from core.AgentLifecycleManager import agent_manager
-            from pathlib import Path
-            import psutil
-            
-            # Contar archivos por categoría
-            output_dir = vault.data_dir / "output"
-            files_count = {
-                "imagenes": len(list((output_dir / "Imagenes").glob("*")) if (output_dir / "Imagenes").exists() else []),
-                "texto": len(list((output_dir / "Texto").glob("*")) if (output_dir / "Texto").exists() else []),
-                "video": len(list((output_dir / "Video").glob("*")) if (output_dir / "Video").exists() else []),
-                "audio": len(list((output_dir / "Audio").glob("*")) if (output_dir / "Audio").exists() else []),
-                "documentos": len(list((output_dir / "Documentos").glob("*")) if (output_dir / "Documentos").exists() else []),
-                "trabajos": len(list((output_dir / "Trabajos").glob("*")) if (output_dir / "Trabajos").exists() else []),
-            }
-            total_files = sum(files_count.values())
-            
-            # Contar skills
-            skills = vault.list_user_skills()
-            skills_count = len(skills)
-            
-            # Skills en ejecución
-            running_skills = len(agent_manager.active_agents)
-            
-            # Estado de voz desde ui_state
-            voice_active = ui_state.get("voice_active", False)
-            
-            # Estado de LLM
-            try:
-                from core.SecureLLMGateway import secure_gateway
-                llm_status = secure_gateway.get_user_api_status("default")
-                providers_configured = len([p for p in llm_status.get("providers", {}).values() if p.get("configured")])
-            except:
-                providers_configured = 0
-            
-            # Uso de recursos
-            try:
-                cpu_percent = psutil.cpu_percent(interval=0.1)
-                memory = psutil.virtual_memory()
-                memory_percent = memory.percent
-            except:
-                cpu_percent = 0
-                memory_percent = 0
-            
-            # Últimos eventos (acciones de hoy)
-            try:
-                from datetime import datetime, timedelta
-                today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
-                recent_events = store.get_recent_events(limit=100)
-                today_actions = len([e for e in recent_events if e.get("timestamp", 0) >= today_start])
-            except:
-                today_actions = 0
-            
-            return {
-                "success": True,
-                "voice_active": voice_active,
-                "skills_count": skills_count,
-                "running_skills": running_skills,
-                "files_count": files_count,
-                "total_files": total_files,
-                "providers_configured": providers_configured,
-                "today_actions": today_actions,
-                "system": {
-                    "cpu_percent": cpu_percent,
-                    "memory_percent": memory_percent,
-                    "status": "online"
-                },
-                "timestamp": datetime.now().isoformat()
-            }
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+    @app.on_event("startup")
+    async def _start_dashboard_status():
+        from core.dashboard_status import dashboard_status
+        dashboard_status.add_listener(_broadcast_dashboard_delta)
+        await dashboard_status.ensure_started()
+    
+    @app.on_event("startup")
+    async def _start_watchdog():
+        """Muestreo de recursos en hilo propio y medición del lag del event loop"""
+        from core.SystemWatchdog import watchdog
+        from core.loop_profiler import enabled_by_env, loop_profiler
+        await watchdog.start_monitoring()
+        if enabled_by_env():
+            loop_profiler.enable()
+    
+    @app.on_event("startup")
+    async def _start_job_scheduler():
+        """Ejecutar los trabajos guardados recurrentes a su hora"""
+        from core.job_scheduler import job_scheduler
+        await job_scheduler.start()
+    
+    @app.on_event("startup")
+    async def _preload_local_llm():
+        """Precargar el modelo de Ollama en segundo plano para que el primer chat no espere la carga"""
+        from core.LLMManager import llm_manager
+        config = llm_manager.get_active_config()
+        if config is not None and config.is_local:
+            asyncio.create_task(llm_manager.preload_local_model())
+    
+    async def _broadcast_dashboard_delta(changes: dict):
+        """Empujar cambios del snapshot del dashboard por /ws"""
+        if ws_connections:
+            await broadcast_message({"type": "dashboard_delta", "changes": changes})
     
     @app.get("/api/dashboard/status")
     async def get_dashboard_status():
-        """Obtener estado real del dashboard"""
+        """Obtener estado del dashboard desde el snapshot en memoria"""
         try:
-            from core.SkillVault import vault
-            from core.AgentLifecycleManager import agent_manager
-            from pathlib import Path
-            import psutil
-            from datetime import datetime
-            
-            # Contar archivos por categoría
-            output_dir = vault.data_dir / "output"
-            files_count = {
-                "imagenes": len(list((output_dir / "Imagenes").glob("*")) if (output_dir / "Imagenes").exists() else []),
-                "texto": len(list((output_dir / "Texto").glob("*")) if (output_dir / "Texto").exists() else []),
-                "video": len(list((output_dir / "Video").glob("*")) if (output_dir / "Video").exists() else []),
-                "audio": len(list((output_dir / "Audio").glob("*")) if (output_dir / "Audio").exists() else []),
-                "documentos": len(list((output_dir / "Documentos").glob("*")) if (output_dir / "Documentos").exists() else []),
-                "trabajos": len(list((output_dir / "Trabajos").glob("*")) if (output_dir / "Trabajos").exists() else []),
-            }
-            total_files = sum(files_count.values())
-            
-            # Contar skills
-            skills = vault.list_user_skills()
-            skills_count = len(skills)
-            
-            # Skills en ejecución
-            running_skills = len(agent_manager.active_agents)
-            
-            # Estado de voz desde ui_state
-            voice_active = ui_state.get("voice_active", False)
-            
-            # Estado de LLM
-            try:
-                from core.SecureLLMGateway import secure_gateway
-                llm_status = secure_gateway.get_user_api_status("default")
-                providers_configured = len([p for p in llm_status.get("providers", {}).values() if p.get("configured")])
-            except:
-                providers_configured = 0
-            
-            # Uso de recursos
-            try:
-                cpu_percent = psutil.cpu_percent(interval=0.1)
-                memory = psutil.virtual_memory()
-                memory_percent = memory.percent
-            except:
-                cpu_percent = 0
-                memory_percent = 0
-            
-            # Últimos eventos (acciones de hoy)
-            try:
-                from datetime import datetime
-                today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
-                recent_events = store.get_recent_events(limit=100)
-                today_actions = len([e for e in recent_events if e.get("timestamp", 0) >= today_start])
-            except:
-                today_actions = 0
-            
-            return {
-                "success": True,
-                "voice_active": voice_active,
-                "skills_count": skills_count,
-                "running_skills": running_skills,
-                "files_count": files_count,
-                "total_files": total_files,
-                "providers_configured": providers_configured,
-                "today_actions": today_actions,
-                "system": {
-                    "cpu_percent": cpu_percent,
-                    "memory_percent": memory_percent,
-                    "status": "online"
-                },
-                "timestamp": datetime.now().isoformat()
-            }
+            from core.dashboard_status import dashboard_status
+            await dashboard_status.ensure_started()
+            return dashboard_status.get_snapshot(voice_active=ui_state.get("voice_active", False))
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    @app.get("/api/system/watchdog")
+    async def watchdog_status():
+        """Servicios, recursos muestreados, lag del event loop y heartbeats"""
+        from core.SystemWatchdog import watchdog
+        return {"success": True, **watchdog.get_status_summary()}
+    
+    @app.get("/api/jobs/scheduler")
+    async def job_scheduler_status():
+        """Próximas ejecuciones, misfires y resultados de los trabajos recurrentes"""
+        from core.job_scheduler import job_scheduler
+        return {"success": True, **job_scheduler.get_stats()}
+    
+    @app.get("/api/http/stats")
+    async def http_client_stats():
+        """Peticiones, reintentos, 429 y latencia por proveedor del cliente HTTP compartido"""
+        from core.http_client import http_client
+        return {"success": True, **http_client.get_stats()}
+    
+    @app.get("/api/skills/usage")
+    async def skill_usage_stats(skill: Optional[str] = None):
+        """Percentiles de CPU, pico de RSS, E/S y duración por skill, y estados de salida"""
+        from core.execution_accounting import execution_accounting
+        if skill:
+            stats = execution_accounting.get_skill_stats(skill)
+            if stats is None:
+                return {"success": False, "error": f"Sin ejecuciones registradas de {skill}"}
+            return {"success": True, "skill": skill, **stats}
+        return {"success": True, "skills": execution_accounting.get_stats()}
+    
+    @app.get("/api/debug/loop-profiler")
+    async def loop_profiler_report(top: int = 20):
+        """Lag del loop, callbacks lentos (con pila y responsable) y latencia por suscriptor"""
+        from core.loop_profiler import loop_profiler
+        return {"success": True, **loop_profiler.get_report(top=max(1, min(top, 100)))}
+    
+    @app.post("/api/debug/loop-profiler")
+    async def loop_profiler_control(data: dict):
+        """Activar/desactivar/reiniciar el perfilador: {"enabled": bool, "slow_callback_ms": n, "reset": bool}"""
+        from core.loop_profiler import loop_profiler
+        if data.get("reset"):
+            loop_profiler.reset()
+        if "enabled" in data:
+            if data["enabled"]:
+                loop_profiler.enable(slow_callback_ms=data.get("slow_callback_ms"))
+            else:
+                loop_profiler.disable()
+        elif data.get("slow_callback_ms") is not None:
+            loop_profiler.slow_callback_ms = float(data["slow_callback_ms"])
+        return {"success": True, "enabled": loop_profiler.enabled, "slow_callback_ms": loop_profiler.slow_callback_ms}
+    
     @app.get("/api/events")
     async def api_events(limit: int = 80):
         items = store.get_recent_events(limit=max(1, min(limit, 500)))
@@ -4577,43 +4678,29 @@ def create_app() -> FastAPI:
             return {"success": False, "error": str(e)}
     
     @app.post("/api/chat")
-    async def chat_endpoint(data: dict):
+    async def chat_endpoint(request: Request, data: dict):
         """Endpoint para chat con integración segura de LLMs"""
         try:
             # Nuevo flujo: si hay provider configurado/activo, usar LLMManager directamente
-            from core.LLMManager import llm_manager, ProviderType
-            from core.llm_extension import credential_store
+            from core.LLMManager import llm_manager
             from core.SecureLLMGateway import secure_gateway
-            
+            from core.llm_streaming import stream_chat
+
             user_id = data.get("user_id", "default")
             message = data.get("message", "")
             session_id = data.get("session_id")
             requested_provider = str(data.get("provider") or "").strip().lower()
 
-            provider_map = {
-                "ollama": ProviderType.OLLAMA,
-                "groq": ProviderType.GROQ,
-                "openai": ProviderType.OPENAI,
-                "gemini": ProviderType.GEMINI,
-            }
-
-            # Si el frontend envía provider (ej groq) y hay key, activarlo para esta respuesta.
-            if requested_provider in {"groq", "openai", "gemini"} and credential_store.has_key(requested_provider):
-                ptype = provider_map[requested_provider]
-                try:
-                    llm_manager.set_api_key(ptype, credential_store.get_api_key(requested_provider) or "")
-                    llm_manager.set_active_provider(ptype)
-                except Exception:
-                    pass
+            if data.get("stream"):
+                return await chat_stream_endpoint(request, data)
 
-            active = llm_manager.active_provider
-            active_is_callable = active is not None and (llm_manager.get_active_config() is not None)
-
-            if active_is_callable and (requested_provider or credential_store.has_key("groq") or credential_store.has_key("openai") or credential_store.has_key("gemini")):
+            if _select_chat_provider(requested_provider):
                 # Generar respuesta con el provider activo
-                out = ""
-                async for chunk in llm_manager.generate(prompt=str(message), system="", stream=False):
-                    out += chunk
+                active = llm_manager.active_provider
+                parts = []
+                async for chunk in stream_chat(f"webui:{user_id}", str(message), stream=False):
+                    parts.append(chunk)
+                out = "".join(parts)
                 if out.strip():
                     return {"success": True, "response": out, "used_api": True, "provider": (active.value if active else None)}
 
@@ -4657,6 +4744,110 @@ def create_app() -> FastAPI:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    @app.post("/api/chat/stream")
+    async def chat_stream_endpoint(request: Request, data: dict):
+        """Chat en streaming (SSE): cada chunk del LLM se envía en cuanto llega"""
+        from fastapi.responses import StreamingResponse
+        from core.llm_streaming import stream_chat
+
+        message = str(data.get("message", ""))
+        chat_session = f"webui:{data.get('user_id', 'default')}"
+        requested_provider = str(data.get("provider") or "").strip().lower()
+
+        def _sse(payload: dict) -> str:
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def event_source():
+            if not _select_chat_provider(requested_provider):
+                yield _sse({"type": "error", "error": "No hay provider LLM activo"})
+                return
+            gen = stream_chat(chat_session, message)
+            try:
+                async for chunk in gen:
+                    # Cancelar la generación si el cliente cerró la conexión
+                    if await request.is_disconnected():
+                        logger.info("Cliente desconectado: generación cancelada")
+                        return
+                    yield _sse({"type": "chunk", "text": chunk})
+                yield _sse({"type": "done"})
+            except Exception as e:
+                yield _sse({"type": "error", "error": str(e)})
+            finally:
+                await gen.aclose()
+
+        return StreamingResponse(
+            event_source(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.get("/api/llm/metrics")
+    async def llm_metrics():
+        """Latencia de primer token y total por provider y tamaño de los prompts"""
+        from core.llm_streaming import stream_metrics
+        from core.prompt_builder import prompt_builder
+        return {
+            "success": True,
+            "providers": stream_metrics.get_stats(),
+            "prompts": prompt_builder.get_stats(),
+        }
+
+    @app.get("/api/llm/cache")
+    async def llm_cache_status():
+        """Estado de la caché de completions y coste ahorrado"""
+        from core.LLMManager import llm_manager
+        from core.SecureLLMGateway import secure_gateway
+        return {
+            "success": True,
+            "settings": llm_manager.cache_settings,
+            "cache": llm_manager.cache.get_stats(),
+            "usage": secure_gateway.get_cache_usage(),
+        }
+
+    @app.post("/api/llm/cache")
+    async def llm_cache_config(data: dict):
+        """Configurar la caché: {enabled?, semantic?, similarity?, ttl_hours?, max_mb?, clear?}"""
+        from core.LLMManager import llm_manager
+        if data.get("clear"):
+            llm_manager.cache.clear()
+        settings = llm_manager.set_cache_settings(**{k: v for k, v in data.items() if k != "clear"})
+        return {"success": True, "settings": settings, "cache": llm_manager.cache.get_stats()}
+
+    @app.get("/api/llm/ollama")
+    async def llm_ollama_status():
+        """Cola y slots del planificador de Ollama"""
+        from core.LLMManager import llm_manager
+        return {"success": True, **llm_manager.ollama_scheduler.get_stats()}
+
+    @app.post("/api/llm/ollama")
+    async def llm_ollama_action(data: dict):
+        """{action: preload|unload}"""
+        from core.LLMManager import llm_manager
+        action = str(data.get("action") or "").strip().lower()
+        if action == "preload":
+            ok = await llm_manager.preload_local_model()
+        elif action == "unload":
+            ok = await llm_manager.unload_local_model()
+        else:
+            return {"success": False, "error": "Acción inválida (preload|unload)"}
+        return {"success": ok, **llm_manager.ollama_scheduler.get_stats()}
+
+    @app.get("/api/llm/router")
+    async def llm_router_status():
+        """Modo del router multi-provider y estadísticas EWMA por provider"""
+        from core.LLMManager import llm_manager
+        return {"success": True, **llm_manager.router.get_stats()}
+
+    @app.post("/api/llm/router")
+    async def llm_router_config(data: dict):
+        """Configurar el router: {mode: single|failover|hedge|race, providers?, hedge_delay_ms?}"""
+        from core.LLMManager import llm_manager, ROUTING_MODES
+        mode = str(data.get("mode") or "").strip().lower()
+        ok = llm_manager.set_routing(mode, providers=data.get("providers"), hedge_delay_ms=data.get("hedge_delay_ms"))
+        if not ok:
+            return {"success": False, "error": f"Modo inválido. Opciones: {', '.join(ROUTING_MODES)}"}
+        return {"success": True, **llm_manager.router.get_stats()}
+
     @app.post("/api/chat/approve")
     async def chat_approve(data: dict):
         """Aprobar una sesión de chat pendiente"""
@@ -5131,47 +5322,49 @@ def create_app() -> FastAPI:
             return {"success": False, "error": str(e)}
     
     @app.get("/api/output/files")
-    async def list_output_files():
-        """Listar archivos generados por el usuario organizados por categoría (dinámico)"""
+    async def list_output_files(
+        category: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        cursor: Optional[str] = None,
+        limit: int = 200,
+        stream: bool = False,
+    ):
+        """
+        Listar archivos generados por el usuario organizados por categoría (dinámico).
+        Paginado por cursor (next_cursor), filtrable por categoría y fecha (epoch),
+        y con stream=true devuelve NDJSON con todos los archivos filtrados.
+        """
         try:
             from core.SkillVault import vault
-            from pathlib import Path
+            from core.output_index import get_output_index
             
             output_base = vault.data_dir / "output"
+            index = get_output_index(output_base)
             
-            # Descubrir categorías dinámicamente desde carpetas existentes
-            categories = {}
+            if stream:
+                from fastapi.responses import StreamingResponse
+                return StreamingResponse(
+                    index.aiter_ndjson(category=category, since=since, until=until),
+                    media_type="application/x-ndjson"
+                )
             
-            if output_base.exists():
-                for cat_path in output_base.iterdir():
-                    if cat_path.is_dir():
-                        category_name = cat_path.name
-                        categories[category_name] = []
-                        
-                        for f in cat_path.iterdir():
-                            if f.is_file():
-                                try:
-                                    stat = f.stat()
-                                    categories[category_name].append({
-                                        "name": f.name,
-                                        "path": str(f),
-                                        "size": stat.st_size,
-                                        "created": stat.st_mtime,
-                                        "category": category_name
-                                    })
-                                except:
-                                    pass
-            
-            # Ordenar por fecha de creación (más reciente primero)
-            for cat in categories:
-                categories[cat].sort(key=lambda x: x["created"], reverse=True)
-            
-            total_files = sum(len(files) for files in categories.values())
+            page = await index.aquery(
+                category=category, since=since, until=until, cursor=cursor, limit=limit
+            )
+            
+            # Agrupar la página por categoría (formato que consume la UI)
+            categories = {cat: [] for cat in page["counts"]}
+            for item in page["items"]:
+                categories.setdefault(item["category"], []).append(item)
             
             return {
                 "success": True,
                 "categories": categories,
-                "total_files": total_files,
+                "items": page["items"],
+                "counts": page["counts"],
+                "next_cursor": page["next_cursor"],
+                "total_files": sum(page["counts"].values()),
                 "output_path": str(output_base)
             }
         except Exception as e:
@@ -5202,6 +5395,22 @@ def create_app() -> FastAPI:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    @app.post("/api/works/upload")
+    async def upload_work(request: Request, filename: str, description: str = ""):
+        """Subir un archivo como trabajo (cuerpo binario en crudo, ?filename=...), hasheado mientras llega"""
+        from pathlib import Path
+        from core.file_manager import works_manager
+
+        safe_filename = Path(filename).name
+        if not safe_filename:
+            return {"success": False, "error": "Nombre de archivo no válido"}
+        work = await works_manager.save_upload(
+            request.stream(), safe_filename, "upload", "upload", description=description
+        )
+        if work is None:
+            return {"success": False, "error": "No se pudo guardar el archivo"}
+        return {"success": True, "work": work.to_dict()}
+    
     @app.delete("/api/output/{category}/{filename}")
     async def delete_output_file(category: str, filename: str):
         """Eliminar un archivo generado"""
@@ -5218,6 +5427,11 @@ def create_app() -> FastAPI:
                 return {"success": False, "error": "Archivo no encontrado"}
             
             file_path.unlink()
+            try:
+                from core.output_index import get_output_index
+                get_output_index(vault.data_dir / "output").invalidate(safe_category)
+            except Exception:
+                pass
             return {"success": True, "message": f"Archivo '{safe_filename}' eliminado"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -11,8 +11,21 @@ from pathlib import Path
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
 
+from core.outbound_dispatcher import RetryLater, get_dispatcher
+
 logger = logging.getLogger("WhatsAppBot")
 
+# Códigos de error de Meta por límite de envío -> segundos a esperar
+RATE_LIMIT_ERRORS = {
+    4: 60.0,         # límite de llamadas de la app
+    80007: 60.0,     # límite de la cuenta de WhatsApp Business
+    130429: 1.0,     # throughput del número
+    131056: 6.0,     # demasiados mensajes al mismo destinatario
+}
+
+# Texto del log de envío correcto por tipo (concordancia de género)
+SENT_LABELS = {"Mensaje": "Mensaje enviado", "Plantilla": "Plantilla enviada"}
+
 @dataclass
 class WhatsAppMessage:
     """Mensaje de WhatsApp"""
@@ -39,6 +52,7 @@ class WhatsAppBotService:
         self._session: Optional[aiohttp.ClientSession] = None
         self._webhook_running = False
         self._handlers: List[callable] = []
+        self._outbound = get_dispatcher("whatsapp")
         
     async def _get_session(self) -> aiohttp.ClientSession:
         """Obtener o crear sesión HTTP"""
@@ -74,22 +88,7 @@ class WhatsAppBotService:
             }
         }
         
-        try:
-            session = await self._get_session()
-            async with session.post(url, headers=headers, json=payload) as response:
-                result = await response.json()
-                
-                if response.status == 200:
-                    logger.info(f"✅ Mensaje enviado a {to_number}")
-                    return {"success": True, "data": result}
-                else:
-                    error_msg = result.get("error", {}).get("message", "Error desconocido")
-                    logger.error(f"❌ Error enviando mensaje: {error_msg}")
-                    return {"success": False, "error": error_msg}
-                    
-        except Exception as e:
-            logger.error(f"❌ Error enviando mensaje: {e}")
-            return {"success": False, "error": str(e)}
+        return await self._dispatch(to_number, url, headers, payload, "Mensaje")
     
     async def send_template_message(self, to_number: str, template_name: str, 
                                    language_code: str = "es",
@@ -126,23 +125,40 @@ class WhatsAppBotService:
         if components:
             payload["template"]["components"] = components
         
+        return await self._dispatch(to_number, url, headers, payload, "Plantilla")
+    
+    async def _dispatch(self, to_number: str, url: str, headers: Dict[str, str],
+                        payload: Dict[str, Any], kind: str) -> Dict[str, Any]:
+        """Enviar por el despachador saliente (límites, reintentos de 429)"""
         try:
-            session = await self._get_session()
-            async with session.post(url, headers=headers, json=payload) as response:
-                result = await response.json()
-                
-                if response.status == 200:
-                    logger.info(f"✅ Plantilla enviada a {to_number}")
-                    return {"success": True, "data": result}
-                else:
-                    error_msg = result.get("error", {}).get("message", "Error desconocido")
-                    logger.error(f"❌ Error enviando plantilla: {error_msg}")
-                    return {"success": False, "error": error_msg}
-                    
+            return await self._outbound.submit(
+                to_number, lambda: self._post_message(to_number, url, headers, payload, kind)
+            )
         except Exception as e:
-            logger.error(f"❌ Error enviando plantilla: {e}")
+            logger.error(f"❌ Error enviando {kind.lower()}: {e}")
             return {"success": False, "error": str(e)}
     
+    async def _post_message(self, to_number: str, url: str, headers: Dict[str, str],
+                            payload: Dict[str, Any], kind: str) -> Dict[str, Any]:
+        session = await self._get_session()
+        async with session.post(url, headers=headers, json=payload) as response:
+            result = await response.json()
+            
+            if response.status == 200:
+                logger.info(f"✅ {SENT_LABELS.get(kind, kind)} a {to_number}")
+                return {"success": True, "data": result}
+            
+            error = result.get("error", {})
+            code = error.get("code")
+            if response.status == 429 or code in RATE_LIMIT_ERRORS:
+                retry_after = response.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else RATE_LIMIT_ERRORS.get(code, 1.0)
+                raise RetryLater(delay, error.get("message", "Rate limit"))
+            
+            error_msg = error.get("message", "Error desconocido")
+            logger.error(f"❌ Error enviando {kind.lower()}: {error_msg}")
+            return {"success": False, "error": error_msg}
+    
     async def get_business_profile(self) -> Dict[str, Any]:
         """Obtener perfil de negocio"""
         url = f"{self.BASE_URL}/{self.API_VERSION}/{self.phone_number_id}/whatsapp_business_profile"
@@ -3,15 +3,26 @@ MININA v3.0 - Asana Manager
 API para operaciones con Asana (tareas, proyectos, workspaces)
 """
 
-import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+from core.pagination import DEFAULT_LIST_LIMIT, CursorParam, PageError, Paginator, page_cache
 
-class AsanaManager:
+http = provider_http("asana")
+
+WORKSPACE_FIELDS = {"id": "gid", "name": "name", "is_organization": "is_organization"}
+PROJECT_FIELDS = {"id": "gid", "name": "name", "archived": "archived", "color": "color", "notes": "notes"}
+TASK_FIELDS = {"id": "gid", "name": "name", "completed": "completed", "due_on": "due_on"}
+# Listados cacheados que cambian al crear/editar/borrar una tarea
+TASK_LISTS = r"/tasks$"
+
+
+class AsanaManager(AsyncManagerMixin):
     """
     Manager de Asana para MININA
     
@@ -80,7 +91,7 @@ class AsanaManager:
         
         try:
             url = f"{self.API_BASE_URL}/users/me"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -96,67 +107,63 @@ class AsanaManager:
         """Verificar si está configurado"""
         return bool(self.access_token)
     
+    def _pages(self, url: str, fields: Dict[str, str]) -> Paginator:
+        """Listado paginado por `offset`, pidiendo sólo los campos usados (opt_fields)"""
+        opt_fields = ",".join(path for path in fields.values() if path != "gid")
+        return Paginator(http, url, style=CursorParam("offset", "next_page.offset", size="limit"),
+                         items="data", fields=fields, params={"opt_fields": opt_fields},
+                         headers=self._get_headers(), page_size=100)
+    
+    def _projects_url(self, workspace_id: Optional[str]) -> str:
+        if workspace_id:
+            return f"{self.API_BASE_URL}/workspaces/{workspace_id}/projects"
+        return f"{self.API_BASE_URL}/projects"
+    
+    def iter_projects(self, workspace_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar (async) todos los proyectos, página a página"""
+        return self._pages(self._projects_url(workspace_id), PROJECT_FIELDS).__aiter__()
+    
+    def iter_project_tasks(self, project_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar (async) todas las tareas de un proyecto"""
+        return self._pages(f"{self.API_BASE_URL}/projects/{project_id}/tasks", TASK_FIELDS).__aiter__()
+    
     def get_workspaces(self) -> Dict[str, Any]:
         """Obtener workspaces del usuario"""
         if not self.is_configured():
             return {"success": False, "error": "Asana no configurado"}
         
         try:
-            url = f"{self.API_BASE_URL}/workspaces"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                workspaces = result.get("data", [])
-                return {
-                    "success": True,
-                    "workspaces": [
-                        {
-                            "id": w["gid"],
-                            "name": w["name"],
-                            "is_organization": w.get("is_organization", False)
-                        }
-                        for w in workspaces
-                    ]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            workspaces = self._pages(f"{self.API_BASE_URL}/workspaces", WORKSPACE_FIELDS).collect(None)
+            return {
+                "success": True,
+                "workspaces": [{**w, "is_organization": bool(w["is_organization"])} for w in workspaces]
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
-    def get_projects(self, workspace_id: Optional[str] = None) -> Dict[str, Any]:
-        """Obtener proyectos"""
+    def get_projects(self, workspace_id: Optional[str] = None,
+                     limit: Optional[int] = DEFAULT_LIST_LIMIT) -> Dict[str, Any]:
+        """Obtener proyectos (hasta `limit`; None = todos)"""
         if not self.is_configured():
             return {"success": False, "error": "Asana no configurado"}
         
         try:
-            if workspace_id:
-                url = f"{self.API_BASE_URL}/workspaces/{workspace_id}/projects"
-            else:
-                url = f"{self.API_BASE_URL}/projects"
-            
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                projects = result.get("data", [])
-                return {
-                    "success": True,
-                    "projects": [
-                        {
-                            "id": p["gid"],
-                            "name": p["name"],
-                            "archived": p.get("archived", False),
-                            "color": p.get("color"),
-                            "notes": p.get("notes", "")[:100]  # Primeros 100 caracteres
-                        }
-                        for p in projects
-                    ]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            projects = self._pages(self._projects_url(workspace_id), PROJECT_FIELDS).collect(limit)
+            return {
+                "success": True,
+                "projects": [
+                    {
+                        **p,
+                        "archived": bool(p["archived"]),
+                        "notes": (p["notes"] or "")[:100]  # Primeros 100 caracteres
+                    }
+                    for p in projects
+                ]
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -192,9 +199,10 @@ class AsanaManager:
             if notes:
                 data["data"]["notes"] = notes
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 201:
+                page_cache.invalidate(self.API_BASE_URL, pattern=TASK_LISTS)
                 result = response.json()
                 task = result.get("data", {})
                 return {
@@ -216,7 +224,7 @@ class AsanaManager:
         
         try:
             url = f"{self.API_BASE_URL}/tasks/{task_id}"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -267,9 +275,10 @@ class AsanaManager:
             if completed is not None:
                 data["data"]["completed"] = completed
             
-            response = requests.put(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.put(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 200:
+                page_cache.invalidate(self.API_BASE_URL, pattern=TASK_LISTS)
                 result = response.json()
                 task = result.get("data", {})
                 return {
@@ -291,9 +300,10 @@ class AsanaManager:
         
         try:
             url = f"{self.API_BASE_URL}/tasks/{task_id}"
-            response = requests.delete(url, headers=self._get_headers(), timeout=30)
+            response = http.delete(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 200:
+                page_cache.invalidate(self.API_BASE_URL, pattern=TASK_LISTS)
                 return {
                     "success": True,
                     "message": f"Tarea {task_id} eliminada"
@@ -304,65 +314,36 @@ class AsanaManager:
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
-    def get_project_tasks(self, project_id: str) -> Dict[str, Any]:
-        """Obtener tareas de un proyecto"""
+    def get_project_tasks(self, project_id: str, limit: Optional[int] = DEFAULT_LIST_LIMIT) -> Dict[str, Any]:
+        """Obtener tareas de un proyecto (hasta `limit`; None = todas)"""
         if not self.is_configured():
             return {"success": False, "error": "Asana no configurado"}
         
         try:
-            url = f"{self.API_BASE_URL}/projects/{project_id}/tasks"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                tasks = result.get("data", [])
-                return {
-                    "success": True,
-                    "tasks": [
-                        {
-                            "id": t["gid"],
-                            "name": t["name"],
-                            "completed": t.get("completed", False),
-                            "due_on": t.get("due_on")
-                        }
-                        for t in tasks
-                    ]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            tasks = self._pages(f"{self.API_BASE_URL}/projects/{project_id}/tasks", TASK_FIELDS).collect(limit)
+            return {
+                "success": True,
+                "tasks": [{**t, "completed": bool(t["completed"])} for t in tasks]
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
-    def get_user_tasks(self, user_id: str = "me") -> Dict[str, Any]:
-        """Obtener tareas asignadas a un usuario"""
+    def get_user_tasks(self, user_id: str = "me", limit: Optional[int] = DEFAULT_LIST_LIMIT) -> Dict[str, Any]:
+        """Obtener tareas asignadas a un usuario (hasta `limit`; None = todas)"""
         if not self.is_configured():
             return {"success": False, "error": "Asana no configurado"}
         
         try:
-            url = f"{self.API_BASE_URL}/users/{user_id}/tasks"
-            params = {"opt_fields": "name,completed,due_on,projects.name"}
-            response = requests.get(url, headers=self._get_headers(), params=params, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                tasks = result.get("data", [])
-                return {
-                    "success": True,
-                    "tasks": [
-                        {
-                            "id": t["gid"],
-                            "name": t["name"],
-                            "completed": t.get("completed", False),
-                            "due_on": t.get("due_on")
-                        }
-                        for t in tasks
-                    ],
-                    "total": len(tasks)
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            tasks = self._pages(f"{self.API_BASE_URL}/users/{user_id}/tasks", TASK_FIELDS).collect(limit)
+            return {
+                "success": True,
+                "tasks": [{**t, "completed": bool(t["completed"])} for t in tasks],
+                "total": len(tasks)
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -375,4 +356,4 @@ class AsanaManager:
 
 
 # Singleton
-asana_manager = AsanaManager()
+asana_manager = lazy_service("asana_manager", AsanaManager)
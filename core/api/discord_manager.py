@@ -3,15 +3,19 @@ MININA v3.0 - Discord Manager
 API para operaciones con Discord (mensajes, canales, usuarios)
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
 
-class DiscordManager:
+http = provider_http("discord")
+
+
+class DiscordManager(AsyncManagerMixin):
     """
     Manager de Discord para MININA
     
@@ -81,7 +85,7 @@ class DiscordManager:
         
         try:
             url = f"{self.API_BASE_URL}/users/@me"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -106,7 +110,7 @@ class DiscordManager:
             url = f"{self.API_BASE_URL}/channels/{channel_id}/messages"
             data = {"content": content}
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -133,7 +137,7 @@ class DiscordManager:
             url = f"{self.API_BASE_URL}/channels/{channel_id}/messages"
             params = {"limit": min(limit, 100)}
             
-            response = requests.get(url, headers=self._get_headers(), params=params, timeout=30)
+            response = http.get(url, headers=self._get_headers(), params=params, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -164,7 +168,7 @@ class DiscordManager:
         
         try:
             url = f"{self.API_BASE_URL}/guilds/{guild_id}/channels"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -197,7 +201,7 @@ class DiscordManager:
             url = f"{self.API_BASE_URL}/users/@me/channels"
             data = {"recipient_id": user_id}
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -220,7 +224,7 @@ class DiscordManager:
         
         try:
             url = f"{self.API_BASE_URL}/users/{user_id}"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -258,4 +262,4 @@ class DiscordManager:
 
 
 # Singleton
-discord_manager = DiscordManager()
+discord_manager = lazy_service("discord_manager", DiscordManager)
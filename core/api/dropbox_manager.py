@@ -3,13 +3,17 @@ MININA v3.0 - Dropbox Manager
 API para operaciones con Dropbox (archivos, carpetas, compartir)
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+
+http = provider_http("dropbox")
+
 
 @dataclass
 class DropboxFile:
@@ -23,7 +27,7 @@ class DropboxFile:
     shared_link: Optional[str] = None
 
 
-class DropboxManager:
+class DropboxManager(AsyncManagerMixin):
     """
     Manager de Dropbox para MININA
     
@@ -93,7 +97,7 @@ class DropboxManager:
         
         try:
             headers = self._get_headers()
-            response = requests.post(
+            response = http.post(
                 f"{self.API_BASE_URL}/users/get_current_account",
                 headers=headers,
                 timeout=30
@@ -131,7 +135,7 @@ class DropboxManager:
                 "recursive": recursive
             }
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -189,7 +193,7 @@ class DropboxManager:
                 "autorename": True
             })
             
-            response = requests.post(url, headers=headers, data=file_data, timeout=60)
+            response = http.post(url, headers=headers, data=file_data, timeout=60)
             
             if response.status_code == 200:
                 result = response.json()
@@ -220,7 +224,7 @@ class DropboxManager:
             headers = self._get_headers(content_type=None)
             headers["Dropbox-API-Arg"] = json.dumps({"path": dropbox_path})
             
-            response = requests.post(url, headers=headers, timeout=60)
+            response = http.post(url, headers=headers, timeout=60)
             
             if response.status_code == 200:
                 # Guardar archivo
@@ -248,7 +252,7 @@ class DropboxManager:
             url = f"{self.API_BASE_URL}/files/create_folder_v2"
             data = {"path": path, "autorename": False}
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -274,7 +278,7 @@ class DropboxManager:
             url = f"{self.API_BASE_URL}/files/delete_v2"
             data = {"path": path}
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 200:
                 return {
@@ -301,7 +305,7 @@ class DropboxManager:
                 }
             }
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -325,4 +329,4 @@ class DropboxManager:
 
 
 # Singleton
-dropbox_manager = DropboxManager()
+dropbox_manager = lazy_service("dropbox_manager", DropboxManager)
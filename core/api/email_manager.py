@@ -14,6 +14,8 @@ from pathlib import Path
 import json
 from datetime import datetime
 
+from core.lazy_services import lazy_service
+
 
 @dataclass
 class EmailConfig:
@@ -361,4 +363,4 @@ class EmailManager:
 
 
 # Singleton para uso global
-email_manager = EmailManager()
+email_manager = lazy_service("email_manager", EmailManager)
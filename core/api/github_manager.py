@@ -3,13 +3,27 @@ MININA v3.0 - GitHub Manager
 API para operaciones con GitHub (repos, issues, PRs, commits)
 """
 
-import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+from core.pagination import DEFAULT_LIST_LIMIT, LinkHeader, PageError, Paginator, page_cache
+
+http = provider_http("github")
+
+REPO_FIELDS = {"name": "name", "full_name": "full_name", "url": "html_url"}
+ISSUE_FIELDS = {"number": "number", "title": "title", "state": "state", "url": "html_url"}
+COMMIT_FIELDS = {
+    "sha": "sha",
+    "message": "commit.message",
+    "author": "commit.author.name",
+    "date": "commit.author.date",
+}
+
 
 @dataclass
 class GitHubIssue:
@@ -23,7 +37,7 @@ class GitHubIssue:
     url: str
 
 
-class GitHubManager:
+class GitHubManager(AsyncManagerMixin):
     """
     Manager de GitHub para MININA
     
@@ -99,7 +113,7 @@ class GitHubManager:
                 "Authorization": f"token {self.token}",
                 "Accept": "application/vnd.github.v3+json"
             }
-            response = requests.get(f"{self.API_BASE_URL}/user", headers=headers, timeout=30)
+            response = http.get(f"{self.API_BASE_URL}/user", headers=headers, timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -116,57 +130,50 @@ class GitHubManager:
             "User-Agent": "MININA-App"
         }
     
-    def list_repos(self, org: Optional[str] = None) -> Dict[str, Any]:
-        """Listar repositorios"""
+    def _pages(self, url: str, fields: Dict[str, str], **params) -> Paginator:
+        """Listado paginado por cabecera Link, con ETag (un 304 no gasta cuota)"""
+        return Paginator(http, url, style=LinkHeader(), fields=fields, params=params,
+                         headers=self._get_headers(), page_size=100)
+    
+    def _repos_url(self, org: Optional[str]) -> str:
+        if org:
+            return f"{self.API_BASE_URL}/orgs/{org}/repos"
+        return f"{self.API_BASE_URL}/user/repos"
+    
+    def iter_repos(self, org: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar (async) todos los repositorios, página a página"""
+        return self._pages(self._repos_url(org), REPO_FIELDS).__aiter__()
+    
+    def iter_issues(self, owner: str, repo: str, state: str = "open") -> AsyncIterator[Dict[str, Any]]:
+        """Iterar (async) todas las issues de un repositorio"""
+        url = f"{self.API_BASE_URL}/repos/{owner}/{repo}/issues"
+        return self._pages(url, ISSUE_FIELDS, state=state).__aiter__()
+    
+    def list_repos(self, org: Optional[str] = None, limit: Optional[int] = DEFAULT_LIST_LIMIT) -> Dict[str, Any]:
+        """Listar repositorios (hasta `limit`; None = todos)"""
         if not self.is_configured():
             return {"success": False, "error": "GitHub no configurado"}
         
         try:
-            if org:
-                url = f"{self.API_BASE_URL}/orgs/{org}/repos"
-            else:
-                url = f"{self.API_BASE_URL}/user/repos"
-            
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
-            
-            if response.status_code == 200:
-                repos = response.json()
-                return {
-                    "success": True,
-                    "repos": [{"name": r["name"], "full_name": r["full_name"], "url": r["html_url"]} for r in repos]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            repos = self._pages(self._repos_url(org), REPO_FIELDS).collect(limit)
+            return {"success": True, "repos": repos}
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
-    def list_issues(self, owner: str, repo: str, state: str = "open") -> Dict[str, Any]:
-        """Listar issues de un repositorio"""
+    def list_issues(self, owner: str, repo: str, state: str = "open",
+                    limit: Optional[int] = DEFAULT_LIST_LIMIT) -> Dict[str, Any]:
+        """Listar issues de un repositorio (hasta `limit`; None = todas)"""
         if not self.is_configured():
             return {"success": False, "error": "GitHub no configurado"}
         
         try:
-            url = f"{self.API_BASE_URL}/repos/{owner}/{repo}/issues?state={state}"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
-            
-            if response.status_code == 200:
-                issues = response.json()
-                return {
-                    "success": True,
-                    "issues": [
-                        {
-                            "number": i["number"],
-                            "title": i["title"],
-                            "state": i["state"],
-                            "url": i["html_url"]
-                        }
-                        for i in issues
-                    ]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            url = f"{self.API_BASE_URL}/repos/{owner}/{repo}/issues"
+            issues = self._pages(url, ISSUE_FIELDS, state=state).collect(limit)
+            return {"success": True, "issues": issues}
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -191,9 +198,10 @@ class GitHubManager:
             if labels:
                 data["labels"] = labels
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 201:
+                page_cache.invalidate(url)
                 issue = response.json()
                 return {
                     "success": True,
@@ -229,7 +237,7 @@ class GitHubManager:
                 "body": body
             }
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 201:
                 pr = response.json()
@@ -245,32 +253,24 @@ class GitHubManager:
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
-    def list_commits(self, owner: str, repo: str, branch: str = "main") -> Dict[str, Any]:
-        """Listar commits"""
+    def list_commits(self, owner: str, repo: str, branch: str = "main", limit: Optional[int] = 10) -> Dict[str, Any]:
+        """Listar los últimos `limit` commits de una rama"""
         if not self.is_configured():
             return {"success": False, "error": "GitHub no configurado"}
         
         try:
-            url = f"{self.API_BASE_URL}/repos/{owner}/{repo}/commits?sha={branch}"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
-            
-            if response.status_code == 200:
-                commits = response.json()
-                return {
-                    "success": True,
-                    "commits": [
-                        {
-                            "sha": c["sha"][:7],
-                            "message": c["commit"]["message"],
-                            "author": c["commit"]["author"]["name"],
-                            "date": c["commit"]["author"]["date"]
-                        }
-                        for c in commits[:10]
-                    ]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            url = f"{self.API_BASE_URL}/repos/{owner}/{repo}/commits"
+            pages = self._pages(url, COMMIT_FIELDS, sha=branch)
+            # Sólo se piden las páginas necesarias para `limit`
+            if limit is not None:
+                pages.page_size = max(1, min(limit, 100))
+            commits = pages.collect(limit)
+            return {
+                "success": True,
+                "commits": [{**c, "sha": (c["sha"] or "")[:7]} for c in commits]
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -284,4 +284,4 @@ class GitHubManager:
 
 
 # Singleton
-github_manager = GitHubManager()
+github_manager = lazy_service("github_manager", GitHubManager)
@@ -9,6 +9,8 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 from datetime import datetime, timedelta
 
+from core.lazy_services import lazy_service
+
 
 @dataclass
 class CalendarEvent:
@@ -260,4 +262,4 @@ class GoogleCalendarManager:
 
 
 # Singleton
-google_calendar_manager = GoogleCalendarManager()
+google_calendar_manager = lazy_service("google_calendar_manager", GoogleCalendarManager)
@@ -9,6 +9,8 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 from datetime import datetime
 
+from core.lazy_services import lazy_service
+
 
 @dataclass
 class DriveFile:
@@ -286,4 +288,4 @@ class GoogleDriveManager:
 
 
 # Singleton
-google_drive_manager = GoogleDriveManager()
+google_drive_manager = lazy_service("google_drive_manager", GoogleDriveManager)
@@ -3,13 +3,17 @@ MININA v3.0 - Google Search Manager
 API para búsquedas web usando Google Custom Search API
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, HttpTimeout, provider_http
+from core.lazy_services import lazy_service
+
+http = provider_http("google_search")
+
 
 @dataclass
 class SearchResult:
@@ -20,7 +24,7 @@ class SearchResult:
     display_url: str
 
 
-class GoogleSearchManager:
+class GoogleSearchManager(AsyncManagerMixin):
     """
     Manager de búsqueda Google para MININA
     
@@ -134,7 +138,7 @@ class GoogleSearchManager:
                 "safe": safe
             }
             
-            response = requests.get(self.API_BASE_URL, params=params, timeout=30)
+            response = http.get(self.API_BASE_URL, params=params, timeout=30)
             
             if response.status_code != 200:
                 error_data = response.json() if response.text else {}
@@ -170,7 +174,7 @@ class GoogleSearchManager:
                 "search_time": search_info.get("searchTime", 0)
             }
             
-        except requests.exceptions.Timeout:
+        except HttpTimeout:
             return {
                 "success": False,
                 "error": "Timeout esperando respuesta de Google Search API"
@@ -202,7 +206,7 @@ class GoogleSearchManager:
                 "searchType": "image"
             }
             
-            response = requests.get(self.API_BASE_URL, params=params, timeout=30)
+            response = http.get(self.API_BASE_URL, params=params, timeout=30)
             
             if response.status_code != 200:
                 error_data = response.json() if response.text else {}
@@ -249,4 +253,4 @@ class GoogleSearchManager:
 
 
 # Singleton
-google_search_manager = GoogleSearchManager()
+google_search_manager = lazy_service("google_search_manager", GoogleSearchManager)
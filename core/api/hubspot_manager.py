@@ -3,15 +3,28 @@ MININA v3.0 - HubSpot Manager
 API para operaciones con HubSpot (contactos, empresas, deals)
 """
 
-import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+from core.pagination import CursorParam, PageError, Paginator, page_cache
 
-class HubSpotManager:
+http = provider_http("hubspot")
+
+CONTACT_FIELDS = {
+    "id": "id",
+    "email": "properties.email",
+    "firstname": "properties.firstname",
+    "lastname": "properties.lastname",
+    "company": "properties.company",
+}
+
+
+class HubSpotManager(AsyncManagerMixin):
     """
     Manager de HubSpot para MININA
     
@@ -82,7 +95,7 @@ class HubSpotManager:
         try:
             url = f"{self.API_BASE_URL}/objects/contacts"
             params = {"limit": 1}
-            response = requests.get(url, headers=self._get_headers(), params=params, timeout=30)
+            response = http.get(url, headers=self._get_headers(), params=params, timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -125,9 +138,10 @@ class HubSpotManager:
             
             data = {"properties": properties}
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 201:
+                page_cache.invalidate(f"{self.API_BASE_URL}/objects/contacts/search")
                 result = response.json()
                 return {
                     "success": True,
@@ -148,7 +162,7 @@ class HubSpotManager:
         
         try:
             url = f"{self.API_BASE_URL}/objects/contacts/{contact_id}"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -170,41 +184,35 @@ class HubSpotManager:
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
-    def search_contacts(self, query: str, limit: int = 10) -> Dict[str, Any]:
-        """Buscar contactos"""
+    def _search_pages(self, query: str, page_size: int = 100) -> Paginator:
+        """Búsqueda paginada por `after`, pidiendo sólo las propiedades usadas"""
+        properties = [path.split(".", 1)[1] for path in CONTACT_FIELDS.values() if path.startswith("properties.")]
+        return Paginator(
+            http, f"{self.API_BASE_URL}/objects/contacts/search", method="POST",
+            style=CursorParam("after", "paging.next.after", size="limit", in_body=True),
+            items="results", fields=CONTACT_FIELDS, json_body={"query": query, "properties": properties},
+            headers=self._get_headers(), page_size=page_size,
+        )
+    
+    def iter_contacts(self, query: str) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar (async) todos los contactos que casan con la búsqueda"""
+        return self._search_pages(query).__aiter__()
+    
+    def search_contacts(self, query: str, limit: Optional[int] = 10) -> Dict[str, Any]:
+        """Buscar contactos (hasta `limit`; None = todos)"""
         if not self.is_configured():
             return {"success": False, "error": "HubSpot no configurado"}
         
         try:
-            url = f"{self.API_BASE_URL}/objects/contacts/search"
-            
-            data = {
-                "query": query,
-                "limit": limit
+            pages = self._search_pages(query, page_size=min(limit or 100, 100))
+            contacts = pages.collect(limit)
+            return {
+                "success": True,
+                "contacts": contacts,
+                "total": pages.total or 0
             }
-            
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                contacts = result.get("results", [])
-                return {
-                    "success": True,
-                    "contacts": [
-                        {
-                            "id": c["id"],
-                            "email": c["properties"].get("email"),
-                            "firstname": c["properties"].get("firstname"),
-                            "lastname": c["properties"].get("lastname"),
-                            "company": c["properties"].get("company")
-                        }
-                        for c in contacts
-                    ],
-                    "total": result.get("total", 0)
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -217,9 +225,10 @@ class HubSpotManager:
             url = f"{self.API_BASE_URL}/objects/contacts/{contact_id}"
             data = {"properties": properties}
             
-            response = requests.patch(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.patch(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 200:
+                page_cache.invalidate(f"{self.API_BASE_URL}/objects/contacts/search")
                 result = response.json()
                 return {
                     "success": True,
@@ -239,9 +248,10 @@ class HubSpotManager:
         
         try:
             url = f"{self.API_BASE_URL}/objects/contacts/{contact_id}"
-            response = requests.delete(url, headers=self._get_headers(), timeout=30)
+            response = http.delete(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 204:
+                page_cache.invalidate(f"{self.API_BASE_URL}/objects/contacts/search")
                 return {
                     "success": True,
                     "message": f"Contacto {contact_id} eliminado"
@@ -276,7 +286,7 @@ class HubSpotManager:
             
             data = {"properties": properties}
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 201:
                 result = response.json()
@@ -301,4 +311,4 @@ class HubSpotManager:
 
 
 # Singleton
-hubspot_manager = HubSpotManager()
+hubspot_manager = lazy_service("hubspot_manager", HubSpotManager)
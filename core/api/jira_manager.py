@@ -3,16 +3,32 @@ MININA v3.0 - Jira Manager
 API para operaciones con Jira (issues, proyectos, comentarios)
 """
 
-import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 import base64
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+from core.pagination import OffsetParams, PageError, Paginator, SinglePage, page_cache
 
-class JiraManager:
+http = provider_http("jira")
+
+# Campos que se piden al servidor y con los que se queda cada issue
+ISSUE_FIELDS = {
+    "key": "key",
+    "summary": "fields.summary",
+    "status": "fields.status.name",
+    "assignee": "fields.assignee.displayName",
+    "created": "fields.created",
+    "updated": "fields.updated",
+}
+PROJECT_FIELDS = ["id", "key", "name", "projectTypeKey"]
+
+
+class JiraManager(AsyncManagerMixin):
     """
     Manager de Jira para MININA
     
@@ -98,7 +114,7 @@ class JiraManager:
         
         try:
             url = f"{self.jira_url}/rest/api/3/myself"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -151,9 +167,10 @@ class JiraManager:
                 }
             }
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 201:
+                page_cache.invalidate(f"{self.jira_url}/rest/api/3/search")
                 result = response.json()
                 return {
                     "success": True,
@@ -175,7 +192,7 @@ class JiraManager:
         
         try:
             url = f"{self.jira_url}/rest/api/3/issue/{issue_key}"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -245,9 +262,10 @@ class JiraManager:
                     ]
                 }
             
-            response = requests.put(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.put(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 204:
+                page_cache.invalidate(f"{self.jira_url}/rest/api/3/search")
                 return {
                     "success": True,
                     "message": f"Issue {issue_key} actualizado"
@@ -279,7 +297,7 @@ class JiraManager:
                 }
             }
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 201:
                 result = response.json()
@@ -294,41 +312,34 @@ class JiraManager:
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
-    def search_issues(self, jql: str, max_results: int = 50) -> Dict[str, Any]:
-        """Buscar issues usando JQL"""
+    def _search_pages(self, jql: str, page_size: int = 100) -> Paginator:
+        """Búsqueda JQL paginada por startAt/maxResults, sólo con los campos usados"""
+        server_fields = ",".join(path.split(".")[1] for path in ISSUE_FIELDS.values() if path.startswith("fields."))
+        return Paginator(
+            http, f"{self.jira_url}/rest/api/3/search", style=OffsetParams("startAt", "maxResults", "total"),
+            items="issues", fields=ISSUE_FIELDS, params={"jql": jql, "fields": server_fields},
+            headers=self._get_headers(), page_size=page_size,
+        )
+    
+    def iter_issues(self, jql: str) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar (async) todas las issues de una búsqueda JQL"""
+        return self._search_pages(jql).__aiter__()
+    
+    def search_issues(self, jql: str, max_results: Optional[int] = 50) -> Dict[str, Any]:
+        """Buscar issues usando JQL (hasta `max_results`; None = todas)"""
         if not self.is_configured():
             return {"success": False, "error": "Jira no configurado"}
         
         try:
-            url = f"{self.jira_url}/rest/api/3/search"
-            params = {
-                "jql": jql,
-                "maxResults": max_results
+            pages = self._search_pages(jql, page_size=min(max_results or 100, 100))
+            issues = pages.collect(max_results)
+            return {
+                "success": True,
+                "total": pages.total or 0,
+                "issues": issues
             }
-            
-            response = requests.get(url, headers=self._get_headers(), params=params, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                issues = result.get("issues", [])
-                return {
-                    "success": True,
-                    "total": result.get("total", 0),
-                    "issues": [
-                        {
-                            "key": issue["key"],
-                            "summary": issue["fields"].get("summary"),
-                            "status": issue["fields"].get("status", {}).get("name"),
-                            "assignee": issue["fields"].get("assignee", {}).get("displayName") if issue["fields"].get("assignee") else None,
-                            "created": issue["fields"].get("created"),
-                            "updated": issue["fields"].get("updated")
-                        }
-                        for issue in issues
-                    ]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -339,26 +350,17 @@ class JiraManager:
         
         try:
             url = f"{self.jira_url}/rest/api/3/project"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    "success": True,
-                    "projects": [
-                        {
-                            "id": project["id"],
-                            "key": project["key"],
-                            "name": project["name"],
-                            "projectTypeKey": project.get("projectTypeKey"),
-                            "url": f"{self.jira_url}/browse/{project['key']}"
-                        }
-                        for project in result
-                    ]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            projects = Paginator(http, url, style=SinglePage(), fields=PROJECT_FIELDS,
+                                 headers=self._get_headers()).collect(None)
+            return {
+                "success": True,
+                "projects": [
+                    {**project, "url": f"{self.jira_url}/browse/{project['key']}"}
+                    for project in projects
+                ]
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -372,4 +374,4 @@ class JiraManager:
 
 
 # Singleton
-jira_manager = JiraManager()
+jira_manager = lazy_service("jira_manager", JiraManager)
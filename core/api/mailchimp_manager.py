@@ -3,15 +3,19 @@ MININA v3.0 - Mailchimp Manager
 API para operaciones con Mailchimp (listas, campañas, suscriptores)
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
 
-class MailchimpManager:
+http = provider_http("mailchimp")
+
+
+class MailchimpManager(AsyncManagerMixin):
     """
     Manager de Mailchimp para MININA
     
@@ -86,7 +90,7 @@ class MailchimpManager:
         
         try:
             url = f"https://{self.datacenter}.api.mailchimp.com/3.0/"
-            response = requests.get(url, auth=("any", self.api_key), timeout=30)
+            response = http.get(url, auth=("any", self.api_key), timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -106,7 +110,7 @@ class MailchimpManager:
         
         try:
             url = self._get_url("/lists")
-            response = requests.get(url, auth=("any", self.api_key), timeout=30)
+            response = http.get(url, auth=("any", self.api_key), timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -157,7 +161,7 @@ class MailchimpManager:
             if last_name:
                 data["merge_fields"]["LNAME"] = last_name
             
-            response = requests.post(
+            response = http.post(
                 url,
                 auth=("any", self.api_key),
                 json=data,
@@ -209,7 +213,7 @@ class MailchimpManager:
             if status:
                 data["status"] = status
             
-            response = requests.patch(
+            response = http.patch(
                 url,
                 auth=("any", self.api_key),
                 json=data,
@@ -241,7 +245,7 @@ class MailchimpManager:
             
             url = self._get_url(f"/lists/{list_id}/members/{subscriber_hash}")
             
-            response = requests.delete(url, auth=("any", self.api_key), timeout=30)
+            response = http.delete(url, auth=("any", self.api_key), timeout=30)
             
             if response.status_code == 204:
                 return {
@@ -263,7 +267,7 @@ class MailchimpManager:
             url = self._get_url(f"/lists/{list_id}/members")
             params = {"count": count}
             
-            response = requests.get(
+            response = http.get(
                 url,
                 auth=("any", self.api_key),
                 params=params,
@@ -303,7 +307,7 @@ class MailchimpManager:
             url = self._get_url("/campaigns")
             params = {"count": count}
             
-            response = requests.get(
+            response = http.get(
                 url,
                 auth=("any", self.api_key),
                 params=params,
@@ -347,4 +351,4 @@ class MailchimpManager:
 
 
 # Singleton
-mailchimp_manager = MailchimpManager()
+mailchimp_manager = lazy_service("mailchimp_manager", MailchimpManager)
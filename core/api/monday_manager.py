@@ -3,15 +3,34 @@ MININA v3.0 - Monday.com Manager
 API para operaciones con Monday.com (boards, items, columnas)
 """
 
-import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+from core.pagination import PageError, PageNumber, Paginator
 
-class MondayManager:
+http = provider_http("monday")
+
+BOARD_FIELDS = {"id": "id", "name": "name", "state": "state", "owner": "owner.name"}
+BOARDS_QUERY = """
+query ($limit: Int!, $page: Int!) {
+    boards(limit: $limit, page: $page) {
+        id
+        name
+        state
+        owner {
+            name
+        }
+    }
+}
+"""
+
+
+class MondayManager(AsyncManagerMixin):
     """
     Manager de Monday.com para MININA
     
@@ -101,53 +120,35 @@ class MondayManager:
         if variables:
             data["variables"] = variables
         
-        response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+        response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
         return response.json()
     
     def is_configured(self) -> bool:
         """Verificar si está configurado"""
         return bool(self.api_token)
     
-    def list_boards(self, limit: int = 25) -> Dict[str, Any]:
-        """Listar boards del usuario"""
+    def _board_pages(self, page_size: int = 100) -> Paginator:
+        """Boards paginados por número de página (variables de la query GraphQL)"""
+        return Paginator(
+            http, self.API_BASE_URL, method="POST", style=PageNumber("page", "limit", in_body="variables"),
+            items="data.boards", errors="errors", fields=BOARD_FIELDS,
+            json_body={"query": BOARDS_QUERY, "variables": {}}, headers=self._get_headers(), page_size=page_size,
+        )
+    
+    def iter_boards(self) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar (async) todos los boards, página a página"""
+        return self._board_pages().__aiter__()
+    
+    def list_boards(self, limit: Optional[int] = 25) -> Dict[str, Any]:
+        """Listar boards del usuario (hasta `limit`; None = todos)"""
         if not self.is_configured():
             return {"success": False, "error": "Monday.com no configurado"}
         
         try:
-            query = f'''
-            query {{
-                boards(limit: {limit}) {{
-                    id
-                    name
-                    state
-                    board_folder_id
-                    owner {{
-                        id
-                        name
-                    }}
-                }}
-            }}
-            '''
-            
-            result = self._execute_query(query)
-            
-            if "errors" in result:
-                return {"success": False, "error": result["errors"][0]["message"]}
-            
-            boards = result.get("data", {}).get("boards", [])
-            return {
-                "success": True,
-                "boards": [
-                    {
-                        "id": b["id"],
-                        "name": b["name"],
-                        "state": b["state"],
-                        "owner": b["owner"]["name"] if b.get("owner") else None
-                    }
-                    for b in boards
-                ]
-            }
-                
+            boards = self._board_pages(page_size=min(limit or 100, 100)).collect(limit)
+            return {"success": True, "boards": boards}
+        except PageError as e:
+            return {"success": False, "error": e.text or f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -338,4 +339,4 @@ class MondayManager:
 
 
 # Singleton
-monday_manager = MondayManager()
+monday_manager = lazy_service("monday_manager", MondayManager)
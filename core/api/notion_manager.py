@@ -3,13 +3,18 @@ MININA v3.0 - Notion Manager
 API para operaciones con Notion (páginas, bases de datos, blocks)
 """
 
-import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+from core.pagination import DEFAULT_LIST_LIMIT, CursorParam, PageError, Paginator, page_cache
+
+http = provider_http("notion")
+
 
 @dataclass
 class NotionPage:
@@ -21,7 +26,7 @@ class NotionPage:
     last_edited_time: str
 
 
-class NotionManager:
+class NotionManager(AsyncManagerMixin):
     """
     Manager de Notion para MININA
     
@@ -92,7 +97,7 @@ class NotionManager:
         
         try:
             headers = self._get_headers()
-            response = requests.get(f"{self.API_BASE_URL}/users/me", headers=headers, timeout=30)
+            response = http.get(f"{self.API_BASE_URL}/users/me", headers=headers, timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -109,49 +114,56 @@ class NotionManager:
             "Content-Type": "application/json"
         }
     
-    def search_pages(self, query: str = "") -> Dict[str, Any]:
-        """Buscar páginas y bases de datos"""
+    def _pages(self, url: str, body: Dict[str, Any], fields: Any = None) -> Paginator:
+        """Listado paginado por start_cursor/next_cursor en el cuerpo del POST"""
+        return Paginator(
+            http, url, method="POST",
+            style=CursorParam("start_cursor", "next_cursor", size="page_size", in_body=True, has_more="has_more"),
+            items="results", fields=fields, json_body=body, headers=self._get_headers(), page_size=100,
+        )
+    
+    def _search_entry(self, item: dict) -> Dict[str, Any]:
+        """Lo que se guarda de cada resultado de búsqueda (sin properties)"""
+        return {
+            "id": item.get("id"),
+            "object": item.get("object"),
+            "title": self._extract_title(item),
+            "url": item.get("url", ""),
+            "created_time": item.get("created_time", "")
+        }
+    
+    def iter_search(self, query: str = "") -> AsyncIterator[Dict[str, Any]]:
+        """Iterar (async) todos los resultados de una búsqueda"""
+        body = {"query": query} if query else {}
+        return self._pages(f"{self.API_BASE_URL}/search", body, self._search_entry).__aiter__()
+    
+    def search_pages(self, query: str = "", limit: Optional[int] = DEFAULT_LIST_LIMIT) -> Dict[str, Any]:
+        """Buscar páginas y bases de datos (hasta `limit` resultados; None = todos)"""
         if not self.is_configured():
             return {"success": False, "error": "Notion no configurado"}
         
         try:
-            url = f"{self.API_BASE_URL}/search"
-            data = {"query": query} if query else {}
+            body = {"query": query} if query else {}
+            results = self._pages(f"{self.API_BASE_URL}/search", body, self._search_entry).collect(limit)
+            pages = []
+            databases = []
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            for item in results:
+                item_type = item.pop("object")
+                if item_type == "page":
+                    pages.append(item)
+                elif item_type == "database":
+                    item.pop("created_time")
+                    databases.append(item)
             
-            if response.status_code == 200:
-                results = response.json().get("results", [])
-                pages = []
-                databases = []
-                
-                for item in results:
-                    item_type = item.get("object")
-                    if item_type == "page":
-                        title = self._extract_title(item)
-                        pages.append({
-                            "id": item["id"],
-                            "title": title,
-                            "url": item.get("url", ""),
-                            "created_time": item.get("created_time", "")
-                        })
-                    elif item_type == "database":
-                        title = self._extract_title(item)
-                        databases.append({
-                            "id": item["id"],
-                            "title": title,
-                            "url": item.get("url", "")
-                        })
-                
-                return {
-                    "success": True,
-                    "pages": pages,
-                    "databases": databases,
-                    "total": len(results)
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}: {response.text}"}
-                
+            return {
+                "success": True,
+                "pages": pages,
+                "databases": databases,
+                "total": len(results)
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}: {e.text}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -207,9 +219,10 @@ class NotionManager:
                     }
                 ]
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 200:
+                page_cache.invalidate(f"{self.API_BASE_URL}/search")
                 page = response.json()
                 return {
                     "success": True,
@@ -248,7 +261,7 @@ class NotionManager:
                 ]
             }
             
-            response = requests.patch(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.patch(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 200:
                 return {
@@ -261,12 +274,18 @@ class NotionManager:
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
+    def iter_database(self, database_id: str, filter_params: dict = None) -> AsyncIterator[Dict[str, Any]]:
+        """Iterar (async) todas las filas de una base de datos"""
+        body = {"filter": filter_params} if filter_params else {}
+        return self._pages(f"{self.API_BASE_URL}/databases/{database_id}/query", body).__aiter__()
+    
     def query_database(
         self,
         database_id: str,
-        filter_params: dict = None
+        filter_params: dict = None,
+        limit: Optional[int] = DEFAULT_LIST_LIMIT
     ) -> Dict[str, Any]:
-        """Consultar base de datos"""
+        """Consultar base de datos (hasta `limit` filas; None = todas)"""
         if not self.is_configured():
             return {"success": False, "error": "Notion no configurado"}
         
@@ -277,18 +296,14 @@ class NotionManager:
             if filter_params:
                 data["filter"] = filter_params
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
-            
-            if response.status_code == 200:
-                results = response.json().get("results", [])
-                return {
-                    "success": True,
-                    "results": results,
-                    "count": len(results)
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}: {response.text}"}
-                
+            results = self._pages(url, data).collect(limit)
+            return {
+                "success": True,
+                "results": results,
+                "count": len(results)
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}: {e.text}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -301,4 +316,4 @@ class NotionManager:
 
 
 # Singleton
-notion_manager = NotionManager()
+notion_manager = lazy_service("notion_manager", NotionManager)
@@ -3,13 +3,17 @@ MININA v3.0 - Slack Manager
 API para operaciones con Slack (mensajes, canales, usuarios)
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+
+http = provider_http("slack")
+
 
 @dataclass
 class SlackMessage:
@@ -21,7 +25,7 @@ class SlackMessage:
     thread_ts: Optional[str] = None
 
 
-class SlackManager:
+class SlackManager(AsyncManagerMixin):
     """
     Manager de Slack para MININA
     
@@ -112,7 +116,7 @@ class SlackManager:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=params or {}, timeout=30)
+            response = http.post(url, headers=headers, json=params or {}, timeout=30)
             return response.json()
         except Exception as e:
             return {"ok": False, "error": str(e)}
@@ -244,7 +248,7 @@ class SlackManager:
                 }
                 
                 headers = {"Authorization": f"Bearer {self.bot_token}"}
-                response = requests.post(url, headers=headers, files=files, data=data, timeout=60)
+                response = http.post(url, headers=headers, files=files, data=data, timeout=60)
                 result = response.json()
             
             if result.get("ok"):
@@ -293,4 +297,4 @@ class SlackManager:
 
 
 # Singleton
-slack_manager = SlackManager()
+slack_manager = lazy_service("slack_manager", SlackManager)
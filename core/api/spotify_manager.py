@@ -3,13 +3,17 @@ MININA v3.0 - Spotify Manager
 API para operaciones con Spotify (reproducción, playlists, búsqueda)
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+
+http = provider_http("spotify")
+
 
 @dataclass
 class SpotifyTrack:
@@ -22,7 +26,7 @@ class SpotifyTrack:
     uri: str
 
 
-class SpotifyManager:
+class SpotifyManager(AsyncManagerMixin):
     """
     Manager de Spotify para MININA
     
@@ -111,7 +115,7 @@ class SpotifyManager:
         
         try:
             headers = {"Authorization": f"Bearer {self.access_token}"}
-            response = requests.get(
+            response = http.get(
                 f"{self.API_BASE_URL}/me",
                 headers=headers,
                 timeout=30
@@ -149,7 +153,7 @@ class SpotifyManager:
                 "limit": limit
             }
             
-            response = requests.get(url, headers=self._get_headers(), params=params, timeout=30)
+            response = http.get(url, headers=self._get_headers(), params=params, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -187,7 +191,7 @@ class SpotifyManager:
             url = f"{self.API_BASE_URL}/me/player/play"
             data = {"uris": [track_uri]}
             
-            response = requests.put(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.put(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code in [200, 204]:
                 return {"success": True, "message": "Reproduciendo canción"}
@@ -204,7 +208,7 @@ class SpotifyManager:
         
         try:
             url = f"{self.API_BASE_URL}/me/player/pause"
-            response = requests.put(url, headers=self._get_headers(), timeout=30)
+            response = http.put(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code in [200, 204]:
                 return {"success": True, "message": "Reproducción pausada"}
@@ -221,7 +225,7 @@ class SpotifyManager:
         
         try:
             url = f"{self.API_BASE_URL}/me/player/currently-playing"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -252,7 +256,7 @@ class SpotifyManager:
             url = f"{self.API_BASE_URL}/me/playlists"
             params = {"limit": limit}
             
-            response = requests.get(url, headers=self._get_headers(), params=params, timeout=30)
+            response = http.get(url, headers=self._get_headers(), params=params, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -284,7 +288,7 @@ class SpotifyManager:
             url = f"{self.API_BASE_URL}/me/player/play"
             data = {"context_uri": playlist_uri}
             
-            response = requests.put(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.put(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code in [200, 204]:
                 return {"success": True, "message": "Reproduciendo playlist"}
@@ -304,4 +308,4 @@ class SpotifyManager:
 
 
 # Singleton
-spotify_manager = SpotifyManager()
+spotify_manager = lazy_service("spotify_manager", SpotifyManager)
@@ -3,15 +3,19 @@ MININA v3.0 - Stripe Manager
 API para operaciones con Stripe (pagos, clientes, suscripciones)
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
 
-class StripeManager:
+http = provider_http("stripe")
+
+
+class StripeManager(AsyncManagerMixin):
     """
     Manager de Stripe para MININA
     
@@ -80,7 +84,7 @@ class StripeManager:
         
         try:
             url = f"{self.API_BASE_URL}/account"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -121,7 +125,7 @@ class StripeManager:
             if description:
                 data["description"] = description
             
-            response = requests.post(url, headers=self._get_headers(), data=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), data=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -158,7 +162,7 @@ class StripeManager:
             if description:
                 data["description"] = description
             
-            response = requests.post(url, headers=self._get_headers(), data=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), data=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -182,7 +186,7 @@ class StripeManager:
         
         try:
             url = f"{self.API_BASE_URL}/customers/{customer_id}"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -220,7 +224,7 @@ class StripeManager:
             if description:
                 data["description"] = description
             
-            response = requests.post(url, headers=self._get_headers(), data=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), data=data, timeout=30)
             
             if response.status_code == 200:
                 product = response.json()
@@ -260,7 +264,7 @@ class StripeManager:
                 "currency": currency.lower()
             }
             
-            response = requests.post(url, headers=self._get_headers(), data=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), data=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -285,7 +289,7 @@ class StripeManager:
             url = f"{self.API_BASE_URL}/charges"
             params = {"limit": limit}
             
-            response = requests.get(url, headers=self._get_headers(), params=params, timeout=30)
+            response = http.get(url, headers=self._get_headers(), params=params, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -323,7 +327,7 @@ class StripeManager:
             if amount:
                 data["amount"] = amount
             
-            response = requests.post(url, headers=self._get_headers(), data=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), data=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -350,4 +354,4 @@ class StripeManager:
 
 
 # Singleton
-stripe_manager = StripeManager()
+stripe_manager = lazy_service("stripe_manager", StripeManager)
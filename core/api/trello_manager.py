@@ -3,13 +3,18 @@ MININA v3.0 - Trello Manager
 API para operaciones con Trello (boards, lists, cards)
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+from core.pagination import PageError, Paginator, SinglePage, page_cache
+
+http = provider_http("trello")
+
 
 @dataclass
 class TrelloCard:
@@ -22,7 +27,7 @@ class TrelloCard:
     labels: List[str]
 
 
-class TrelloManager:
+class TrelloManager(AsyncManagerMixin):
     """
     Manager de Trello para MININA
     
@@ -97,7 +102,7 @@ class TrelloManager:
         try:
             url = f"{self.API_BASE_URL}/members/me"
             params = {"key": self.api_key, "token": self.token}
-            response = requests.get(url, params=params, timeout=30)
+            response = http.get(url, params=params, timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -113,34 +118,24 @@ class TrelloManager:
             "token": self.token
         }
     
+    def _fetch_list(self, url: str, fields: List[str]) -> List[Dict[str, Any]]:
+        """GET cacheado de un listado, pidiendo al servidor sólo `fields`"""
+        params = {**self._get_auth_params(), "fields": ",".join(f for f in fields if f != "id")}
+        return Paginator(http, url, style=SinglePage(), fields=fields, params=params).collect(None)
+    
     def list_boards(self) -> Dict[str, Any]:
         """Listar boards del usuario"""
         if not self.is_configured():
             return {"success": False, "error": "Trello no configurado"}
         
         try:
-            url = f"{self.API_BASE_URL}/members/me/boards"
-            params = self._get_auth_params()
-            
-            response = requests.get(url, params=params, timeout=30)
-            
-            if response.status_code == 200:
-                boards = response.json()
-                return {
-                    "success": True,
-                    "boards": [
-                        {
-                            "id": b["id"],
-                            "name": b["name"],
-                            "url": b.get("url", ""),
-                            "desc": b.get("desc", "")
-                        }
-                        for b in boards
-                    ]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            boards = self._fetch_list(f"{self.API_BASE_URL}/members/me/boards", ["id", "name", "url", "desc"])
+            return {
+                "success": True,
+                "boards": [{**b, "url": b["url"] or "", "desc": b["desc"] or ""} for b in boards]
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -150,27 +145,13 @@ class TrelloManager:
             return {"success": False, "error": "Trello no configurado"}
         
         try:
-            url = f"{self.API_BASE_URL}/boards/{board_id}/lists"
-            params = self._get_auth_params()
-            
-            response = requests.get(url, params=params, timeout=30)
-            
-            if response.status_code == 200:
-                lists = response.json()
-                return {
-                    "success": True,
-                    "lists": [
-                        {
-                            "id": l["id"],
-                            "name": l["name"],
-                            "pos": l.get("pos", 0)
-                        }
-                        for l in lists
-                    ]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            lists = self._fetch_list(f"{self.API_BASE_URL}/boards/{board_id}/lists", ["id", "name", "pos"])
+            return {
+                "success": True,
+                "lists": [{**l, "pos": l["pos"] or 0} for l in lists]
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -180,30 +161,22 @@ class TrelloManager:
             return {"success": False, "error": "Trello no configurado"}
         
         try:
-            url = f"{self.API_BASE_URL}/lists/{list_id}/cards"
-            params = self._get_auth_params()
-            
-            response = requests.get(url, params=params, timeout=30)
-            
-            if response.status_code == 200:
-                cards = response.json()
-                return {
-                    "success": True,
-                    "cards": [
-                        {
-                            "id": c["id"],
-                            "name": c["name"],
-                            "desc": c.get("desc", ""),
-                            "url": c.get("url", ""),
-                            "due": c.get("due"),
-                            "labels": [l["name"] for l in c.get("labels", [])]
-                        }
-                        for c in cards
-                    ]
-                }
-            else:
-                return {"success": False, "error": f"Error HTTP {response.status_code}"}
-                
+            cards = self._fetch_list(f"{self.API_BASE_URL}/lists/{list_id}/cards",
+                                     ["id", "name", "desc", "url", "due", "labels"])
+            return {
+                "success": True,
+                "cards": [
+                    {
+                        **c,
+                        "desc": c["desc"] or "",
+                        "url": c["url"] or "",
+                        "labels": [l["name"] for l in c["labels"] or []]
+                    }
+                    for c in cards
+                ]
+            }
+        except PageError as e:
+            return {"success": False, "error": f"Error HTTP {e.status_code}"}
         except Exception as e:
             return {"success": False, "error": f"Error: {str(e)}"}
     
@@ -231,9 +204,10 @@ class TrelloManager:
             if due:
                 params["due"] = due
             
-            response = requests.post(url, params=params, timeout=30)
+            response = http.post(url, params=params, timeout=30)
             
             if response.status_code == 200:
+                page_cache.invalidate(f"{self.API_BASE_URL}/lists/{list_id}/cards")
                 card = response.json()
                 return {
                     "success": True,
@@ -266,9 +240,10 @@ class TrelloManager:
                 "defaultLists": str(default_lists).lower()
             })
             
-            response = requests.post(url, params=params, timeout=30)
+            response = http.post(url, params=params, timeout=30)
             
             if response.status_code == 200:
+                page_cache.invalidate(f"{self.API_BASE_URL}/members/me/boards")
                 board = response.json()
                 return {
                     "success": True,
@@ -292,9 +267,10 @@ class TrelloManager:
             params = self._get_auth_params()
             params["idList"] = list_id
             
-            response = requests.put(url, params=params, timeout=30)
+            response = http.put(url, params=params, timeout=30)
             
             if response.status_code == 200:
+                page_cache.invalidate(f"{self.API_BASE_URL}/lists/")
                 return {
                     "success": True,
                     "message": f"Card movida a lista {list_id}"
@@ -315,4 +291,4 @@ class TrelloManager:
 
 
 # Singleton
-trello_manager = TrelloManager()
+trello_manager = lazy_service("trello_manager", TrelloManager)
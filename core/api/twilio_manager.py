@@ -3,16 +3,19 @@ MININA v3.0 - Twilio Manager
 API para operaciones con Twilio (SMS, llamadas, WhatsApp)
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
-from requests.auth import HTTPBasicAuth
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
 
-class TwilioManager:
+http = provider_http("twilio")
+
+
+class TwilioManager(AsyncManagerMixin):
     """
     Manager de Twilio para MININA
     
@@ -96,7 +99,7 @@ class TwilioManager:
         
         try:
             url = f"{self.API_BASE_URL}/Accounts/{self.account_sid}.json"
-            response = requests.get(url, auth=HTTPBasicAuth(self.account_sid, self.auth_token), timeout=30)
+            response = http.get(url, auth=(self.account_sid, self.auth_token), timeout=30)
             return response.status_code == 200
         except:
             return False
@@ -119,9 +122,9 @@ class TwilioManager:
                 "Body": message
             }
             
-            response = requests.post(
+            response = http.post(
                 url,
-                auth=HTTPBasicAuth(self.account_sid, self.auth_token),
+                auth=(self.account_sid, self.auth_token),
                 data=data,
                 timeout=30
             )
@@ -163,9 +166,9 @@ class TwilioManager:
                 "Body": message
             }
             
-            response = requests.post(
+            response = http.post(
                 url,
-                auth=HTTPBasicAuth(self.account_sid, self.auth_token),
+                auth=(self.account_sid, self.auth_token),
                 data=data,
                 timeout=30
             )
@@ -201,9 +204,9 @@ class TwilioManager:
                 "Url": url  # URL con TwiML para manejar la llamada
             }
             
-            response = requests.post(
+            response = http.post(
                 call_url,
-                auth=HTTPBasicAuth(self.account_sid, self.auth_token),
+                auth=(self.account_sid, self.auth_token),
                 data=data,
                 timeout=30
             )
@@ -233,7 +236,7 @@ class TwilioManager:
         
         try:
             url = f"{self.API_BASE_URL}/Accounts/{self.account_sid}/Messages/{message_sid}.json"
-            response = requests.get(url, auth=HTTPBasicAuth(self.account_sid, self.auth_token), timeout=30)
+            response = http.get(url, auth=(self.account_sid, self.auth_token), timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -269,9 +272,9 @@ class TwilioManager:
             if from_number:
                 params["From"] = from_number
             
-            response = requests.get(
+            response = http.get(
                 url,
-                auth=HTTPBasicAuth(self.account_sid, self.auth_token),
+                auth=(self.account_sid, self.auth_token),
                 params=params,
                 timeout=30
             )
@@ -310,9 +313,9 @@ class TwilioManager:
             url = f"https://lookups.twilio.com/v1/PhoneNumbers/{phone_number}"
             params = {"Type": "carrier"}
             
-            response = requests.get(
+            response = http.get(
                 url,
-                auth=HTTPBasicAuth(self.account_sid, self.auth_token),
+                auth=(self.account_sid, self.auth_token),
                 params=params,
                 timeout=30
             )
@@ -346,4 +349,4 @@ class TwilioManager:
 
 
 # Singleton
-twilio_manager = TwilioManager()
+twilio_manager = lazy_service("twilio_manager", TwilioManager)
@@ -3,13 +3,17 @@ MININA v3.0 - Twitter/X Manager
 API para operaciones con Twitter/X (posts, timeline, búsqueda)
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
+
+http = provider_http("twitter")
+
 
 @dataclass
 class Tweet:
@@ -22,7 +26,7 @@ class Tweet:
     public_metrics: dict
 
 
-class TwitterManager:
+class TwitterManager(AsyncManagerMixin):
     """
     Manager de Twitter/X para MININA
     
@@ -123,7 +127,7 @@ class TwitterManager:
         
         try:
             headers = {"Authorization": f"Bearer {self.bearer_token}"}
-            response = requests.get(
+            response = http.get(
                 f"{self.API_BASE_URL}/users/me",
                 headers=headers,
                 timeout=30
@@ -169,7 +173,7 @@ class TwitterManager:
                 "tweet.fields": "created_at,public_metrics,author_id"
             }
             
-            response = requests.get(url, headers=self._get_headers(), params=params, timeout=30)
+            response = http.get(url, headers=self._get_headers(), params=params, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -208,7 +212,7 @@ class TwitterManager:
             headers = self._get_headers(user_auth=True)
             data = {"text": text}
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http.post(url, headers=headers, json=data, timeout=30)
             
             if response.status_code == 201:
                 result = response.json()
@@ -244,7 +248,7 @@ class TwitterManager:
                 else:
                     # Buscar usuario por username
                     user_url = f"{self.API_BASE_URL}/users/by/username/{username}"
-                    user_response = requests.get(user_url, headers=self._get_headers(), timeout=30)
+                    user_response = http.get(user_url, headers=self._get_headers(), timeout=30)
                     if user_response.status_code == 200:
                         user_id = user_response.json().get("data", {}).get("id")
                         url = f"{self.API_BASE_URL}/users/{user_id}/tweets"
@@ -258,7 +262,7 @@ class TwitterManager:
                 "tweet.fields": "created_at,public_metrics"
             }
             
-            response = requests.get(url, headers=self._get_headers(), params=params, timeout=30)
+            response = http.get(url, headers=self._get_headers(), params=params, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -290,7 +294,7 @@ class TwitterManager:
             url = f"{self.API_BASE_URL}/tweets/{tweet_id}"
             headers = self._get_headers(user_auth=True)
             
-            response = requests.delete(url, headers=headers, timeout=30)
+            response = http.delete(url, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 return {
@@ -314,4 +318,4 @@ class TwitterManager:
 
 
 # Singleton
-twitter_manager = TwitterManager()
+twitter_manager = lazy_service("twitter_manager", TwitterManager)
@@ -3,15 +3,19 @@ MININA v3.0 - Zoom Manager
 API para operaciones con Zoom (reuniones, webinars, usuarios)
 """
 
-import requests
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 from datetime import datetime
 
+from core.http_client import AsyncManagerMixin, provider_http
+from core.lazy_services import lazy_service
 
-class ZoomManager:
+http = provider_http("zoom")
+
+
+class ZoomManager(AsyncManagerMixin):
     """
     Manager de Zoom para MININA
     
@@ -87,7 +91,7 @@ class ZoomManager:
                 "account_id": self.account_id
             }
             
-            response = requests.post(
+            response = http.post(
                 self.TOKEN_URL,
                 headers=headers,
                 data=data,
@@ -176,7 +180,7 @@ class ZoomManager:
                 }
             }
             
-            response = requests.post(url, headers=self._get_headers(), json=data, timeout=30)
+            response = http.post(url, headers=self._get_headers(), json=data, timeout=30)
             
             if response.status_code == 201:
                 result = response.json()
@@ -202,7 +206,7 @@ class ZoomManager:
         
         try:
             url = f"{self.API_BASE_URL}/meetings/{meeting_id}"
-            response = requests.delete(url, headers=self._get_headers(), timeout=30)
+            response = http.delete(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 204:
                 return {
@@ -224,7 +228,7 @@ class ZoomManager:
             url = f"{self.API_BASE_URL}/users/me/meetings"
             params = {"type": type}
             
-            response = requests.get(url, headers=self._get_headers(), params=params, timeout=30)
+            response = http.get(url, headers=self._get_headers(), params=params, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -256,7 +260,7 @@ class ZoomManager:
         
         try:
             url = f"{self.API_BASE_URL}/meetings/{meeting_id}"
-            response = requests.get(url, headers=self._get_headers(), timeout=30)
+            response = http.get(url, headers=self._get_headers(), timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -288,4 +292,4 @@ class ZoomManager:
 
 
 # Singleton
-zoom_manager = ZoomManager()
+zoom_manager = lazy_service("zoom_manager", ZoomManager)
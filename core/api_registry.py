@@ -1,13 +1,71 @@
 """
 API Registry System
 Sistema de registro y detección de APIs para el orquestador
+
+El estado de todas las APIs se precalcula en un índice que sólo se reconstruye
+cuando cambia api_config.json (mtime) o al llamar a reload(); las consultas
+son búsquedas en diccionario. Las intenciones se detectan con un autómata
+Aho-Corasick sobre todas las frases clave en una sola pasada del texto.
 """
 import json
 import os
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Any, Set
 from dataclasses import dataclass
 from enum import Enum
 
+# Cada cuánto (s) se comprueba el mtime del archivo de configuración
+CONFIG_CHECK_INTERVAL = 1.0
+
+# Mapeo de APIs a funcionalidades
+API_REQUIREMENTS: Dict[str, List[str]] = {
+    # AI APIs
+    "openai": ["generación de texto", "chat", "análisis de código"],
+    "groq": ["generación de texto rápida", "chat"],
+    "anthropic": ["generación de texto", "análisis complejo"],
+
+    # Bot APIs
+    "telegram": ["notificaciones Telegram", "comandos remotos"],
+    "whatsapp": ["notificaciones WhatsApp"],
+    "discord": ["integración Discord"],
+    "slack": ["integración Slack"],
+
+    # Business APIs
+    "salesforce": ["gestión de CRM", "automatización de ventas"],
+    "quickbooks": ["contabilidad", "facturación"],
+    "shopify": ["gestión de e-commerce"],
+    "paypal": ["procesamiento de pagos"],
+    "zendesk": ["soporte al cliente"],
+    "clickup": ["gestión de proyectos"],
+    "gitlab": ["gestión de código", "CI/CD"],
+    "airtable": ["gestión de bases de datos"],
+}
+
+# Intención -> APIs requeridas. El orden importa: si varias frases aparecen
+# en el texto gana la primera de este mapa.
+INTENT_API_MAP: Dict[str, List[str]] = {
+    # Intenciones de negocio
+    "gestionar crm": ["salesforce", "pipedrive"],
+    "facturación": ["quickbooks", "xero"],
+    "procesar pago": ["paypal", "square"],
+    "tienda online": ["shopify", "woocommerce"],
+    "soporte cliente": ["zendesk", "freshdesk"],
+    "gestión proyectos": ["clickup", "wrike"],
+    "código": ["gitlab"],
+    "base de datos": ["airtable"],
+
+    # Intenciones de comunicación
+    "notificar": ["telegram", "whatsapp", "discord", "slack"],
+    "enviar mensaje": ["telegram", "whatsapp", "discord", "slack"],
+
+    # Intenciones de IA (tienen fallback a modelos locales)
+    "generar texto": ["openai", "groq", "anthropic"],
+    "chat": ["openai", "groq", "anthropic"],
+    "analizar": ["openai", "groq", "anthropic"],
+}
+
 
 class APIStatus(Enum):
     """Estado de una API"""
@@ -30,6 +88,74 @@ class APIInfo:
     error_message: Optional[str] = None
 
 
+class IntentMatcher:
+    """
+    Autómata Aho-Corasick: encuentra todas las frases clave contenidas en un
+    texto en una sola pasada, independientemente de cuántas haya.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for idx, pattern in enumerate(self.patterns):
+            self._add(pattern.lower(), idx)
+        self._build_links()
+
+    def _add(self, pattern: str, idx: int) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(idx)
+
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> Set[int]:
+        """Índices de los patrones que aparecen en el texto"""
+        found: Set[int] = set()
+        state = 0
+        for ch in text.lower():
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            if self._out[state]:
+                found.update(self._out[state])
+        return found
+
+    def first(self, text: str) -> Optional[str]:
+        """Patrón de menor índice presente en el texto (o None)"""
+        found = self.find_all(text)
+        return self.patterns[min(found)] if found else None
+
+
+_intent_matcher: Optional[IntentMatcher] = None
+
+
+def get_intent_matcher() -> IntentMatcher:
+    global _intent_matcher
+    if _intent_matcher is None:
+        _intent_matcher = IntentMatcher(list(INTENT_API_MAP))
+    return _intent_matcher
+
+
 class APIRegistry:
     """
     Registro central de APIs del sistema.
@@ -40,24 +166,50 @@ class APIRegistry:
     def __init__(self, config_path: str = 'data/api_config.json'):
         self.config_path = config_path
         self._config = {}
+        self._index: Dict[str, APIInfo] = {}
+        self._config_mtime: Optional[float] = None
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+        self.index_builds = 0
         self._load_config()
     
+    def _read_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
+    
     def _load_config(self):
-        """Cargar configuración de APIs"""
-        if os.path.exists(self.config_path):
-            try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    self._config = json.load(f)
-            except Exception as e:
-                print(f"Error cargando configuración de APIs: {e}")
-                self._config = {}
+        """Cargar configuración de APIs y reconstruir el índice"""
+        with self._lock:
+            self._config_mtime = self._read_mtime()
+            self._last_check = time.monotonic()
+            self._config = {}
+            if self._config_mtime is not None:
+                try:
+                    with open(self.config_path, 'r', encoding='utf-8') as f:
+                        self._config = json.load(f)
+                except Exception as e:
+                    print(f"Error cargando configuración de APIs: {e}")
+                    self._config = {}
+            self._index = self._build_index()
+            self.index_builds += 1
     
     def reload(self):
         """Recargar configuración"""
         self._load_config()
     
-    def get_all_apis(self) -> Dict[str, APIInfo]:
-        """Obtener todas las APIs con su estado"""
+    def _ensure_fresh(self):
+        """Reconstruir el índice si api_config.json cambió desde la última carga"""
+        now = time.monotonic()
+        if now - self._last_check < CONFIG_CHECK_INTERVAL:
+            return
+        self._last_check = now
+        if self._read_mtime() != self._config_mtime:
+            self._load_config()
+    
+    def _build_index(self) -> Dict[str, APIInfo]:
+        """Estado de todas las APIs de todas las categorías"""
         from core.ui.views.api_categories_structure import API_CATEGORIES
         
         apis = {}
@@ -73,6 +225,11 @@ class APIRegistry:
         
         return apis
     
+    def get_all_apis(self) -> Dict[str, APIInfo]:
+        """Obtener todas las APIs con su estado"""
+        self._ensure_fresh()
+        return dict(self._index)
+    
     def _get_api_info(self, api_id: str, api_def: Dict, category: str) -> APIInfo:
         """Obtener información de una API específica"""
         # Buscar configuración
@@ -133,30 +290,7 @@ class APIRegistry:
     
     def _get_required_for(self, api_id: str) -> List[str]:
         """Obtener para qué funcionalidades se requiere esta API"""
-        # Mapeo de APIs a funcionalidades
-        requirements = {
-            # AI APIs
-            "openai": ["generación de texto", "chat", "análisis de código"],
-            "groq": ["generación de texto rápida", "chat"],
-            "anthropic": ["generación de texto", "análisis complejo"],
-            
-            # Bot APIs
-            "telegram": ["notificaciones Telegram", "comandos remotos"],
-            "whatsapp": ["notificaciones WhatsApp"],
-            "discord": ["integración Discord"],
-            "slack": ["integración Slack"],
-            
-            # Business APIs
-            "salesforce": ["gestión de CRM", "automatización de ventas"],
-            "quickbooks": ["contabilidad", "facturación"],
-            "shopify": ["gestión de e-commerce"],
-            "paypal": ["procesamiento de pagos"],
-            "zendesk": ["soporte al cliente"],
-            "clickup": ["gestión de proyectos"],
-            "gitlab": ["gestión de código", "CI/CD"],
-            "airtable": ["gestión de bases de datos"],
-        }
-        return requirements.get(api_id, [])
+        return list(API_REQUIREMENTS.get(api_id, []))
     
     def check_api_for_intent(self, intent: str) -> List[APIInfo]:
         """
@@ -175,41 +309,18 @@ class APIRegistry:
     
     def _get_apis_for_intent(self, intent: str) -> List[str]:
         """Mapear intención a APIs requeridas"""
-        intent_api_map = {
-            # Intenciones de negocio
-            "gestionar crm": ["salesforce", "pipedrive"],
-            "facturación": ["quickbooks", "xero"],
-            "procesar pago": ["paypal", "square"],
-            "tienda online": ["shopify", "woocommerce"],
-            "soporte cliente": ["zendesk", "freshdesk"],
-            "gestión proyectos": ["clickup", "wrike"],
-            "código": ["gitlab"],
-            "base de datos": ["airtable"],
-            
-            # Intenciones de comunicación
-            "notificar": ["telegram", "whatsapp", "discord", "slack"],
-            "enviar mensaje": ["telegram", "whatsapp", "discord", "slack"],
-            
-            # Intenciones de IA (tienen fallback a modelos locales)
-            "generar texto": ["openai", "groq", "anthropic"],
-            "chat": ["openai", "groq", "anthropic"],
-            "analizar": ["openai", "groq", "anthropic"],
-        }
-        
-        # Buscar coincidencias parciales
-        for key, apis in intent_api_map.items():
-            if key in intent.lower():
-                return apis
-        
-        return []
+        # Coincidencias parciales: la primera frase del mapa presente en el texto
+        key = get_intent_matcher().first(intent)
+        return list(INTENT_API_MAP[key]) if key else []
     
     def get_api_info(self, api_id: str) -> Optional[APIInfo]:
         """Obtener información de una API específica"""
-        apis = self.get_all_apis()
-        return apis.get(api_id)
+        self._ensure_fresh()
+        return self._index.get(api_id)
     
     def get_configured_apis(self) -> Dict[str, Dict]:
         """Obtener solo las APIs configuradas"""
+        self._ensure_fresh()
         configured = {}
         for cat_id, cat_apis in self._config.items():
             for api_id, api_config in cat_apis.items():
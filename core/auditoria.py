@@ -1,22 +1,45 @@
 """
 Sistema de Auditoría General para MININA
 Registra todas las ejecuciones de skills con retención de 30 días
+
+Almacenamiento:
+- Un log append-only por día (auditoria_YYYY-MM-DD.jsonl) con eventos
+  "start" (registro completo) y "end" (estado final). Finalizar una
+  ejecución añade una línea; nunca se reescribe el archivo del día.
+- Índice id -> registro para las ejecuciones abiertas.
+- Contadores por día (estado y skill) mantenidos de forma incremental y
+  guardados en auditoria_stats.json junto con los bytes del log ya
+  contabilizados: al arrancar sólo se reprocesa la cola que falte.
+- Las consultas recorren los días de más nuevo a más viejo (índice temporal)
+  cargando cada día bajo demanda y paginan con cursor.
 """
+import atexit
 import json
+import logging
 import os
+import threading
 import time
-import logging
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
-import asyncio
+
+from core.lazy_services import lazy_service
 
 logger = logging.getLogger("Auditoria")
 
 AUDITORIA_PATH = Path("data/auditoria")
 RETENTION_DAYS = 30
 
+STATS_FILE = "auditoria_stats.json"
+# Cada cuánto (s) se guardan los contadores; el log es la fuente de verdad
+STATS_PERSIST_INTERVAL = 5.0
+# Días materializados en memoria para consultas
+DAY_CACHE_SIZE = 4
+DEFAULT_PAGE_SIZE = 100
+
+
 @dataclass
 class RegistroAuditoria:
     id: str
@@ -29,79 +52,359 @@ class RegistroAuditoria:
     duration_seconds: Optional[float]
     details: Dict[str, Any]
     created_at: str
-    
+
     def to_dict(self) -> Dict:
         return asdict(self)
 
 
+def _empty_day() -> Dict[str, Any]:
+    return {"bytes": 0, "status": {}, "skills": {}}
+
+
+def _bump(counter: Dict[str, int], key: str, delta: int) -> None:
+    value = counter.get(key, 0) + delta
+    if value:
+        counter[key] = value
+    else:
+        counter.pop(key, None)
+
+
+class AlmacenAuditoria:
+    """Log append-only de auditoría con índice y contadores incrementales"""
+
+    def __init__(self, base_path: Path = AUDITORIA_PATH, retention_days: int = RETENTION_DAYS):
+        self.base_path = Path(base_path)
+        self.retention_days = retention_days
+        self.base_path.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        # Ejecuciones sin finalizar
+        self._abiertos: Dict[str, RegistroAuditoria] = {}
+        # fecha -> contadores del día y bytes del log ya contabilizados
+        self._dias: Dict[str, Dict[str, Any]] = {}
+        # fecha -> registros del día materializados (orden de inicio)
+        self._cache_dias: "OrderedDict[str, Dict[str, RegistroAuditoria]]" = OrderedDict()
+        self._stats_dirty = False
+        self._last_persist = time.monotonic()
+        self._fecha_limpieza = ""
+
+        self._cargar_indice()
+
+    # ------------------------------------------------------------------
+    # Archivos
+    # ------------------------------------------------------------------
+
+    def _get_file_path(self, date_str: str) -> Path:
+        """Obtener ruta del log para una fecha específica"""
+        return self.base_path / f"auditoria_{date_str}.jsonl"
+
+    def _legacy_path(self, date_str: str) -> Path:
+        return self.base_path / f"auditoria_{date_str}.json"
+
+    def _fechas_en_disco(self) -> List[str]:
+        fechas = set()
+        for archivo in self.base_path.glob("auditoria_*.json*"):
+            fecha = archivo.name.split("_", 1)[1].split(".", 1)[0]
+            if len(fecha) == 10:
+                fechas.add(fecha)
+        return sorted(fechas)
+
+    def _purgar_antiguos(self) -> None:
+        """Eliminar días fuera de la retención (por nombre, sin leerlos)"""
+        hoy = datetime.now().strftime("%Y-%m-%d")
+        if hoy == self._fecha_limpieza:
+            return
+        self._fecha_limpieza = hoy
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        for fecha in self._fechas_en_disco():
+            if fecha >= cutoff:
+                continue
+            for archivo in (self._get_file_path(fecha), self._legacy_path(fecha)):
+                if archivo.exists():
+                    archivo.unlink()
+                    logger.info(f"Eliminado registro antiguo: {archivo.name}")
+            self._dias.pop(fecha, None)
+            self._cache_dias.pop(fecha, None)
+            self._stats_dirty = True
+
+    # ------------------------------------------------------------------
+    # Índice y contadores
+    # ------------------------------------------------------------------
+
+    def _cargar_indice(self) -> None:
+        """Cargar contadores guardados y contabilizar sólo lo añadido después"""
+        stats_path = self.base_path / STATS_FILE
+        if stats_path.exists():
+            try:
+                with open(stats_path, 'r', encoding='utf-8') as f:
+                    self._dias = json.load(f).get("dias", {})
+            except Exception as e:
+                logger.error(f"Error cargando {STATS_FILE}, se reconstruye: {e}")
+                self._dias = {}
+
+        self._purgar_antiguos()
+
+        en_disco = self._fechas_en_disco()
+        for fecha in en_disco:
+            dia = self._dias.get(fecha)
+            path = self._get_file_path(fecha)
+            if not path.exists():
+                # Día en formato antiguo (JSON completo): se migra una vez
+                if dia is None:
+                    self._migrar_legacy(fecha)
+                continue
+            size = path.stat().st_size
+            if dia is None or dia.get("bytes", 0) > size:
+                dia = self._dias[fecha] = _empty_day()
+            if dia["bytes"] < size:
+                self._contabilizar(fecha, dia)
+                self._stats_dirty = True
+
+        for fecha in set(self._dias) - set(en_disco):
+            self._dias.pop(fecha)
+            self._stats_dirty = True
+
+        self.guardar_estadisticas()
+        logger.info(f"Índice de auditoría cargado ({len(self._dias)} días)")
+
+    def _contabilizar(self, fecha: str, dia: Dict[str, Any]) -> None:
+        """Aplicar a los contadores los eventos del log desde dia['bytes']"""
+        path = self._get_file_path(fecha)
+        abiertos: Dict[str, str] = {}
+        with open(path, 'rb') as f:
+            f.seek(dia["bytes"])
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # línea a medio escribir
+                dia["bytes"] += len(raw)
+                try:
+                    evento = json.loads(raw)
+                except ValueError:
+                    continue
+                if evento.get("op") == "start":
+                    reg = evento["registro"]
+                    _bump(dia["status"], reg["status"], 1)
+                    _bump(dia["skills"], reg["skill_name"], 1)
+                    abiertos[reg["id"]] = reg["status"]
+                elif evento.get("op") == "end":
+                    previo = abiertos.pop(evento["id"], "running")
+                    _bump(dia["status"], previo, -1)
+                    _bump(dia["status"], evento["status"], 1)
+
+    def _migrar_legacy(self, fecha: str) -> None:
+        """Convertir un día del formato JSON antiguo a log append-only"""
+        legacy = self._legacy_path(fecha)
+        try:
+            with open(legacy, 'r', encoding='utf-8') as f:
+                registros = json.load(f).get("registros", [])
+            with open(self._get_file_path(fecha), 'a', encoding='utf-8') as f:
+                for reg in registros:
+                    f.write(json.dumps({"op": "start", "registro": reg}, ensure_ascii=False) + "\n")
+            dia = self._dias[fecha] = _empty_day()
+            self._contabilizar(fecha, dia)
+            legacy.unlink()
+            self._stats_dirty = True
+            logger.info(f"Migrado {legacy.name} a log append-only ({len(registros)} registros)")
+        except Exception as e:
+            logger.error(f"Error migrando auditoría {legacy}: {e}")
+
+    def _aplicar(self, fecha: str, evento: Dict[str, Any], nbytes: int, previo: Optional[str] = None) -> None:
+        dia = self._dias.setdefault(fecha, _empty_day())
+        dia["bytes"] += nbytes
+        if evento["op"] == "start":
+            reg = evento["registro"]
+            _bump(dia["status"], reg["status"], 1)
+            _bump(dia["skills"], reg["skill_name"], 1)
+        else:
+            _bump(dia["status"], previo or "running", -1)
+            _bump(dia["status"], evento["status"], 1)
+        self._stats_dirty = True
+
+    def guardar_estadisticas(self) -> None:
+        """Guardar contadores (escritura atómica)"""
+        with self._lock:
+            if not self._stats_dirty and (self.base_path / STATS_FILE).exists():
+                return
+            path = self.base_path / STATS_FILE
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"dias": self._dias}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            self._stats_dirty = False
+            self._last_persist = time.monotonic()
+
+    def _maybe_guardar_estadisticas(self) -> None:
+        if self._stats_dirty and time.monotonic() - self._last_persist >= STATS_PERSIST_INTERVAL:
+            self.guardar_estadisticas()
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def _append(self, fecha: str, evento: Dict[str, Any]) -> int:
+        line = (json.dumps(evento, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self._get_file_path(fecha), 'ab') as f:
+            f.write(line)
+        return len(line)
+
+    def iniciar(self, registro: RegistroAuditoria) -> None:
+        with self._lock:
+            self._purgar_antiguos()
+            evento = {"op": "start", "registro": registro.to_dict()}
+            nbytes = self._append(registro.created_at, evento)
+            self._aplicar(registro.created_at, evento, nbytes)
+            self._abiertos[registro.id] = registro
+            cached = self._cache_dias.get(registro.created_at)
+            if cached is not None:
+                cached[registro.id] = registro
+            self._maybe_guardar_estadisticas()
+
+    def finalizar(self, registro_id: str, status: str, details_update: Optional[Dict] = None) -> Optional[RegistroAuditoria]:
+        with self._lock:
+            registro = self._abiertos.pop(registro_id, None)
+            if registro is None:
+                return None
+            previo = registro.status
+            end = datetime.now()
+            registro.status = status
+            registro.end_time = end.isoformat()
+            registro.duration_seconds = (end - datetime.fromisoformat(registro.start_time)).total_seconds()
+            if details_update:
+                registro.details.update(details_update)
+
+            evento = {
+                "op": "end",
+                "id": registro_id,
+                "status": status,
+                "end_time": registro.end_time,
+                "duration_seconds": registro.duration_seconds,
+                "details_update": details_update or {},
+            }
+            nbytes = self._append(registro.created_at, evento)
+            self._aplicar(registro.created_at, evento, nbytes, previo=previo)
+            self._maybe_guardar_estadisticas()
+            return registro
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _cargar_dia(self, fecha: str) -> Dict[str, RegistroAuditoria]:
+        """Registros de un día en orden de inicio (caché LRU de días)"""
+        cached = self._cache_dias.get(fecha)
+        if cached is not None:
+            self._cache_dias.move_to_end(fecha)
+            return cached
+
+        registros: Dict[str, RegistroAuditoria] = {}
+        path = self._get_file_path(fecha)
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        evento = json.loads(line)
+                    except ValueError:
+                        continue
+                    if evento.get("op") == "start":
+                        reg = RegistroAuditoria(**evento["registro"])
+                        registros[reg.id] = self._abiertos.get(reg.id, reg)
+                    elif evento.get("op") == "end":
+                        reg = registros.get(evento["id"])
+                        if reg is not None:
+                            reg.status = evento["status"]
+                            reg.end_time = evento.get("end_time")
+                            reg.duration_seconds = evento.get("duration_seconds")
+                            reg.details.update(evento.get("details_update") or {})
+
+        self._cache_dias[fecha] = registros
+        while len(self._cache_dias) > DAY_CACHE_SIZE:
+            self._cache_dias.popitem(last=False)
+        return registros
+
+    def pagina(self, skill_id: Optional[str] = None, status: Optional[str] = None,
+               fecha_desde: Optional[str] = None, fecha_hasta: Optional[str] = None,
+               limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Registros de más reciente a más antiguo. El cursor ("fecha:posición")
+        permite pedir la página siguiente sin recorrer lo ya devuelto.
+        """
+        with self._lock:
+            fechas = sorted(self._dias, reverse=True)
+            cursor_fecha, cursor_pos = None, None
+            if cursor:
+                cursor_fecha, _, pos = cursor.partition(":")
+                cursor_pos = int(pos) if pos.isdigit() else None
+
+            resultado: List[Dict] = []
+            next_cursor = None
+            for fecha in fechas:
+                if fecha_hasta and fecha > fecha_hasta:
+                    continue
+                if fecha_desde and fecha < fecha_desde:
+                    break
+                if cursor_fecha and fecha > cursor_fecha:
+                    continue
+                # Sin registros que encajen en el día: no hace falta leerlo
+                dia = self._dias[fecha]
+                if status and not dia["status"].get(status):
+                    continue
+
+                registros = list(self._cargar_dia(fecha).values())
+                # El log está en orden de inicio: más reciente = mayor posición
+                start = len(registros) - 1
+                if fecha == cursor_fecha and cursor_pos is not None:
+                    start = cursor_pos - 1
+                for pos in range(start, -1, -1):
+                    reg = registros[pos]
+                    if skill_id and reg.skill_id != skill_id:
+                        continue
+                    if status and reg.status != status:
+                        continue
+                    if len(resultado) == limit:
+                        next_cursor = f"{fecha}:{pos + 1}"
+                        break
+                    resultado.append(reg.to_dict())
+                if next_cursor:
+                    break
+
+            return {"registros": resultado, "next_cursor": next_cursor}
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            status: Dict[str, int] = {}
+            skills: Dict[str, int] = {}
+            for dia in self._dias.values():
+                for k, v in dia["status"].items():
+                    status[k] = status.get(k, 0) + v
+                for k, v in dia["skills"].items():
+                    skills[k] = skills.get(k, 0) + v
+            return {"status": status, "skills": skills}
+
+
 class AuditoriaManager:
     """Gestor centralizado de auditoría"""
-    
+
     _instance = None
-    _lock = asyncio.Lock()
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._initialized = False
         return cls._instance
-    
+
     def __init__(self):
         if self._initialized:
             return
         self._initialized = True
-        
-        AUDITORIA_PATH.mkdir(parents=True, exist_ok=True)
-        self.registros: List[RegistroAuditoria] = []
-        self._cargar_registros()
-    
-    def _get_file_path(self, date_str: str) -> Path:
-        """Obtener ruta del archivo para una fecha específica"""
-        return AUDITORIA_PATH / f"auditoria_{date_str}.json"
-    
-    def _cargar_registros(self):
-        """Cargar registros de los últimos 30 días"""
-        cutoff_date = datetime.now() - timedelta(days=RETENTION_DAYS)
-        
-        for archivo in AUDITORIA_PATH.glob("auditoria_*.json"):
-            try:
-                fecha_str = archivo.stem.replace("auditoria_", "")
-                fecha = datetime.strptime(fecha_str, "%Y-%m-%d")
-                
-                if fecha < cutoff_date:
-                    # Eliminar archivos antiguos
-                    archivo.unlink()
-                    logger.info(f"Eliminado registro antiguo: {archivo.name}")
-                    continue
-                
-                with open(archivo, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for reg in data.get("registros", []):
-                        self.registros.append(RegistroAuditoria(**reg))
-                        
-            except Exception as e:
-                logger.error(f"Error cargando auditoría {archivo}: {e}")
-        
-        logger.info(f"Cargados {len(self.registros)} registros de auditoría")
-    
-    def _guardar_registros_dia(self, date_str: str):
-        """Guardar registros de un día específico"""
-        registros_dia = [r for r in self.registros if r.created_at.startswith(date_str)]
-        
-        if registros_dia:
-            archivo = self._get_file_path(date_str)
-            with open(archivo, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "fecha": date_str,
-                    "registros": [r.to_dict() for r in registros_dia],
-                    "total": len(registros_dia)
-                }, f, indent=2, ensure_ascii=False)
-    
+
+        self.almacen = AlmacenAuditoria(AUDITORIA_PATH)
+        atexit.register(self.almacen.guardar_estadisticas)
+
     def iniciar_registro(self, skill_name: str, skill_id: str, action: str, details: Dict = None) -> str:
         """Iniciar un nuevo registro de auditoría"""
         now = datetime.now()
         registro_id = f"{skill_id}_{now.strftime('%Y%m%d_%H%M%S')}_{int(time.time()*1000)%1000}"
-        
+
         registro = RegistroAuditoria(
             id=registro_id,
             skill_name=skill_name,
@@ -114,78 +417,46 @@ class AuditoriaManager:
             details=details or {},
             created_at=now.strftime("%Y-%m-%d")
         )
-        
-        self.registros.append(registro)
+
+        self.almacen.iniciar(registro)
         logger.info(f"[AUDITORIA] Iniciado: {skill_name} - {action} (ID: {registro_id})")
-        
+
         return registro_id
-    
+
     def finalizar_registro(self, registro_id: str, status: str = "completed", details_update: Dict = None):
         """Finalizar un registro de auditoría"""
-        for registro in self.registros:
-            if registro.id == registro_id:
-                registro.status = status
-                registro.end_time = datetime.now().isoformat()
-                
-                start = datetime.fromisoformat(registro.start_time)
-                end = datetime.now()
-                registro.duration_seconds = (end - start).total_seconds()
-                
-                if details_update:
-                    registro.details.update(details_update)
-                
-                # Guardar inmediatamente
-                self._guardar_registros_dia(registro.created_at)
-                
-                logger.info(f"[AUDITORIA] Finalizado: {registro.skill_name} - {status} ({registro.duration_seconds:.2f}s)")
-                return True
-        
-        return False
-    
-    def obtener_registros(self, skill_id: str = None, status: str = None, 
+        registro = self.almacen.finalizar(registro_id, status, details_update)
+        if registro is None:
+            return False
+        logger.info(f"[AUDITORIA] Finalizado: {registro.skill_name} - {status} ({registro.duration_seconds:.2f}s)")
+        return True
+
+    def obtener_registros(self, skill_id: str = None, status: str = None,
                          fecha_desde: str = None, fecha_hasta: str = None,
                          limit: int = 1000) -> List[Dict]:
-        """Obtener registros con filtros"""
-        resultado = self.registros
-        
-        if skill_id:
-            resultado = [r for r in resultado if r.skill_id == skill_id]
-        
-        if status:
-            resultado = [r for r in resultado if r.status == status]
-        
-        if fecha_desde:
-            resultado = [r for r in resultado if r.created_at >= fecha_desde]
-        
-        if fecha_hasta:
-            resultado = [r for r in resultado if r.created_at <= fecha_hasta]
-        
-        # Ordenar por fecha descendente
-        resultado = sorted(resultado, key=lambda x: x.start_time, reverse=True)
-        
-        return [r.to_dict() for r in resultado[:limit]]
-    
+        """Obtener registros con filtros (más recientes primero)"""
+        return self.almacen.pagina(skill_id, status, fecha_desde, fecha_hasta, limit=limit)["registros"]
+
+    def obtener_pagina(self, skill_id: str = None, status: str = None,
+                       fecha_desde: str = None, fecha_hasta: str = None,
+                       limit: int = DEFAULT_PAGE_SIZE, cursor: str = None) -> Dict:
+        """Página de registros y cursor para la siguiente"""
+        return self.almacen.pagina(skill_id, status, fecha_desde, fecha_hasta, limit=limit, cursor=cursor)
+
     def obtener_estadisticas(self) -> Dict:
         """Obtener estadísticas de auditoría"""
-        total = len(self.registros)
-        completed = len([r for r in self.registros if r.status == "completed"])
-        failed = len([r for r in self.registros if r.status == "failed"])
-        running = len([r for r in self.registros if r.status == "running"])
-        
-        # Agrupar por skill
-        skills_count = {}
-        for r in self.registros:
-            skills_count[r.skill_name] = skills_count.get(r.skill_name, 0) + 1
-        
+        stats = self.almacen.estadisticas()
+        por_estado = stats["status"]
+
         return {
-            "total": total,
-            "completed": completed,
-            "failed": failed,
-            "running": running,
+            "total": sum(por_estado.values()),
+            "completed": por_estado.get("completed", 0),
+            "failed": por_estado.get("failed", 0),
+            "running": por_estado.get("running", 0),
             "retention_days": RETENTION_DAYS,
-            "skills_mas_usadas": sorted(skills_count.items(), key=lambda x: x[1], reverse=True)[:10]
+            "skills_mas_usadas": sorted(stats["skills"].items(), key=lambda x: x[1], reverse=True)[:10]
         }
 
 
 # Instancia global
-auditoria_manager = AuditoriaManager()
+auditoria_manager = lazy_service("auditoria_manager", AuditoriaManager)
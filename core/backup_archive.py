@@ -0,0 +1,281 @@
+"""
+Archivos de backup incrementales y deduplicados
+Cada backup es un ZIP con `backup_manifest.json`: la lista completa de
+archivos respaldados con su hash y el ZIP que guarda su contenido. Sólo se
+comprimen los archivos nuevos o modificados; los demás apuntan al backup
+anterior que ya los tiene (y un mismo contenido con otro nombre no se
+repite).
+
+Para no releer todo en cada backup, `backup_index.json` recuerda tamaño,
+mtime y hash de cada archivo: si tamaño y mtime no cambian no se vuelve a
+calcular el hash.
+
+La compresión es síncrona (zlib libera el GIL): BackupManager la ejecuta
+en un hilo con asyncio.to_thread.
+
+    archiver = BackupArchiver(Path("backups"), compression_level=6)
+    result = archiver.create(zip_path, [("skills/a.py", Path("skills_user/a.py"))])
+    with archiver.open_member(zip_path, "skills/a.py") as f:
+        ...
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from core.blob_store import hash_file
+
+logger = logging.getLogger("MiIABackupArchive")
+
+MANIFEST_NAME = "backup_manifest.json"
+INDEX_NAME = "backup_index.json"
+MANIFEST_VERSION = 1
+HASH_CHUNK = 1024 * 1024
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# Ya comprimidos: volver a pasarlos por deflate sólo gasta CPU
+STORED_SUFFIXES = {
+    ".zip", ".gz", ".bz2", ".xz", ".7z", ".rar", ".png", ".jpg", ".jpeg", ".gif", ".webp",
+    ".mp3", ".mp4", ".ogg", ".m4a", ".pdf", ".docx", ".xlsx", ".pptx",
+}
+
+
+@dataclass
+class ArchiveResult:
+    """Resultado de un backup: qué se guardó en este ZIP y qué se reutilizó"""
+    path: Path
+    files: List[str] = field(default_factory=list)
+    stored: List[str] = field(default_factory=list)
+    reused: List[str] = field(default_factory=list)
+    bytes_stored: int = 0
+    full: bool = False
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "path": str(self.path),
+            "files": len(self.files),
+            "stored": len(self.stored),
+            "reused": len(self.reused),
+            "bytes_stored": self.bytes_stored,
+            "full": self.full,
+        }
+
+
+class BackupArchiver:
+    """Crea, resuelve y poda backups incrementales en `backup_dir`"""
+
+    def __init__(self, backup_dir: Path, compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+                 pattern: str = "miia_backup_*.zip"):
+        self.backup_dir = Path(backup_dir)
+        self.compression_level = max(0, min(9, int(compression_level)))
+        self.pattern = pattern
+        self.index_file = self.backup_dir / INDEX_NAME
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Índice local
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> Dict[str, Dict[str, object]]:
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("files", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, files: Mapping[str, Mapping[str, object]]) -> None:
+        tmp = self.index_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": files}, f)
+        os.replace(tmp, self.index_file)
+
+    # ------------------------------------------------------------------
+    # Crear
+    # ------------------------------------------------------------------
+
+    def create(self, zip_path: Path, sources: Iterable[Tuple[str, Path]],
+               extra: Optional[Mapping[str, bytes]] = None, full: bool = False,
+               record: bool = True) -> ArchiveResult:
+        """
+        Crear `zip_path` con los archivos nuevos o modificados de `sources`
+        ((nombre en el archivo, ruta)). `full` guarda todo: el ZIP queda
+        autocontenido. Con `record=False` (exportaciones) el ZIP no entra en
+        la cadena de backups
+        """
+        zip_path = Path(zip_path)
+        result = ArchiveResult(zip_path, full=full)
+        with self._lock:
+            index = self._load_index()
+            # Contenido ya guardado (ZIP, nombre dentro del ZIP) en algún backup que sigue en disco
+            blobs: Dict[str, Tuple[str, str]] = {}
+            if not full:
+                for arcname, entry in index.items():
+                    archive = entry.get("archive")
+                    # Si se reescribe un ZIP con el mismo nombre, su contenido anterior no cuenta
+                    if archive and archive != zip_path.name and (self.backup_dir / archive).exists():
+                        blobs.setdefault(entry["sha256"], (archive, entry.get("member", arcname)))
+
+            manifest: Dict[str, Dict[str, object]] = {}
+            new_index: Dict[str, Dict[str, object]] = {}
+            tmp_path = zip_path.with_suffix(".partial")
+            try:
+                with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED,
+                                     compresslevel=self.compression_level) as zf:
+                    for arcname, path in sources:
+                        try:
+                            st = os.stat(path)
+                        except OSError:
+                            continue
+                        known = index.get(arcname)
+                        if known and known.get("size") == st.st_size and known.get("mtime_ns") == st.st_mtime_ns:
+                            sha = known["sha256"]
+                        else:
+                            sha = hash_file(path)
+                        blob = blobs.get(sha)
+                        if blob is None:
+                            compress = zipfile.ZIP_STORED if Path(path).suffix.lower() in STORED_SUFFIXES \
+                                else zipfile.ZIP_DEFLATED
+                            zf.write(path, arcname, compress_type=compress)
+                            blob = blobs[sha] = (zip_path.name, arcname)
+                            result.stored.append(arcname)
+                            result.bytes_stored += st.st_size
+                        else:
+                            result.reused.append(arcname)
+                        result.files.append(arcname)
+                        manifest[arcname] = {"sha256": sha, "size": st.st_size, "archive": blob[0], "member": blob[1]}
+                        new_index[arcname] = {**manifest[arcname], "mtime_ns": st.st_mtime_ns}
+
+                    for arcname, data in (extra or {}).items():
+                        zf.writestr(arcname, data)
+                        result.files.append(arcname)
+                        result.stored.append(arcname)
+
+                    zf.writestr(MANIFEST_NAME, json.dumps({
+                        "version": MANIFEST_VERSION,
+                        "created": datetime.now().isoformat(),
+                        "full": full,
+                        "files": manifest,
+                    }, indent=1))
+                os.replace(tmp_path, zip_path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+            if record:
+                self._save_index(new_index)
+        return result
+
+    # ------------------------------------------------------------------
+    # Leer
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def read_manifest(zip_path: Path) -> Optional[Dict[str, object]]:
+        """Manifest del backup, o None si es un ZIP antiguo sin él"""
+        with zipfile.ZipFile(zip_path, "r") as zf:
+            try:
+                return json.loads(zf.read(MANIFEST_NAME))
+            except KeyError:
+                return None
+
+    def members(self, zip_path: Path) -> List[str]:
+        """Todos los archivos que restaura el backup (propios y referenciados)"""
+        manifest = self.read_manifest(zip_path)
+        with zipfile.ZipFile(zip_path, "r") as zf:
+            own = [n for n in zf.namelist() if n != MANIFEST_NAME]
+        if manifest is None:
+            return own
+        return sorted(set(own) | set(manifest.get("files", {})))
+
+    def _locate(self, zip_path: Path, archive: str) -> Path:
+        # Junto al backup (importado de otra carpeta) o en el directorio de backups
+        for folder in (Path(zip_path).parent, self.backup_dir):
+            candidate = folder / archive
+            if candidate.exists():
+                return candidate
+        raise FileNotFoundError(f"Falta {archive}, necesario para restaurar {Path(zip_path).name}")
+
+    def open_member(self, zip_path: Path, arcname: str) -> IO[bytes]:
+        """Stream de un archivo del backup, buscándolo en el ZIP que lo guarda"""
+        manifest = self.read_manifest(zip_path) or {}
+        entry = manifest.get("files", {}).get(arcname)
+        source = Path(zip_path) if entry is None else self._locate(zip_path, entry["archive"])
+        name = arcname if entry is None else entry.get("member", arcname)
+        zf = zipfile.ZipFile(source, "r")
+        try:
+            member = zf.open(name)
+        except KeyError:
+            zf.close()
+            raise
+        # El stream mantiene vivo el ZipFile; se cierra con él
+        close = member.close
+
+        def _close():
+            close()
+            zf.close()
+
+        member.close = _close
+        return member
+
+    def extract(self, zip_path: Path, arcname: str, target: Path) -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with self.open_member(zip_path, arcname) as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst, HASH_CHUNK)
+
+    # ------------------------------------------------------------------
+    # Retención
+    # ------------------------------------------------------------------
+
+    def archives(self) -> List[Path]:
+        """Backups del directorio, del más reciente al más antiguo"""
+        return sorted(self.backup_dir.glob(self.pattern), key=lambda p: p.stat().st_mtime, reverse=True)
+
+    def chain_length(self) -> int:
+        """Backups incrementales desde el último completo"""
+        length = 0
+        for path in self.archives():
+            try:
+                manifest = self.read_manifest(path)
+            except (OSError, zipfile.BadZipFile):
+                continue
+            if manifest is None or manifest.get("full"):
+                break
+            length += 1
+        return length
+
+    def referenced(self, zip_path: Path) -> Set[str]:
+        manifest = self.read_manifest(zip_path) or {}
+        return {entry["archive"] for entry in manifest.get("files", {}).values()}
+
+    def prune(self, keep: int) -> List[Path]:
+        """
+        Borrar los backups más antiguos que los `keep` últimos, salvo los que
+        alguno de ellos necesita para restaurarse
+        """
+        archives = self.archives()
+        kept = archives[:keep]
+        needed = {p.name for p in kept}
+        for path in kept:
+            try:
+                needed |= self.referenced(path)
+            except (OSError, zipfile.BadZipFile) as e:
+                logger.warning(f"No se pudo leer el manifest de {path.name}: {e}")
+        removed = []
+        for path in archives[keep:]:
+            if path.name in needed:
+                continue
+            try:
+                path.unlink()
+                removed.append(path)
+            except OSError as e:
+                logger.warning(f"No se pudo eliminar {path}: {e}")
+        return removed
@@ -0,0 +1,332 @@
+"""
+Almacén de blobs direccionado por contenido para MININA
+Guarda cada contenido una sola vez (sha256 -> blob) con conteo de referencias,
+de modo que las skills que regeneran el mismo archivo no ocupan espacio extra.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Tuple, Union
+
+logger = logging.getLogger("BlobStore")
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB por lectura: nunca se carga un archivo completo en memoria
+
+# ioctl FICLONE de Linux (reflink en btrfs/xfs)
+_FICLONE = 0x40049409
+
+
+def hash_file(path: Union[str, Path], chunk_size: int = CHUNK_SIZE) -> str:
+    """Calcular sha256 de un archivo leyendo por bloques"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_copy(src: Union[str, Path], dst_dir: Union[str, Path],
+              chunk_size: int = CHUNK_SIZE) -> Tuple[str, Path]:
+    """
+    Copiar `src` a un temporal en `dst_dir` calculando su sha256 en la misma
+    pasada (el hash corresponde exactamente a lo copiado aunque el origen
+    cambie a la vez). Retorna (digest, temporal); si falla no deja temporal.
+    """
+    h = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=str(dst_dir), prefix=".tmp_")
+    try:
+        with open(src, "rb") as fin, os.fdopen(fd, "wb") as fout:
+            for chunk in iter(lambda: fin.read(chunk_size), b""):
+                h.update(chunk)
+                fout.write(chunk)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return h.hexdigest(), Path(tmp)
+
+
+def _reflink(src: Path, dest: Path) -> bool:
+    """Intentar un clon copy-on-write (solo Linux con FS compatible)"""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+        with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        return True
+    except Exception:
+        try:
+            dest.unlink()
+        except OSError:
+            pass
+        return False
+
+
+def link_or_copy(src: Union[str, Path], dest: Union[str, Path]) -> str:
+    """
+    Materializar src en dest sin duplicar datos cuando sea posible.
+    Orden: hardlink -> reflink -> copia. Retorna el método usado.
+    """
+    src, dest = Path(src), Path(dest)
+    try:
+        os.link(src, dest)
+        return "hardlink"
+    except OSError:
+        pass
+    if _reflink(src, dest):
+        return "reflink"
+    shutil.copy2(src, dest)
+    return "copy"
+
+
+def unlink_readonly(path: Union[str, Path], shared_with: Union[str, Path, None] = None) -> None:
+    """
+    Borrar un enlace a un blob de solo lectura. En POSIX basta con unlink;
+    Windows no borra archivos de solo lectura, así que ahí se quita el
+    atributo, se borra y se vuelve a poner en el inodo compartido a través
+    de `shared_with` (otro enlace al mismo blob)
+    """
+    path = Path(path)
+    try:
+        path.unlink()
+        return
+    except PermissionError:
+        if os.name != "nt":
+            raise
+    os.chmod(path, 0o644)
+    try:
+        path.unlink()
+    finally:
+        if shared_with is not None:
+            try:
+                os.chmod(shared_with, 0o444)
+            except OSError:
+                pass
+
+
+class BlobStore:
+    """Almacén sha256 -> blob con referencias persistidas en refs.json"""
+
+    def __init__(self, base_path: Union[str, Path]):
+        self.base_path = Path(base_path)
+        self.objects_path = self.base_path / "objects"
+        self.tmp_path = self.base_path / "tmp"
+        self.refs_file = self.base_path / "refs.json"
+        self.refs: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+        self.objects_path.mkdir(parents=True, exist_ok=True)
+        self.tmp_path.mkdir(parents=True, exist_ok=True)
+        self._load_refs()
+
+    # ------------------------------------------------------------------
+    # Persistencia de referencias
+    # ------------------------------------------------------------------
+
+    def _load_refs(self):
+        if self.refs_file.exists():
+            try:
+                with open(self.refs_file, "r", encoding="utf-8") as f:
+                    self.refs = {k: int(v) for k, v in json.load(f).items()}
+            except Exception as e:
+                logger.error(f"Error cargando referencias de blobs: {e}")
+
+    def _save_refs(self):
+        try:
+            tmp = self.refs_file.with_suffix(".json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.refs, f)
+            os.replace(tmp, self.refs_file)
+        except Exception as e:
+            logger.error(f"Error guardando referencias de blobs: {e}")
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def blob_path(self, digest: str) -> Path:
+        """Ruta física de un blob (objects/ab/cdef...)"""
+        return self.objects_path / digest[:2] / digest[2:]
+
+    def exists(self, digest: str) -> bool:
+        return self.blob_path(digest).exists()
+
+    def _commit_tmp(self, tmp: Path, digest: str) -> bool:
+        """Mover un temporal ya hasheado a su ruta final. Retorna True si era nuevo."""
+        dest = self.blob_path(digest)
+        if dest.exists():
+            tmp.unlink()
+            return False
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp, dest)
+        try:
+            os.chmod(dest, 0o444)  # los blobs son inmutables; los hardlinks también
+        except OSError:
+            pass
+        return True
+
+    def _add_ref(self, digest: str):
+        with self._lock:
+            self.refs[digest] = self.refs.get(digest, 0) + 1
+            self._save_refs()
+
+    def open_writer(self) -> "BlobWriter":
+        """Escritor incremental (uploads que llegan por trozos); ver BlobWriter"""
+        return BlobWriter(self)
+
+    def put_stream(self, stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Tuple[str, int]:
+        """
+        Guardar el contenido de un stream hasheando mientras se escribe.
+        Retorna (digest, tamaño). Suma una referencia.
+        """
+        with self.open_writer() as writer:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                writer.write(chunk)
+            return writer.commit()
+
+    def put_bytes(self, data: bytes) -> Tuple[str, int]:
+        """Guardar contenido en memoria. Suma una referencia."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if not self.exists(digest):
+                fd, tmp_name = tempfile.mkstemp(dir=str(self.tmp_path))
+                with os.fdopen(fd, "wb") as out:
+                    out.write(data)
+                self._commit_tmp(Path(tmp_name), digest)
+            self._add_ref(digest)
+        return digest, len(data)
+
+    def put_file(self, source: Union[str, Path], move: bool = False) -> Tuple[str, int]:
+        """
+        Guardar un archivo existente. Con move=True el origen se mueve al almacén
+        (rename atómico, sin copiar bytes) o se elimina si el blob ya existía.
+        Suma una referencia.
+        """
+        source = Path(source)
+        if not move:
+            with open(source, "rb") as f:
+                return self.put_stream(f)
+
+        digest = hash_file(source)
+        size = source.stat().st_size
+        with self._lock:
+            if self.exists(digest):
+                source.unlink()
+            else:
+                dest = self.blob_path(digest)
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.replace(source, dest)
+                except OSError:
+                    # Distinto filesystem: shutil.move copia y elimina el origen
+                    shutil.move(str(source), str(dest))
+                try:
+                    os.chmod(dest, 0o444)
+                except OSError:
+                    pass
+            self._add_ref(digest)
+        return digest, size
+
+    def link_to(self, digest: str, dest: Union[str, Path]) -> str:
+        """Crear dest apuntando al blob (hardlink/reflink/copia)"""
+        return link_or_copy(self.blob_path(digest), dest)
+
+    def release(self, digest: str) -> bool:
+        """Restar una referencia; elimina el blob al llegar a cero. True si se eliminó."""
+        with self._lock:
+            count = self.refs.get(digest, 0) - 1
+            if count > 0:
+                self.refs[digest] = count
+                self._save_refs()
+                return False
+            self.refs.pop(digest, None)
+            self._save_refs()
+            path = self.blob_path(digest)
+            try:
+                if path.exists():
+                    unlink_readonly(path)
+                return True
+            except OSError as e:
+                logger.error(f"Error eliminando blob {digest[:12]}: {e}")
+                return False
+
+    def ref_count(self, digest: str) -> int:
+        return self.refs.get(digest, 0)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Estadísticas: blobs únicos, referencias y bytes ahorrados"""
+        with self._lock:
+            unique_bytes = 0
+            logical_bytes = 0
+            for digest, count in self.refs.items():
+                try:
+                    size = self.blob_path(digest).stat().st_size
+                except OSError:
+                    continue
+                unique_bytes += size
+                logical_bytes += size * count
+            return {
+                "blobs": len(self.refs),
+                "references": sum(self.refs.values()),
+                "stored_bytes": unique_bytes,
+                "logical_bytes": logical_bytes,
+                "saved_bytes": logical_bytes - unique_bytes,
+            }
+
+
+class BlobWriter:
+    """
+    Escritura de un blob por trozos hasheando sobre la marcha: write() por
+    cada trozo y commit() al final, que mueve el temporal a su ruta y suma la
+    referencia en la misma sección crítica. Si no se llega a commit() (error,
+    cliente desconectado) el temporal se borra al salir del with.
+    """
+
+    def __init__(self, store: BlobStore):
+        self.store = store
+        self.size = 0
+        self._hash = hashlib.sha256()
+        fd, tmp_name = tempfile.mkstemp(dir=str(store.tmp_path))
+        self._tmp = Path(tmp_name)
+        self._out = os.fdopen(fd, "wb")
+        self._done = False
+
+    def write(self, chunk: bytes) -> None:
+        self._hash.update(chunk)
+        self._out.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> Tuple[str, int]:
+        self._out.close()
+        digest = self._hash.hexdigest()
+        # Referencia en la misma sección crítica: un release concurrente no puede borrarlo entre medias
+        with self.store._lock:
+            self.store._commit_tmp(self._tmp, digest)
+            self.store._add_ref(digest)
+        self._done = True
+        return digest, self.size
+
+    def abort(self) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._out.close()
+        try:
+            self._tmp.unlink()
+        except OSError:
+            pass
+
+    def __enter__(self) -> "BlobWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.abort()
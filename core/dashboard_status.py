@@ -0,0 +1,285 @@
+"""
+Agregador de estado del dashboard para MININA
+Mantiene un snapshot en memoria que /api/dashboard/status devuelve al instante.
+Los contadores se actualizan por eventos del bus y los recursos se muestrean
+en una tarea de fondo, nunca dentro del handler HTTP.
+"""
+import asyncio
+import copy
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.CortexBus import bus
+
+logger = logging.getLogger("DashboardStatus")
+
+# Carpetas de data/output que muestra el dashboard (clave -> subcarpeta)
+OUTPUT_CATEGORIES = {
+    "imagenes": "Imagenes",
+    "texto": "Texto",
+    "video": "Video",
+    "audio": "Audio",
+    "documentos": "Documentos",
+    "trabajos": "Trabajos",
+}
+
+# Mismos tópicos que registra UserObservabilityStore como "acciones"
+ACTION_TOPICS = {
+    "user.SPEAK",
+    "user.UI_MESSAGE",
+    "user.PROGRESS",
+    "skill.RETRY_AVAILABLE",
+    "skill.RETRY_REQUEST",
+    "agent.SPAWNED",
+    "agent.RESULT",
+}
+
+RESOURCE_INTERVAL = 2.0     # segundos entre muestras de CPU/RAM
+SLOW_REFRESH_INTERVAL = 30.0  # skills y proveedores LLM (escaneos de disco)
+
+
+def _count_dir(path: Path) -> int:
+    """Contar entradas de un directorio con os.scandir (sin construir listas de Path)"""
+    try:
+        with os.scandir(path) as it:
+            return sum(1 for _ in it)
+    except OSError:
+        return 0
+
+
+class DashboardStatusAggregator:
+    """Snapshot incremental del estado del dashboard"""
+
+    def __init__(self, output_dir: Optional[Path] = None):
+        self.output_dir = output_dir
+        self._snapshot: Dict[str, Any] = {
+            "voice_active": False,
+            "skills_count": 0,
+            "running_skills": 0,
+            "files_count": {k: 0 for k in OUTPUT_CATEGORIES},
+            "total_files": 0,
+            "providers_configured": 0,
+            "today_actions": 0,
+            "system": {"cpu_percent": 0.0, "memory_percent": 0.0, "status": "online"},
+        }
+        self._running_pids: set = set()
+        self._dir_mtimes: Dict[str, float] = {}
+        self._files_dirty = True
+        self._today = datetime.now().date()
+        self._listeners: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+        self._tasks: List[asyncio.Task] = []
+        self._started = False
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    async def ensure_started(self) -> None:
+        """Arrancar suscripciones y tareas de fondo (idempotente)"""
+        if self._started:
+            return
+        self._started = True
+
+        if self.output_dir is None:
+            try:
+                from core.SkillVault import vault
+                self.output_dir = vault.data_dir / "output"
+            except Exception as e:
+                logger.warning(f"No se pudo resolver output_dir: {e}")
+
+        try:
+            from core.AgentLifecycleManager import agent_manager
+            self._running_pids = set(agent_manager.active_agents.keys())
+            self._snapshot["running_skills"] = len(self._running_pids)
+        except Exception:
+            pass
+
+        # Las acciones de hoy ya registradas sobreviven al reinicio
+        await self._seed_today_actions()
+
+        bus.subscribe("agent.SPAWNED", self._on_agent_spawned)
+        bus.subscribe("agent.KILLED", self._on_agent_killed)
+        bus.subscribe("work.COMPLETED", self._on_work_completed)
+        bus.subscribe("*", self._on_any_event)
+
+        # Primera carga completa antes de servir
+        await self._refresh_files()
+        await self._refresh_slow()
+
+        self._tasks = [
+            asyncio.create_task(self._resource_loop()),
+            asyncio.create_task(self._slow_loop()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._started = False
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+        """Registrar un callback async que recibe los deltas del snapshot"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def get_snapshot(self, voice_active: Optional[bool] = None) -> Dict[str, Any]:
+        """Copia del snapshot actual (O(1) en disco y CPU)"""
+        self._rollover()
+        snap = copy.deepcopy(self._snapshot)
+        if voice_active is not None:
+            snap["voice_active"] = voice_active
+        snap["success"] = True
+        snap["timestamp"] = datetime.now().isoformat()
+        return snap
+
+    # ------------------------------------------------------------------
+    # Actualización
+    # ------------------------------------------------------------------
+
+    async def _apply(self, changes: Dict[str, Any]) -> None:
+        """Aplicar cambios al snapshot y notificar sólo lo que realmente cambió"""
+        delta = {k: v for k, v in changes.items() if self._snapshot.get(k) != v}
+        if not delta:
+            return
+        self._snapshot.update(delta)
+        for listener in list(self._listeners):
+            try:
+                await listener(copy.deepcopy(delta))
+            except Exception as e:
+                logger.debug(f"Error notificando delta del dashboard: {e}")
+
+    async def _on_agent_spawned(self, data: Dict[str, Any]) -> None:
+        pid = (data or {}).get("pid")
+        if pid is not None:
+            self._running_pids.add(pid)
+        await self._apply({"running_skills": len(self._running_pids)})
+
+    async def _on_agent_killed(self, data: Dict[str, Any]) -> None:
+        self._running_pids.discard((data or {}).get("pid"))
+        self._files_dirty = True  # la skill pudo dejar archivos en output
+        await self._apply({"running_skills": len(self._running_pids)})
+
+    async def _on_work_completed(self, data: Dict[str, Any]) -> None:
+        self._files_dirty = True
+
+    def _rollover(self) -> None:
+        """Poner a cero las acciones de hoy si cambió el día desde el último evento"""
+        today = datetime.now().date()
+        if today != self._today:
+            self._today = today
+            self._snapshot["today_actions"] = 0
+
+    async def _on_any_event(self, event: Dict[str, Any]) -> None:
+        if event.get("topic") not in ACTION_TOPICS:
+            return
+        self._rollover()
+        await self._apply({"today_actions": self._snapshot["today_actions"] + 1})
+
+    def _count_today_actions(self) -> int:
+        """Acciones de hoy según UserObservabilityStore (SQLite, se ejecuta en un thread)"""
+        from core.UserObservabilityStore import store
+
+        today = self._today.isoformat()
+        return sum(
+            1 for e in store.get_recent_events(limit=100)
+            if e.get("topic") in ACTION_TOPICS and str(e.get("timestamp") or "").startswith(today)
+        )
+
+    async def _seed_today_actions(self) -> None:
+        try:
+            count = await asyncio.to_thread(self._count_today_actions)
+        except Exception as e:
+            logger.debug(f"No se pudieron leer las acciones de hoy: {e}")
+            return
+        self._rollover()
+        await self._apply({"today_actions": max(count, self._snapshot["today_actions"])})
+
+    def _scan_files(self) -> Optional[Dict[str, int]]:
+        """Recontar sólo las carpetas cuyo mtime cambió (se ejecuta en un thread)"""
+        if self.output_dir is None:
+            return None
+        counts = dict(self._snapshot["files_count"])
+        changed = False
+        for key, folder in OUTPUT_CATEGORIES.items():
+            path = self.output_dir / folder
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                mtime = -1.0
+            if self._dir_mtimes.get(key) == mtime:
+                continue
+            self._dir_mtimes[key] = mtime
+            counts[key] = _count_dir(path) if mtime >= 0 else 0
+            changed = True
+        return counts if changed else None
+
+    async def _refresh_files(self) -> None:
+        self._files_dirty = False
+        counts = await asyncio.to_thread(self._scan_files)
+        if counts is not None:
+            await self._apply({"files_count": counts, "total_files": sum(counts.values())})
+
+    def _read_slow_counters(self) -> Dict[str, Any]:
+        """Escaneos costosos: skills instaladas y proveedores LLM (en un thread)"""
+        changes: Dict[str, Any] = {}
+        try:
+            from core.SkillVault import vault
+            changes["skills_count"] = len(vault.list_user_skills())
+        except Exception as e:
+            logger.debug(f"Error contando skills: {e}")
+        try:
+            from core.SecureLLMGateway import secure_gateway
+            llm_status = secure_gateway.get_user_api_status("default")
+            changes["providers_configured"] = len(
+                [p for p in llm_status.get("providers", {}).values() if p.get("configured")]
+            )
+        except Exception:
+            changes["providers_configured"] = 0
+        return changes
+
+    async def _refresh_slow(self) -> None:
+        await self._apply(await asyncio.to_thread(self._read_slow_counters))
+
+    async def _resource_loop(self) -> None:
+        # CPU/RAM vienen del hilo de muestreo del watchdog (única fuente de
+        # psutil.cpu_percent): aquí sólo se lee la última muestra
+        from core.SystemWatchdog import watchdog
+
+        while True:
+            await asyncio.sleep(RESOURCE_INTERVAL)
+            try:
+                sample = watchdog.latest_resources()
+                if sample is not None:
+                    system = {
+                        "cpu_percent": sample["cpu_percent"],
+                        "memory_percent": sample["memory_percent"],
+                        "status": "online",
+                    }
+                    await self._apply({"system": system})
+                if self._files_dirty:
+                    await self._refresh_files()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Error muestreando recursos: {e}")
+
+    async def _slow_loop(self) -> None:
+        while True:
+            await asyncio.sleep(SLOW_REFRESH_INTERVAL)
+            try:
+                self._files_dirty = True  # cambios hechos fuera del bus (p.ej. borrado manual)
+                await self._refresh_slow()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Error refrescando contadores: {e}")
+
+
+dashboard_status = DashboardStatusAggregator()
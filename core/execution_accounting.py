@@ -0,0 +1,428 @@
+"""
+Contabilidad de recursos por ejecución de skill
+Cada ejecución en sandbox registra tiempo de CPU, pico de RSS, bytes de E/S,
+tiempo de pared y estado de salida. El hijo mide su propio consumo con
+getrusage + /proc/self/io al terminar; el padre muestrea el proceso con psutil
+mientras espera, para no perder la medida si el hijo muere o se le mata.
+
+Al arrancar el hijo se aplican límites RLIMIT (CPU, memoria, tamaño de
+archivo) derivados de DEFAULT_SECURITY_LIMITS. El presupuesto de memoria lo
+hace cumplir el padre con el RSS que muestrea (memory_exceeded); en el hijo
+RLIMIT_DATA es sólo un tope de seguridad con margen para pilas de hilos y
+arenas de malloc, que con RLIMIT_AS agotaban el presupuesto sin usarlo. Las ejecuciones se agregan por
+skill en una ventana acotada para consultar percentiles y detectar consumos
+anómalos frente al historial de la propia skill.
+
+    limits = ResourceLimits.from_security_limits()
+    limits.apply()                         # en el hijo, antes de la skill
+    anomalies = execution_accounting.record(usage)   # en el padre, al terminar
+    execution_accounting.get_skill_stats("imagen")
+"""
+import errno
+import io
+import logging
+import math
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from core.lazy_services import lazy_import
+from core.security.skill_security_constants import DEFAULT_SECURITY_LIMITS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+psutil = lazy_import("psutil")
+
+logger = logging.getLogger("ExecutionAccounting")
+
+WINDOW_SIZE = 256
+ANOMALY_FACTOR = 3.0
+ANOMALY_MIN_SAMPLES = 10
+CPU_GRACE_SECONDS = 2
+# RSS del intérprete y la carga de la skill que no cuenta contra max_memory_mb
+INTERPRETER_RSS_MB = 64
+# Margen del tope RLIMIT_DATA sobre el presupuesto (pilas de hilos, arenas de malloc)
+DATA_HEADROOM_MB = 256
+# Arenas de malloc por proceso en el hijo (glibc crea hasta 8 por núcleo)
+MALLOC_ARENA_MAX = 2
+
+# Métricas agregadas por skill (atributos de ResourceUsage)
+METRICS = ("wall_seconds", "cpu_seconds", "peak_rss_mb", "read_bytes", "write_bytes")
+
+# Estados de salida que indican que un límite cortó la ejecución
+LIMIT_STATUSES = {"cpu_limit", "memory_limit", "file_size_limit", "timeout"}
+
+
+class ResourceLimitExceeded(Exception):
+    """La skill superó un límite de recursos del sandbox"""
+
+    def __init__(self, resource_name: str):
+        super().__init__(f"Límite de {resource_name} excedido")
+        self.resource_name = resource_name
+
+
+@dataclass
+class ResourceLimits:
+    """Límites del sistema operativo aplicados al proceso de la skill"""
+    cpu_seconds: Optional[int] = None
+    memory_mb: Optional[int] = None
+    file_size_mb: Optional[int] = None
+
+    @classmethod
+    def from_security_limits(cls, limits: Optional[Dict[str, Any]] = None) -> "ResourceLimits":
+        limits = DEFAULT_SECURITY_LIMITS if limits is None else limits
+        return cls(
+            cpu_seconds=limits.get("max_execution_time_seconds"),
+            memory_mb=limits.get("max_memory_mb"),
+            file_size_mb=limits.get("max_file_size_mb"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def apply(self) -> Dict[str, int]:
+        """
+        Aplicar los límites al proceso actual (sólo POSIX). La memoria se
+        acota con RLIMIT_DATA sobre lo que ya ocupa el intérprete, con
+        DATA_HEADROOM_MB de margen: el presupuesto real (max_memory_mb) lo
+        vigila el padre por RSS. Devuelve los límites efectivamente aplicados.
+        """
+        applied: Dict[str, int] = {}
+        if resource is None:
+            return applied
+
+        if self.cpu_seconds:
+            soft = int(self.cpu_seconds)
+            if _set_limit("RLIMIT_CPU", soft, soft + CPU_GRACE_SECONDS):
+                # SIGXCPU al superar el blando: excepción en lugar de core dump;
+                # si la skill la ignora, el duro termina el proceso
+                _install_handler("SIGXCPU", _raise_cpu_limit)
+                applied["cpu_seconds"] = soft
+
+        if self.memory_mb:
+            _limit_malloc_arenas(MALLOC_ARENA_MAX)
+            limit = _data_bytes() + (int(self.memory_mb) + DATA_HEADROOM_MB) * 1024 * 1024
+            if _set_limit("RLIMIT_DATA", limit, limit):
+                applied["memory_bytes"] = limit
+
+        if self.file_size_mb:
+            limit = int(self.file_size_mb) * 1024 * 1024
+            if _set_limit("RLIMIT_FSIZE", limit, limit):
+                # Ignorar SIGXFSZ: la escritura falla con EFBIG (OSError)
+                _install_handler("SIGXFSZ", signal.SIG_IGN)
+                applied["file_size_bytes"] = limit
+
+        return applied
+
+    def rss_budget_mb(self) -> Optional[float]:
+        """RSS máximo que el padre tolera antes de matar al hijo"""
+        if not self.memory_mb:
+            return None
+        return float(self.memory_mb) + INTERPRETER_RSS_MB
+
+
+def memory_exceeded(limits: Optional[Dict[str, Any]], sample: Optional[Dict[str, Any]]) -> bool:
+    """¿La muestra del padre supera el presupuesto de memoria de la skill?"""
+    if not limits or not sample:
+        return False
+    budget = ResourceLimits(**limits).rss_budget_mb()
+    return budget is not None and float(sample.get("rss_mb", 0.0)) > budget
+
+
+def _set_limit(name: str, soft: int, hard: int) -> bool:
+    which = getattr(resource, name, None)
+    if which is None:
+        return False
+    try:
+        _, current_hard = resource.getrlimit(which)
+        if current_hard != resource.RLIM_INFINITY:
+            soft, hard = min(soft, current_hard), min(hard, current_hard)
+        resource.setrlimit(which, (soft, hard))
+        return True
+    except (ValueError, OSError) as e:
+        logger.warning(f"No se pudo aplicar {name}: {e}")
+        return False
+
+
+def _install_handler(name: str, handler) -> None:
+    signum = getattr(signal, name, None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return
+    try:
+        signal.signal(signum, handler)
+    except (ValueError, OSError):
+        pass
+
+
+def _raise_cpu_limit(signum, frame):
+    # El kernel repite SIGXCPU cada segundo: avisar una sola vez y dejar
+    # que el límite duro termine el proceso si la skill sigue
+    signal.signal(signum, signal.SIG_IGN)
+    raise ResourceLimitExceeded("CPU")
+
+
+def _data_bytes() -> int:
+    """Segmento de datos actual (VmData) del proceso"""
+    try:
+        with io.open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmData:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _limit_malloc_arenas(count: int) -> None:
+    """mallopt(M_ARENA_MAX): cada hilo no estrena arena propia (sólo glibc)"""
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None)
+        libc.mallopt(-8, int(count))  # M_ARENA_MAX
+    except (OSError, AttributeError):
+        pass
+
+
+def _proc_io() -> Dict[str, int]:
+    """Bytes leídos/escritos en almacenamiento según /proc/self/io"""
+    values: Dict[str, int] = {}
+    try:
+        # io.open: la skill puede haber sustituido builtins.open
+        with io.open("/proc/self/io", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                values[key.strip()] = int(value)
+    except (OSError, ValueError):
+        pass
+    return values
+
+
+def exit_status_for(error: BaseException) -> str:
+    """Estado de salida de una ejecución que terminó con `error`"""
+    if isinstance(error, ResourceLimitExceeded):
+        return "cpu_limit"
+    if isinstance(error, MemoryError):
+        return "memory_limit"
+    if isinstance(error, OSError) and error.errno == errno.EFBIG:
+        return "file_size_limit"
+    return "error"
+
+
+def measure_self() -> Dict[str, Any]:
+    """Consumo del proceso actual hasta ahora (lo llama el hijo al terminar)"""
+    usage: Dict[str, Any] = {}
+    if resource is not None:
+        ru = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss está en KiB en Linux y en bytes en macOS
+        rss_kb = ru.ru_maxrss / 1024 if sys.platform == "darwin" else ru.ru_maxrss
+        usage.update(
+            cpu_user=ru.ru_utime,
+            cpu_system=ru.ru_stime,
+            peak_rss_mb=rss_kb / 1024,
+            read_bytes=ru.ru_inblock * 512,
+            write_bytes=ru.ru_oublock * 512,
+        )
+    proc_io = _proc_io()
+    if proc_io:
+        usage["read_bytes"] = proc_io.get("read_bytes", 0)
+        usage["write_bytes"] = proc_io.get("write_bytes", 0)
+    return usage
+
+
+def sample_process(proc, previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Muestra desde el padre (psutil.Process) por si el hijo no llega a
+    informar; el pico de RSS se acumula sobre la muestra anterior
+    """
+    try:
+        with proc.oneshot():
+            cpu = proc.cpu_times()
+            rss_mb = proc.memory_info().rss / (1024 * 1024)
+            sample = {
+                "cpu_user": cpu.user,
+                "cpu_system": cpu.system,
+                "rss_mb": rss_mb,
+                "peak_rss_mb": max(rss_mb, (previous or {}).get("peak_rss_mb", 0.0)),
+            }
+            try:
+                counters = proc.io_counters()
+                sample["read_bytes"] = counters.read_bytes
+                sample["write_bytes"] = counters.write_bytes
+            except (AttributeError, psutil.AccessDenied):
+                pass
+            return sample
+    except Exception:
+        return None
+
+
+@dataclass
+class ResourceUsage:
+    """Consumo de una ejecución de skill"""
+    skill_name: str
+    wall_seconds: float = 0.0
+    cpu_user: float = 0.0
+    cpu_system: float = 0.0
+    peak_rss_mb: float = 0.0
+    read_bytes: int = 0
+    write_bytes: int = 0
+    exit_status: str = "ok"
+    exitcode: Optional[int] = None
+    source: str = "child"
+    finished_at: float = field(default_factory=time.time)
+    anomalies: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def cpu_seconds(self) -> float:
+        return self.cpu_user + self.cpu_system
+
+    @classmethod
+    def from_reports(cls, skill_name: str, wall_seconds: float, exit_status: str,
+                     child: Optional[Dict[str, Any]] = None,
+                     samples: Optional[Dict[str, Any]] = None,
+                     exitcode: Optional[int] = None) -> "ResourceUsage":
+        """
+        Combinar el informe del hijo (preferente, exacto) con la última
+        muestra del padre (si el hijo murió antes de informar)
+        """
+        report = child or samples or {}
+        usage = cls(
+            skill_name=skill_name,
+            wall_seconds=wall_seconds,
+            cpu_user=float(report.get("cpu_user", 0.0)),
+            cpu_system=float(report.get("cpu_system", 0.0)),
+            peak_rss_mb=float(report.get("peak_rss_mb", 0.0)),
+            read_bytes=int(report.get("read_bytes", 0)),
+            write_bytes=int(report.get("write_bytes", 0)),
+            exit_status=exit_status,
+            exitcode=exitcode,
+            source="child" if child else ("sampled" if samples else "none"),
+        )
+        if child and samples:
+            usage.peak_rss_mb = max(usage.peak_rss_mb, float(samples.get("peak_rss_mb", 0.0)))
+        return usage
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["cpu_seconds"] = round(self.cpu_seconds, 4)
+        return data
+
+
+def _percentile(ordered: List[float], pct: float) -> Optional[float]:
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class SkillUsageWindow:
+    """Últimas ejecuciones de una skill (memoria acotada)"""
+
+    def __init__(self, maxlen: int = WINDOW_SIZE):
+        self.samples: Deque[ResourceUsage] = deque(maxlen=maxlen)
+        self.count = 0
+        self.statuses: Dict[str, int] = {}
+
+    def add(self, usage: ResourceUsage) -> None:
+        self.samples.append(usage)
+        self.count += 1
+        self.statuses[usage.exit_status] = self.statuses.get(usage.exit_status, 0) + 1
+
+    def values(self, metric: str) -> List[float]:
+        return sorted(float(getattr(u, metric)) for u in self.samples)
+
+    def percentile(self, metric: str, pct: float) -> Optional[float]:
+        return _percentile(self.values(metric), pct)
+
+    def to_dict(self) -> Dict[str, Any]:
+        metrics = {}
+        for metric in METRICS:
+            ordered = self.values(metric)
+            if not ordered:
+                continue
+            metrics[metric] = {
+                "p50": round(_percentile(ordered, 50), 4),
+                "p95": round(_percentile(ordered, 95), 4),
+                "p99": round(_percentile(ordered, 99), 4),
+                "max": round(ordered[-1], 4),
+            }
+        return {
+            "count": self.count,
+            "window": len(self.samples),
+            "statuses": dict(self.statuses),
+            "metrics": metrics,
+        }
+
+
+class ExecutionAccounting:
+    """Agregado por skill del consumo de las ejecuciones"""
+
+    def __init__(self, window: int = WINDOW_SIZE, factor: float = ANOMALY_FACTOR,
+                 min_samples: int = ANOMALY_MIN_SAMPLES):
+        self.window = window
+        self.factor = factor
+        self.min_samples = min_samples
+        self._skills: Dict[str, SkillUsageWindow] = {}
+        self._lock = threading.Lock()
+
+    def check(self, usage: ResourceUsage) -> List[Dict[str, Any]]:
+        """
+        Anomalías de una ejecución frente al historial de su skill: un límite
+        alcanzado, o una métrica por encima de `factor` veces su p95
+        """
+        anomalies: List[Dict[str, Any]] = []
+        if usage.exit_status in LIMIT_STATUSES:
+            anomalies.append({"metric": "exit_status", "value": usage.exit_status})
+        with self._lock:
+            history = self._skills.get(usage.skill_name)
+            if history is None or len(history.samples) < self.min_samples:
+                return anomalies
+            for metric in METRICS:
+                p95 = history.percentile(metric, 95)
+                value = float(getattr(usage, metric))
+                if p95 and value > p95 * self.factor:
+                    anomalies.append({"metric": metric, "value": round(value, 4), "p95": round(p95, 4)})
+        return anomalies
+
+    def record(self, usage: ResourceUsage) -> List[Dict[str, Any]]:
+        """Registrar una ejecución; devuelve (y guarda en usage) sus anomalías"""
+        usage.anomalies = self.check(usage)
+        with self._lock:
+            history = self._skills.get(usage.skill_name)
+            if history is None:
+                history = self._skills[usage.skill_name] = SkillUsageWindow(self.window)
+            history.add(usage)
+        if usage.anomalies:
+            logger.warning(f"Consumo anómalo en {usage.skill_name}: {usage.anomalies}")
+        return usage.anomalies
+
+    def percentile(self, skill_name: str, metric: str, pct: float) -> Optional[float]:
+        with self._lock:
+            history = self._skills.get(skill_name)
+            return history.percentile(metric, pct) if history else None
+
+    def get_skill_stats(self, skill_name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            history = self._skills.get(skill_name)
+            return history.to_dict() if history else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: history.to_dict() for name, history in sorted(self._skills.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._skills.clear()
+
+
+execution_accounting = ExecutionAccounting()
@@ -4,15 +4,17 @@ Organiza archivos generados por skills en carpetas por tipo
 """
 import json
 import os
-import shutil
 import hashlib
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Any, AsyncIterable, BinaryIO, Dict, List, Optional
 from dataclasses import dataclass, asdict
 import mimetypes
 
+from core.blob_store import BlobStore, unlink_readonly
+from core.lazy_services import lazy_service
+
 logger = logging.getLogger("FileManager")
 
 WORKS_BASE_PATH = Path("data/works")
@@ -82,6 +84,7 @@ class WorkFile:
     skill_id: str
     description: str
     metadata: Dict[str, Any]
+    content_hash: str = ""
     
     def to_dict(self) -> Dict:
         return asdict(self)
@@ -90,8 +93,8 @@ class WorkFile:
 class WorksManager:
     """Gestor centralizado de trabajos/archivos"""
     
-    def __init__(self):
-        self.base_path = WORKS_BASE_PATH
+    def __init__(self, base_path: Optional[Path] = None):
+        self.base_path = Path(base_path) if base_path else WORKS_BASE_PATH
         self.index_file = self.base_path / "works_index.json"
         self.works: Dict[str, WorkFile] = {}
         
@@ -99,6 +102,9 @@ class WorksManager:
         for category in CATEGORY_NAMES.keys():
             (self.base_path / category).mkdir(parents=True, exist_ok=True)
         
+        # Contenido deduplicado: los archivos de cada categoría son hardlinks a blobs
+        self.blob_store = BlobStore(self.base_path / ".blobs")
+        
         self._load_index()
     
     def _load_index(self):
@@ -142,131 +148,150 @@ class WorksManager:
         return f"{timestamp}_{file_hash}"
     
     def save_file(self, source_path: str, filename: str, skill_name: str, 
-                  skill_id: str, description: str = "", metadata: Dict = None) -> Optional[WorkFile]:
-        """Guardar un archivo generado por una skill"""
+                  skill_id: str, description: str = "", metadata: Dict = None,
+                  move: bool = False, notify: bool = True) -> Optional[WorkFile]:
+        """
+        Guardar un archivo generado por una skill.
+        Con move=True el origen (p.ej. el output del sandbox) se mueve al almacén
+        en lugar de copiarse. notify=False no publica work.COMPLETED (quien
+        llama desde un thread lo publica luego con publish_completed).
+        """
         try:
             source = Path(source_path)
             if not source.exists():
                 logger.error(f"Archivo fuente no existe: {source_path}")
                 return None
             
-            # Determinar categoría
-            category = self._get_category(filename)
-            
-            # Generar ID y ruta destino
-            work_id = self._generate_id(filename)
-            category_path = self.base_path / category
-            
-            # Asegurar nombre único
-            dest_filename = f"{work_id}_{filename}"
-            dest_path = category_path / dest_filename
-            
-            # Copiar archivo
-            shutil.copy2(source_path, dest_path)
-            
-            # Crear registro
-            work = WorkFile(
-                id=work_id,
-                filename=dest_filename,
-                original_name=filename,
-                category=category,
-                path=str(dest_path.relative_to(self.base_path)),
-                size=dest_path.stat().st_size,
-                created_at=datetime.now().isoformat(),
-                skill_name=skill_name,
-                skill_id=skill_id,
-                description=description,
-                metadata=metadata or {}
-            )
+            digest, _ = self.blob_store.put_file(source, move=move)
+            return self._register_blob(digest, filename, skill_name, skill_id, description, metadata,
+                                       notify=notify)
             
-            self.works[work_id] = work
-            self._save_index()
-            
-            # Publicar evento de work completado
+        except Exception as e:
+            logger.error(f"Error guardando archivo: {e}")
+            return None
+    
+    def save_output(self, path: str, skill_name: str, skill_id: str,
+                    description: str = "", metadata: Dict = None, notify: bool = True) -> Optional[WorkFile]:
+        """
+        Registrar un archivo de salida sin copiar bytes: se mueve al almacén y
+        en su sitio queda un enlace al blob, así sigue visible donde la skill
+        lo dejó. El blob lo mantiene vivo la referencia del trabajo.
+        """
+        path = Path(path)
+        work = self.save_file(str(path), path.name, skill_name, skill_id, description, metadata,
+                              move=True, notify=notify)
+        if work is not None and work.content_hash and not path.exists():
             try:
-                import asyncio
-                from core.CortexBus import bus
-                asyncio.create_task(bus.publish(
-                    "work.COMPLETED",
-                    {
-                        "work_id": work_id,
-                        "work_name": filename,
-                        "category": category,
-                        "skill_name": skill_name,
-                        "timestamp": datetime.now().isoformat()
-                    },
-                    sender="WorksManager"
-                ))
-            except Exception as e:
-                logger.warning(f"Error publicando evento work.COMPLETED: {e}")
-            
-            logger.info(f"[WORKS] Guardado: {filename} en {category} (ID: {work_id})")
+                self.blob_store.link_to(work.content_hash, path)
+            except OSError as e:
+                logger.warning(f"No se pudo enlazar {path} al blob: {e}")
+        return work
+    
+    def save_stream(self, stream: BinaryIO, filename: str, skill_name: str,
+                    skill_id: str, description: str = "", metadata: Dict = None) -> Optional[WorkFile]:
+        """Guardar un stream binario (uploads) hasheándolo por bloques"""
+        try:
+            digest, _ = self.blob_store.put_stream(stream)
+            return self._register_blob(digest, filename, skill_name, skill_id, description, metadata)
+        except Exception as e:
+            logger.error(f"Error guardando stream: {e}")
+            return None
+    
+    async def save_upload(self, chunks: AsyncIterable[bytes], filename: str, skill_name: str,
+                          skill_id: str, description: str = "", metadata: Dict = None) -> Optional[WorkFile]:
+        """
+        Guardar un upload que llega por trozos (cuerpo HTTP) hasheando sobre la
+        marcha; la escritura a disco va a un thread. Si el cliente se corta no
+        queda nada registrado.
+        """
+        import asyncio
+        try:
+            with self.blob_store.open_writer() as writer:
+                async for chunk in chunks:
+                    if chunk:
+                        await asyncio.to_thread(writer.write, chunk)
+                digest, _ = await asyncio.to_thread(writer.commit)
+            work = await asyncio.to_thread(
+                self._register_blob, digest, filename, skill_name, skill_id, description, metadata,
+                notify=False,
+            )
+            self.publish_completed(work)
             return work
-            
         except Exception as e:
-            logger.error(f"Error guardando archivo: {e}")
+            logger.error(f"Error guardando upload: {e}")
             return None
     
     def save_content(self, content: str or bytes, filename: str, skill_name: str,
                      skill_id: str, description: str = "", metadata: Dict = None) -> Optional[WorkFile]:
         """Guardar contenido directamente (string o bytes)"""
         try:
-            category = self._get_category(filename)
-            work_id = self._generate_id(filename)
-            category_path = self.base_path / category
-            
-            dest_filename = f"{work_id}_{filename}"
-            dest_path = category_path / dest_filename
-            
-            # Escribir contenido
-            mode = 'wb' if isinstance(content, bytes) else 'w'
-            encoding = None if isinstance(content, bytes) else 'utf-8'
-            
-            with open(dest_path, mode, encoding=encoding) as f:
-                f.write(content)
-            
-            work = WorkFile(
-                id=work_id,
-                filename=dest_filename,
-                original_name=filename,
-                category=category,
-                path=str(dest_path.relative_to(self.base_path)),
-                size=dest_path.stat().st_size,
-                created_at=datetime.now().isoformat(),
-                skill_name=skill_name,
-                skill_id=skill_id,
-                description=description,
-                metadata=metadata or {}
-            )
-            
-            self.works[work_id] = work
-            self._save_index()
-            
-            # Publicar evento de work completado
-            try:
-                import asyncio
-                from core.CortexBus import bus
-                asyncio.create_task(bus.publish(
-                    "work.COMPLETED",
-                    {
-                        "work_id": work_id,
-                        "work_name": filename,
-                        "category": category,
-                        "skill_name": skill_name,
-                        "timestamp": datetime.now().isoformat()
-                    },
-                    sender="WorksManager"
-                ))
-            except Exception as e:
-                logger.warning(f"Error publicando evento work.COMPLETED: {e}")
-            
-            logger.info(f"[WORKS] Guardado contenido: {filename} en {category} (ID: {work_id})")
-            return work
+            data = content if isinstance(content, bytes) else content.encode('utf-8')
+            digest, _ = self.blob_store.put_bytes(data)
+            return self._register_blob(digest, filename, skill_name, skill_id, description, metadata)
             
         except Exception as e:
             logger.error(f"Error guardando contenido: {e}")
             return None
     
+    def _register_blob(self, digest: str, filename: str, skill_name: str, skill_id: str,
+                       description: str, metadata: Optional[Dict], notify: bool = True) -> WorkFile:
+        """Enlazar un blob en su carpeta de categoría y registrar el trabajo"""
+        category = self._get_category(filename)
+        work_id = self._generate_id(filename)
+        category_path = self.base_path / category
+        
+        # Asegurar nombre único
+        dest_filename = f"{work_id}_{filename}"
+        dest_path = category_path / dest_filename
+        
+        try:
+            method = self.blob_store.link_to(digest, dest_path)
+        except Exception:
+            self.blob_store.release(digest)
+            raise
+        
+        work = WorkFile(
+            id=work_id,
+            filename=dest_filename,
+            original_name=filename,
+            category=category,
+            path=str(dest_path.relative_to(self.base_path)),
+            size=dest_path.stat().st_size,
+            created_at=datetime.now().isoformat(),
+            skill_name=skill_name,
+            skill_id=skill_id,
+            description=description,
+            metadata=metadata or {},
+            content_hash=digest
+        )
+        
+        self.works[work_id] = work
+        self._save_index()
+        
+        if notify:
+            self.publish_completed(work)
+        
+        logger.info(f"[WORKS] Guardado: {filename} en {category} (ID: {work_id}, {method}, blob {digest[:12]})")
+        return work
+    
+    def publish_completed(self, work: WorkFile) -> None:
+        """Publicar work.COMPLETED (desde un thread, mejor notify=False y llamar aquí en el loop)"""
+        try:
+            from core.CortexBus import bus
+            bus.publish_sync(
+                "work.COMPLETED",
+                {
+                    "work_id": work.id,
+                    "work_name": work.original_name,
+                    "category": work.category,
+                    "skill_name": work.skill_name,
+                    "timestamp": datetime.now().isoformat()
+                },
+                sender="WorksManager"
+            )
+        except Exception as e:
+            logger.warning(f"Error publicando evento work.COMPLETED: {e}")
+    
     def get_work(self, work_id: str) -> Optional[WorkFile]:
         """Obtener un trabajo por ID"""
         return self.works.get(work_id)
@@ -312,10 +337,16 @@ class WorksManager:
             return False
         
         try:
-            # Eliminar archivo físico
+            # Eliminar archivo físico (puede ser un hardlink de solo lectura)
             file_path = self.base_path / work.path
+            # Sin chmod: el inodo es compartido con el blob y con otros trabajos
             if file_path.exists():
-                file_path.unlink()
+                shared = self.blob_store.blob_path(work.content_hash) if work.content_hash else None
+                unlink_readonly(file_path, shared_with=shared)
+            
+            # Liberar la referencia al blob; se borra cuando nadie más lo usa
+            if work.content_hash:
+                self.blob_store.release(work.content_hash)
             
             # Eliminar del índice
             del self.works[work_id]
@@ -337,4 +368,4 @@ class WorksManager:
 
 
 # Instancia global
-works_manager = WorksManager()
+works_manager = lazy_service("works_manager", WorksManager)
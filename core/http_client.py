@@ -0,0 +1,500 @@
+"""
+Cliente HTTP compartido para los managers de integraciones (core/api)
+Una sola capa aiohttp con pools keep-alive por host, timeouts, reintentos con
+backoff que respetan Retry-After y límites de tasa por proveedor.
+
+- Código async: `await http.request_async(...)` usa la sesión del loop actual
+- Código sync (managers, vistas Qt): `http.get(...)` ejecuta la misma
+  corrutina en un loop dedicado en segundo plano, así que también reutiliza
+  conexiones y nunca abre una conexión TCP+TLS por llamada
+
+    http = provider_http("slack")
+    response = http.post(url, headers=headers, json=payload, timeout=30)
+    if response.status_code == 200:
+        data = response.json()
+"""
+import asyncio
+import email.utils
+import json
+import logging
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Coroutine, Dict, Mapping, Optional, Tuple
+
+from core.lazy_services import lazy_import
+from core.SystemWatchdog import LatencyHistogram
+
+aiohttp = lazy_import("aiohttp")
+
+logger = logging.getLogger("HttpClient")
+
+CONNECTOR_LIMIT = 100
+CONNECTOR_LIMIT_PER_HOST = 10
+KEEPALIVE_TIMEOUT = 30
+DNS_CACHE_TTL = 300
+DEFAULT_TIMEOUT = 30.0
+CONNECT_TIMEOUT = 10.0
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+MAX_RETRY_AFTER = 60.0
+RETRY_STATUS = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# Límites publicados por cada proveedor (peticiones/segundo, ráfaga).
+# Conservadores: el servidor manda de todas formas vía 429/Retry-After.
+PROVIDER_LIMITS: Dict[str, Tuple[float, int]] = {
+    "slack": (1.0, 5),
+    "notion": (3.0, 3),
+    "hubspot": (10.0, 10),
+    "asana": (2.5, 10),
+    "trello": (10.0, 10),
+    "discord": (5.0, 5),
+    "stripe": (25.0, 25),
+    "github": (5.0, 10),
+    "jira": (5.0, 10),
+    "monday": (1.0, 5),
+    "mailchimp": (5.0, 10),
+    "zoom": (10.0, 10),
+    "twitter": (1.0, 5),
+}
+
+
+class HttpError(Exception):
+    """Error de red (conexión, DNS, TLS) tras agotar los reintentos"""
+
+
+class HttpTimeout(HttpError, TimeoutError):
+    """La petición superó su timeout"""
+
+
+class HttpResponse:
+    """Respuesta ya leída (el cuerpo no depende de la conexión)"""
+
+    __slots__ = ("status_code", "headers", "content", "url", "elapsed_ms", "attempts")
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], content: bytes,
+                 url: str = "", elapsed_ms: float = 0.0, attempts: int = 1):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.elapsed_ms = elapsed_ms
+        self.attempts = attempts
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content or b"null")
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise HttpError(f"HTTP {self.status_code} en {self.url}: {self.text[:200]}")
+
+    def __repr__(self) -> str:
+        return f"<HttpResponse [{self.status_code}]>"
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Segundos a esperar según Retry-After (número de segundos o fecha HTTP)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - (now if now is not None else time.time()))
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Backoff exponencial con jitter completo"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ProviderLimiter:
+    """
+    Límite de tasa de un proveedor: token bucket local más pausas dictadas
+    por el servidor (429 + Retry-After, o X-RateLimit-Remaining a 0).
+    Compartido entre loops, así que sólo usa un lock de threading.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """Reservar un hueco; devuelve cuántos segundos hay que esperar"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            wait = max(0.0, self._paused_until - now)
+            if self.rate:
+                elapsed = max(0.0, now - self._updated)
+                self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+                self._updated = max(self._updated, now)
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    def pause(self, seconds: float, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._paused_until = max(self._paused_until, now + seconds)
+
+    def observe(self, status: int, headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+        """Ajustarse a las cabeceras de la respuesta; devuelve la pausa aplicada"""
+        delay = None
+        if status == 429 or status == 503:
+            delay = parse_retry_after(headers.get("Retry-After"))
+        if delay is None and headers.get("X-RateLimit-Remaining") == "0":
+            reset = headers.get("X-RateLimit-Reset")
+            try:
+                reset_at = float(reset)
+                # Epoch (GitHub, Discord usa segundos relativos en Reset-After)
+                delay = reset_at - time.time() if reset_at > 1e9 else reset_at
+            except (TypeError, ValueError):
+                delay = parse_retry_after(headers.get("X-RateLimit-Reset-After"))
+        if delay is not None and delay > 0:
+            self.pause(min(delay, MAX_RETRY_AFTER), now)
+            return delay
+        return None
+
+
+@dataclass
+class ProviderStats:
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+    throttled: int = 0
+    waited_ms: float = 0.0
+
+    def __post_init__(self):
+        self.latency = LatencyHistogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "waited_ms": round(self.waited_ms, 1),
+            "latency": self.latency.to_dict(),
+        }
+
+
+def _form_data(data: Any, files: Mapping[str, Any]) -> "aiohttp.FormData":
+    """multipart/form-data al estilo de requests (files={'campo': f | (nombre, f[, tipo])})"""
+    form = aiohttp.FormData()
+    for key, value in _clean_params(data) or []:
+        form.add_field(key, value)
+    for field, spec in files.items():
+        content_type = None
+        if isinstance(spec, tuple):
+            filename, fileobj = spec[0], spec[1]
+            content_type = spec[2] if len(spec) > 2 else None
+        else:
+            fileobj = spec
+            filename = getattr(spec, "name", field)
+        filename = str(filename).replace("\\", "/").rsplit("/", 1)[-1]
+        form.add_field(field, fileobj, filename=filename, content_type=content_type)
+    return form
+
+
+def _clean_params(params: Optional[Mapping[str, Any]]) -> Optional[list]:
+    """Query/form como lista de pares str, igual que requests (None se omite)"""
+    if not params:
+        return None
+    items = []
+    for key, value in params.items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        items.extend((key, str(v)) for v in values if v is not None)
+    return items
+
+
+class HttpClient:
+    """Sesiones aiohttp compartidas (una por event loop) con reintentos y límites"""
+
+    def __init__(self, max_retries: int = MAX_RETRIES, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.max_retries = max_retries
+        self.limits = dict(PROVIDER_LIMITS if limits is None else limits)
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._limiters: Dict[str, ProviderLimiter] = {}
+        self._stats: Dict[str, ProviderStats] = {}
+        self._lock = threading.Lock()
+        self._bridge_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._bridge_thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Sesiones y límites
+    # ------------------------------------------------------------------
+
+    def _session(self):
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTOR_LIMIT,
+                limit_per_host=CONNECTOR_LIMIT_PER_HOST,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                enable_cleanup_closed=True,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": "MININA/3.0"},
+            )
+            self._sessions[loop] = session
+        return session
+
+    def limiter(self, provider: str) -> ProviderLimiter:
+        with self._lock:
+            limiter = self._limiters.get(provider)
+            if limiter is None:
+                rate, burst = self.limits.get(provider, (None, 1))
+                limiter = self._limiters[provider] = ProviderLimiter(rate, burst)
+            return limiter
+
+    def _provider_stats(self, provider: str) -> ProviderStats:
+        with self._lock:
+            stats = self._stats.get(provider)
+            if stats is None:
+                stats = self._stats[provider] = ProviderStats()
+            return stats
+
+    # ------------------------------------------------------------------
+    # Petición async
+    # ------------------------------------------------------------------
+
+    async def request_async(
+        self,
+        method: str,
+        url: str,
+        *,
+        provider: str = "default",
+        headers: Optional[Mapping[str, str]] = None,
+        params: Optional[Mapping[str, Any]] = None,
+        json: Any = None,
+        data: Any = None,
+        files: Optional[Mapping[str, Any]] = None,
+        auth: Optional[Tuple[str, str]] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: Optional[int] = None,
+    ) -> HttpResponse:
+        method = method.upper()
+        retries = self.max_retries if retries is None else retries
+        limiter = self.limiter(provider)
+        stats = self._provider_stats(provider)
+        session = self._session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=min(CONNECT_TIMEOUT, timeout))
+        basic_auth = aiohttp.BasicAuth(*auth) if auth else None
+        query = _clean_params(params)
+        started = time.perf_counter()
+
+        attempt = 0
+        while True:
+            wait = limiter.reserve()
+            if wait > 0:
+                stats.waited_ms += wait * 1000
+                await asyncio.sleep(wait)
+
+            # Los archivos se consumen al enviar: rehacer el form en cada intento
+            if files:
+                body = _form_data(data, files)
+            else:
+                body = _clean_params(data) if isinstance(data, Mapping) else data
+            if files and attempt:
+                for spec in files.values():
+                    fileobj = spec[1] if isinstance(spec, tuple) else spec
+                    if hasattr(fileobj, "seek"):
+                        fileobj.seek(0)
+
+            stats.requests += 1
+            try:
+                async with session.request(
+                    method, url, headers=headers, params=query, json=json, data=body,
+                    auth=basic_auth, timeout=client_timeout,
+                ) as resp:
+                    content = await resp.read()
+                    status, resp_headers = resp.status, resp.headers.copy()
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                stats.errors += 1
+                if attempt < retries and method in IDEMPOTENT_METHODS:
+                    attempt += 1
+                    stats.retries += 1
+                    await asyncio.sleep(backoff_delay(attempt))
+                    continue
+                stats.latency.observe((time.perf_counter() - started) * 1000)
+                if isinstance(e, asyncio.TimeoutError):
+                    raise HttpTimeout(f"Timeout ({timeout:.0f}s) en {method} {url}") from e
+                raise HttpError(f"{method} {url}: {e}") from e
+
+            server_delay = limiter.observe(status, resp_headers)
+            if status == 429:
+                stats.throttled += 1
+            # 429: la petición no se procesó, se puede repetir aunque sea POST
+            retryable = status == 429 or (status in RETRY_STATUS and method in IDEMPOTENT_METHODS)
+            if retryable and attempt < retries and (server_delay or 0) <= MAX_RETRY_AFTER:
+                attempt += 1
+                stats.retries += 1
+                if server_delay is None:
+                    await asyncio.sleep(backoff_delay(attempt))
+                # Con Retry-After el limiter ya está en pausa: reserve() espera
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats.latency.observe(elapsed_ms)
+            return HttpResponse(status, resp_headers, content, url=url,
+                                elapsed_ms=elapsed_ms, attempts=attempt + 1)
+
+    # ------------------------------------------------------------------
+    # Puente sync
+    # ------------------------------------------------------------------
+
+    def _bridge(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._bridge_loop is None or self._bridge_loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._bridge_thread = threading.Thread(target=run, name="HttpClient", daemon=True)
+                self._bridge_thread.start()
+                ready.wait()
+                self._bridge_loop = loop
+            return self._bridge_loop
+
+    def run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Ejecutar una corrutina en el loop del cliente y esperar su resultado"""
+        if threading.current_thread() is self._bridge_thread:
+            coro.close()
+            raise RuntimeError("HttpClient: no se puede bloquear desde el loop del cliente")
+        return asyncio.run_coroutine_threadsafe(coro, self._bridge()).result()
+
+    def request(self, method: str, url: str, **kwargs) -> HttpResponse:
+        """Versión bloqueante: corre en el loop del cliente y espera el resultado"""
+        return self.run(self.request_async(method, url, **kwargs))
+
+    # ------------------------------------------------------------------
+    # Cierre y métricas
+    # ------------------------------------------------------------------
+
+    async def aclose(self) -> None:
+        """Cerrar la sesión del loop actual"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    def close(self) -> None:
+        """Cerrar la sesión y el loop del puente sync"""
+        loop = self._bridge_loop
+        if loop is None or loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        if self._bridge_thread is not None:
+            self._bridge_thread.join(timeout=5)
+        loop.close()
+        self._bridge_loop = None
+        self._bridge_thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = {name: stats.to_dict() for name, stats in self._stats.items()}
+        return {
+            "sessions": sum(1 for s in list(self._sessions.values()) if not s.closed),
+            "providers": providers,
+        }
+
+
+class ProviderHttp:
+    """Fachada por proveedor: API tipo requests (sync) y variantes *_async"""
+
+    def __init__(self, provider: str, client: Optional[HttpClient] = None):
+        self.provider = provider
+        self._client = client
+
+    @property
+    def client(self) -> HttpClient:
+        return self._client or http_client
+
+    def request(self, method: str, url: str, **kwargs) -> HttpResponse:
+        return self.client.request(method, url, provider=self.provider, **kwargs)
+
+    async def request_async(self, method: str, url: str, **kwargs) -> HttpResponse:
+        return await self.client.request_async(method, url, provider=self.provider, **kwargs)
+
+    def get(self, url: str, **kwargs) -> HttpResponse:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> HttpResponse:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> HttpResponse:
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> HttpResponse:
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> HttpResponse:
+        return self.request("DELETE", url, **kwargs)
+
+    async def get_async(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request_async("GET", url, **kwargs)
+
+    async def post_async(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request_async("POST", url, **kwargs)
+
+    async def put_async(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request_async("PUT", url, **kwargs)
+
+    async def patch_async(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request_async("PATCH", url, **kwargs)
+
+    async def delete_async(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request_async("DELETE", url, **kwargs)
+
+
+class AsyncManagerMixin:
+    """
+    Variantes async de los métodos públicos de un manager:
+    `await slack_manager.acall("post_message", channel, text)`.
+    El método sync corre en un thread y sus peticiones van por el cliente
+    compartido, así que el event loop que llama nunca se bloquea.
+    """
+
+    async def acall(self, method: str, *args, **kwargs) -> Any:
+        func = getattr(self, method)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+# Instancia global
+http_client = HttpClient()
+
+
+def provider_http(provider: str) -> ProviderHttp:
+    return ProviderHttp(provider)
@@ -0,0 +1,326 @@
+"""
+Scheduler de trabajos recurrentes de MININA
+Ejecuta los `SavedJob` con `is_recurring` a su hora a través del
+orquestador. Un min-heap de (hora de ejecución, token, job_id) y una sola
+tarea que duerme hasta el primer vencimiento: no se recorre la lista de
+trabajos periódicamente, así que escala a miles de trabajos.
+
+- Cada ejecución se desplaza un jitter aleatorio para no lanzar a la vez
+  todos los trabajos programados a la misma hora.
+- Misfire: si la ejecución llega más tarde que `misfire_grace` (equipo
+  suspendido, proceso parado) se omite y se programa la siguiente; si la
+  última ejecución perdida está dentro del margen, se recupera una vez al
+  arrancar.
+- Una ejecución no se solapa con la anterior del mismo trabajo.
+- Los cambios en SavedJobsManager (crear, editar, archivar, borrar)
+  reprograman el trabajo afectado; las entradas viejas del heap se descartan
+  al salir por su token.
+- Los trabajos de ejemplo (`is_sample`) no se programan.
+- Las ejecuciones corren con prioridad BACKGROUND en el planificador de
+  Ollama: las generaciones locales que lancen esperan detrás del chat.
+
+El runner por defecto sólo prepara el plan en el orquestador (no hay
+ejecutor de planes desatendido): la ejecución se registra como "planned",
+no como éxito. Un runner puede devolver {"status": "succeeded" | "failed"
+| "planned"} o un bool.
+
+    from core.job_scheduler import job_scheduler
+    await job_scheduler.start()
+"""
+import asyncio
+import calendar
+import heapq
+import itertools
+import logging
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.lazy_services import lazy_service
+from core.ollama_scheduler import BACKGROUND, llm_priority
+from core.saved_jobs import JobStatus, SavedJob, SavedJobsManager, get_saved_jobs_manager
+
+logger = logging.getLogger("JobScheduler")
+
+DEFAULT_JITTER = 30.0           # segundos máximos añadidos a cada ejecución
+DEFAULT_MISFIRE_GRACE = 3600.0  # retraso máximo con el que todavía se ejecuta
+DEFAULT_TIME = "09:00"
+# Tope de espera: tras una suspensión el reloj de pared salta y se recalcula
+MAX_SLEEP = 600.0
+SEARCH_DAYS = 400
+
+WEEKDAYS = {
+    "monday": 0, "lunes": 0, "mon": 0,
+    "tuesday": 1, "martes": 1, "tue": 1,
+    "wednesday": 2, "miercoles": 2, "miércoles": 2, "wed": 2,
+    "thursday": 3, "jueves": 3, "thu": 3,
+    "friday": 4, "viernes": 4, "fri": 4,
+    "saturday": 5, "sabado": 5, "sábado": 5, "sat": 5,
+    "sunday": 6, "domingo": 6, "sun": 6,
+}
+
+JobRunner = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def _parse_time(value: Optional[str]) -> Tuple[int, int]:
+    try:
+        hour, minute = (value or DEFAULT_TIME).split(":")[:2]
+        return max(0, min(23, int(hour))), max(0, min(59, int(minute)))
+    except ValueError:
+        return _parse_time(DEFAULT_TIME)
+
+
+def _matches(job: SavedJob, day: date) -> bool:
+    frequency = (job.frequency or "daily").lower()
+    weekdays = {WEEKDAYS[d.lower()] for d in job.schedule_days if d.lower() in WEEKDAYS}
+    if frequency == "monthly":
+        days = [int(d) for d in job.schedule_days if str(d).isdigit()] or [1]
+        last = calendar.monthrange(day.year, day.month)[1]
+        # El día 31 en un mes de 30 se ejecuta el último día
+        return day.day in {min(d, last) for d in days}
+    if frequency == "weekly":
+        return day.weekday() in (weekdays or {0})
+    if weekdays:
+        return day.weekday() in weekdays
+    return True
+
+
+def next_run_time(job: SavedJob, after: datetime) -> Optional[datetime]:
+    """Siguiente ejecución de `job` estrictamente posterior a `after`"""
+    hour, minute = _parse_time(job.schedule_time)
+    if (job.frequency or "").lower() == "hourly":
+        candidate = after.replace(minute=minute, second=0, microsecond=0)
+        return candidate if candidate > after else candidate + timedelta(hours=1)
+    start = after.date()
+    for offset in range(SEARCH_DAYS):
+        day = start + timedelta(days=offset)
+        if not _matches(job, day):
+            continue
+        candidate = datetime(day.year, day.month, day.day, hour, minute)
+        if candidate > after:
+            return candidate
+    return None
+
+
+_orchestrator = None
+
+
+async def run_with_orchestrator(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runner por defecto: el orquestador genera el plan del trabajo, igual que
+    «Activar» en la UI. El plan queda preparado, no ejecutado
+    """
+    global _orchestrator
+    from core.CortexBus import bus
+    from core.orchestrator.orchestrator_agent import OrchestratorAgent
+
+    if _orchestrator is None:
+        _orchestrator = OrchestratorAgent()
+    plan = await _orchestrator.process_objective(job_data["objective"], context={
+        "saved_job_id": job_data["job_id"],
+        "plan_template": job_data.get("plan_template"),
+        "skills_required": job_data.get("skills_required"),
+    })
+    # El agente es compartido entre ejecuciones: no acumular planes
+    _orchestrator.active_plans.pop(plan.plan_id, None)
+    await bus.publish("jobs.PLANNED", {
+        "job_id": job_data["job_id"],
+        "plan_id": plan.plan_id,
+        "tasks": plan.tasks,
+        "notification_channels": job_data.get("notification_channels"),
+    }, sender="JobScheduler")
+    return {"status": "planned", "plan_id": plan.plan_id}
+
+
+def _outcome(result: Any) -> str:
+    if isinstance(result, dict):
+        status = result.get("status")
+        if status in ("succeeded", "failed", "planned"):
+            return status
+        return "failed" if result.get("success") is False else "succeeded"
+    return "failed" if result is False else "succeeded"
+
+
+class JobScheduler:
+    """Dispara los trabajos recurrentes activos de SavedJobsManager"""
+
+    def __init__(self, manager: Optional[SavedJobsManager] = None, runner: Optional[JobRunner] = None,
+                 jitter: float = DEFAULT_JITTER, misfire_grace: float = DEFAULT_MISFIRE_GRACE,
+                 clock: Callable[[], float] = time.time):
+        self.manager = manager
+        self.runner = runner or run_with_orchestrator
+        self.jitter = jitter
+        self.misfire_grace = misfire_grace
+        self._clock = clock
+
+        self._heap: List[Tuple[float, int, str]] = []
+        self._due: Dict[str, Tuple[float, int]] = {}
+        self._tokens = itertools.count()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"fired": 0, "succeeded": 0, "failed": 0, "planned": 0, "misfired": 0, "skipped_overlap": 0}
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Programar los trabajos recurrentes y arrancar el bucle (idempotente)"""
+        if self._task is not None:
+            return
+        if self.manager is None:
+            self.manager = get_saved_jobs_manager()
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self.manager.add_listener(self._on_job_changed)
+        for job in self.manager.get_recurring_jobs():
+            self._schedule(job.job_id)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Scheduler de trabajos iniciado ({len(self._due)} programados)")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self.manager.remove_listener(self._on_job_changed)
+        self._task.cancel()
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(self._task, *self._running.values(), return_exceptions=True)
+        self._task = None
+        self._heap.clear()
+        self._due.clear()
+
+    def _on_job_changed(self, job_id: str) -> None:
+        # Puede llegar desde el hilo de la UI
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._reschedule, job_id)
+
+    def _reschedule(self, job_id: str) -> None:
+        self._schedule(job_id)
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Programación
+    # ------------------------------------------------------------------
+
+    def _schedule(self, job_id: str, after: Optional[datetime] = None) -> None:
+        """
+        (Re)programar `job_id`. Sin `after` se parte de su última ejecución
+        para recuperar, dentro del margen de misfire, la que se perdió
+        """
+        self._due.pop(job_id, None)
+        job = self.manager.get_job(job_id)
+        if job is None or not job.is_recurring or job.is_sample or job.status != JobStatus.ACTIVE:
+            return
+
+        now = self._clock()
+        now_dt = datetime.fromtimestamp(now)
+        run_at = None
+        if after is None and job.last_executed:
+            try:
+                missed = next_run_time(job, datetime.fromisoformat(job.last_executed))
+            except ValueError:
+                missed = None
+            if missed is not None and missed.timestamp() <= now:
+                if now - missed.timestamp() <= self.misfire_grace:
+                    run_at = now
+                else:
+                    self._misfire(job_id, missed.timestamp(), now)
+        if run_at is None:
+            nominal = next_run_time(job, after or now_dt)
+            if nominal is None:
+                return
+            run_at = nominal.timestamp() + random.uniform(0, self.jitter)
+
+        token = next(self._tokens)
+        self._due[job_id] = (run_at, token)
+        heapq.heappush(self._heap, (run_at, token, job_id))
+
+    def _misfire(self, job_id: str, scheduled: float, now: float) -> None:
+        self.stats["misfired"] += 1
+        logger.warning(f"Trabajo '{job_id}' omitido: {now - scheduled:.0f}s de retraso supera el margen")
+
+    async def _run(self) -> None:
+        while True:
+            now = self._clock()
+            while self._heap and self._heap[0][0] <= now:
+                run_at, token, job_id = heapq.heappop(self._heap)
+                # Entradas de trabajos reprogramados o eliminados
+                if self._due.get(job_id) != (run_at, token):
+                    continue
+                del self._due[job_id]
+                self._fire(job_id, run_at, now)
+
+            timeout = min(self._heap[0][0] - now, MAX_SLEEP) if self._heap else None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _fire(self, job_id: str, run_at: float, now: float) -> None:
+        after = datetime.fromtimestamp(now)
+        if now - run_at > self.misfire_grace:
+            self._misfire(job_id, run_at, now)
+        elif job_id in self._running:
+            self.stats["skipped_overlap"] += 1
+            logger.warning(f"Trabajo '{job_id}' sigue en ejecución: se omite esta vez")
+        else:
+            job_data = self.manager.activate_job(job_id)
+            if job_data is not None:
+                self.stats["fired"] += 1
+                task = asyncio.create_task(self._execute(job_id, job_data))
+                self._running[job_id] = task
+        self._schedule(job_id, after=after)
+
+    async def _execute(self, job_id: str, job_data: Dict[str, Any]) -> None:
+        start = time.monotonic()
+        outcome = "failed"
+        try:
+            # Nadie espera en pantalla: el modelo local atiende antes al chat
+            with llm_priority(BACKGROUND):
+                outcome = _outcome(await self.runner(job_data))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error ejecutando trabajo '{job_id}': {e}")
+        finally:
+            self._running.pop(job_id, None)
+        self.stats[outcome] += 1
+        if outcome == "planned":
+            self.manager.record_planned(job_id)
+        else:
+            self.manager.record_execution_result(job_id, outcome == "succeeded")
+        try:
+            from core.CortexBus import bus
+            await bus.publish("jobs.EXECUTED", {
+                "job_id": job_id,
+                "status": outcome,
+                "duration_s": round(time.monotonic() - start, 3),
+            }, sender="JobScheduler")
+        except Exception as e:
+            logger.debug(f"No se pudo publicar jobs.EXECUTED: {e}")
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    def get_stats(self, upcoming: int = 5) -> Dict[str, Any]:
+        nxt = heapq.nsmallest(upcoming, self._due.items(), key=lambda item: item[1][0])
+        return {
+            **self.stats,
+            "running": self._task is not None,
+            "scheduled": len(self._due),
+            "in_progress": sorted(self._running),
+            "next_runs": [
+                {"job_id": job_id, "run_at": datetime.fromtimestamp(run_at).isoformat(timespec="seconds")}
+                for job_id, (run_at, _) in nxt
+            ],
+        }
+
+
+job_scheduler = lazy_service("job_scheduler", JobScheduler)
@@ -0,0 +1,187 @@
+"""
+Registro de servicios perezosos para MININA
+Los singletons globales (vault, works_manager, memory_core, managers de APIs...)
+se construyen en el primer uso en lugar de al importar su módulo, y los imports
+pesados (psutil, aiohttp, requests, cryptography) se resuelven al primer acceso.
+"""
+import importlib
+import logging
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, TypeVar
+
+logger = logging.getLogger("LazyServices")
+
+T = TypeVar("T")
+
+_registry: Dict[str, "LazyService"] = {}
+_registry_lock = threading.Lock()
+
+
+class LazyService(Generic[T]):
+    """
+    Proxy de un singleton que se construye en el primer acceso a un atributo.
+    Reenvía getattr/setattr a la instancia real, así que `from core.X import x`
+    sigue funcionando sin cambios para quien lo usa. Los métodos especiales
+    (len, bool, iter, in, [], ==, llamada, with/async with) y __class__ (para
+    isinstance) también se reenvían: Python los busca en el tipo, no pasan por
+    __getattr__.
+    """
+
+    __slots__ = ("_name", "_factory", "_instance", "_lock", "_init_ms")
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.RLock())
+        object.__setattr__(self, "_init_ms", None)
+
+    def _get(self) -> T:
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                start = time.perf_counter()
+                instance = self._factory()
+                object.__setattr__(self, "_init_ms", (time.perf_counter() - start) * 1000)
+                object.__setattr__(self, "_instance", instance)
+                logger.debug(f"Servicio '{self._name}' construido en {self._init_ms:.1f} ms")
+            return self._instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._get(), item)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        setattr(self._get(), key, value)
+
+    def __delattr__(self, item: str) -> None:
+        delattr(self._get(), item)
+
+    def __repr__(self) -> str:
+        state = "listo" if self._instance is not None else "pendiente"
+        return f"<LazyService {self._name} ({state})>"
+
+    # -- Métodos especiales ------------------------------------------------
+
+    @property
+    def __class__(self):
+        return type(self._get())
+
+    def __len__(self) -> int:
+        return len(self._get())
+
+    def __bool__(self) -> bool:
+        return bool(self._get())
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self._get()
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._get()[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._get()[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        del self._get()[key]
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._get()(*args, **kwargs)
+
+    def __eq__(self, other: Any) -> bool:
+        return self._get() == resolve(other)
+
+    def __ne__(self, other: Any) -> bool:
+        return self._get() != resolve(other)
+
+    def __hash__(self) -> int:
+        return hash(self._get())
+
+    def __enter__(self) -> Any:
+        return self._get().__enter__()
+
+    def __exit__(self, *exc: Any) -> Any:
+        return self._get().__exit__(*exc)
+
+    async def __aenter__(self) -> Any:
+        return await self._get().__aenter__()
+
+    async def __aexit__(self, *exc: Any) -> Any:
+        return await self._get().__aexit__(*exc)
+
+
+def lazy_service(name: str, factory: Callable[[], T]) -> T:
+    """Registrar un singleton perezoso y devolver su proxy"""
+    with _registry_lock:
+        existing = _registry.get(name)
+        if existing is not None:
+            return existing  # type: ignore[return-value]
+        proxy = LazyService(name, factory)
+        _registry[name] = proxy
+        return proxy  # type: ignore[return-value]
+
+
+def get_service(name: str) -> Any:
+    """Obtener la instancia real de un servicio registrado (la construye si hace falta)"""
+    proxy = _registry.get(name)
+    if proxy is None:
+        raise KeyError(f"Servicio no registrado: {name}")
+    return proxy._get()
+
+
+def resolve(obj: Any) -> Any:
+    """Devolver la instancia real si obj es un proxy perezoso"""
+    if isinstance(obj, LazyService):
+        return obj._get()
+    return obj
+
+
+def get_service_stats() -> Dict[str, Dict[str, Any]]:
+    """Estado de cada servicio: si ya se construyó y cuánto tardó"""
+    return {
+        name: {"initialized": proxy._instance is not None, "init_ms": proxy._init_ms}
+        for name, proxy in sorted(_registry.items())
+    }
+
+
+class _LazyModule:
+    """Módulo que se importa en el primer acceso a un atributo"""
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._load(), item)
+
+    def __repr__(self) -> str:
+        loaded = "cargado" if self.__dict__["_module"] is not None else "diferido"
+        return f"<lazy module '{self.__dict__['_name']}' ({loaded})>"
+
+
+def lazy_import(name: str) -> Any:
+    """
+    Import diferido: `requests = lazy_import("requests")`.
+    Si el módulo ya está cargado se devuelve tal cual, sin proxy.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return _LazyModule(name)
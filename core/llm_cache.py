@@ -0,0 +1,411 @@
+"""
+Caché de respuestas LLM para MININA
+Dos niveles:
+- Exacto: clave sha256 de (provider, model, system, prompt, temperature, max_tokens)
+- Casi-duplicado (opcional): mismo provider/modelo/system/parámetros y prompt con
+  similitud coseno >= umbral, usando embeddings locales por hashing de
+  n-gramas (sin dependencias ni llamadas externas)
+
+Expulsión por TTL y LRU con presupuesto de bytes; persistencia en disco con
+escritura atómica. Las entradas se copian bajo el lock y el json.dump (hasta
+max_bytes) se hace en un executor cuando hay event loop en marcha.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("LLMCache")
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_SIMILARITY = 0.92
+# Candidatos máximos por grupo para la búsqueda por similitud
+SEMANTIC_SCAN_LIMIT = 500
+# Dimensiones del embedding por hashing
+EMBEDDING_DIM = 1 << 16
+# Guardar en disco como mucho cada N segundos
+PERSIST_INTERVAL = 5.0
+
+SparseVector = Dict[int, float]
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def hashing_embedding(text: str) -> SparseVector:
+    """
+    Embedding local: palabras + trigramas de caracteres proyectados por hashing
+    a un vector disperso normalizado (L2).
+    """
+    norm = _normalize(text)
+    features: Dict[int, float] = {}
+
+    def add(token: str, weight: float) -> None:
+        h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        idx = h % EMBEDDING_DIM
+        sign = 1.0 if (h >> 63) & 1 else -1.0
+        features[idx] = features.get(idx, 0.0) + sign * weight
+
+    for word in _WORD_RE.findall(norm):
+        add("w:" + word, 1.0)
+    padded = f"  {norm}  "
+    for i in range(len(padded) - 2):
+        add("c:" + padded[i:i + 3], 0.5)
+
+    length = math.sqrt(sum(v * v for v in features.values()))
+    if length == 0:
+        return {}
+    return {k: v / length for k, v in features.items()}
+
+
+def cosine(a: SparseVector, b: SparseVector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+def make_key(provider: str, model: str, system: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    payload = json.dumps(
+        [provider, model, system, prompt, round(float(temperature), 3), int(max_tokens)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _group_key(provider: str, model: str, system: str, temperature: float, max_tokens: int) -> str:
+    """Grupo de entradas comparables por similitud (todo menos el prompt)"""
+    return make_key(provider, model, system, "", temperature, max_tokens)
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    group: str
+    provider: str
+    model: str
+    prompt: str
+    response: str
+    created: float
+    last_access: float
+    hits: int = 0
+    size: int = 0
+    vector: SparseVector = field(default_factory=dict, repr=False)
+
+    def to_json(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("vector")
+        return data
+
+
+@dataclass
+class CacheLookup:
+    response: str
+    tier: str          # "exact" | "semantic"
+    similarity: float
+    entry: CacheEntry
+
+
+class CompletionCache:
+    """Caché LRU+TTL de completions con presupuesto de bytes"""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        semantic: bool = False,
+        similarity_threshold: float = DEFAULT_SIMILARITY,
+        embedder: Callable[[str], SparseVector] = hashing_embedding,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self._embedder = embedder
+        self._clock = clock
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._groups: Dict[str, "OrderedDict[str, None]"] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_persist = 0.0
+        self._write_lock = threading.Lock()
+        self._seq = 0
+        self._written_seq = 0
+        self._pending_write: Optional[asyncio.Future] = None
+
+        self.stats = {
+            "hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Consulta / inserción
+    # ------------------------------------------------------------------
+
+    def get(
+        self, provider: str, model: str, system: str, prompt: str,
+        temperature: float, max_tokens: int,
+    ) -> Optional[CacheLookup]:
+        now = self._clock()
+        key = make_key(provider, model, system, prompt, temperature, max_tokens)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._remove(key)
+                self.stats["expired"] += 1
+                entry = None
+            if entry is not None:
+                self._touch(entry, now)
+                self.stats["hits"] += 1
+                return CacheLookup(entry.response, "exact", 1.0, entry)
+
+            if self.semantic:
+                found = self._semantic_lookup(
+                    _group_key(provider, model, system, temperature, max_tokens), prompt, now
+                )
+                if found is not None:
+                    self.stats["semantic_hits"] += 1
+                    return found
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(
+        self, provider: str, model: str, system: str, prompt: str,
+        temperature: float, max_tokens: int, response: str,
+    ) -> None:
+        if not response or not response.strip():
+            return
+        now = self._clock()
+        key = make_key(provider, model, system, prompt, temperature, max_tokens)
+        entry = CacheEntry(
+            key=key,
+            group=_group_key(provider, model, system, temperature, max_tokens),
+            provider=provider,
+            model=model,
+            prompt=prompt,
+            response=response,
+            created=now,
+            last_access=now,
+            size=len(prompt.encode("utf-8")) + len(response.encode("utf-8")),
+        )
+        if entry.size > self.max_bytes:
+            return
+        if self.semantic:
+            entry.vector = self._embedder(prompt)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._insert(entry)
+            self.stats["stores"] += 1
+            self._evict()
+            self._dirty = True
+        self.maybe_persist()
+
+    def _semantic_lookup(self, group: str, prompt: str, now: float) -> Optional[CacheLookup]:
+        members = self._groups.get(group)
+        if not members:
+            return None
+        query = self._embedder(prompt)
+        if not query:
+            return None
+        best: Optional[CacheEntry] = None
+        best_sim = 0.0
+        # Los más recientes primero
+        for key in list(reversed(members))[:SEMANTIC_SCAN_LIMIT]:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry, now):
+                continue
+            if not entry.vector:
+                entry.vector = self._embedder(entry.prompt)
+            sim = cosine(query, entry.vector)
+            if sim > best_sim:
+                best, best_sim = entry, sim
+        if best is None or best_sim < self.similarity_threshold:
+            return None
+        self._touch(best, now)
+        return CacheLookup(best.response, "semantic", round(best_sim, 4), best)
+
+    # ------------------------------------------------------------------
+    # Estructura interna
+    # ------------------------------------------------------------------
+
+    def _expired(self, entry: CacheEntry, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.created > self.ttl_seconds
+
+    def _touch(self, entry: CacheEntry, now: float) -> None:
+        entry.hits += 1
+        entry.last_access = now
+        self._entries.move_to_end(entry.key)
+        group = self._groups.get(entry.group)
+        if group is not None:
+            group.move_to_end(entry.key)
+        self._dirty = True
+
+    def _insert(self, entry: CacheEntry) -> None:
+        self._entries[entry.key] = entry
+        self._groups.setdefault(entry.group, OrderedDict())[entry.key] = None
+        self._bytes += entry.size
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        group = self._groups.get(entry.group)
+        if group is not None:
+            group.pop(key, None)
+            if not group:
+                del self._groups[entry.group]
+        self._dirty = True
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+
+    def purge_expired(self) -> int:
+        now = self._clock()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if self._expired(e, now)]
+            for key in expired:
+                self._remove(key)
+            self.stats["expired"] += len(expired)
+            return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self._bytes = 0
+            self._dirty = True
+        self.maybe_persist(force=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["semantic_hits"] + self.stats["misses"]
+            hits = self.stats["hits"] + self.stats["semantic_hits"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "semantic": self.semantic,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"No se pudo cargar la caché LLM: {e}")
+            return
+        now = self._clock()
+        # El archivo está en orden LRU (más antiguo primero)
+        for raw in data.get("entries", []):
+            try:
+                entry = CacheEntry(**raw)
+            except TypeError:
+                continue
+            if self._expired(entry, now):
+                continue
+            self._insert(entry)
+        self._evict()
+        self._dirty = False
+
+    def _snapshot(self) -> Optional[tuple]:
+        """Copiar las entradas bajo el lock (barato); la serialización va fuera"""
+        with self._lock:
+            if not self._dirty and self.path.exists():
+                return None
+            self._seq += 1
+            payload = {"version": 1, "entries": [e.to_json() for e in self._entries.values()]}
+            self._dirty = False
+            self._last_persist = time.monotonic()
+            return self._seq, payload
+
+    def _write(self, seq: int, payload: Dict[str, Any]) -> bool:
+        """json.dump + os.replace (bloqueante: en el event loop va a un thread)"""
+        with self._write_lock:
+            # Una copia más nueva ya está en disco: no pisarla con una vieja
+            if seq < self._written_seq:
+                return True
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+                self._written_seq = seq
+                return True
+            except Exception as e:
+                logger.error(f"Error guardando caché LLM: {e}")
+                self._dirty = True
+                return False
+
+    def persist(self) -> bool:
+        """Escribir la caché a disco (atómico, síncrono: fuera del event loop)"""
+        if not self.path:
+            return False
+        snapshot = self._snapshot()
+        return True if snapshot is None else self._write(*snapshot)
+
+    async def persist_async(self) -> bool:
+        """Como persist() pero escribiendo en un thread"""
+        if not self.path:
+            return False
+        snapshot = self._snapshot()
+        return True if snapshot is None else await asyncio.to_thread(self._write, *snapshot)
+
+    def maybe_persist(self, force: bool = False) -> None:
+        """Guardar si toca; dentro del event loop la escritura va a un executor"""
+        if not self.path or not self._dirty:
+            return
+        if not force and time.monotonic() - self._last_persist < PERSIST_INTERVAL:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.persist()
+            return
+        if self._pending_write is not None and not self._pending_write.done():
+            return  # sigue sucia: la próxima llamada la recoge
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            self._pending_write = loop.run_in_executor(None, self._write, *snapshot)
@@ -3,148 +3,18 @@ MiIA-Product-20 LLM Extension
 Versión simplificada para el producto standalone
 Gestión de credenciales y providers LLM
 """
-import os
-import json
-import base64
-import hashlib
 import logging
-from pathlib import Path
 from typing import Optional, Dict, List
 
+# Store único de credenciales, compartido con core.SecureCredentials
+from core.SecureCredentials import CRYPTO_AVAILABLE, SecureCredentialStore, credential_store
+
 logger = logging.getLogger("LLMExtension")
 
-# Intentar importar Fernet para encriptación
-try:
-    from cryptography.fernet import Fernet
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-    CRYPTO_AVAILABLE = True
-except ImportError:
-    CRYPTO_AVAILABLE = False
+if not CRYPTO_AVAILABLE:
     logging.warning("cryptography no disponible, usando almacenamiento básico")
 
 
-class SecureCredentialStore:
-    """Almacenamiento seguro de credenciales API para MiIA-Product-20"""
-    
-    def __init__(self, app_name: str = "miia-product-20"):
-        self.app_name = app_name
-        self.config_dir = Path.home() / ".config" / app_name
-        self.config_dir.mkdir(parents=True, exist_ok=True)
-        
-        self.creds_file = self.config_dir / "credentials.enc"
-        self._key = None
-        self._fernet = None
-        self._credentials = {}
-        
-        if CRYPTO_AVAILABLE:
-            self._init_encryption()
-        else:
-            logger.warning("cryptography no disponible, usando almacenamiento sin encriptar")
-        
-        self._load_credentials()
-    
-    def _get_machine_id(self) -> str:
-        """Obtener ID único de la máquina"""
-        try:
-            import winreg
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
-                r"SOFTWARE\Microsoft\Cryptography") as key:
-                return winreg.QueryValueEx(key, "MachineGuid")[0]
-        except:
-            return f"{os.environ.get('COMPUTERNAME', 'unknown')}-{os.environ.get('USERNAME', 'user')}"
-    
-    def _init_encryption(self):
-        """Inicializar encriptación"""
-        key_file = self.config_dir / ".key"
-        
-        if key_file.exists():
-            with open(key_file, 'rb') as f:
-                self._key = f.read()
-        else:
-            machine_id = self._get_machine_id()
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=machine_id.encode(),
-                iterations=480000,
-            )
-            self._key = base64.urlsafe_b64encode(kdf.derive(b"miia-secret-v1"))
-            
-            with open(key_file, 'wb') as f:
-                f.write(self._key)
-        
-        self._fernet = Fernet(self._key)
-    
-    def _load_credentials(self):
-        """Cargar credenciales"""
-        if not self.creds_file.exists():
-            return
-        
-        try:
-            if CRYPTO_AVAILABLE and self._fernet:
-                with open(self.creds_file, 'rb') as f:
-                    encrypted = f.read()
-                decrypted = self._fernet.decrypt(encrypted)
-                self._credentials = json.loads(decrypted.decode('utf-8'))
-            else:
-                # Sin encriptación
-                with open(self.creds_file, 'r', encoding='utf-8') as f:
-                    self._credentials = json.load(f)
-        except Exception as e:
-            logger.warning(f"Error cargando credenciales: {e}")
-            self._credentials = {}
-    
-    def _save_credentials(self):
-        """Guardar credenciales"""
-        try:
-            data = json.dumps(self._credentials).encode('utf-8')
-            
-            if CRYPTO_AVAILABLE and self._fernet:
-                encrypted = self._fernet.encrypt(data)
-                with open(self.creds_file, 'wb') as f:
-                    f.write(encrypted)
-            else:
-                with open(self.creds_file, 'w', encoding='utf-8') as f:
-                    json.dump(self._credentials, f)
-            return True
-        except Exception as e:
-            logger.error(f"Error guardando credenciales: {e}")
-            return False
-    
-    def set_api_key(self, provider: str, api_key: str) -> bool:
-        """Guardar API key"""
-        if provider not in self._credentials:
-            self._credentials[provider] = {}
-        
-        self._credentials[provider]['api_key'] = api_key
-        self._credentials[provider]['updated_at'] = json.dumps({})
-        return self._save_credentials()
-    
-    def get_api_key(self, provider: str) -> Optional[str]:
-        """Obtener API key"""
-        return self._credentials.get(provider, {}).get('api_key')
-    
-    def delete_api_key(self, provider: str) -> bool:
-        """Eliminar API key"""
-        if provider in self._credentials:
-            del self._credentials[provider]
-            return self._save_credentials()
-        return False
-    
-    def has_key(self, provider: str) -> bool:
-        """Verificar si existe API key"""
-        return bool(self.get_api_key(provider))
-    
-    def list_providers(self) -> List[str]:
-        """Listar providers con credenciales"""
-        return [k for k, v in self._credentials.items() if v.get('api_key')]
-
-
-# Instancia global
-credential_store = SecureCredentialStore()
-
-
 # Providers disponibles para MiIA-Product-20
 AVAILABLE_PROVIDERS = {
     'openai': {
@@ -0,0 +1,305 @@
+"""
+Router multi-provider para LLMManager
+Elige el provider según latencia y tasa de error (EWMA), hace failover ante
+errores o timeouts y, en modo hedge/race, lanza la misma petición a un segundo
+provider si el primero no ha dado el primer token a tiempo. Gana el primero
+que responde; el resto se cancela.
+
+Modos:
+    failover: un provider cada vez; si falla o no responde, el siguiente
+    hedge:    como failover, pero tras `hedge_delay` sin primer token se lanza
+              el siguiente en paralelo
+    race:     los dos mejores en paralelo desde el principio
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("LLMRouter")
+
+EWMA_ALPHA = 0.3
+# Latencia supuesta para providers aún sin muestras (favorece explorarlos)
+DEFAULT_LATENCY_MS = 1500.0
+# Peso de la tasa de error en la puntuación
+ERROR_PENALTY = 4.0
+# Circuit breaker
+MAX_CONSECUTIVE_FAILURES = 3
+COOLDOWN_SECONDS = 30.0
+# Tiempo máximo sin primer token antes de dar el intento por fallido
+FIRST_TOKEN_TIMEOUT = 30.0
+# Límites del hedge adaptativo
+MIN_HEDGE_MS = 250
+MAX_HEDGE_MS = 10_000
+
+
+@dataclass
+class RouteStats:
+    """Estadísticas EWMA de un provider"""
+    latency_ms: Optional[float] = None   # primer token
+    total_ms: Optional[float] = None
+    error_rate: float = 0.0
+    requests: int = 0
+    successes: int = 0
+    failures: int = 0
+    hedges_won: int = 0
+    hedges_lost: int = 0
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+    last_error: str = ""
+
+    def score(self) -> float:
+        """Menor es mejor"""
+        latency = self.latency_ms if self.latency_ms is not None else DEFAULT_LATENCY_MS
+        return latency * (1.0 + ERROR_PENALTY * self.error_rate)
+
+    def available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "total_ms": round(self.total_ms, 1) if self.total_ms is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "score": round(self.score(), 1),
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "hedges_won": self.hedges_won,
+            "hedges_lost": self.hedges_lost,
+            "cooldown_s": round(max(0.0, self.cooldown_until - now), 1),
+            "last_error": self.last_error,
+        }
+
+
+def _ewma(current: Optional[float], sample: float, alpha: float = EWMA_ALPHA) -> float:
+    if current is None:
+        return sample
+    return alpha * sample + (1 - alpha) * current
+
+
+class LLMRouter:
+    """Enrutado adaptativo entre los providers configurados de un LLMManager"""
+
+    def __init__(
+        self,
+        manager,
+        hedge_delay_ms: int = 1500,
+        first_token_timeout: float = FIRST_TOKEN_TIMEOUT,
+        clock=time.monotonic,
+    ):
+        self.manager = manager
+        self.hedge_delay_ms = hedge_delay_ms
+        self.first_token_timeout = first_token_timeout
+        self._clock = clock
+        self._stats: Dict[str, RouteStats] = {}
+
+    # ------------------------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------------------------
+
+    def _entry(self, name: str) -> RouteStats:
+        entry = self._stats.get(name)
+        if entry is None:
+            entry = self._stats[name] = RouteStats()
+        return entry
+
+    def _record_success(self, name: str, first_token_ms: float, total_ms: Optional[float] = None) -> None:
+        st = self._entry(name)
+        st.latency_ms = _ewma(st.latency_ms, first_token_ms)
+        if total_ms is not None:
+            st.total_ms = _ewma(st.total_ms, total_ms)
+        st.error_rate = _ewma(st.error_rate, 0.0)
+        st.successes += 1
+        st.consecutive_failures = 0
+        st.cooldown_until = 0.0
+
+    def _record_failure(self, name: str, error: str) -> None:
+        st = self._entry(name)
+        st.error_rate = _ewma(st.error_rate, 1.0)
+        st.failures += 1
+        st.consecutive_failures += 1
+        st.last_error = error[:200]
+        if st.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+            st.cooldown_until = self._clock() + COOLDOWN_SECONDS
+            logger.warning(f"Provider {name} en pausa {COOLDOWN_SECONDS:.0f}s tras {st.consecutive_failures} fallos")
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        return {
+            "mode": getattr(self.manager, "routing_mode", "single"),
+            "hedge_delay_ms": self.hedge_delay_ms,
+            "order": [p.value for p in self.rank()],
+            "providers": {name: st.to_dict(now) for name, st in sorted(self._stats.items())},
+        }
+
+    # ------------------------------------------------------------------
+    # Selección
+    # ------------------------------------------------------------------
+
+    def rank(self) -> List[Any]:
+        """Providers ordenados por puntuación; los que están en pausa van al final"""
+        now = self._clock()
+        candidates = list(self.manager.routable_providers())
+        active = getattr(self.manager, "active_provider", None)
+
+        def key(ptype) -> Tuple[int, float, int]:
+            st = self._entry(ptype.value)
+            # A igualdad de puntuación, el provider activo primero
+            return (0 if st.available(now) else 1, st.score(), 0 if ptype == active else 1)
+
+        return sorted(candidates, key=key)
+
+    def _hedge_delay(self, primary) -> float:
+        """Segundos a esperar el primer token antes de lanzar el siguiente provider"""
+        st = self._stats.get(primary.value)
+        delay_ms = float(self.hedge_delay_ms)
+        if st is not None and st.latency_ms is not None:
+            # Adaptativo: 1.5x la latencia habitual del provider
+            delay_ms = min(delay_ms, 1.5 * st.latency_ms)
+        return max(MIN_HEDGE_MS, min(MAX_HEDGE_MS, delay_ms)) / 1000.0
+
+    # ------------------------------------------------------------------
+    # Generación
+    # ------------------------------------------------------------------
+
+    async def _run_attempt(self, ptype, queue: asyncio.Queue, args: tuple) -> None:
+        try:
+            async for chunk in self.manager._stream_provider(ptype, *args):
+                if chunk:
+                    await queue.put(("chunk", ptype, chunk))
+            await queue.put(("done", ptype, None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(("error", ptype, e))
+
+    async def generate(
+        self,
+        prompt: str,
+        system: str = "",
+        max_tokens: int = 2000,
+        temperature: float = 0.7,
+        stream: bool = False,
+        mode: Optional[str] = None,
+        raise_errors: bool = False,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Generar con el mejor provider disponible, con failover y hedging.
+        Los errores se devuelven como texto (igual que LLMManager) salvo con
+        raise_errors=True, que lanza LLMProviderError.
+        """
+        from core.LLMManager import LLMProviderError
+
+        def fail(message: str) -> str:
+            if raise_errors:
+                raise LLMProviderError(message, "router")
+            return message
+
+        mode = mode or getattr(self.manager, "routing_mode", "failover")
+        pending = self.rank()
+        if not pending:
+            yield fail("Error: No hay providers LLM configurados para el router.")
+            return
+
+        args = (prompt, system, max_tokens, temperature, stream)
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks: Dict[Any, asyncio.Task] = {}
+        started: Dict[Any, float] = {}
+        live: List[Any] = []
+        errors: List[str] = []
+        last_launch = 0.0
+
+        def launch() -> None:
+            nonlocal last_launch
+            ptype = pending.pop(0)
+            self._entry(ptype.value).requests += 1
+            started[ptype] = last_launch = self._clock()
+            live.append(ptype)
+            tasks[ptype] = asyncio.create_task(self._run_attempt(ptype, queue, args))
+
+        def drop(ptype, error: str) -> None:
+            live.remove(ptype)
+            tasks[ptype].cancel()
+            errors.append(f"{ptype.value}: {error}")
+            self._record_failure(ptype.value, error)
+
+        launch()
+        if mode == "race" and pending:
+            launch()
+
+        winner = None
+        first_chunk = ""
+        try:
+            # Fase 1: esperar el primer token de algún intento
+            while winner is None:
+                if not live:
+                    if not pending:
+                        break
+                    launch()  # failover
+                    continue
+
+                now = self._clock()
+                deadlines = [started[p] + self.first_token_timeout for p in live]
+                hedge_at = None
+                if mode in ("hedge", "race") and pending:
+                    hedge_at = last_launch + self._hedge_delay(live[-1])
+                    deadlines.append(hedge_at)
+                timeout = max(0.0, min(deadlines) - now)
+
+                try:
+                    kind, ptype, payload = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    now = self._clock()
+                    for p in list(live):
+                        if now - started[p] >= self.first_token_timeout:
+                            drop(p, f"sin respuesta en {self.first_token_timeout:.0f}s")
+                    if hedge_at is not None and now >= hedge_at and pending:
+                        logger.info(f"Hedge: {live[-1].value if live else '-'} lento, lanzando {pending[0].value}")
+                        launch()
+                    continue
+
+                if ptype not in live:
+                    continue  # restos de un intento ya descartado
+                if kind == "chunk":
+                    winner, first_chunk = ptype, payload
+                elif kind == "error":
+                    drop(ptype, str(payload))
+                else:
+                    drop(ptype, "respuesta vacía")
+
+            if winner is None:
+                yield fail("Error: ningún provider respondió (" + "; ".join(errors) + ")")
+                return
+
+            first_ms = (self._clock() - started[winner]) * 1000
+            for p in live:
+                if p is not winner:
+                    tasks[p].cancel()
+                    self._entry(p.value).hedges_lost += 1
+            if len(started) > 1:
+                self._entry(winner.value).hedges_won += 1
+
+            # Fase 2: seguir sólo al ganador
+            yield first_chunk
+            while True:
+                kind, ptype, payload = await queue.get()
+                if ptype is not winner:
+                    continue
+                if kind == "chunk":
+                    yield payload
+                elif kind == "done":
+                    self._record_success(winner.value, first_ms, (self._clock() - started[winner]) * 1000)
+                    break
+                else:
+                    # Ya se envió texto: no se puede cambiar de provider a mitad
+                    self._record_failure(winner.value, str(payload))
+                    yield fail(f"\nError: {payload}")
+                    break
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
@@ -0,0 +1,298 @@
+"""
+Streaming de respuestas LLM para MININA
+Envuelve LLMManager.generate(stream=True) midiendo latencia de primer token y
+total por provider, y ofrece un editor de mensajes con throttling para canales
+que sólo permiten editar un mensaje cada cierto tiempo (Telegram).
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger("LLMStreaming")
+
+# Muestras por provider para percentiles
+LATENCY_WINDOW = 200
+
+# Telegram: límite de texto por mensaje y ~1 edición/segundo por chat
+TELEGRAM_MAX_MESSAGE = 4096
+DEFAULT_EDIT_INTERVAL = 1.0
+
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return round(ordered[idx], 1)
+
+
+@dataclass
+class ProviderLatency:
+    """Ventana de latencias de un provider"""
+    first_token_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    total_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    requests: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    errors: int = 0
+    chars: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "chars": self.chars,
+            "first_token_ms": {
+                "last": round(self.first_token_ms[-1], 1) if self.first_token_ms else None,
+                "p50": _percentile(self.first_token_ms, 50),
+                "p95": _percentile(self.first_token_ms, 95),
+            },
+            "total_ms": {
+                "last": round(self.total_ms[-1], 1) if self.total_ms else None,
+                "p50": _percentile(self.total_ms, 50),
+                "p95": _percentile(self.total_ms, 95),
+            },
+        }
+
+
+class LLMStreamMetrics:
+    """Métricas de latencia de generación por provider"""
+
+    def __init__(self):
+        self._providers: Dict[str, ProviderLatency] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, provider: str) -> ProviderLatency:
+        entry = self._providers.get(provider)
+        if entry is None:
+            entry = self._providers[provider] = ProviderLatency()
+        return entry
+
+    def record(
+        self,
+        provider: str,
+        first_token_ms: Optional[float],
+        total_ms: float,
+        chars: int = 0,
+        status: str = "completed",
+    ) -> None:
+        """Registrar una generación. status: completed | cancelled | error"""
+        with self._lock:
+            entry = self._entry(provider or "unknown")
+            entry.requests += 1
+            entry.chars += chars
+            if first_token_ms is not None:
+                entry.first_token_ms.append(first_token_ms)
+            if status == "completed":
+                entry.completed += 1
+                entry.total_ms.append(total_ms)
+            elif status == "cancelled":
+                entry.cancelled += 1
+            else:
+                entry.errors += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: entry.to_dict() for name, entry in sorted(self._providers.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._providers.clear()
+
+
+# Instancia global
+stream_metrics = LLMStreamMetrics()
+
+
+def _active_provider_name(manager) -> str:
+    mode = getattr(manager, "routing_mode", "single")
+    if mode != "single":
+        return f"router:{mode}"
+    active = getattr(manager, "active_provider", None)
+    return getattr(active, "value", None) or str(active or "none")
+
+
+async def stream_completion(
+    prompt: str,
+    system: str = "",
+    max_tokens: int = 2000,
+    temperature: float = 0.7,
+    stream: bool = True,
+    manager=None,
+    metrics: Optional[LLMStreamMetrics] = None,
+    raise_errors: bool = False,
+) -> AsyncGenerator[str, None]:
+    """
+    Generar con el provider activo reenviando cada chunk en cuanto llega.
+    Registra latencia de primer token y total; si quien consume cancela
+    (desconexión del cliente) se cierra el generador subyacente y se
+    registra como cancelada. Con raise_errors=True un fallo del provider
+    llega como LLMProviderError en lugar de como texto.
+    """
+    if manager is None:
+        from core.LLMManager import llm_manager as manager
+    metrics = metrics or stream_metrics
+    provider = _active_provider_name(manager)
+
+    start = time.perf_counter()
+    first_token_ms: Optional[float] = None
+    chars = 0
+    status = "error"
+    gen = manager.generate(
+        prompt=prompt, system=system, max_tokens=max_tokens,
+        temperature=temperature, stream=stream, raise_errors=raise_errors,
+    )
+    try:
+        async for chunk in gen:
+            if not chunk:
+                continue
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000
+            chars += len(chunk)
+            yield chunk
+        status = "completed"
+    except (asyncio.CancelledError, GeneratorExit):
+        status = "cancelled"
+        raise
+    finally:
+        await gen.aclose()
+        total_ms = (time.perf_counter() - start) * 1000
+        metrics.record(provider, first_token_ms, total_ms, chars=chars, status=status)
+        logger.debug(
+            f"[{provider}] {status}: primer token {first_token_ms or 0:.0f} ms, total {total_ms:.0f} ms"
+        )
+
+
+async def stream_chat(
+    session_id: str,
+    message: str,
+    system: str = "",
+    max_tokens: int = 2000,
+    temperature: float = 0.7,
+    stream: bool = True,
+    manager=None,
+    memory=None,
+) -> AsyncGenerator[str, None]:
+    """
+    Turno de chat con memoria: construye el prompt dentro del presupuesto de
+    tokens del modelo activo (STM/MTM/LTM/hechos), genera y guarda el
+    intercambio en la STM de la sesión. Si el provider falla, el usuario ve
+    el error pero el turno no se guarda.
+    """
+    from core.LLMManager import LLMProviderError
+    from core.prompt_builder import build_chat_prompt, prompt_builder
+    if memory is None:
+        from core.MemoryCore import memory_core as memory
+
+    # Las lecturas de memoria (SQLite) van en un thread, no en el event loop
+    segments = await prompt_builder.gather(session_id, message)
+    built = build_chat_prompt(session_id, message, system=system, max_tokens=max_tokens,
+                              memory=segments)
+    logger.debug(f"[{session_id}] prompt {built.prompt_tokens}/{built.budget} tokens {built.sections}")
+
+    parts = []
+    try:
+        async for chunk in stream_completion(
+            prompt=built.prompt, system=built.system, max_tokens=max_tokens,
+            temperature=temperature, stream=stream, manager=manager, raise_errors=True,
+        ):
+            parts.append(chunk)
+            yield chunk
+    except LLMProviderError as e:
+        logger.warning(f"[{session_id}] turno sin guardar: {e}")
+        yield str(e)
+        return
+
+    try:
+        memory.add_to_stm(session_id, "user", message)
+        memory.add_to_stm(session_id, "assistant", "".join(parts))
+    except Exception as e:
+        logger.warning(f"No se pudo guardar el turno en memoria: {e}")
+
+
+class ThrottledMessageEditor:
+    """
+    Acumula texto y lo publica editando un único mensaje, como mucho una vez
+    cada `min_interval` segundos. El primer fragmento se envía enseguida para
+    que el usuario vea respuesta lo antes posible. Cuando el texto supera
+    `max_length` el mensaje actual se cierra (cortando en un salto de línea o
+    espacio si lo hay) y la respuesta sigue en un mensaje nuevo.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[Any]],
+        edit: Callable[[Any, str], Awaitable[Any]],
+        min_interval: float = DEFAULT_EDIT_INTERVAL,
+        max_length: int = TELEGRAM_MAX_MESSAGE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._send = send
+        self._edit = edit
+        self._min_interval = min_interval
+        self._max_length = max_length
+        self._clock = clock
+        self._parts: list = []
+        self._offset = 0  # inicio del mensaje actual dentro del texto completo
+        self._handle: Any = None
+        self._last_push = 0.0
+        self._last_text = ""
+        self.edits = 0
+        self.messages = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def _split_point(self, text: str) -> int:
+        """Longitud del trozo que cierra el mensaje: hasta el último salto de línea o espacio"""
+        window = text[: self._max_length]
+        for sep in ("\n", " "):
+            idx = window.rfind(sep)
+            if idx >= self._max_length // 2:
+                return idx + 1
+        return self._max_length
+
+    async def _publish(self, text: str) -> None:
+        if not text.strip() or text == self._last_text:
+            return
+        if self._handle is None:
+            self._handle = await self._send(text)
+            self.messages += 1
+        else:
+            await self._edit(self._handle, text)
+            self.edits += 1
+        self._last_text = text
+
+    async def _push(self) -> None:
+        text = self.text[self._offset:]
+        while len(text) > self._max_length:
+            cut = self._split_point(text)
+            await self._publish(text[:cut])
+            self._offset += cut
+            self._handle = None
+            self._last_text = ""
+            text = text[cut:]
+        if not text.strip() or text == self._last_text:
+            return
+        await self._publish(text)
+        self._last_push = self._clock()
+
+    async def feed(self, chunk: str) -> None:
+        """Añadir un chunk; publica sólo si ya pasó el intervalo mínimo"""
+        if not chunk:
+            return
+        self._parts.append(chunk)
+        if self._handle is None or self._clock() - self._last_push >= self._min_interval:
+            await self._push()
+
+    async def flush(self) -> str:
+        """Publicar el texto final pendiente y devolverlo completo"""
+        await self._push()
+        return self.text
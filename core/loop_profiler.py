@@ -0,0 +1,268 @@
+"""
+Perfilador del event loop para MININA (opcional)
+Detecta qué bloquea el loop y quién es responsable:
+
+- Lag del loop: retraso de un tick periódico respecto a lo programado
+- Callbacks lentos: cada paso del loop que supera el umbral se registra con
+  su duración, la etiqueta responsable (tópico del bus + suscriptor o ruta
+  HTTP) y una muestra de la pila tomada mientras el loop estaba bloqueado
+- Latencia por suscriptor de CortexBus
+
+Se activa con MIIA_LOOP_PROFILER=1, desde /api/debug/loop-profiler o con
+loop_profiler.enable(). Desactivado no cuesta nada: CortexBus y la WebUI sólo
+comprueban `loop_profiler.enabled`.
+
+    with loop_profiler.label("http:GET /api/works"):
+        ...  # todo lo que se ejecute aquí (y en tareas creadas aquí) se atribuye a la ruta
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+from core.SystemWatchdog import LatencyHistogram
+
+logger = logging.getLogger("LoopProfiler")
+
+DEFAULT_SLOW_CALLBACK_MS = 100.0
+TICK_INTERVAL = 0.05
+SLOW_CALLBACK_WINDOW = 100
+STACK_DEPTH = 12
+
+_label: ContextVar[Optional[str]] = ContextVar("loop_profiler_label", default=None)
+
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_PROJECT_ROOT + os.sep):
+        return filename[len(_PROJECT_ROOT) + 1:]
+    return filename
+
+
+def _format_stack(frame) -> List[str]:
+    return [
+        f"{_short_path(fs.filename)}:{fs.lineno} in {fs.name}"
+        for fs in traceback.extract_stack(frame, limit=STACK_DEPTH)
+    ]
+
+
+class LoopProfiler:
+    """Instrumentación del event loop (un loop por instancia)"""
+
+    def __init__(self, slow_callback_ms: float = DEFAULT_SLOW_CALLBACK_MS):
+        self.enabled = False
+        self.slow_callback_ms = slow_callback_ms
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._tick_task: Optional[asyncio.Task] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._original_run = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.loop_lag = LatencyHistogram()
+            self.slow_callbacks: Deque[Dict[str, Any]] = deque(maxlen=SLOW_CALLBACK_WINDOW)
+            self.by_label: Dict[str, Dict[str, float]] = {}
+            self.subscribers: Dict[str, Dict[str, LatencyHistogram]] = {}
+            self._last_tick = time.monotonic()
+            self._handle_started: Optional[float] = None
+            self._step_label: Optional[str] = None
+            self._pending_stack: Optional[List[str]] = None
+            self.started_at = time.time()
+
+    # ------------------------------------------------------------------
+    # Activación
+    # ------------------------------------------------------------------
+
+    def enable(self, loop: Optional[asyncio.AbstractEventLoop] = None,
+               slow_callback_ms: Optional[float] = None) -> None:
+        """Activar sobre el loop en ejecución (o el indicado)"""
+        if slow_callback_ms is not None:
+            self.slow_callback_ms = float(slow_callback_ms)
+        if self.enabled:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._patch_handles()
+        self._stop.clear()
+        self._last_tick = time.monotonic()
+        self._tick_task = self._loop.create_task(self._tick())
+        self._sampler = threading.Thread(target=self._sample_stalls, name="LoopProfiler", daemon=True)
+        self._sampler.start()
+        self.enabled = True
+        logger.info(f"Perfilador del loop activo (umbral {self.slow_callback_ms:.0f} ms)")
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._stop.set()
+        if self._tick_task is not None:
+            self._tick_task.cancel()
+            self._tick_task = None
+        self._unpatch_handles()
+        logger.info("Perfilador del loop desactivado")
+
+    def _patch_handles(self) -> None:
+        """Cronometrar cada callback del loop (misma técnica que el modo debug de asyncio)"""
+        if self._original_run is not None:
+            return
+        profiler = self
+        original = asyncio.events.Handle._run
+        self._original_run = original
+
+        def _run(handle):
+            if threading.get_ident() != profiler._loop_thread:
+                return original(handle)
+            start = time.monotonic()
+            profiler._handle_started = start
+            profiler._step_label = None
+            try:
+                return original(handle)
+            finally:
+                profiler._handle_started = None
+                elapsed_ms = (time.monotonic() - start) * 1000
+                if elapsed_ms >= profiler.slow_callback_ms:
+                    profiler._record_slow(handle, elapsed_ms)
+
+        asyncio.events.Handle._run = _run
+
+    def _unpatch_handles(self) -> None:
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+
+    # ------------------------------------------------------------------
+    # Medición
+    # ------------------------------------------------------------------
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(TICK_INTERVAL)
+            lag_ms = max(0.0, (loop.time() - start - TICK_INTERVAL) * 1000)
+            self.loop_lag.observe(lag_ms)
+            self._last_tick = time.monotonic()
+
+    def _sample_stalls(self) -> None:
+        """Hilo aparte: si el loop lleva bloqueado más del umbral, tomar su pila"""
+        interval = max(0.005, self.slow_callback_ms / 2000)
+        sampled_for: Optional[float] = None
+        while not self._stop.wait(interval):
+            started = self._handle_started
+            if started is None or started == sampled_for:
+                continue
+            if (time.monotonic() - started) * 1000 >= self.slow_callback_ms:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._pending_stack = _format_stack(frame)
+                    sampled_for = started
+
+    def _record_slow(self, handle, elapsed_ms: float) -> None:
+        # Etiqueta que sigue activa en la tarea o, si el bloque terminó dentro
+        # de este mismo paso, la primera que se abrió durante el paso
+        label = None
+        context = getattr(handle, "_context", None)
+        if context is not None:
+            label = context.get(_label)
+        label = label or self._step_label or self._describe(handle)
+        self._step_label = None
+        stack, self._pending_stack = self._pending_stack, None
+        entry = {
+            "timestamp": time.time(),
+            "duration_ms": round(elapsed_ms, 1),
+            "label": label,
+            "callback": self._describe(handle),
+            "stack": stack or [],
+        }
+        with self._lock:
+            self.slow_callbacks.append(entry)
+            agg = self.by_label.setdefault(label, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            agg["count"] += 1
+            agg["total_ms"] += elapsed_ms
+            agg["max_ms"] = max(agg["max_ms"], elapsed_ms)
+        logger.warning(f"Loop bloqueado {elapsed_ms:.0f} ms por {label}")
+
+    @staticmethod
+    def _describe(handle) -> str:
+        callback = getattr(handle, "_callback", None)
+        task = getattr(callback, "__self__", None)
+        if isinstance(task, asyncio.Task):
+            coro = task.get_coro()
+            return getattr(coro, "__qualname__", None) or repr(coro)
+        return getattr(callback, "__qualname__", None) or repr(callback)
+
+    # ------------------------------------------------------------------
+    # Etiquetas y suscriptores del bus
+    # ------------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def label(self, name: str):
+        """Atribuir a `name` el trabajo hecho dentro del bloque"""
+        token = _label.set(name)
+        if self.enabled and self._step_label is None and threading.get_ident() == self._loop_thread:
+            self._step_label = name
+        try:
+            yield
+        finally:
+            _label.reset(token)
+
+    def record_subscriber(self, topic: str, subscriber: str, elapsed_ms: float) -> None:
+        with self._lock:
+            per_topic = self.subscribers.setdefault(topic, {})
+            hist = per_topic.get(subscriber)
+            if hist is None:
+                hist = per_topic[subscriber] = LatencyHistogram()
+        hist.observe(elapsed_ms)
+
+    # ------------------------------------------------------------------
+    # Reporte
+    # ------------------------------------------------------------------
+
+    def get_report(self, top: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            slow = sorted(self.slow_callbacks, key=lambda e: e["duration_ms"], reverse=True)[:top]
+            by_label = sorted(
+                ({"label": k, **{n: round(v, 1) for n, v in agg.items()}} for k, agg in self.by_label.items()),
+                key=lambda e: e["total_ms"], reverse=True,
+            )
+            subscribers = {
+                topic: {name: hist.to_dict() for name, hist in subs.items()}
+                for topic, subs in self.subscribers.items()
+            }
+        return {
+            "enabled": self.enabled,
+            "slow_callback_ms": self.slow_callback_ms,
+            "since": self.started_at,
+            "loop_lag": self.loop_lag.to_dict(),
+            "slow_callbacks": slow,
+            "blocking_by_label": by_label[:top],
+            "bus_subscribers": subscribers,
+        }
+
+
+def subscriber_name(callback) -> str:
+    return getattr(callback, "__qualname__", None) or getattr(callback, "__name__", None) or repr(callback)
+
+
+# Instancia global
+loop_profiler = LoopProfiler(
+    slow_callback_ms=float(os.environ.get("MIIA_SLOW_CALLBACK_MS") or DEFAULT_SLOW_CALLBACK_MS)
+)
+
+
+def enabled_by_env() -> bool:
+    return str(os.environ.get("MIIA_LOOP_PROFILER") or "").strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,195 @@
+"""
+Planificador de peticiones a Ollama (modelo local)
+- Limita las generaciones simultáneas a los slots paralelos del servidor
+  (OLLAMA_NUM_PARALLEL); el resto espera en cola en vez de competir por la GPU/CPU
+- Las peticiones interactivas (chat, Telegram, WhatsApp) pasan por delante de
+  las de segundo plano
+- Mantiene el modelo cargado (keep_alive) y permite precargarlo al arrancar
+
+La prioridad se toma del contexto, así que no hay que pasarla por toda la
+cadena de llamadas:
+
+    with llm_priority(BACKGROUND):
+        async for chunk in llm_manager.generate(...):
+            ...
+
+Lo usa el scheduler de trabajos recurrentes (core.job_scheduler) para todo lo
+que lanza una ejecución desatendida.
+"""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("OllamaScheduler")
+
+INTERACTIVE = 0
+BACKGROUND = 10
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+DEFAULT_KEEP_ALIVE = "30m"
+
+_priority: ContextVar[int] = ContextVar("ollama_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def llm_priority(priority: int):
+    """Fijar la prioridad de las generaciones locales lanzadas dentro del bloque"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def default_parallel() -> int:
+    """Slots paralelos del servidor Ollama (misma variable que usa el servidor)"""
+    for var in ("MIIA_OLLAMA_PARALLEL", "OLLAMA_NUM_PARALLEL"):
+        raw = str(os.environ.get(var) or "").strip()
+        if raw.isdigit() and int(raw) > 0:
+            return int(raw)
+    return 1
+
+
+class OllamaScheduler:
+    """Semáforo con prioridad + gestión de modelos cargados"""
+
+    def __init__(self, max_parallel: Optional[int] = None, keep_alive: str = DEFAULT_KEEP_ALIVE):
+        self.max_parallel = max_parallel or default_parallel()
+        self.keep_alive = keep_alive
+        self._running = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._loaded: Dict[str, float] = {}   # modelo -> último uso
+        self._preloading: Dict[str, asyncio.Task] = {}
+
+        self.stats: Dict[str, Any] = {
+            "served": {name: 0 for name in PRIORITY_NAMES.values()},
+            "max_wait_ms": 0.0,
+            "avg_wait_ms": 0.0,
+            "max_queue": 0,
+            "preloads": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Slots
+    # ------------------------------------------------------------------
+
+    async def acquire(self, priority: Optional[int] = None) -> float:
+        """Esperar un slot. Retorna los ms de espera en cola."""
+        if priority is None:
+            priority = current_priority()
+        start = time.perf_counter()
+        if self._running < self.max_parallel and not self._waiters:
+            self._running += 1
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+            self.stats["max_queue"] = max(self.stats["max_queue"], len(self._waiters))
+            try:
+                await fut
+            except asyncio.CancelledError:
+                # Si el slot ya se nos había cedido, pasarlo al siguiente
+                if fut.done() and not fut.cancelled():
+                    self.release()
+                raise
+        wait_ms = (time.perf_counter() - start) * 1000
+        self._record_wait(priority, wait_ms)
+        return wait_ms
+
+    def release(self) -> None:
+        """Liberar un slot; se cede directamente al siguiente en cola"""
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._running = max(0, self._running - 1)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, model: str = "", priority: Optional[int] = None):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            if model:
+                self._loaded[model] = time.time()
+            self.release()
+
+    def _record_wait(self, priority: int, wait_ms: float) -> None:
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        served = self.stats["served"]
+        served[name] = served.get(name, 0) + 1
+        total = sum(served.values())
+        self.stats["avg_wait_ms"] += (wait_ms - self.stats["avg_wait_ms"]) / total
+        self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], wait_ms)
+
+    # ------------------------------------------------------------------
+    # Modelos cargados
+    # ------------------------------------------------------------------
+
+    def payload_options(self) -> Dict[str, Any]:
+        """Campos a añadir a cada petición para que el modelo no se descargue"""
+        return {"keep_alive": self.keep_alive}
+
+    async def preload(self, session, base_url: str, model: str) -> bool:
+        """
+        Cargar el modelo en memoria sin generar nada (petición vacía con
+        keep_alive). Varias llamadas simultáneas comparten la misma precarga.
+        """
+        task = self._preloading.get(model)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._do_preload(session, base_url, model))
+            self._preloading[model] = task
+        return await asyncio.shield(task)
+
+    async def _do_preload(self, session, base_url: str, model: str) -> bool:
+        try:
+            async with session.post(
+                f"{base_url}/api/generate",
+                json={"model": model, "keep_alive": self.keep_alive},
+            ) as resp:
+                await resp.read()
+                if resp.status != 200:
+                    logger.warning(f"Precarga de {model} falló: HTTP {resp.status}")
+                    return False
+            self._loaded[model] = time.time()
+            self.stats["preloads"] += 1
+            logger.info(f"Modelo {model} precargado (keep_alive={self.keep_alive})")
+            return True
+        except Exception as e:
+            logger.warning(f"Precarga de {model} falló: {e}")
+            return False
+
+    async def unload(self, session, base_url: str, model: str) -> bool:
+        """Liberar la memoria del modelo (keep_alive=0)"""
+        try:
+            async with session.post(
+                f"{base_url}/api/generate", json={"model": model, "keep_alive": 0}
+            ) as resp:
+                await resp.read()
+                self._loaded.pop(model, None)
+                return resp.status == 200
+        except Exception as e:
+            logger.warning(f"No se pudo descargar {model}: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "max_parallel": self.max_parallel,
+            "keep_alive": self.keep_alive,
+            "running": self._running,
+            "queued": sum(1 for _, _, f in self._waiters if not f.done()),
+            "idle_models_s": {m: round(now - ts, 1) for m, ts in self._loaded.items()},
+            **{k: (round(v, 1) if isinstance(v, float) else v) for k, v in self.stats.items()},
+        }
@@ -0,0 +1,356 @@
+"""
+Despachador de mensajes salientes para Telegram y WhatsApp
+Todos los envíos a chats pasan por aquí en lugar de un `await send_message`
+por chat en serie:
+
+- Token bucket por chat y global por canal (límites anti-flood)
+- Concurrencia acotada: un chat en espera no frena a los demás
+- Reintento de 429 / flood wait respetando `retry_after`
+- Agrupación de ráfagas (user.SPEAK): los mensajes de progreso que llegan
+  seguidos se publican como un único mensaje que se va editando
+- Deduplicación con un conjunto LRU acotado
+
+    dispatcher = get_dispatcher("telegram")
+    await dispatcher.broadcast(chat_ids, lambda cid: bot.send_message(chat_id=cid, text=text))
+    dispatcher.coalesce(chat_id, text, send=..., edit=...)
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from core.http_client import ProviderLimiter
+
+logger = logging.getLogger("OutboundDispatcher")
+
+# (peticiones/segundo, ráfaga) por chat y global para cada canal.
+# Telegram: ~1 msg/s por chat y 30 msg/s por bot. WhatsApp Cloud API: 80 msg/s.
+CHANNEL_LIMITS: Dict[str, Dict[str, Tuple[float, int]]] = {
+    "telegram": {"per_chat": (1.0, 3), "global": (30.0, 30)},
+    "whatsapp": {"per_chat": (1.0, 5), "global": (80.0, 80)},
+}
+DEFAULT_LIMITS = {"per_chat": (1.0, 3), "global": (30.0, 30)}
+
+DEFAULT_CONCURRENCY = 8
+MAX_RETRIES = 3
+MAX_RETRY_AFTER = 120.0
+COALESCE_WINDOW = 1.0
+EDIT_WINDOW = 60.0
+MAX_MESSAGE_LENGTH = 4096
+DEDUP_SIZE = 2048
+# Limitadores por chat que se conservan (LRU): los chats inactivos se olvidan
+MAX_CHATS = 4096
+
+
+class RetryLater(Exception):
+    """El destino pidió esperar (429 / flood wait) antes de reintentar"""
+
+    def __init__(self, retry_after: float, message: str = ""):
+        super().__init__(message or f"Reintentar en {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def retry_after_of(exc: BaseException) -> Optional[float]:
+    """Segundos de espera que indica la excepción (telegram.error.RetryAfter o RetryLater)"""
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RecentKeys:
+    """Conjunto LRU acotado: recuerda las últimas `maxlen` claves"""
+
+    def __init__(self, maxlen: int = DEDUP_SIZE):
+        self.maxlen = maxlen
+        self._keys: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def add(self, key: Hashable) -> bool:
+        """Añadir la clave; False si ya estaba (duplicado)"""
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self.maxlen:
+            self._keys.popitem(last=False)
+        return True
+
+    def discard(self, key: Hashable) -> None:
+        self._keys.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+@dataclass
+class _PendingBurst:
+    lines: List[str]
+    send: Callable[[str], Awaitable[Any]]
+    edit: Optional[Callable[[Any, str], Awaitable[Any]]]
+
+
+@dataclass
+class _ProgressMessage:
+    handle: Any
+    text: str
+    updated: float
+
+
+@dataclass
+class DispatcherStats:
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    deduped: int = 0
+    coalesced: int = 0
+    edits: int = 0
+    waited_ms: float = 0.0
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "deduped": self.deduped,
+            "coalesced": self.coalesced,
+            "edits": self.edits,
+            "waited_ms": round(self.waited_ms, 1),
+            "errors": dict(self.errors),
+        }
+
+
+class OutboundDispatcher:
+    """Envíos salientes de un canal con límites por chat y globales"""
+
+    def __init__(
+        self,
+        channel: str,
+        per_chat: Optional[Tuple[float, int]] = None,
+        global_limit: Optional[Tuple[float, int]] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+        coalesce_window: float = COALESCE_WINDOW,
+        edit_window: float = EDIT_WINDOW,
+        max_length: int = MAX_MESSAGE_LENGTH,
+        dedup_size: int = DEDUP_SIZE,
+        max_chats: int = MAX_CHATS,
+    ):
+        limits = CHANNEL_LIMITS.get(channel, DEFAULT_LIMITS)
+        self.channel = channel
+        self.per_chat = per_chat or limits["per_chat"]
+        self.global_limit = global_limit or limits["global"]
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.coalesce_window = coalesce_window
+        self.edit_window = edit_window
+        self.max_length = max_length
+        self.max_chats = max_chats
+
+        self._global = ProviderLimiter(*self.global_limit)
+        self._chats: "OrderedDict[Hashable, ProviderLimiter]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self._seen = RecentKeys(dedup_size)
+        self._pending: Dict[Hashable, _PendingBurst] = {}
+        self._progress: Dict[Hashable, _ProgressMessage] = {}
+        self._flush_tasks: Dict[Hashable, asyncio.Task] = {}
+        self.stats = DispatcherStats()
+
+    # ------------------------------------------------------------------
+    # Límites
+    # ------------------------------------------------------------------
+
+    def _chat_limiter(self, chat_id: Hashable) -> ProviderLimiter:
+        limiter = self._chats.get(chat_id)
+        if limiter is None:
+            limiter = self._chats[chat_id] = ProviderLimiter(*self.per_chat)
+            if len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        return limiter
+
+    def _slots(self) -> asyncio.Semaphore:
+        # El semáforo pertenece a un loop: recrearlo si cambia (tests, reinicios)
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _wait(self, limiter: ProviderLimiter) -> None:
+        wait = limiter.reserve()
+        if wait > 0:
+            self.stats.waited_ms += wait * 1000
+            await asyncio.sleep(wait)
+
+    # ------------------------------------------------------------------
+    # Envío
+    # ------------------------------------------------------------------
+
+    async def submit(self, chat_id: Hashable, factory: Callable[[], Awaitable[Any]],
+                     key: Optional[Hashable] = None) -> Any:
+        """
+        Ejecutar `factory()` (una corrutina de envío) respetando los límites.
+        Devuelve su resultado, None si `key` ya se envió, o propaga el error
+        tras agotar los reintentos (y olvida `key` para que se pueda reenviar).
+        """
+        if key is not None and not self._seen.add(key):
+            self.stats.deduped += 1
+            return None
+
+        chat_limiter = self._chat_limiter(chat_id)
+        attempt = 0
+        while True:
+            # La espera por chat va fuera del semáforo: un chat en flood wait
+            # no ocupa un hueco de concurrencia
+            await self._wait(chat_limiter)
+            async with self._slots():
+                await self._wait(self._global)
+                try:
+                    result = await factory()
+                except Exception as e:
+                    retry_after = retry_after_of(e)
+                    if retry_after is None or attempt >= self.max_retries or retry_after > MAX_RETRY_AFTER:
+                        self.stats.failed += 1
+                        name = type(e).__name__
+                        self.stats.errors[name] = self.stats.errors.get(name, 0) + 1
+                        logger.warning(f"[{self.channel}] Envío a {chat_id} fallido: {e}")
+                        if key is not None:
+                            self._seen.discard(key)
+                        raise
+                    attempt += 1
+                    self.stats.retried += 1
+                    chat_limiter.pause(retry_after)
+                    logger.info(f"[{self.channel}] Flood limit en {chat_id}: reintento en {retry_after:.1f}s")
+                    continue
+            self.stats.sent += 1
+            return result
+
+    async def broadcast(self, chat_ids: Iterable[Hashable],
+                        factory_for: Callable[[Hashable], Awaitable[Any]],
+                        key: Optional[Hashable] = None) -> Dict[str, int]:
+        """
+        Enviar a varios chats en paralelo; los fallos se cuentan y registran.
+        Con `key` la deduplicación es por chat: repetir el envío sólo llega a
+        los chats en los que falló.
+        """
+        chat_ids = list(chat_ids)
+        if key is not None:
+            chat_ids = [cid for cid in chat_ids if (key, cid) not in self._seen]
+            if not chat_ids:
+                self.stats.deduped += 1
+                return {"sent": 0, "failed": 0}
+        results = await asyncio.gather(
+            *(self.submit(cid, (lambda cid=cid: factory_for(cid)),
+                          key=None if key is None else (key, cid)) for cid in chat_ids),
+            return_exceptions=True,
+        )
+        failed = sum(1 for r in results if isinstance(r, BaseException))
+        return {"sent": len(chat_ids) - failed, "failed": failed}
+
+    # ------------------------------------------------------------------
+    # Agrupación de ráfagas (mensajes de progreso)
+    # ------------------------------------------------------------------
+
+    def coalesce(self, chat_id: Hashable, text: str,
+                 send: Callable[[str], Awaitable[Any]],
+                 edit: Optional[Callable[[Any, str], Awaitable[Any]]] = None) -> None:
+        """
+        Encolar un mensaje de progreso. Los que llegan dentro de
+        `coalesce_window` se unen; si el último mensaje de progreso del chat
+        es reciente y cabe, se edita en lugar de enviar uno nuevo.
+        """
+        if not text:
+            return
+        pending = self._pending.get(chat_id)
+        if pending is None:
+            self._pending[chat_id] = _PendingBurst([text], send, edit)
+        else:
+            pending.lines.append(text)
+            pending.send, pending.edit = send, edit
+            self.stats.coalesced += 1
+        if chat_id not in self._flush_tasks:
+            self._flush_tasks[chat_id] = asyncio.get_running_loop().create_task(self._flush_later(chat_id))
+
+    async def _flush_later(self, chat_id: Hashable) -> None:
+        try:
+            await asyncio.sleep(self.coalesce_window)
+        finally:
+            self._flush_tasks.pop(chat_id, None)
+        await self.flush(chat_id)
+
+    async def flush(self, chat_id: Hashable) -> None:
+        """Publicar ya lo pendiente de un chat"""
+        pending = self._pending.pop(chat_id, None)
+        if pending is None:
+            return
+        text = "\n".join(pending.lines)
+        now = time.monotonic()
+        progress = self._progress.get(chat_id)
+        try:
+            if (
+                progress is not None and pending.edit is not None
+                and now - progress.updated <= self.edit_window
+                and len(progress.text) + 1 + len(text) <= self.max_length
+            ):
+                combined = f"{progress.text}\n{text}"
+                await self.submit(chat_id, lambda: pending.edit(progress.handle, combined))
+                progress.text, progress.updated = combined, now
+                self.stats.edits += 1
+            else:
+                text = self._truncate(text)
+                handle = await self.submit(chat_id, lambda: pending.send(text))
+                self._progress[chat_id] = _ProgressMessage(handle, text, now)
+        except Exception:
+            # Ya contado y registrado en submit()
+            self._progress.pop(chat_id, None)
+        self._prune_progress(now)
+
+    async def flush_all(self) -> None:
+        for task in list(self._flush_tasks.values()):
+            task.cancel()
+        self._flush_tasks.clear()
+        for chat_id in list(self._pending):
+            await self.flush(chat_id)
+
+    def _truncate(self, text: str) -> str:
+        if len(text) > self.max_length:
+            return text[: self.max_length - 1] + "…"
+        return text
+
+    def _prune_progress(self, now: float) -> None:
+        stale = [cid for cid, p in self._progress.items() if now - p.updated > self.edit_window]
+        for cid in stale:
+            del self._progress[cid]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "channel": self.channel,
+            "chats": len(self._chats),
+            "pending": sum(len(p.lines) for p in self._pending.values()),
+            **self.stats.to_dict(),
+        }
+
+
+_dispatchers: Dict[str, OutboundDispatcher] = {}
+
+
+def get_dispatcher(channel: str) -> OutboundDispatcher:
+    """Despachador compartido del canal (los límites son por bot, no por servicio)"""
+    dispatcher = _dispatchers.get(channel)
+    if dispatcher is None:
+        dispatcher = _dispatchers[channel] = OutboundDispatcher(channel)
+    return dispatcher
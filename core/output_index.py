@@ -0,0 +1,232 @@
+"""
+Índice de archivos de salida (data/output/*) para la WebUI
+Listado paginado por cursor, filtrado por categoría/fecha y caché por mtime
+de cada carpeta, de modo que sólo se re-escanea lo que cambió. Editar un
+archivo in situ no cambia el mtime de la carpeta: los endpoints que modifican
+archivos llaman a invalidate() y, como red de seguridad, una carpeta sin
+cambios se vuelve a escanear como mucho cada REFRESH_INTERVAL segundos.
+"""
+import asyncio
+import base64
+import bisect
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("OutputIndex")
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+# Segundos máximos que se sirve una carpeta de caché sin re-escanearla
+REFRESH_INTERVAL = 30.0
+
+# Clave de orden: más reciente primero, luego categoría y nombre (estable entre páginas)
+SortKey = Tuple[float, str, str]
+
+
+def _sort_key(entry: Dict[str, Any]) -> SortKey:
+    return (-entry["created"], entry["category"], entry["name"])
+
+
+def encode_cursor(key: SortKey) -> str:
+    raw = json.dumps([key[0], key[1], key[2]], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Optional[SortKey]:
+    try:
+        neg_created, category, name = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (float(neg_created), str(category), str(name))
+    except Exception:
+        return None
+
+
+class OutputIndex:
+    """Listado de data/output con caché por carpeta invalidada por mtime"""
+
+    def __init__(self, output_base: Path, refresh_interval: float = REFRESH_INTERVAL,
+                 clock=time.monotonic):
+        self.output_base = Path(output_base)
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        # categoría -> (mtime_ns de la carpeta, momento del escaneo, entradas ordenadas por _sort_key)
+        self._cache: Dict[str, Tuple[int, float, List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Escaneo (síncrono: llamar vía asyncio.to_thread desde handlers)
+    # ------------------------------------------------------------------
+
+    def _scan_category(self, category: str, cat_path: Path, mtime_ns: int) -> List[Dict[str, Any]]:
+        now = self._clock()
+        with self._lock:
+            cached = self._cache.get(category)
+        if cached and cached[0] == mtime_ns and now - cached[1] < self.refresh_interval:
+            return cached[2]
+
+        entries: List[Dict[str, Any]] = []
+        try:
+            with os.scandir(cat_path) as it:
+                for de in it:
+                    try:
+                        if not de.is_file():
+                            continue
+                        st = de.stat()
+                    except OSError:
+                        continue
+                    entries.append({
+                        "name": de.name,
+                        "path": de.path,
+                        "size": st.st_size,
+                        "created": st.st_mtime,
+                        "category": category,
+                    })
+        except OSError as e:
+            logger.debug(f"No se pudo escanear {cat_path}: {e}")
+        entries.sort(key=_sort_key)
+
+        with self._lock:
+            self._cache[category] = (mtime_ns, now, entries)
+        return entries
+
+    def categories(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Entradas por categoría (desde caché si la carpeta no cambió)"""
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        if not self.output_base.exists():
+            return result
+        seen = set()
+        try:
+            with os.scandir(self.output_base) as it:
+                for de in it:
+                    try:
+                        if not de.is_dir():
+                            continue
+                        mtime_ns = de.stat().st_mtime_ns
+                    except OSError:
+                        continue
+                    seen.add(de.name)
+                    result[de.name] = self._scan_category(de.name, Path(de.path), mtime_ns)
+        except OSError as e:
+            logger.error(f"Error listando {self.output_base}: {e}")
+        with self._lock:
+            for stale in set(self._cache) - seen:
+                self._cache.pop(stale, None)
+        return result
+
+    def invalidate(self, category: Optional[str] = None) -> None:
+        """Olvidar la caché (tras borrar o editar un archivo sin que cambie la carpeta)"""
+        with self._lock:
+            if category is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(category, None)
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        Página de archivos ordenados del más reciente al más antiguo.
+        Retorna items, next_cursor (None en la última página) y conteos por categoría.
+        """
+        limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        by_category = self.categories()
+        counts = {cat: len(entries) for cat, entries in by_category.items()}
+
+        if category:
+            selected = [by_category.get(category, [])]
+        else:
+            selected = list(by_category.values())
+
+        after = decode_cursor(cursor) if cursor else None
+        items: List[Dict[str, Any]] = []
+        for entry in self._merge(selected, after):
+            created = entry["created"]
+            if until is not None and created > until:
+                continue
+            if since is not None and created < since:
+                break  # orden descendente: el resto es más antiguo
+            items.append(entry)
+            if len(items) > limit:
+                break
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(_sort_key(items[-1]))
+
+        return {"items": items, "next_cursor": next_cursor, "counts": counts}
+
+    def iter_entries(
+        self,
+        category: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterar todas las entradas que cumplen el filtro (para streaming)"""
+        by_category = self.categories()
+        selected = [by_category.get(category, [])] if category else list(by_category.values())
+        for entry in self._merge(selected, None):
+            created = entry["created"]
+            if until is not None and created > until:
+                continue
+            if since is not None and created < since:
+                return
+            yield entry
+
+    @staticmethod
+    def _merge(lists: List[List[Dict[str, Any]]], after: Optional[SortKey]) -> Iterator[Dict[str, Any]]:
+        """Merge k-way de listas ya ordenadas, empezando tras el cursor"""
+        iters = []
+        for entries in lists:
+            start = 0
+            if after is not None:
+                keys = [_sort_key(e) for e in entries]
+                start = bisect.bisect_right(keys, after)
+            iters.append(iter(entries[start:]))
+        return heapq.merge(*iters, key=_sort_key)
+
+    # ------------------------------------------------------------------
+    # Wrappers async (el escaneo nunca corre en el event loop)
+    # ------------------------------------------------------------------
+
+    async def aquery(self, **kwargs) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.query, **kwargs)
+
+    async def aiter_ndjson(self, batch_size: int = 256, **kwargs):
+        """Generador async de líneas NDJSON; cada lote se lee en un thread"""
+        it = await asyncio.to_thread(self.iter_entries, **kwargs)
+
+        def next_batch():
+            batch = []
+            for entry in it:
+                batch.append(json.dumps(entry, ensure_ascii=False) + "\n")
+                if len(batch) >= batch_size:
+                    break
+            return batch
+
+        while True:
+            batch = await asyncio.to_thread(next_batch)
+            if not batch:
+                break
+            yield "".join(batch)
+
+
+_indexes: Dict[str, OutputIndex] = {}
+
+
+def get_output_index(output_base: Path) -> OutputIndex:
+    """Instancia compartida por ruta base"""
+    key = str(Path(output_base).resolve())
+    if key not in _indexes:
+        _indexes[key] = OutputIndex(Path(output_base))
+    return _indexes[key]
@@ -0,0 +1,487 @@
+"""
+Paginación y caché de listados para los managers de integraciones
+Los listados (repos, issues, tareas, páginas...) se recorren con un iterador
+async perezoso sobre todas las páginas: la siguiente página se pide mientras
+el consumidor procesa la actual (prefetch acotado) y si el consumidor para,
+no se piden más.
+
+Cada página pasa por una caché condicional: dentro de su TTL se sirve sin
+red; después se revalida con If-None-Match / If-Modified-Since y un 304
+reutiliza lo guardado (en GitHub un 304 no consume cuota). Los TTL van por
+endpoint (ENDPOINT_TTLS).
+
+Los elementos se proyectan a los campos que usa el llamador nada más
+parsear la respuesta: la caché y la lista resultante sólo guardan eso. Donde
+la API lo permite (opt_fields de Asana, fields de Trello/Jira) el manager
+pide además esos campos al servidor.
+
+    pages = Paginator(http, f"{API}/user/repos", style=LinkHeader(), page_size=100,
+                      fields={"name": "name", "url": "html_url"}, headers=headers)
+    async for repo in pages:          # async
+        ...
+    repos = pages.collect(limit=500)  # sync (loop del cliente HTTP)
+"""
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from core.http_client import HttpError, HttpResponse, ProviderHttp
+
+logger = logging.getLogger("Pagination")
+
+DEFAULT_TTL = 60.0
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_PREFETCH = 1
+DEFAULT_LIST_LIMIT = 500
+CACHE_MAX_ENTRIES = 512
+
+# (proveedor, patrón de la ruta, TTL en segundos). El primero que coincide gana.
+ENDPOINT_TTLS: List[Tuple[str, str, float]] = [
+    ("github", r"/(user|orgs/[^/]+)/repos$", 300.0),
+    ("github", r"/repos/[^/]+/[^/]+/commits$", 120.0),
+    ("github", r"/repos/[^/]+/[^/]+/issues$", 60.0),
+    ("jira", r"/rest/api/3/project$", 600.0),
+    ("jira", r"/rest/api/3/search$", 30.0),
+    ("trello", r"/members/me/boards$", 300.0),
+    ("trello", r"/boards/[^/]+/lists$", 120.0),
+    ("trello", r"/lists/[^/]+/cards$", 30.0),
+    ("asana", r"/workspaces$", 600.0),
+    ("asana", r"/projects$", 300.0),
+    ("asana", r"/tasks$", 30.0),
+    ("notion", r"/search$", 30.0),
+    ("notion", r"/databases/[^/]+/query$", 30.0),
+    ("hubspot", r"/objects/contacts/search$", 30.0),
+    ("monday", r"/v2$", 60.0),
+]
+
+FieldSpec = Union[Sequence[str], Mapping[str, str], Callable[[Any], Any], None]
+
+
+class PageError(HttpError):
+    """Una página respondió con un estado de error"""
+
+    def __init__(self, status_code: int, url: str, text: str = ""):
+        super().__init__(f"HTTP {status_code} en {url}: {text[:200]}")
+        self.status_code = status_code
+        self.text = text
+
+
+def endpoint_ttl(provider: str, url: str, method: str = "GET") -> float:
+    """TTL del endpoint; las búsquedas por POST sólo se cachean si están en la tabla (-1 = sin caché)"""
+    path = url.split("?", 1)[0]
+    for name, pattern, ttl in ENDPOINT_TTLS:
+        if name == provider and re.search(pattern, path):
+            return ttl
+    return DEFAULT_TTL if method.upper() == "GET" else -1.0
+
+
+def get_path(data: Any, path: Optional[str], default: Any = None) -> Any:
+    """Valor en una ruta con puntos ("paging.next.after"); None = el propio dato"""
+    if not path:
+        return data
+    for key in path.split("."):
+        if isinstance(data, Mapping):
+            data = data.get(key)
+        elif isinstance(data, list) and key.isdigit() and int(key) < len(data):
+            data = data[int(key)]
+        else:
+            return default
+        if data is None:
+            return default
+    return data
+
+
+def _set_path(data: Dict[str, Any], path: str, value: Any) -> Dict[str, Any]:
+    """Copia de `data` con `value` en la ruta con puntos"""
+    data = dict(data)
+    head, _, rest = path.partition(".")
+    if rest:
+        data[head] = _set_path(data.get(head) or {}, rest, value)
+    else:
+        data[head] = value
+    return data
+
+
+def project(item: Any, fields: FieldSpec) -> Any:
+    """
+    Quedarse con los campos pedidos: lista de nombres, {salida: ruta} con
+    rutas con puntos ("fields.status.name") o una función item -> item
+    """
+    if not fields or not isinstance(item, Mapping):
+        return item
+    if callable(fields):
+        return fields(item)
+    if isinstance(fields, Mapping):
+        return {out: get_path(item, path) for out, path in fields.items()}
+    return {name: item.get(name) for name in fields}
+
+
+# ----------------------------------------------------------------------
+# Estilos de paginación
+# ----------------------------------------------------------------------
+
+@dataclass
+class PageRequest:
+    """Una página concreta: la URL y lo que cambia entre páginas"""
+    url: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    body: Optional[Dict[str, Any]] = None
+
+
+class LinkHeader:
+    """Cabecera Link rel="next" (GitHub)"""
+
+    size_param = "per_page"
+
+    def first(self, req: PageRequest, page_size: int) -> PageRequest:
+        return PageRequest(req.url, {**req.params, self.size_param: page_size}, req.body)
+
+    def next(self, req: PageRequest, data: Any, headers: Mapping[str, str], count: int,
+             page_size: int) -> Optional[PageRequest]:
+        match = re.search(r'<([^>]+)>;\s*rel="next"', headers.get("Link", ""))
+        # La URL de "next" ya lleva todos los parámetros
+        return PageRequest(match.group(1), {}, req.body) if match else None
+
+
+class OffsetParams:
+    """Desplazamiento + tamaño + total (Jira: startAt/maxResults/total)"""
+
+    def __init__(self, start: str = "startAt", size: str = "maxResults", total: Optional[str] = "total"):
+        self.start, self.size, self.total = start, size, total
+
+    def first(self, req: PageRequest, page_size: int) -> PageRequest:
+        return PageRequest(req.url, {**req.params, self.start: 0, self.size: page_size}, req.body)
+
+    def next(self, req, data, headers, count, page_size) -> Optional[PageRequest]:
+        if not count:
+            return None
+        start = int(req.params.get(self.start, 0)) + count
+        total = get_path(data, self.total) if self.total else None
+        if total is not None:
+            if start >= int(total):
+                return None
+        elif count < page_size:
+            return None
+        return PageRequest(req.url, {**req.params, self.start: start}, req.body)
+
+
+class CursorParam:
+    """
+    Cursor opaco devuelto en la respuesta: en la query (Asana `offset`,
+    HubSpot `after`) o en el cuerpo JSON (Notion `start_cursor`)
+    """
+
+    def __init__(self, param: str, next_path: str, size: str = "limit", in_body: bool = False,
+                 has_more: Optional[str] = None):
+        self.param, self.next_path, self.size = param, next_path, size
+        self.in_body, self.has_more = in_body, has_more
+
+    def first(self, req: PageRequest, page_size: int) -> PageRequest:
+        if self.in_body:
+            return PageRequest(req.url, dict(req.params), {**(req.body or {}), self.size: page_size})
+        return PageRequest(req.url, {**req.params, self.size: page_size}, req.body)
+
+    def next(self, req, data, headers, count, page_size) -> Optional[PageRequest]:
+        if self.has_more and not get_path(data, self.has_more):
+            return None
+        cursor = get_path(data, self.next_path)
+        if not cursor or not count:
+            return None
+        if self.in_body:
+            return PageRequest(req.url, req.params, {**(req.body or {}), self.param: cursor})
+        return PageRequest(req.url, {**req.params, self.param: cursor}, req.body)
+
+
+class PageNumber:
+    """Número de página (Monday `page`); `in_body` es una ruta dentro del JSON"""
+
+    def __init__(self, param: str = "page", size: str = "limit", start: int = 1, in_body: Optional[str] = None):
+        self.param, self.size, self.start, self.in_body = param, size, start, in_body
+
+    def _with(self, req: PageRequest, values: Dict[str, Any]) -> PageRequest:
+        if self.in_body is None:
+            return PageRequest(req.url, {**req.params, **values}, req.body)
+        body = req.body or {}
+        for key, value in values.items():
+            body = _set_path(body, f"{self.in_body}.{key}", value)
+        return PageRequest(req.url, req.params, body)
+
+    def first(self, req: PageRequest, page_size: int) -> PageRequest:
+        return self._with(req, {self.param: self.start, self.size: page_size})
+
+    def next(self, req, data, headers, count, page_size) -> Optional[PageRequest]:
+        if count < page_size:
+            return None
+        current = req.params.get(self.param) if self.in_body is None else \
+            get_path(req.body, f"{self.in_body}.{self.param}")
+        return self._with(req, {self.param: int(current) + 1})
+
+
+class SinglePage:
+    """Endpoints sin paginación: una petición (cacheada y proyectada)"""
+
+    def first(self, req: PageRequest, page_size: int) -> PageRequest:
+        return req
+
+    def next(self, req, data, headers, count, page_size) -> Optional[PageRequest]:
+        return None
+
+
+# ----------------------------------------------------------------------
+# Caché condicional
+# ----------------------------------------------------------------------
+
+@dataclass
+class CachedPage:
+    data: Any
+    headers: Dict[str, str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+
+# Cabeceras de la respuesta que hacen falta para paginar desde caché
+_KEPT_HEADERS = ("Link",)
+
+
+class ConditionalCache:
+    """Páginas ya proyectadas por clave de petición; LRU acotado"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[CachedPage]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedPage) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def invalidate(self, url_prefix: Optional[str] = None, pattern: Optional[str] = None) -> int:
+        """
+        Olvidar páginas: las de URLs que empiezan por `url_prefix` y/o cuya
+        ruta casa con `pattern`; sin argumentos, todas
+        """
+        with self._lock:
+            stale = []
+            for key in self._entries:
+                url = key.split(" ", 2)[1]
+                if url_prefix is not None and not url.startswith(url_prefix):
+                    continue
+                if pattern is not None and not re.search(pattern, url.split("?", 1)[0]):
+                    continue
+                stale.append(key)
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+
+def _cache_key(provider: str, method: str, req: PageRequest, headers: Optional[Mapping[str, str]],
+               items: Optional[str], fields: FieldSpec) -> str:
+    # La identidad (Authorization) entra en la clave, hasheada: cada cuenta
+    # tiene sus propias páginas
+    identity = ""
+    if headers:
+        auth = headers.get("Authorization") or headers.get("authorization") or ""
+        identity = hashlib.sha256(auth.encode("utf-8")).hexdigest()[:16] if auth else ""
+    if callable(fields):
+        fields = getattr(fields, "__qualname__", repr(fields))
+    elif isinstance(fields, Mapping):
+        fields = sorted(fields.items())
+    extra = json.dumps([sorted((k, str(v)) for k, v in req.params.items()), req.body, items, fields],
+                       sort_keys=True, default=str)
+    digest = hashlib.sha256(extra.encode("utf-8")).hexdigest()[:24]
+    return f"{provider}:{method} {req.url} {identity}:{digest}"
+
+
+page_cache = ConditionalCache()
+
+
+# ----------------------------------------------------------------------
+# Paginador
+# ----------------------------------------------------------------------
+
+class Paginator:
+    """Iterador async perezoso sobre los elementos de todas las páginas"""
+
+    def __init__(
+        self,
+        http: ProviderHttp,
+        url: str,
+        *,
+        method: str = "GET",
+        style: Any = None,
+        items: Optional[str] = None,
+        errors: Optional[str] = None,
+        fields: FieldSpec = None,
+        params: Optional[Mapping[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        prefetch: int = DEFAULT_PREFETCH,
+        ttl: Optional[float] = None,
+        timeout: float = 30.0,
+        cache: Optional[ConditionalCache] = None,
+    ):
+        self.http = http
+        self.method = method.upper()
+        self.style = style or SinglePage()
+        self.items = items
+        self.errors = errors
+        self.fields = fields
+        self.headers = dict(headers or {})
+        self.page_size = page_size
+        self.prefetch = max(1, prefetch)
+        self.ttl = endpoint_ttl(http.provider, url, self.method) if ttl is None else ttl
+        self.timeout = timeout
+        self.cache = page_cache if cache is None else cache
+        self._start = PageRequest(url, dict(params or {}), dict(json_body) if json_body is not None else None)
+        self.pages_fetched = 0
+        self.total: Optional[int] = None
+
+    # -- una página -------------------------------------------------------
+
+    def _project_page(self, data: Any) -> Any:
+        page_items = get_path(data, self.items)
+        if not isinstance(page_items, list):
+            return data
+        projected = [project(item, self.fields) for item in page_items]
+        if not self.items:
+            return projected
+        return _set_path(data, self.items, projected) if isinstance(data, Mapping) else projected
+
+    async def fetch_page(self, req: PageRequest) -> Tuple[Any, Dict[str, str]]:
+        """Datos proyectados y cabeceras de una página (caché o red)"""
+        key = _cache_key(self.http.provider, self.method, req, self.headers, self.items, self.fields)
+        entry = self.cache.get(key) if self.ttl >= 0 else None
+        now = time.monotonic()
+        if entry is not None and now - entry.stored_at < self.ttl:
+            self.cache.count("hits")
+            return entry.data, entry.headers
+
+        headers = dict(self.headers)
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        response: HttpResponse = await self.http.request_async(
+            self.method, req.url, headers=headers, params=req.params or None, json=req.body,
+            timeout=self.timeout,
+        )
+        self.pages_fetched += 1
+        if response.status_code == 304 and entry is not None:
+            self.cache.count("revalidated")
+            entry.stored_at = now
+            self.cache.put(key, entry)
+            return entry.data, entry.headers
+        if response.status_code >= 400:
+            raise PageError(response.status_code, req.url, response.text)
+
+        data = response.json()
+        # GraphQL responde 200 con "errors": no se cachea ni se pagina
+        errors = get_path(data, self.errors) if self.errors else None
+        if errors:
+            first = errors[0] if isinstance(errors, list) else errors
+            message = first.get("message", "") if isinstance(first, Mapping) else str(first)
+            raise PageError(response.status_code, req.url, message)
+        self.cache.count("misses")
+        data = self._project_page(data)
+        kept = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if self.ttl >= 0:
+            self.cache.put(key, CachedPage(data, kept, etag, last_modified, now))
+        return data, kept
+
+    # -- todas las páginas ------------------------------------------------
+
+    async def pages(self) -> AsyncIterator[List[Any]]:
+        """Listas de elementos por página; la siguiente se pide por adelantado"""
+        queue: "asyncio.Queue" = asyncio.Queue(maxsize=self.prefetch)
+        done = object()
+
+        async def produce():
+            req = self.style.first(self._start, self.page_size)
+            try:
+                while req is not None:
+                    data, headers = await self.fetch_page(req)
+                    page_items = get_path(data, self.items, [])
+                    if not isinstance(page_items, list):
+                        page_items = []
+                    if self.total is None and isinstance(data, Mapping):
+                        total = data.get("total")
+                        self.total = total if isinstance(total, int) else None
+                    await queue.put(page_items)
+                    req = self.style.next(req, data, headers, len(page_items), self.page_size)
+                await queue.put(done)
+            except asyncio.CancelledError:
+                # El consumidor cerró el iterador: nada que entregar
+                raise
+            except Exception as e:
+                # Con la cola llena un put bloquearía; el error sustituye a las páginas pendientes
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(e)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                page = await queue.get()
+                if page is done:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+        finally:
+            producer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await producer
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        async with contextlib.aclosing(self.pages()) as pages:
+            async for page in pages:
+                for item in page:
+                    yield item
+
+    async def collect_async(self, limit: Optional[int] = DEFAULT_LIST_LIMIT) -> List[Any]:
+        """Hasta `limit` elementos (None = todos); no pide páginas de más"""
+        result: List[Any] = []
+        if limit is not None and limit <= 0:
+            return result
+        async with contextlib.aclosing(self.pages()) as pages:
+            async for page in pages:
+                result.extend(page)
+                if limit is not None and len(result) >= limit:
+                    return result[:limit]
+        return result
+
+    def collect(self, limit: Optional[int] = DEFAULT_LIST_LIMIT) -> List[Any]:
+        """Versión bloqueante de collect_async (para los managers sync)"""
+        return self.http.client.run(self.collect_async(limit))
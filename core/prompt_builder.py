@@ -0,0 +1,387 @@
+"""
+Constructor de prompts con presupuesto de tokens para MININA
+Ensambla system prompt, conversación reciente (STM), contexto previo (MTM),
+memoria relevante (LTM) y hechos dentro del presupuesto del modelo activo.
+
+Prioridad (de mayor a menor) cuando no cabe todo:
+    1. system prompt y mensaje del usuario (se recortan sólo como último recurso)
+    2. últimos turnos de la conversación (STM)
+    3. hechos sobre lo que se pregunta
+    4. memoria de largo plazo relevante (LTM)
+    5. turnos más antiguos de la sesión y contexto MTM
+
+Los tokens se estiman con un tokenizador aproximado local (sin dependencias) y
+los conteos de cada segmento se cachean por sesión: en una conversación larga
+sólo se tokeniza lo nuevo.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("PromptBuilder")
+
+# Ventana de contexto por modelo (tokens). Ollama usa num_ctx=2048 si no se configura.
+MODEL_CONTEXT = {
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "gpt-3.5-turbo": 16_385,
+    "gemini-1.5-flash": 1_000_000,
+    "gemini-1.5-pro": 2_000_000,
+    "gemini-1.0-pro": 30_720,
+    "llama-3.1-8b-instant": 131_072,
+    "llama-3.1-70b-versatile": 131_072,
+    "mixtral-8x7b-32768": 32_768,
+    "gemma-7b-it": 8_192,
+}
+DEFAULT_LOCAL_CONTEXT = 2_048
+DEFAULT_CONTEXT = 8_192
+# Tope de prompt aunque el modelo admita más: más contexto = más latencia y coste
+DEFAULT_PROMPT_CAP = 4_096
+# Por debajo de esto no merece la pena meter un fragmento recortado
+MIN_FRAGMENT_TOKENS = 24
+# Turnos recientes que se intentan conservar completos
+KEEP_RECENT_TURNS = 4
+
+HEADERS = {
+    "facts": "[Hechos conocidos]",
+    "ltm": "[Memoria relevante]",
+    "history": "[Contexto previo]",
+    "stm": "[Conversación reciente]",
+}
+
+SESSION_CACHE_SIZE = 256
+SEGMENTS_PER_SESSION = 1024
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_KEYWORD_RE = re.compile(r"\w{4,}", re.UNICODE)
+_STOPWORDS = {
+    "para", "como", "este", "esta", "esto", "pero", "porque", "cuando", "donde",
+    "sobre", "entre", "desde", "hasta", "tiene", "tengo", "puedes", "quiero",
+    "hacer", "sería", "puede", "todos", "todas", "algo", "nada", "muy", "más",
+    "what", "with", "that", "this", "from", "have", "please",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Aproximación rápida al conteo BPE: cada signo de puntuación es un token y
+    cada palabra cuesta 1 token por cada ~4 caracteres.
+    """
+    if not text:
+        return 0
+    total = 0
+    for piece in _TOKEN_RE.findall(text):
+        total += 1 + (len(piece) - 1) // 4
+    return total
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = " […]") -> str:
+    """Recortar texto (por el final) para que quepa en max_tokens"""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - estimate_tokens(marker)
+    if budget <= 0:
+        return ""
+    # Búsqueda binaria sobre la longitud en caracteres
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    cut = text[:lo]
+    space = cut.rfind(" ")
+    if space > len(cut) * 0.6:
+        cut = cut[:space]
+    return cut.rstrip() + marker
+
+
+def context_window(model: str, is_local: bool = False) -> int:
+    if model in MODEL_CONTEXT:
+        return MODEL_CONTEXT[model]
+    return DEFAULT_LOCAL_CONTEXT if is_local else DEFAULT_CONTEXT
+
+
+def _keywords(text: str, limit: int = 3) -> List[str]:
+    seen = []
+    for word in _KEYWORD_RE.findall(text.lower()):
+        if word not in _STOPWORDS and word not in seen:
+            seen.append(word)
+    # Las palabras largas suelen ser las más específicas
+    return sorted(seen, key=len, reverse=True)[:limit]
+
+
+class SegmentTokenCache:
+    """Conteos de tokens por segmento de texto, agrupados por sesión (LRU)"""
+
+    def __init__(self, max_sessions: int = SESSION_CACHE_SIZE, per_session: int = SEGMENTS_PER_SESSION):
+        self._sessions: "OrderedDict[str, OrderedDict[str, int]]" = OrderedDict()
+        self._max_sessions = max_sessions
+        self._per_session = per_session
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, session_id: str, text: str) -> int:
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+        with self._lock:
+            segments = self._sessions.get(session_id)
+            if segments is not None:
+                self._sessions.move_to_end(session_id)
+                cached = segments.get(key)
+                if cached is not None:
+                    segments.move_to_end(key)
+                    self.hits += 1
+                    return cached
+        tokens = estimate_tokens(text)
+        with self._lock:
+            segments = self._sessions.get(session_id)
+            if segments is None:
+                segments = self._sessions[session_id] = OrderedDict()
+                while len(self._sessions) > self._max_sessions:
+                    self._sessions.popitem(last=False)
+            segments[key] = tokens
+            while len(segments) > self._per_session:
+                segments.popitem(last=False)
+            self.misses += 1
+        return tokens
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+@dataclass
+class BuiltPrompt:
+    system: str
+    prompt: str
+    prompt_tokens: int
+    budget: int
+    sections: Dict[str, int] = field(default_factory=dict)
+    dropped: Dict[str, int] = field(default_factory=dict)
+    build_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "budget": self.budget,
+            "sections": self.sections,
+            "dropped": self.dropped,
+            "build_ms": round(self.build_ms, 2),
+        }
+
+
+class PromptBuilder:
+    """Ensamblado de prompts con memoria bajo presupuesto de tokens"""
+
+    def __init__(self, memory=None, prompt_cap: int = DEFAULT_PROMPT_CAP):
+        self._memory = memory
+        self.prompt_cap = prompt_cap
+        self.token_cache = SegmentTokenCache()
+        self.stats = {"builds": 0, "avg_prompt_tokens": 0.0, "avg_build_ms": 0.0, "truncations": 0}
+
+    @property
+    def memory(self):
+        if self._memory is None:
+            from core.MemoryCore import memory_core
+            self._memory = memory_core
+        return self._memory
+
+    def budget_for(self, model: str = "", is_local: bool = False, max_tokens: int = 1024) -> int:
+        """Tokens disponibles para el prompt: ventana - respuesta, con tope"""
+        window = context_window(model, is_local)
+        reserve = min(max_tokens, window // 2)
+        return max(256, min(self.prompt_cap, window - reserve))
+
+    # ------------------------------------------------------------------
+    # Recogida de memoria
+    # ------------------------------------------------------------------
+
+    async def gather(self, session_id: str, message: str) -> Dict[str, List[str]]:
+        """Recoger la memoria de la sesión en un thread (consultas SQLite bloqueantes)"""
+        return await asyncio.to_thread(self._gather, session_id, message)
+
+    def _gather(self, session_id: str, message: str) -> Dict[str, List[str]]:
+        mem = self.memory
+        stm = [self._format_turn(t) for t in mem.get_stm_context(session_id, limit=50)]
+        mtm = [self._format_turn(t) for t in mem.get_mtm_context(session_id, limit=20)]
+
+        keywords = _keywords(message)
+        facts: List[str] = []
+        ltm: List[str] = []
+        seen = set()
+        for kw in keywords:
+            for fact in mem.query_facts(subject=kw)[:5]:
+                line = f"{fact['subject']} {fact['predicate']} {fact['object']}"
+                if line not in seen:
+                    seen.add(line)
+                    facts.append(line)
+            for hit in mem.search_ltm(kw, limit=3):
+                content = str(hit.get("content") or "")
+                if content and content not in seen:
+                    seen.add(content)
+                    ltm.append(content)
+        # Más palabras clave en común = más relevante
+        ltm.sort(key=lambda c: -sum(1 for kw in keywords if kw in c.lower()))
+        return {"stm": stm, "mtm": mtm, "facts": facts, "ltm": ltm}
+
+    @staticmethod
+    def _format_turn(turn: Dict[str, Any]) -> str:
+        role = "Usuario" if turn.get("role") == "user" else "MININA"
+        return f"{role}: {turn.get('content', '')}"
+
+    # ------------------------------------------------------------------
+    # Ensamblado
+    # ------------------------------------------------------------------
+
+    def build(
+        self,
+        session_id: str,
+        message: str,
+        system: str = "",
+        model: str = "",
+        is_local: bool = False,
+        max_tokens: int = 1024,
+        budget: Optional[int] = None,
+        memory: Optional[Dict[str, List[str]]] = None,
+    ) -> BuiltPrompt:
+        """
+        Construir el prompt de `message` para la sesión. `memory` permite pasar
+        los segmentos ya recogidos (stm/mtm/facts/ltm) en lugar de leerlos.
+        """
+        start = time.perf_counter()
+        budget = budget or self.budget_for(model, is_local, max_tokens)
+        segments = memory if memory is not None else self._gather(session_id, message)
+
+        def count(text: str) -> int:
+            return self.token_cache.count(session_id, text)
+
+        sections: Dict[str, int] = {}
+        dropped: Dict[str, int] = {}
+        remaining = budget
+
+        # 1. Obligatorios
+        user_line = f"Usuario: {message}"
+        system_tokens = count(system) if system else 0
+        if system_tokens > budget // 2:
+            system = truncate_to_tokens(system, budget // 2)
+            system_tokens = estimate_tokens(system)
+            dropped["system"] = 1
+        remaining -= system_tokens
+        user_tokens = count(user_line)
+        if user_tokens > remaining:
+            user_line = truncate_to_tokens(user_line, remaining)
+            user_tokens = estimate_tokens(user_line)
+            dropped["message"] = 1
+        remaining -= user_tokens
+        sections["system"] = system_tokens
+        sections["message"] = user_tokens
+
+        # Turnos de STM sin el mensaje actual (si ya se guardó)
+        stm = list(segments.get("stm") or [])
+        if stm and stm[-1] == user_line:
+            stm.pop()
+
+        def take(name: str, items: List[str], header: str, bullet: bool = False,
+                 newest_first: bool = False) -> List[str]:
+            """Meter elementos mientras quepan; el primero que no cabe se recorta"""
+            nonlocal remaining
+            chosen: List[str] = []
+            ordered = list(reversed(items)) if newest_first else list(items)
+            header_cost = estimate_tokens(header)
+            item_overhead = 1 if bullet else 0  # "- "
+            used = 0
+            for i, item in enumerate(ordered):
+                extra = item_overhead + (0 if chosen else header_cost)
+                cost = count(item) + extra
+                if cost <= remaining:
+                    chosen.append(item)
+                    remaining -= cost
+                    used += cost
+                    continue
+                room = remaining - extra
+                if room >= MIN_FRAGMENT_TOKENS:
+                    cut = truncate_to_tokens(item, room)
+                    chosen.append(cut)
+                    cost = estimate_tokens(cut) + extra
+                    remaining -= cost
+                    used += cost
+                    self.stats["truncations"] += 1
+                    i += 1
+                dropped[name] = len(ordered) - i
+                break
+            if used:
+                sections[name] = sections.get(name, 0) + used
+            return list(reversed(chosen)) if newest_first else chosen
+
+        # 2. Conversación reciente (de más nuevo a más viejo)
+        recent = take("stm", stm[-KEEP_RECENT_TURNS:], HEADERS["stm"], newest_first=True)
+        # 3-4. Hechos y memoria relevante
+        facts = take("facts", segments.get("facts") or [], HEADERS["facts"], bullet=True)
+        ltm = take("ltm", segments.get("ltm") or [], HEADERS["ltm"], bullet=True)
+        # 5. Turnos antiguos de la sesión y MTM
+        older_stm = stm[:-KEEP_RECENT_TURNS] if len(recent) == min(len(stm), KEEP_RECENT_TURNS) else []
+        older = take("history", (segments.get("mtm") or []) + older_stm, HEADERS["history"], newest_first=True)
+
+        parts: List[str] = []
+        if facts:
+            parts.append(HEADERS["facts"] + "\n" + "\n".join(f"- {f}" for f in facts))
+        if ltm:
+            parts.append(HEADERS["ltm"] + "\n" + "\n".join(f"- {m}" for m in ltm))
+        if older:
+            parts.append(HEADERS["history"] + "\n" + "\n".join(older))
+        conversation = recent + [user_line]
+        parts.append((HEADERS["stm"] + "\n" if recent else "") + "\n".join(conversation))
+        prompt = "\n\n".join(parts)
+
+        built = BuiltPrompt(
+            system=system,
+            prompt=prompt,
+            prompt_tokens=estimate_tokens(prompt) + system_tokens,
+            budget=budget,
+            sections=sections,
+            dropped={k: v for k, v in dropped.items() if v},
+            build_ms=(time.perf_counter() - start) * 1000,
+        )
+        self._record(built)
+        return built
+
+    def _record(self, built: BuiltPrompt) -> None:
+        st = self.stats
+        st["builds"] += 1
+        n = st["builds"]
+        st["avg_prompt_tokens"] += (built.prompt_tokens - st["avg_prompt_tokens"]) / n
+        st["avg_build_ms"] += (built.build_ms - st["avg_build_ms"]) / n
+
+    def get_stats(self) -> Dict[str, Any]:
+        cache = self.token_cache
+        lookups = cache.hits + cache.misses
+        return {
+            **{k: (round(v, 2) if isinstance(v, float) else v) for k, v in self.stats.items()},
+            "prompt_cap": self.prompt_cap,
+            "token_cache_hit_rate": round(cache.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Instancia global
+prompt_builder = PromptBuilder()
+
+
+def build_chat_prompt(session_id: str, message: str, system: str = "", max_tokens: int = 1024,
+                      memory: Optional[Dict[str, List[str]]] = None) -> BuiltPrompt:
+    """Prompt con memoria para el provider activo de LLMManager"""
+    from core.LLMManager import llm_manager
+    config = llm_manager.get_active_config()
+    model = config.model if config else ""
+    is_local = bool(config and config.is_local)
+    return prompt_builder.build(session_id, message, system=system, model=model,
+                                is_local=is_local, max_tokens=max_tokens, memory=memory)
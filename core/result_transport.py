@@ -0,0 +1,181 @@
+"""
+Transporte de resultados de skills desde el proceso sandbox
+Los resultados pequeños siguen viajando por la mp.Queue (pickle). Los valores
+binarios grandes (bytes, o texto largo como base64 de imágenes) se vuelcan a
+un archivo mapeado en memoria fuera del sandbox y en la cola sólo viaja un
+marcador: así no se pickean, no pasan por el pipe ni por el hilo alimentador
+de la cola, y el padre los lee con mmap o los mueve (rename) sin copiarlos.
+
+Los archivos que la skill deja en `output/` se mueven con os.replace al
+directorio final antes de avisar al padre (un rename, no una copia).
+"""
+import logging
+import mmap
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+logger = logging.getLogger("ResultTransport")
+
+INLINE_LIMIT = 256 * 1024
+SPILL_MARKER = "__spilled__"
+STALE_SPILL_SECONDS = 3600
+
+
+def _write_mapped(path: Path, data) -> None:
+    """Escribir `data` con un único memcpy a través de un mmap del archivo"""
+    view = memoryview(data).cast("B")
+    fd = os.open(str(path), os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        if len(view) == 0:
+            return
+        os.ftruncate(fd, len(view))
+        with mmap.mmap(fd, len(view)) as mm:
+            mm[:] = view
+    finally:
+        os.close(fd)
+
+
+class ResultBlob:
+    """Valor grande de un resultado, respaldado por un archivo mapeado"""
+
+    __slots__ = ("path", "size", "kind")
+
+    def __init__(self, path: str, size: int, kind: str = "bytes"):
+        self.path = path
+        self.size = size
+        self.kind = kind
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bytes__(self) -> bytes:
+        return self.read_bytes()
+
+    def read_bytes(self) -> bytes:
+        if self.size == 0:
+            return b""
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:]
+
+    def value(self):
+        """El valor original (bytes o str)"""
+        data = self.read_bytes()
+        return data.decode("utf-8") if self.kind == "str" else data
+
+    def move_to(self, dest: Path) -> Path:
+        """Mover el archivo a `dest` (rename atómico si es el mismo filesystem)"""
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        move_file(Path(self.path), dest)
+        self.path = str(dest)
+        return dest
+
+    def __repr__(self) -> str:
+        return f"<ResultBlob {self.kind} {self.size} bytes>"
+
+
+def spill_large_values(obj: Any, spill_dir: Path, limit: int = INLINE_LIMIT) -> Any:
+    """
+    Sustituir (recursivamente en dicts/listas/tuplas) los bytes y textos de
+    más de `limit` bytes por marcadores; el contenido queda en spill_dir
+    """
+    counter = [0]
+
+    def spill(data, kind: str):
+        spill_dir.mkdir(parents=True, exist_ok=True)
+        path = spill_dir / f"{counter[0]:04d}.bin"
+        counter[0] += 1
+        _write_mapped(path, data)
+        return {SPILL_MARKER: str(path), "size": len(memoryview(data).cast("B")), "kind": kind}
+
+    def walk(value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return spill(value, "bytes") if memoryview(value).nbytes > limit else value
+        if isinstance(value, str):
+            # len(str) <= bytes utf-8: evitar codificar textos claramente cortos
+            if len(value) * 4 <= limit:
+                return value
+            encoded = value.encode("utf-8")
+            return spill(encoded, "str") if len(encoded) > limit else value
+        if isinstance(value, dict):
+            return {k: walk(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [walk(v) for v in value]
+        if isinstance(value, tuple):
+            return tuple(walk(v) for v in value)
+        return value
+
+    return walk(obj)
+
+
+def restore_spilled(obj: Any, materialize: bool = True) -> Any:
+    """
+    Reemplazar los marcadores por su valor (materialize=True) o por ResultBlob
+    (sin leer nada hasta que se use)
+    """
+    def walk(value):
+        if isinstance(value, dict):
+            if SPILL_MARKER in value:
+                blob = ResultBlob(value[SPILL_MARKER], value.get("size", 0), value.get("kind", "bytes"))
+                return blob.value() if materialize else blob
+            return {k: walk(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [walk(v) for v in value]
+        if isinstance(value, tuple):
+            return tuple(walk(v) for v in value)
+        return value
+
+    return walk(obj)
+
+
+def move_file(src: Path, dest: Path) -> None:
+    try:
+        os.replace(src, dest)
+    except OSError:
+        # Distinto filesystem: shutil.move copia y elimina el origen
+        shutil.move(str(src), str(dest))
+
+
+def move_outputs(src_dir: Path, dest_dir: Path) -> List[str]:
+    """Mover los archivos de src_dir a dest_dir sin copiar bytes; devuelve los destinos"""
+    moved: List[str] = []
+    if not src_dir.is_dir():
+        return moved
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    with os.scandir(src_dir) as it:
+        for entry in it:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            dest = dest_dir / entry.name
+            move_file(Path(entry.path), dest)
+            moved.append(str(dest))
+    return moved
+
+
+def spill_dir_for(base: Path, session_id: str) -> Path:
+    return Path(base) / session_id
+
+
+def cleanup_spills(base: Path, max_age: float = STALE_SPILL_SECONDS, now: Optional[float] = None) -> int:
+    """Borrar volcados huérfanos (resultados que nadie recogió)"""
+    base = Path(base)
+    if not base.is_dir():
+        return 0
+    now = time.time() if now is None else now
+    removed = 0
+    with os.scandir(base) as it:
+        for entry in it:
+            try:
+                if now - entry.stat(follow_symlinks=False).st_mtime < max_age:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.unlink(entry.path)
+                removed += 1
+            except OSError:
+                continue
+    return removed
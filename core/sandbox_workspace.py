@@ -0,0 +1,348 @@
+"""
+Workspaces reutilizables para los sandboxes de skills
+En lugar de mkdtemp + rmtree en cada ejecución, un WorkspacePool mantiene
+directorios ya creados (con su `output/`) listos para usar. Al liberarlos se
+vacían en un hilo de fondo y vuelven al pool, sin bloquear al que libera.
+
+Los archivos que no cambian entre ejecuciones (skill.py, manifest.json) se
+guardan una sola vez, de sólo lectura, en `.shared/` indexados por su
+contenido, y se enlazan en cada workspace (hardlink; symlink o copia si el
+filesystem no lo permite).
+
+Al crear el pool se recogen los directorios huérfanos que dejaron procesos
+anteriores (workspaces, `skill_*` antiguos, `extract_*`/`sandbox_*` del
+simulador de SkillSafetyGate, `test_*` de SkillDynamicSandbox).
+
+    pool = get_workspace_pool(data_dir / "temp_sandbox")
+    ws = pool.acquire()
+    pool.share(ws, "skill.py", code.encode("utf-8"))
+    ...
+    pool.release(ws)
+"""
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Set, Union
+
+from core.lazy_services import lazy_import
+
+psutil = lazy_import("psutil")
+
+logger = logging.getLogger("SandboxWorkspace")
+
+POOL_SIZE = 4
+ORPHAN_MAX_AGE = 3600
+SHARED_DIR = ".shared"
+WORKSPACE_PREFIX = "ws_"
+OUTPUT_DIR = "output"
+
+
+def _remove_readonly(func, path, exc_info):
+    # Windows no borra archivos de sólo lectura (los compartidos)
+    try:
+        os.chmod(path, stat.S_IWRITE)
+        func(path)
+    except OSError:
+        pass
+
+
+def remove_tree(path: Union[str, Path]) -> None:
+    shutil.rmtree(str(path), onerror=_remove_readonly)
+
+
+def _clear_dir(path: Path) -> None:
+    """Vaciar un directorio conservándolo"""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                remove_tree(entry.path)
+            else:
+                try:
+                    os.unlink(entry.path)
+                except PermissionError:
+                    _remove_readonly(os.unlink, entry.path, None)
+
+
+def _owner_alive(name: str) -> Optional[bool]:
+    """
+    ¿Sigue vivo el proceso dueño del workspace (su PID va en el nombre)?
+    None si no se puede saber. Un workspace con nuestro PID que el pool no
+    conoce es de una ejecución anterior que reutilizó el PID (contenedores).
+    """
+    parts = name.split("_")
+    if len(parts) < 3 or not parts[1].isdigit():
+        return None
+    pid = int(parts[1])
+    if pid == os.getpid():
+        return False
+    try:
+        return psutil.pid_exists(pid)
+    except Exception:
+        return None
+
+
+class WorkspacePool:
+    """Pool de directorios de trabajo para sandboxes bajo `base_dir`"""
+
+    def __init__(self, base_dir: Union[str, Path], size: int = POOL_SIZE,
+                 orphan_max_age: float = ORPHAN_MAX_AGE, collect: bool = True):
+        self.base_dir = Path(base_dir)
+        self.size = size
+        self.orphan_max_age = orphan_max_age
+        self.shared_dir = self.base_dir / SHARED_DIR
+        self._free: Deque[Path] = deque()
+        self._in_use: Set[Path] = set()
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._pending: "queue.Queue[tuple]" = queue.Queue()
+        self._outstanding = 0
+        self._idle = threading.Condition(self._lock)
+        self._worker: Optional[threading.Thread] = None
+        self.stats: Dict[str, int] = {"created": 0, "reused": 0, "released": 0, "shared": 0, "collected": 0}
+
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        if collect:
+            self.collect_orphans()
+        self._submit("warm", None)
+
+    # ------------------------------------------------------------------
+    # Workspaces
+    # ------------------------------------------------------------------
+
+    def _new_workspace(self) -> Path:
+        with self._lock:
+            self._counter += 1
+            prefix = f"{WORKSPACE_PREFIX}{os.getpid()}_{self._counter}_"
+        path = Path(tempfile.mkdtemp(prefix=prefix, dir=str(self.base_dir)))
+        (path / OUTPUT_DIR).mkdir()
+        self.stats["created"] += 1
+        return path
+
+    def acquire(self) -> Path:
+        """Un workspace vacío con `output/` creado"""
+        with self._lock:
+            path = self._free.popleft() if self._free else None
+            if path is not None:
+                self.stats["reused"] += 1
+        if path is None or not path.is_dir():
+            path = self._new_workspace()
+        with self._lock:
+            self._in_use.add(path)
+        return path
+
+    def release(self, path: Union[str, Path]) -> None:
+        """Devolver un workspace; se vacía y recicla en segundo plano"""
+        path = Path(path)
+        with self._lock:
+            if path not in self._in_use:
+                return
+            self._in_use.discard(path)
+        self.stats["released"] += 1
+        self._submit("recycle", path)
+
+    def discard(self, path: Union[str, Path]) -> None:
+        """Borrar en segundo plano un directorio temporal que no es del pool"""
+        self._submit("remove", Path(path))
+
+    # ------------------------------------------------------------------
+    # Archivos compartidos
+    # ------------------------------------------------------------------
+
+    def _shared_copy(self, data: bytes) -> Path:
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        target = self.shared_dir / digest
+        if not target.exists():
+            self.shared_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=str(self.shared_dir), prefix=".tmp_")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                os.replace(tmp, target)
+            except OSError:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        return target
+
+    def share(self, workspace: Union[str, Path], name: str,
+              data: Optional[bytes] = None, src: Optional[Path] = None) -> Path:
+        """
+        Colocar `name` en el workspace enlazando una copia compartida de sólo
+        lectura de `data` (o del contenido de `src`)
+        """
+        if data is None:
+            data = Path(src).read_bytes()
+        dest = Path(workspace) / name
+        shared = self._shared_copy(data)
+        try:
+            os.link(shared, dest)
+        except OSError:
+            try:
+                os.symlink(shared, dest)
+            except OSError:
+                shutil.copyfile(shared, dest)
+        self.stats["shared"] += 1
+        return dest
+
+    # ------------------------------------------------------------------
+    # Limpieza en segundo plano
+    # ------------------------------------------------------------------
+
+    def _submit(self, action: str, path: Optional[Path]) -> None:
+        with self._lock:
+            self._outstanding += 1
+        self._pending.put((action, path))
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="SandboxCleanup", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                action, path = self._pending.get(timeout=5.0)
+            except queue.Empty:
+                with self._lock:
+                    if self._pending.empty():
+                        self._worker = None
+                        return
+                continue
+            try:
+                if action == "recycle":
+                    self._recycle(path)
+                elif action == "remove":
+                    remove_tree(path)
+                elif action == "warm":
+                    self._warm()
+            except Exception as e:
+                logger.warning(f"Error limpiando {path}: {e}")
+            finally:
+                with self._lock:
+                    self._outstanding -= 1
+                    if not self._outstanding:
+                        self._idle.notify_all()
+
+    def _recycle(self, path: Path) -> None:
+        with self._lock:
+            keep = len(self._free) < self.size
+        if not keep or not path.is_dir():
+            remove_tree(path)
+            return
+        _clear_dir(path)
+        (path / OUTPUT_DIR).mkdir(exist_ok=True)
+        with self._lock:
+            self._free.append(path)
+
+    def _warm(self) -> None:
+        while True:
+            with self._lock:
+                if len(self._free) >= self.size:
+                    return
+            path = self._new_workspace()
+            with self._lock:
+                self._free.append(path)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Esperar a que termine la limpieza pendiente (tests, apagado)"""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._outstanding, timeout)
+
+    # ------------------------------------------------------------------
+    # Huérfanos
+    # ------------------------------------------------------------------
+
+    def collect_orphans(self, now: Optional[float] = None) -> int:
+        """
+        Borrar (en segundo plano) lo que dejaron ejecuciones anteriores:
+        workspaces de procesos que ya no existen, directorios antiguos y
+        copias compartidas que ningún workspace enlaza
+        """
+        now = time.time() if now is None else now
+        collected = 0
+        with self._lock:
+            known = {str(p) for p in self._free} | {str(p) for p in self._in_use}
+        try:
+            entries = list(os.scandir(self.base_dir))
+        except OSError:
+            return 0
+        for entry in entries:
+            if entry.name == SHARED_DIR or entry.path in known:
+                continue
+            try:
+                age = now - entry.stat(follow_symlinks=False).st_mtime
+            except OSError:
+                continue
+            alive = _owner_alive(entry.name) if entry.name.startswith(WORKSPACE_PREFIX) else None
+            if alive is False or age > self.orphan_max_age:
+                if entry.is_dir(follow_symlinks=False):
+                    self.discard(entry.path)
+                else:
+                    _unlink(entry.path)
+                collected += 1
+        collected += self._collect_shared(now)
+        self.stats["collected"] += collected
+        if collected:
+            logger.info(f"{collected} directorios huérfanos recogidos en {self.base_dir}")
+        return collected
+
+    def _collect_shared(self, now: float) -> int:
+        if not self.shared_dir.is_dir():
+            return 0
+        removed = 0
+        with os.scandir(self.shared_dir) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                # st_nlink == 1: sólo queda la copia compartida
+                if st.st_nlink <= 1 and now - st.st_mtime > self.orphan_max_age:
+                    _unlink(entry.path)
+                    removed += 1
+        return removed
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "free": len(self._free), "in_use": len(self._in_use)}
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except PermissionError:
+        _remove_readonly(os.unlink, path, None)
+    except OSError:
+        pass
+
+
+_pools: Dict[str, WorkspacePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_workspace_pool(base_dir: Union[str, Path], size: int = POOL_SIZE) -> WorkspacePool:
+    """Pool compartido por directorio base (la primera llamada recoge huérfanos)"""
+    key = str(Path(base_dir).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = WorkspacePool(base_dir, size=size)
+        return pool
+
+
+def sim_temp_root() -> Path:
+    """Raíz temporal de los simuladores de skills (MIIA_SKILL_SIM_TMP o TEMP)"""
+    root = os.environ.get("MIIA_SKILL_SIM_TMP", "")
+    if not root.strip():
+        root = os.getenv("TEMP", ".")
+    return Path(root)
@@ -3,13 +3,24 @@ MININA v3.0 - Sistema de Trabajos y Rutinas Guardadas
 Gestión de trabajos/recetas reutilizables del orquestador
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
+import itertools
 import json
 import os
+import threading
 from enum import Enum
 
+# Entradas mínimas del journal antes de compactarlo en el snapshot
+JOURNAL_COMPACT_MIN = 256
+
+# Trabajos de ejemplo que se crean en una instalación nueva (no se programan solos)
+SAMPLE_JOB_IDS = frozenset({
+    "stock_supermarket_daily", "backup_weekly", "social_media_post",
+    "inventory_monthly", "send_newsletter", "analyze_sales",
+})
+
 
 class JobStatus(Enum):
     ACTIVE = "active"       # Disponible para uso
@@ -58,12 +69,14 @@ class SavedJob:
     execution_count: int = 0
     success_count: int = 0
     failure_count: int = 0
+    planned_count: int = 0              # Ejecuciones que sólo generaron el plan
     
     # Metadata
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
     tags: List[str] = field(default_factory=list)
     icon: str = "🤖"                     # Emoji/icono
+    is_sample: bool = False             # Ejemplo de fábrica: el scheduler no lo ejecuta
     color: str = "#6366f1"               # Color de categoría
     
     def to_dict(self) -> Dict[str, Any]:
@@ -78,6 +91,8 @@ class SavedJob:
         """Crear desde diccionario"""
         data['job_type'] = JobType(data.get('job_type', 'custom'))
         data['status'] = JobStatus(data.get('status', 'active'))
+        # Ejemplos guardados antes de existir el campo
+        data.setdefault('is_sample', data.get('job_id') in SAMPLE_JOB_IDS)
         return cls(**data)
 
 
@@ -85,23 +100,47 @@ class SavedJobsManager:
     """
     Gestor de trabajos/rutinas guardadas
     Singleton para persistencia
+
+    Índices en memoria por estado, tipo y etiqueta, más un índice de
+    trigramas para `search_jobs`; las estadísticas salen de ellos sin
+    recorrer los trabajos. Cada cambio se añade como una línea a
+    `saved_jobs.journal.jsonl`; cuando el journal crece se compacta en
+    `saved_jobs.json` (archivo temporal + os.replace).
     """
     _instance = None
     _initialized = False
     
-    def __new__(cls):
+    def __new__(cls, data_dir: Optional[str] = None, create_samples: bool = True):
+        # Con data_dir explícito se crea una instancia independiente (tests, herramientas)
+        if data_dir is not None:
+            return super().__new__(cls)
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
-        if SavedJobsManager._initialized:
+    def __init__(self, data_dir: Optional[str] = None, create_samples: bool = True):
+        if self._initialized:
             return
             
-        self.data_dir = "data"
+        self.data_dir = data_dir or "data"
         self.jobs_file = os.path.join(self.data_dir, "saved_jobs.json")
+        self.journal_file = os.path.join(self.data_dir, "saved_jobs.journal.jsonl")
         self.jobs: Dict[str, SavedJob] = {}
         
+        self._lock = threading.RLock()
+        self._order: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._by_status: Dict[JobStatus, Set[str]] = {s: set() for s in JobStatus}
+        self._by_type: Dict[JobType, Set[str]] = {t: set() for t in JobType}
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._recurring: Set[str] = set()
+        self._text: Dict[str, str] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._indexed: Dict[str, Tuple[JobStatus, JobType, Tuple[str, ...], bool, int]] = {}
+        self._total_executions = 0
+        self._journal_entries = 0
+        self._listeners: List[Callable[[str], None]] = []
+        
         # Asegurar directorio existe
         os.makedirs(self.data_dir, exist_ok=True)
         
@@ -109,31 +148,154 @@ class SavedJobsManager:
         self._load_jobs()
         
         # Crear ejemplos si está vacío
-        if not self.jobs:
+        if not self.jobs and create_samples:
             self._create_sample_jobs()
         
-        SavedJobsManager._initialized = True
+        self._initialized = True
+    
+    # ============== Persistencia ==============
     
     def _load_jobs(self):
-        """Cargar trabajos desde archivo"""
+        """Cargar trabajos: snapshot + cambios del journal"""
         if os.path.exists(self.jobs_file):
             try:
                 with open(self.jobs_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     for job_id, job_data in data.items():
-                        self.jobs[job_id] = SavedJob.from_dict(job_data)
+                        self._put(SavedJob.from_dict(job_data))
             except Exception as e:
                 print(f"Error cargando trabajos guardados: {e}")
+        
+        if os.path.exists(self.journal_file):
+            damaged = False
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        if entry.get("op") == "put":
+                            self._put(SavedJob.from_dict(entry["job"]))
+                        elif entry.get("op") == "del":
+                            self._remove(entry["job_id"])
+                    except (ValueError, KeyError, TypeError):
+                        # Última línea a medio escribir tras un corte: se ignora
+                        damaged = True
+                        continue
+                    self._journal_entries += 1
+            if damaged:
+                # Compactar ya: la siguiente línea no debe añadirse tras el fragmento cortado
+                self._save_jobs()
     
     def _save_jobs(self):
-        """Guardar trabajos a archivo"""
+        """Escribir el snapshot completo (atómico) y vaciar el journal"""
         try:
             data = {job_id: job.to_dict() for job_id, job in self.jobs.items()}
-            with open(self.jobs_file, 'w', encoding='utf-8') as f:
+            tmp = self.jobs_file + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, self.jobs_file)
+            # Si se corta aquí, reaplicar el journal sobre el snapshot nuevo es inocuo
+            with open(self.journal_file, 'w', encoding='utf-8'):
+                pass
+            self._journal_entries = 0
         except Exception as e:
             print(f"Error guardando trabajos: {e}")
     
+    def _append(self, entry: Dict[str, Any]) -> None:
+        """Añadir un cambio al journal (compacta si ya es más grande que el snapshot)"""
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._journal_entries += 1
+        except Exception as e:
+            print(f"Error guardando trabajos: {e}")
+            return
+        if self._journal_entries > max(JOURNAL_COMPACT_MIN, len(self.jobs)):
+            self._save_jobs()
+    
+    def _persist(self, job: SavedJob) -> None:
+        self._append({"op": "put", "job": job.to_dict()})
+    
+    # ============== Índices ==============
+    
+    @staticmethod
+    def _grams(text: str) -> Set[str]:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    def _put(self, job: SavedJob) -> None:
+        """Insertar o reindexar un trabajo"""
+        if job.job_id in self.jobs:
+            self._unindex(job.job_id)
+        else:
+            self._order[job.job_id] = next(self._seq)
+        self.jobs[job.job_id] = job
+        self._index(job)
+    
+    def _remove(self, job_id: str) -> Optional[SavedJob]:
+        job = self.jobs.pop(job_id, None)
+        if job is not None:
+            self._unindex(job_id)
+            self._order.pop(job_id, None)
+        return job
+    
+    def _index(self, job: SavedJob) -> None:
+        job_id = job.job_id
+        tags = tuple(job.tags)
+        self._by_status[job.status].add(job_id)
+        self._by_type[job.job_type].add(job_id)
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(job_id)
+        if job.is_recurring:
+            self._recurring.add(job_id)
+        text = "\n".join([job.name, job.description, job.objective, *tags]).lower()
+        self._text[job_id] = text
+        for gram in self._grams(text):
+            self._trigrams.setdefault(gram, set()).add(job_id)
+        self._total_executions += job.execution_count
+        self._indexed[job_id] = (job.status, job.job_type, tags, job.is_recurring, job.execution_count)
+    
+    def _unindex(self, job_id: str) -> None:
+        indexed = self._indexed.pop(job_id, None)
+        if indexed is None:
+            return
+        status, job_type, tags, recurring, executions = indexed
+        self._by_status[status].discard(job_id)
+        self._by_type[job_type].discard(job_id)
+        for tag in tags:
+            ids = self._by_tag.get(tag)
+            if ids is not None:
+                ids.discard(job_id)
+                if not ids:
+                    del self._by_tag[tag]
+        self._recurring.discard(job_id)
+        for gram in self._grams(self._text.pop(job_id, "")):
+            ids = self._trigrams.get(gram)
+            if ids is not None:
+                ids.discard(job_id)
+                if not ids:
+                    del self._trigrams[gram]
+        self._total_executions -= executions
+    
+    def _ordered(self, ids) -> List[SavedJob]:
+        """Trabajos de `ids` en orden de creación"""
+        return [self.jobs[j] for j in sorted(ids, key=self._order.__getitem__)]
+    
+    # ============== Listeners ==============
+    
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Llamar a `callback(job_id)` tras crear, modificar o eliminar un trabajo"""
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[str], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def _notify(self, job_id: str) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(job_id)
+            except Exception as e:
+                print(f"Error notificando cambio de trabajo: {e}")
+    
     def _create_sample_jobs(self):
         """Crear trabajos de ejemplo"""
         samples = [
@@ -158,6 +320,7 @@ class SavedJobsManager:
                 frequency="daily",
                 schedule_time="08:00",
                 icon="📦",
+                is_sample=True,
                 color="#f59e0b",
                 tags=["supermercado", "stock", "diario", "reporte"]
             ),
@@ -183,6 +346,7 @@ class SavedJobsManager:
                 schedule_time="02:00",
                 schedule_days=["sunday"],
                 icon="💾",
+                is_sample=True,
                 color="#10b981",
                 tags=["backup", "seguridad", "semanal"]
             ),
@@ -205,6 +369,7 @@ class SavedJobsManager:
                 skills_required=["content_generation", "design", "social_media"],
                 is_recurring=False,
                 icon="📱",
+                is_sample=True,
                 color="#ec4899",
                 tags=["redes sociales", "marketing", "contenido"]
             ),
@@ -231,6 +396,7 @@ class SavedJobsManager:
                 schedule_time="09:00",
                 schedule_days=["1"],  # Primer día del mes
                 icon="📊",
+                is_sample=True,
                 color="#8b5cf6",
                 tags=["inventario", "mensual", "stock", "reporte"]
             ),
@@ -256,6 +422,7 @@ class SavedJobsManager:
                 frequency="monthly",
                 schedule_time="10:00",
                 icon="📧",
+                is_sample=True,
                 color="#3b82f6",
                 tags=["email", "newsletter", "comunicación"]
             ),
@@ -281,46 +448,57 @@ class SavedJobsManager:
                 frequency="monthly",
                 schedule_time="11:00",
                 icon="📈",
+                is_sample=True,
                 color="#10b981",
                 tags=["ventas", "análisis", "métricas", "mensual"]
             )
         ]
         
-        for job in samples:
-            self.jobs[job.job_id] = job
-        
-        self._save_jobs()
+        with self._lock:
+            for job in samples:
+                self._put(job)
+            self._save_jobs()
     
     # ============== CRUD Operations ==============
     
     def create_job(self, job: SavedJob) -> bool:
         """Crear nuevo trabajo"""
-        if job.job_id in self.jobs:
-            return False
-        self.jobs[job.job_id] = job
-        self._save_jobs()
+        with self._lock:
+            if job.job_id in self.jobs:
+                return False
+            self._put(job)
+            self._persist(job)
+        self._notify(job.job_id)
         return True
     
     def update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
         """Actualizar trabajo existente"""
-        if job_id not in self.jobs:
-            return False
-        
-        job = self.jobs[job_id]
-        for key, value in updates.items():
-            if hasattr(job, key):
-                setattr(job, key, value)
-        
-        job.updated_at = datetime.now().isoformat()
-        self._save_jobs()
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+            
+            for key, value in updates.items():
+                if key == "status" and isinstance(value, str):
+                    value = JobStatus(value)
+                elif key == "job_type" and isinstance(value, str):
+                    value = JobType(value)
+                if hasattr(job, key) and key != "job_id":
+                    setattr(job, key, value)
+            
+            job.updated_at = datetime.now().isoformat()
+            self._put(job)
+            self._persist(job)
+        self._notify(job_id)
         return True
     
     def delete_job(self, job_id: str) -> bool:
         """Eliminar trabajo"""
-        if job_id not in self.jobs:
-            return False
-        del self.jobs[job_id]
-        self._save_jobs()
+        with self._lock:
+            if self._remove(job_id) is None:
+                return False
+            self._append({"op": "del", "job_id": job_id})
+        self._notify(job_id)
         return True
     
     def get_job(self, job_id: str) -> Optional[SavedJob]:
@@ -333,27 +511,40 @@ class SavedJobsManager:
     
     def get_active_jobs(self) -> List[SavedJob]:
         """Obtener trabajos activos"""
-        return [j for j in self.jobs.values() if j.status == JobStatus.ACTIVE]
+        return self.get_jobs_by_status(JobStatus.ACTIVE)
+    
+    def get_jobs_by_status(self, status: JobStatus) -> List[SavedJob]:
+        """Obtener trabajos por estado"""
+        with self._lock:
+            return self._ordered(self._by_status[status])
     
     def get_jobs_by_type(self, job_type: JobType) -> List[SavedJob]:
         """Obtener trabajos por tipo"""
-        return [j for j in self.jobs.values() if j.job_type == job_type]
+        with self._lock:
+            return self._ordered(self._by_type[job_type])
     
     def get_jobs_by_tag(self, tag: str) -> List[SavedJob]:
         """Obtener trabajos por etiqueta"""
-        return [j for j in self.jobs.values() if tag in j.tags]
+        with self._lock:
+            return self._ordered(self._by_tag.get(tag, ()))
+    
+    def get_recurring_jobs(self) -> List[SavedJob]:
+        """Obtener trabajos recurrentes"""
+        with self._lock:
+            return self._ordered(self._recurring)
     
     def search_jobs(self, query: str) -> List[SavedJob]:
-        """Buscar trabajos por nombre/descripción"""
+        """Buscar trabajos por nombre/descripción/objetivo/etiquetas"""
         query = query.lower()
-        results = []
-        for job in self.jobs.values():
-            if (query in job.name.lower() or 
-                query in job.description.lower() or
-                query in job.objective.lower() or
-                any(query in tag.lower() for tag in job.tags)):
-                results.append(job)
-        return results
+        with self._lock:
+            grams = self._grams(query)
+            if grams:
+                # Candidatos: trabajos que contienen todos los trigramas de la consulta
+                postings = sorted((self._trigrams.get(g, set()) for g in grams), key=len)
+                candidates = set(postings[0]).intersection(*postings[1:])
+            else:
+                candidates = self._text.keys()
+            return self._ordered(j for j in candidates if query in self._text[j])
     
     # ============== Activation ==============
     
@@ -362,14 +553,17 @@ class SavedJobsManager:
         Activar un trabajo guardado
         Retorna la información necesaria para ejecutar en el orquestador
         """
-        job = self.jobs.get(job_id)
-        if not job:
-            return None
-        
-        # Actualizar estadísticas
-        job.last_executed = datetime.now().isoformat()
-        job.execution_count += 1
-        self._save_jobs()
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            
+            # Actualizar estadísticas
+            job.last_executed = datetime.now().isoformat()
+            job.execution_count += 1
+            self._total_executions += 1
+            self._indexed[job_id] = self._indexed[job_id][:4] + (job.execution_count,)
+            self._persist(job)
         
         return {
             "job_id": job.job_id,
@@ -382,13 +576,22 @@ class SavedJobsManager:
     
     def record_execution_result(self, job_id: str, success: bool):
         """Registrar resultado de ejecución"""
-        job = self.jobs.get(job_id)
-        if job:
-            if success:
-                job.success_count += 1
-            else:
-                job.failure_count += 1
-            self._save_jobs()
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job:
+                if success:
+                    job.success_count += 1
+                else:
+                    job.failure_count += 1
+                self._persist(job)
+    
+    def record_planned(self, job_id: str):
+        """Registrar una ejecución que sólo dejó el plan preparado (sin resultado todavía)"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job:
+                job.planned_count += 1
+                self._persist(job)
     
     # ============== Categories ==============
     
@@ -405,22 +608,14 @@ class SavedJobsManager:
     
     def get_stats(self) -> Dict[str, Any]:
         """Obtener estadísticas"""
-        total = len(self.jobs)
-        active = len([j for j in self.jobs.values() if j.status == JobStatus.ACTIVE])
-        recurring = len([j for j in self.jobs.values() if j.is_recurring])
-        total_executions = sum(j.execution_count for j in self.jobs.values())
-        
-        by_type = {}
-        for job_type in JobType:
-            by_type[job_type.value] = len([j for j in self.jobs.values() if j.job_type == job_type])
-        
-        return {
-            "total": total,
-            "active": active,
-            "recurring": recurring,
-            "total_executions": total_executions,
-            "by_type": by_type
-        }
+        with self._lock:
+            return {
+                "total": len(self.jobs),
+                "active": len(self._by_status[JobStatus.ACTIVE]),
+                "recurring": len(self._recurring),
+                "total_executions": self._total_executions,
+                "by_type": {job_type.value: len(ids) for job_type, ids in self._by_type.items()}
+            }
 
 
 # Singleton getter
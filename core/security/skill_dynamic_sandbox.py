@@ -15,6 +15,7 @@ from pathlib import Path
 import json
 
 from core.security.skill_security_constants import DEFAULT_SECURITY_LIMITS
+from core.sandbox_workspace import get_workspace_pool
 
 
 @dataclass
@@ -193,10 +194,22 @@ class SkillDynamicSandbox:
         timeout = timeout or self.limits["max_execution_time_seconds"]
         test_context = test_context or {"test_mode": True}
         
-        # Crear directorio sandbox temporal
-        sandbox_dir = Path(os.getenv("TEMP", "/tmp")) / "minina_sandbox" / f"test_{time.time_ns()}"
-        sandbox_dir.mkdir(parents=True, exist_ok=True)
-        
+        # Workspace reciclado del pool (se vacía al devolverlo)
+        pool = get_workspace_pool(Path(os.getenv("TEMP", "/tmp")) / "minina_sandbox")
+        sandbox_dir = pool.acquire()
+        try:
+            return self._run_in_sandbox(skill_dir, sandbox_dir, test_context, timeout, allow_network)
+        finally:
+            pool.release(sandbox_dir)
+    
+    def _run_in_sandbox(
+        self,
+        skill_dir: Path,
+        sandbox_dir: Path,
+        test_context: Dict[str, Any],
+        timeout: float,
+        allow_network: bool
+    ) -> DynamicExecutionResult:
         # Preparar queue para comunicación
         ctx = mp.get_context("spawn")
         queue = ctx.Queue()
@@ -78,6 +78,7 @@ DEFAULT_SECURITY_LIMITS: Dict[str, Any] = {
     "sandbox_timeout_seconds": 4,
     "max_execution_time_seconds": 30,
     "max_memory_mb": 128,
+    "max_file_size_mb": 256,
 }
 
 # Patrones de código sospechosos (para análisis AST)
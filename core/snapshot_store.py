@@ -0,0 +1,321 @@
+"""
+Snapshots incrementales por contenido para el actualizador
+Cada archivo se guarda una sola vez en `.objects/` (de sólo lectura, por su
+sha256) y cada snapshot es un árbol de hardlinks a esos objetos más un
+`snapshot.json` con el manifest (hash, tamaño, mtime y permisos). Un
+archivo que no cambió entre snapshots no se vuelve a leer ni a copiar: sólo
+se enlaza.
+
+Restaurar compara el manifest con lo que hay en disco y sólo copia los
+archivos distintos (y borra los que sobran), así que un rollback cuesta lo
+que cambió la actualización.
+
+Los archivos vivos nunca se enlazan a la tienda: editar uno no puede
+corromper un snapshot.
+
+    store = SnapshotStore(Path("backups") / "snapshots")
+    info = store.create("backup_1.0.0_...", {"core": Path("core"), "version.json": Path("version.json")})
+    store.verify(info["name"])
+    store.restore(info["name"])
+"""
+import fnmatch
+import json
+import logging
+import os
+import stat
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from core.blob_store import hash_copy, hash_file, link_or_copy
+from core.sandbox_workspace import remove_tree
+
+logger = logging.getLogger("MiIASnapshots")
+
+OBJECTS_DIR = ".objects"
+MANIFEST_NAME = "snapshot.json"
+MANIFEST_VERSION = 1
+DEFAULT_IGNORE = ("*.pyc", "__pycache__")
+DEFAULT_RETENTION = 5
+
+
+def _ignored(rel: str, patterns: Sequence[str]) -> bool:
+    return any(fnmatch.fnmatch(part, pattern) for part in rel.split("/") for pattern in patterns)
+
+
+class SnapshotStore:
+    """Snapshots con deduplicación por contenido bajo `root`"""
+
+    def __init__(self, root: Union[str, Path], ignore: Sequence[str] = DEFAULT_IGNORE):
+        self.root = Path(root)
+        self.objects = self.root / OBJECTS_DIR
+        self.ignore = tuple(ignore)
+        self.objects.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Objetos
+    # ------------------------------------------------------------------
+
+    def _object_path(self, sha: str) -> Path:
+        return self.objects / sha[:2] / sha
+
+    def _store(self, src: Path) -> str:
+        """Guardar el contenido de `src` (si no estaba) y devolver su hash"""
+        sha, tmp = hash_copy(src, self.objects)
+        target = self._object_path(sha)
+        if target.exists():
+            os.unlink(tmp)
+        else:
+            target.parent.mkdir(exist_ok=True)
+            os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp, target)
+        return sha
+
+    def _link(self, sha: str, dest: Path) -> None:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        link_or_copy(self._object_path(sha), dest)
+
+    # ------------------------------------------------------------------
+    # Manifests
+    # ------------------------------------------------------------------
+
+    def _resolve(self, snapshot: Union[str, Path]) -> Path:
+        path = Path(snapshot)
+        if not path.is_absolute() and not path.exists():
+            path = self.root / str(snapshot)
+        return path
+
+    def read_manifest(self, snapshot: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._resolve(snapshot) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Snapshots del más reciente al más antiguo"""
+        snapshots = []
+        for entry in self.root.iterdir():
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            manifest = self.read_manifest(entry)
+            if manifest is not None:
+                snapshots.append({
+                    "name": entry.name,
+                    "path": str(entry),
+                    "created": manifest.get("created"),
+                    "files": len(manifest.get("files", {})),
+                    "meta": manifest.get("meta", {}),
+                })
+        return sorted(snapshots, key=lambda s: s["created"] or "", reverse=True)
+
+    def _latest_files(self) -> Dict[str, Dict[str, Any]]:
+        snapshots = self.list()
+        if not snapshots:
+            return {}
+        return (self.read_manifest(snapshots[0]["name"]) or {}).get("files", {})
+
+    def _walk(self, roots: Mapping[str, Path]) -> Iterator[Tuple[str, Path]]:
+        """(nombre en el snapshot, ruta) de cada archivo de las raíces"""
+        for label, base in roots.items():
+            base = Path(base)
+            if base.is_file():
+                yield label, base
+                continue
+            if not base.is_dir():
+                continue
+            for dirpath, dirnames, filenames in os.walk(base):
+                rel_dir = Path(dirpath).relative_to(base).as_posix()
+                dirnames[:] = [d for d in dirnames if not _ignored(d, self.ignore)]
+                for filename in filenames:
+                    rel = filename if rel_dir == "." else f"{rel_dir}/{filename}"
+                    if not _ignored(rel, self.ignore):
+                        yield f"{label}/{rel}", Path(dirpath) / filename
+
+    # ------------------------------------------------------------------
+    # Crear
+    # ------------------------------------------------------------------
+
+    def create(self, name: str, roots: Mapping[str, Path], meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Snapshot de `roots` ({etiqueta: ruta}, directorios o archivos). Los
+        archivos con el mismo tamaño y mtime que en el snapshot anterior se
+        enlazan sin leerlos
+        """
+        previous = self._latest_files()
+        target = self.root / name
+        if target.exists():
+            raise FileExistsError(f"El snapshot {name} ya existe")
+        building = Path(tempfile.mkdtemp(prefix=f".build_{name}_", dir=str(self.root)))
+        files: Dict[str, Dict[str, Any]] = {}
+        stored = reused = 0
+        try:
+            for arcname, path in self._walk(roots):
+                st = os.stat(path)
+                known = previous.get(arcname)
+                if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns \
+                        and self._object_path(known["sha256"]).exists():
+                    sha = known["sha256"]
+                    reused += 1
+                else:
+                    sha = self._store(path)
+                    stored += 1
+                self._link(sha, building / arcname)
+                files[arcname] = {
+                    "sha256": sha,
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "mode": stat.S_IMODE(st.st_mode),
+                }
+            manifest = {
+                "version": MANIFEST_VERSION,
+                "name": name,
+                "created": datetime.now().isoformat(),
+                "roots": {label: {"path": str(Path(p).absolute()), "is_file": Path(p).is_file()}
+                          for label, p in roots.items()},
+                "meta": meta or {},
+                "files": files,
+            }
+            with open(building / MANIFEST_NAME, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1)
+            os.replace(building, target)
+        except BaseException:
+            remove_tree(building)
+            raise
+        logger.info(f"Snapshot {name}: {stored} archivos nuevos, {reused} enlazados")
+        return {"name": name, "path": str(target), "files": len(files), "stored": stored, "reused": reused}
+
+    # ------------------------------------------------------------------
+    # Verificar
+    # ------------------------------------------------------------------
+
+    def verify(self, snapshot: Union[str, Path], deep: bool = False) -> Dict[str, Any]:
+        """
+        Comprobar que cada archivo del snapshot tiene su objeto con el tamaño
+        esperado; `deep` vuelve a calcular los hashes
+        """
+        manifest = self.read_manifest(snapshot)
+        if manifest is None:
+            return {"ok": False, "checked": 0, "missing": [], "corrupt": [], "error": "Sin manifest"}
+        missing, corrupt = [], []
+        for arcname, entry in manifest["files"].items():
+            obj = self._object_path(entry["sha256"])
+            try:
+                size = obj.stat().st_size
+            except OSError:
+                missing.append(arcname)
+                continue
+            if size != entry["size"] or (deep and hash_file(obj) != entry["sha256"]):
+                corrupt.append(arcname)
+        return {
+            "ok": not missing and not corrupt,
+            "checked": len(manifest["files"]),
+            "missing": missing,
+            "corrupt": corrupt,
+        }
+
+    # ------------------------------------------------------------------
+    # Restaurar
+    # ------------------------------------------------------------------
+
+    def _restore_file(self, entry: Mapping[str, Any], dest: Path) -> None:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        sha, tmp = hash_copy(self._object_path(entry["sha256"]), dest.parent)
+        if sha != entry["sha256"]:
+            os.unlink(tmp)
+            raise IOError(f"Objeto corrupto para {dest}")
+        os.chmod(tmp, entry.get("mode", 0o644))
+        os.replace(tmp, dest)
+        # Mismo mtime que en el snapshot: el siguiente lo reconoce sin leerlo
+        os.utime(dest, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+
+    def restore(self, snapshot: Union[str, Path], roots: Optional[Mapping[str, Path]] = None,
+                exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Dejar las raíces como en el snapshot copiando sólo los archivos que
+        difieren y borrando los que no estaban. Las raíces de `exclude` no se
+        tocan (ni se restauran ni se borra nada en ellas)
+        """
+        manifest = self.read_manifest(snapshot)
+        if manifest is None:
+            raise FileNotFoundError(f"Snapshot no encontrado: {snapshot}")
+        check = self.verify(snapshot)
+        if not check["ok"]:
+            raise IOError(f"Snapshot incompleto: {len(check['missing'])} sin objeto, {len(check['corrupt'])} corruptos")
+        targets = {label: Path(info["path"]) for label, info in manifest["roots"].items()}
+        targets.update({label: Path(p) for label, p in (roots or {}).items()})
+
+        excluded = set(exclude)
+        files = manifest["files"]
+        restored = unchanged = removed = 0
+        for arcname, entry in files.items():
+            label, _, rel = arcname.partition("/")
+            if label in excluded:
+                continue
+            dest = targets[label] / rel if rel else targets[label]
+            try:
+                st = os.stat(dest)
+                same = st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime_ns"]
+            except OSError:
+                same = False
+            if same:
+                unchanged += 1
+                continue
+            self._restore_file(entry, dest)
+            restored += 1
+
+        # Lo que añadió la actualización y no estaba en el snapshot
+        current = dict(self._walk({label: targets[label] for label, info in manifest["roots"].items()
+                                   if not info.get("is_file") and label not in excluded}))
+        for arcname, path in current.items():
+            if arcname not in files:
+                path.unlink()
+                removed += 1
+        logger.info(f"Restaurado {manifest['name']}: {restored} copiados, {removed} borrados, {unchanged} sin cambios")
+        return {"restored": restored, "removed": removed, "unchanged": unchanged, "meta": manifest.get("meta", {})}
+
+    # ------------------------------------------------------------------
+    # Retención
+    # ------------------------------------------------------------------
+
+    def prune(self, keep: int = DEFAULT_RETENTION) -> List[str]:
+        """Borrar los snapshots más antiguos que los `keep` últimos y los objetos huérfanos"""
+        removed = []
+        for snapshot in self.list()[max(0, keep):]:
+            remove_tree(snapshot["path"])
+            removed.append(snapshot["name"])
+        self.collect_garbage()
+        return removed
+
+    def collect_garbage(self) -> int:
+        """Borrar objetos que ningún snapshot referencia (y restos de builds cortados)"""
+        referenced = set()
+        for snapshot in self.list():
+            referenced.update(e["sha256"] for e in (self.read_manifest(snapshot["name"]) or {}).get("files", {}).values())
+        for entry in self.root.iterdir():
+            if entry.name.startswith(".build_"):
+                remove_tree(entry)
+        deleted = 0
+        for path in self.objects.glob("*/*"):
+            if path.name not in referenced:
+                try:
+                    os.chmod(path, stat.S_IWUSR | stat.S_IRUSR)
+                    path.unlink()
+                    deleted += 1
+                except OSError as e:
+                    logger.warning(f"No se pudo borrar {path}: {e}")
+        for path in self.objects.glob(".tmp_*"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        return deleted
+
+    def get_stats(self) -> Dict[str, Any]:
+        objects = list(self.objects.glob("*/*"))
+        return {
+            "snapshots": len(self.list()),
+            "objects": len(objects),
+            "bytes": sum(p.stat().st_size for p in objects),
+        }
@@ -3,13 +3,14 @@ MININA v3.0 - ExecutionSupervisor (Capa 2)
 Supervisión y validación de ejecuciones
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
 from datetime import datetime
 
 from core.orchestrator.bus import bus, EventType, CortexEvent
+from core.execution_accounting import ResourceUsage, execution_accounting
 
 
 class ValidationResult(Enum):
@@ -24,9 +25,10 @@ class ExecutionMetrics:
     execution_id: str
     start_time: datetime
     end_time: Optional[datetime]
-    cpu_usage: float
-    memory_usage: float
+    cpu_usage: float  # segundos de CPU (usuario + sistema)
+    memory_usage: float  # pico de RSS en MB
     duration_seconds: float
+    skill_name: Optional[str] = None
 
 
 class ExecutionSupervisor:
@@ -39,7 +41,7 @@ class ExecutionSupervisor:
         self.active_executions: Dict[str, ExecutionMetrics] = {}
         self.anomaly_threshold = 10.0  # segundos
         
-    async def monitor_execution(self, execution_id: str):
+    async def monitor_execution(self, execution_id: str, skill_name: Optional[str] = None):
         """Monitorear ejecución en tiempo real"""
         metrics = ExecutionMetrics(
             execution_id=execution_id,
@@ -47,7 +49,8 @@ class ExecutionSupervisor:
             end_time=None,
             cpu_usage=0.0,
             memory_usage=0.0,
-            duration_seconds=0.0
+            duration_seconds=0.0,
+            skill_name=skill_name
         )
         self.active_executions[execution_id] = metrics
         
@@ -73,6 +76,25 @@ class ExecutionSupervisor:
         success = result.get("success", False)
         has_output = bool(result.get("result") or result.get("generated_files"))
         
+        # Consumo medido por AgentLifecycleManager (result["usage"])
+        usage = result.get("usage")
+        if usage:
+            metrics.cpu_usage = usage.get("cpu_seconds", 0.0)
+            metrics.memory_usage = usage.get("peak_rss_mb", 0.0)
+            for anomaly in self._resource_anomalies(metrics, usage):
+                await bus.publish(CortexEvent(
+                    type=EventType.ANOMALY_DETECTED,
+                    source="supervisor",
+                    payload={
+                        "execution_id": execution_id,
+                        "skill": usage.get("skill_name", metrics.skill_name),
+                        "type": "resource_usage",
+                        **anomaly
+                    },
+                    timestamp=datetime.now(),
+                    event_id=f"evt_{execution_id}_resource_{anomaly['metric']}"
+                ))
+        
         # Detectar anomalías
         if metrics.duration_seconds > self.anomaly_threshold:
             await bus.publish(CortexEvent(
@@ -105,7 +127,9 @@ class ExecutionSupervisor:
             payload={
                 "execution_id": execution_id,
                 "validation": result_type.value,
-                "duration": metrics.duration_seconds
+                "duration": metrics.duration_seconds,
+                "cpu_seconds": metrics.cpu_usage,
+                "peak_rss_mb": metrics.memory_usage
             },
             timestamp=datetime.now(),
             event_id=f"evt_{execution_id}_end"
@@ -115,3 +139,18 @@ class ExecutionSupervisor:
         del self.active_executions[execution_id]
         
         return result_type
+
+    def _resource_anomalies(self, metrics: ExecutionMetrics, usage: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Anomalías de consumo: las ya calculadas al registrar la ejecución o,
+        si el consumo no se registró, comparándolo con el historial de la skill
+        """
+        if "anomalies" in usage:
+            return list(usage["anomalies"])
+        skill_name = usage.get("skill_name") or metrics.skill_name
+        if not skill_name:
+            return []
+        fields = ResourceUsage.__dataclass_fields__
+        record = ResourceUsage(**{k: v for k, v in usage.items() if k in fields and k != "skill_name"},
+                               skill_name=skill_name)
+        return execution_accounting.check(record)
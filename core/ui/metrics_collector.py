@@ -0,0 +1,157 @@
+"""
+MININA v3.0 - Metrics Collector
+===============================
+Recoge las métricas de sistema en un QThread y las reparte a todas las vistas
+por señales, de modo que el hilo de la interfaz sólo pinta.
+
+Las vistas se suscriben a un canal al activarse y se dan de baja al
+desactivarse; un canal sin suscriptores no se muestrea. Cada muestra se toma
+una sola vez aunque haya varias vistas mirando el mismo canal.
+
+    collector = get_metrics_collector()
+    collector.system_ready.connect(self._on_system)
+    collector.subscribe("system")
+"""
+import logging
+from typing import Dict, Optional
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+
+from core.ui.metrics_sampler import MetricsSampler
+
+logger = logging.getLogger("MetricsCollector")
+
+# Intervalo de muestreo por canal (ms)
+CHANNEL_INTERVALS = {
+    "system": 1000,
+    "dashboard": 8000,
+    "monitor": 4000,
+}
+
+
+class _SamplerWorker(QObject):
+    """Vive en el hilo del collector: timers y muestreo"""
+
+    sampled = pyqtSignal(str, dict)
+
+    def __init__(self, sampler: MetricsSampler):
+        super().__init__()
+        self._sampler = sampler
+        self._timers: Dict[str, QTimer] = {}
+
+    @pyqtSlot()
+    def start(self):
+        try:
+            self._sampler.prime()
+        except Exception as e:
+            logger.warning(f"No se pudo inicializar el muestreo de CPU: {e}")
+
+    @pyqtSlot(str, bool)
+    def set_channel(self, channel: str, active: bool):
+        timer = self._timers.get(channel)
+        if active:
+            if timer is None:
+                timer = QTimer(self)
+                timer.timeout.connect(lambda ch=channel: self.sample_now(ch))
+                self._timers[channel] = timer
+            if not timer.isActive():
+                timer.start(CHANNEL_INTERVALS[channel])
+            self.sample_now(channel)
+        elif timer is not None:
+            timer.stop()
+
+    @pyqtSlot(str)
+    def sample_now(self, channel: str):
+        try:
+            snapshot = self._sampler.sample(channel)
+        except Exception as e:
+            snapshot = {"error": str(e)}
+        self.sampled.emit(channel, snapshot)
+
+    @pyqtSlot()
+    def stop(self):
+        for timer in self._timers.values():
+            timer.stop()
+
+
+class MetricsCollector(QObject):
+    """Punto único de métricas para las vistas PyQt"""
+
+    system_ready = pyqtSignal(dict)
+    dashboard_ready = pyqtSignal(dict)
+    monitor_ready = pyqtSignal(dict)
+
+    # Hacia el worker (conexión en cola: se ejecutan en su hilo)
+    _channel_changed = pyqtSignal(str, bool)
+    _sample_requested = pyqtSignal(str)
+    _stop_requested = pyqtSignal()
+
+    def __init__(self, sampler: Optional[MetricsSampler] = None, parent=None):
+        super().__init__(parent)
+        self._subscribers: Dict[str, int] = {name: 0 for name in CHANNEL_INTERVALS}
+        self.latest: Dict[str, dict] = {}
+
+        self._thread = QThread()
+        self._thread.setObjectName("MetricsCollector")
+        self._worker = _SamplerWorker(sampler or MetricsSampler())
+        self._worker.moveToThread(self._thread)
+
+        self._thread.started.connect(self._worker.start)
+        self._channel_changed.connect(self._worker.set_channel)
+        self._sample_requested.connect(self._worker.sample_now)
+        self._stop_requested.connect(self._worker.stop)
+        self._worker.sampled.connect(self._on_sampled)
+
+        self._thread.start()
+
+    def subscribe(self, channel: str):
+        """Empezar a recibir un canal (muestrea de inmediato al primer suscriptor)"""
+        self._subscribers[channel] += 1
+        if self._subscribers[channel] == 1:
+            self._channel_changed.emit(channel, True)
+        elif channel in self.latest:
+            self._emit(channel, self.latest[channel])
+
+    def unsubscribe(self, channel: str):
+        if self._subscribers.get(channel, 0) <= 0:
+            return
+        self._subscribers[channel] -= 1
+        if self._subscribers[channel] == 0:
+            self._channel_changed.emit(channel, False)
+
+    def refresh(self, channel: str):
+        """Pedir una muestra fuera de ciclo (botón de actualizar)"""
+        self._sample_requested.emit(channel)
+
+    @pyqtSlot(str, dict)
+    def _on_sampled(self, channel: str, snapshot: dict):
+        self.latest[channel] = snapshot
+        self._emit(channel, snapshot)
+
+    def _emit(self, channel: str, snapshot: dict):
+        signal = {
+            "system": self.system_ready,
+            "dashboard": self.dashboard_ready,
+            "monitor": self.monitor_ready,
+        }[channel]
+        signal.emit(snapshot)
+
+    def shutdown(self):
+        self._stop_requested.emit()
+        self._thread.quit()
+        self._thread.wait(2000)
+
+
+_collector: Optional[MetricsCollector] = None
+
+
+def get_metrics_collector() -> MetricsCollector:
+    """Instancia compartida (requiere QApplication creada)"""
+    global _collector
+    if _collector is None:
+        _collector = MetricsCollector()
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_collector.shutdown)
+    return _collector
@@ -0,0 +1,230 @@
+"""
+MININA v3.0 - Muestreo de métricas
+==================================
+Recogida de métricas para las vistas del dashboard y de monitoreo, sin Qt:
+se ejecuta en el hilo del MetricsCollector y devuelve snapshots (dicts) que
+las vistas sólo tienen que pintar.
+
+Canales:
+    system     CPU/RAM/disco (barato, cada segundo)
+    dashboard  skills, APIs, works, salud y actividad reciente
+    monitor    procesos, red y hardware
+"""
+import heapq
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("MetricsSampler")
+
+MAX_ACTIVITIES = 10
+RECENT_WORKS = 5
+TOP_PROCESSES = 20
+
+DEFAULT_ACTIVITIES = [
+    {"icon": "✅", "message": "Sistema iniciado correctamente", "time": "Ahora"},
+    {"icon": "🔧", "message": "Dashboard cargado", "time": "Ahora"},
+]
+
+
+def recent_files(root: Path, limit: int = RECENT_WORKS) -> List[Tuple[float, str]]:
+    """
+    Los `limit` archivos más recientes bajo root como (mtime, nombre).
+    Recorre con os.scandir (un stat por entrada, reutilizado) y se queda con
+    un heap de tamaño `limit` en vez de ordenar todo el árbol.
+    """
+    def walk(path: str) -> Iterable[Tuple[float, str]]:
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            yield from walk(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.stat(follow_symlinks=False).st_mtime, entry.name
+                    except OSError:
+                        continue
+        except OSError:
+            return
+
+    if not os.path.isdir(root):
+        return []
+    return heapq.nlargest(limit, walk(str(root)))
+
+
+def recent_activities(works_dir: Path, limit: int = RECENT_WORKS) -> List[Dict[str, str]]:
+    """Actividades recientes (works generados), de más nueva a más vieja"""
+    activities = [
+        {
+            "icon": "📄",
+            "message": f"Work generado: {name}",
+            "time": datetime.fromtimestamp(mtime).strftime("%H:%M:%S"),
+        }
+        for mtime, name in recent_files(works_dir, limit)
+    ]
+    return (activities or list(DEFAULT_ACTIVITIES))[:MAX_ACTIVITIES]
+
+
+def activity_key(activity: Dict[str, str]) -> Tuple[str, str, str]:
+    return activity.get("icon", ""), activity.get("message", ""), activity.get("time", "")
+
+
+def diff_keys(current: Sequence, new: Sequence) -> Tuple[List, List]:
+    """(claves a quitar, claves a crear) para pasar de current a new"""
+    current_set, new_set = set(current), set(new)
+    removed = [k for k in current if k not in new_set]
+    added = [k for k in new if k not in current_set]
+    return removed, added
+
+
+def top_processes(processes: Iterable[Dict[str, Any]], limit: int = TOP_PROCESSES) -> List[Dict[str, Any]]:
+    """Procesos con más CPU (sólo los que consumen algo)"""
+    active = (p for p in processes if (p.get("cpu_percent") or 0) > 0)
+    top = heapq.nlargest(limit, active, key=lambda p: p.get("cpu_percent") or 0)
+    rows = []
+    for p in top:
+        mem = p.get("memory_info")
+        rows.append({
+            "pid": p.get("pid"),
+            "name": str(p.get("name"))[:30],
+            "cpu_percent": float(p.get("cpu_percent") or 0),
+            "ram_mb": (mem.rss / (1024 ** 2)) if mem else 0.0,
+            "status": str(p.get("status")),
+        })
+    return rows
+
+
+class MetricsSampler:
+    """Toma las muestras de cada canal. Los fallos se reflejan en el snapshot."""
+
+    def __init__(
+        self,
+        api_client=None,
+        registry_getter: Optional[Callable[[], Any]] = None,
+        works_dir: Path = Path("data/works"),
+    ):
+        self._api_client = api_client
+        self._registry_getter = registry_getter
+        self.works_dir = Path(works_dir)
+        self._hardware: Optional[Dict[str, Any]] = None
+
+    @property
+    def api_client(self):
+        if self._api_client is None:
+            from core.ui.api_client import api_client
+            self._api_client = api_client
+        return self._api_client
+
+    def _registry(self):
+        if self._registry_getter is None:
+            from core.api_registry import get_api_registry
+            self._registry_getter = get_api_registry
+        return self._registry_getter()
+
+    def prime(self) -> None:
+        """Arrancar el hilo de recursos del watchdog (fuente de CPU/RAM)"""
+        from core.SystemWatchdog import watchdog
+        watchdog.resources.start()
+
+    def sample(self, channel: str) -> Dict[str, Any]:
+        handler = {
+            "system": self.sample_system,
+            "dashboard": self.sample_dashboard,
+            "monitor": self.sample_monitor,
+        }[channel]
+        return handler()
+
+    def sample_system(self) -> Dict[str, Any]:
+        import psutil
+        from core.SystemWatchdog import watchdog
+        # CPU/RAM del hilo de muestreo del watchdog (compartido con la WebUI)
+        sample = watchdog.latest_resources()
+        if sample is None:
+            sample = {"cpu_percent": 0.0, "memory_percent": psutil.virtual_memory().percent}
+        disk = psutil.disk_usage('/')
+        return {
+            "cpu_percent": sample["cpu_percent"],
+            "ram_percent": sample["memory_percent"],
+            "disk_percent": (disk.used / disk.total) * 100 if disk.total else 0.0,
+            "disk_used_gb": disk.used / (1024 ** 3),
+            "disk_total_gb": disk.total / (1024 ** 3),
+        }
+
+    def sample_dashboard(self) -> Dict[str, Any]:
+        snap: Dict[str, Any] = {}
+        client = self.api_client
+
+        try:
+            snap["skills"] = len(client.get_skills())
+        except Exception:
+            snap["skills"] = 0
+
+        try:
+            apis = self._registry().get_all_apis()
+            snap["apis_configured"] = sum(1 for api in apis.values() if api.is_configured)
+            snap["apis_total"] = len(apis)
+        except Exception as e:
+            logger.debug(f"API registry no disponible: {e}")
+            snap["apis_configured"] = None
+            snap["apis_total"] = 0
+
+        try:
+            snap["works"] = len(client.get_works())
+        except Exception:
+            snap["works"] = sum(1 for _ in self.works_dir.glob("**/*")) if self.works_dir.exists() else 0
+
+        try:
+            snap["healthy"] = bool(client.health_check())
+        except Exception:
+            snap["healthy"] = False
+
+        snap["activities"] = recent_activities(self.works_dir)
+        return snap
+
+    def sample_monitor(self) -> Dict[str, Any]:
+        import psutil
+        snap: Dict[str, Any] = {}
+
+        procs = []
+        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info', 'status']):
+            try:
+                procs.append(proc.info)
+            except Exception:
+                pass
+        snap["processes"] = top_processes(procs)
+
+        try:
+            net = psutil.net_io_counters()
+            snap["network"] = {
+                "sent_mb": net.bytes_sent / (1024 ** 2),
+                "recv_mb": net.bytes_recv / (1024 ** 2),
+                "packets_sent": net.packets_sent,
+                "packets_recv": net.packets_recv,
+                "errin": net.errin,
+                "errout": net.errout,
+                "dropin": net.dropin,
+                "dropout": net.dropout,
+            }
+        except Exception as e:
+            snap["network"] = {"error": str(e)}
+
+        # El hardware no cambia: se consulta una vez
+        if self._hardware is None:
+            try:
+                freq = psutil.cpu_freq()
+                self._hardware = {
+                    "cores_physical": psutil.cpu_count(logical=False),
+                    "cores_logical": psutil.cpu_count(),
+                    "freq_current": freq.current if freq else 0.0,
+                    "freq_min": freq.min if freq else 0.0,
+                    "freq_max": freq.max if freq else 0.0,
+                    "ram_total_gb": psutil.virtual_memory().total / (1024 ** 3),
+                    "partitions": len(psutil.disk_partitions()),
+                }
+            except Exception as e:
+                snap["hardware"] = {"error": str(e)}
+        if self._hardware is not None:
+            snap["hardware"] = self._hardware
+        return snap
@@ -10,16 +10,11 @@ from PyQt5.QtWidgets import (
     QPushButton, QGridLayout, QFrame, QScrollArea,
     QProgressBar, QTableWidget, QTableWidgetItem, QHeaderView
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QPainter, QPen, QBrush
-import psutil
-import json
-import os
-from datetime import datetime
-from pathlib import Path
 
-from core.ui.api_client import api_client
-from core.api_registry import get_api_registry
+from core.ui.metrics_collector import get_metrics_collector
+from core.ui.metrics_sampler import activity_key, diff_keys
 
 
 class MetricCard(QFrame):
@@ -178,12 +173,17 @@ class DashboardView(QWidget):
         super().__init__(parent)
         self.api_client = api_client
         
+        # Widgets de actividad por clave, para actualizar sólo lo que cambia
+        self._activity_widgets = {}
+        self._active = False
+        
         # Configurar UI
         self._setup_ui()
         
-        # Timer para actualización automática (se activa solo cuando la vista está visible)
-        self.refresh_timer = QTimer(self)
-        self.refresh_timer.timeout.connect(self._refresh_data)
+        # Las métricas llegan del collector (hilo aparte) mientras la vista está visible
+        self.collector = get_metrics_collector()
+        self.collector.system_ready.connect(self._on_system_metrics)
+        self.collector.dashboard_ready.connect(self._on_dashboard_snapshot)
     
     def _setup_ui(self):
         """Configurar interfaz del dashboard"""
@@ -432,187 +432,92 @@ class DashboardView(QWidget):
         layout.addLayout(bottom_layout, 1)
     
     def _refresh_data(self):
-        """Actualizar todos los datos del dashboard"""
+        """Pedir datos nuevos del dashboard al collector"""
+        self.collector.refresh("dashboard")
+        self.collector.refresh("system")
+    
+    def _on_dashboard_snapshot(self, snap):
+        """Pintar un snapshot del canal 'dashboard'"""
+        if not self._active or "error" in snap:
+            return
         try:
-            # Contar skills
-            self._update_skills_count()
-            
-            # Contar APIs configuradas
-            self._update_apis_count()
-            
-            # Contar works
-            self._update_works_count()
+            self.skills_card.update_value(str(snap.get("skills", 0)))
             
-            # Métricas de sistema
-            self._update_system_metrics()
+            configured = snap.get("apis_configured")
+            total = snap.get("apis_total", 0)
+            self.apis_card.update_value(f"{configured}/{total}" if configured is not None else "0")
             
-            # Indicadores
-            self._update_indicators()
-            
-            # Actividades (simuladas por ahora)
-            self._update_activities()
+            self.works_card.update_value(str(snap.get("works", 0)))
             
+            self._update_indicators(snap.get("healthy", False), total > 0)
+            self._update_activities(snap.get("activities", []))
         except Exception as e:
             print(f"Error actualizando dashboard: {e}")
     
-    def _update_skills_count(self):
-        """Actualizar contador de skills"""
-        try:
-            skills = api_client.get_skills()
-            count = len(skills)
-            self.skills_card.update_value(str(count))
-        except:
-            self.skills_card.update_value("0")
-    
-    def _update_apis_count(self):
-        """Actualizar contador de APIs configuradas"""
-        try:
-            registry = get_api_registry()
-            apis = registry.get_all_apis()
-            configured = sum(1 for api in apis.values() if api.is_configured)
-            self.apis_card.update_value(f"{configured}/{len(apis)}")
-        except:
-            # Fallback: contar desde archivo
-            try:
-                config_path = 'data/api_config.json'
-                if os.path.exists(config_path):
-                    with open(config_path, 'r') as f:
-                        config = json.load(f)
-                    # Contar APIs configuradas
-                    count = 0
-                    for cat_data in config.values():
-                        if isinstance(cat_data, dict):
-                            count += len(cat_data)
-                    self.apis_card.update_value(str(count))
-                else:
-                    self.apis_card.update_value("0")
-            except:
-                self.apis_card.update_value("0")
-    
-    def _update_works_count(self):
-        """Actualizar contador de works"""
-        try:
-            works = api_client.get_works()
-            count = len(works)
-            self.works_card.update_value(str(count))
-        except:
-            # Fallback: contar archivos
-            try:
-                works_dir = Path("data/works")
-                if works_dir.exists():
-                    count = len(list(works_dir.glob("**/*")))
-                    self.works_card.update_value(str(count))
-                else:
-                    self.works_card.update_value("0")
-            except:
-                self.works_card.update_value("0")
-    
-    def _update_system_metrics(self):
+    def _on_system_metrics(self, snap):
         """Actualizar métricas de CPU, RAM, disco"""
-        try:
-            # CPU
-            cpu_percent = psutil.cpu_percent(interval=0.5)
-            self.cpu_bar.setValue(int(cpu_percent))
-            self.cpu_label.setText(f"{cpu_percent:.1f}%")
-            
-            # RAM
-            ram = psutil.virtual_memory()
-            self.ram_bar.setValue(int(ram.percent))
-            self.ram_label.setText(f"{ram.percent}%")
-            
-            # Disco
-            disk = psutil.disk_usage('/')
-            disk_percent = (disk.used / disk.total) * 100
-            self.disk_bar.setValue(int(disk_percent))
-            self.disk_label.setText(f"{disk_percent:.1f}%")
-            
-        except Exception as e:
-            print(f"Error obteniendo métricas del sistema: {e}")
+        if not self._active or "error" in snap:
+            return
+        cpu_percent = snap["cpu_percent"]
+        self.cpu_bar.setValue(int(cpu_percent))
+        self.cpu_label.setText(f"{cpu_percent:.1f}%")
+        
+        self.ram_bar.setValue(int(snap["ram_percent"]))
+        self.ram_label.setText(f"{snap['ram_percent']}%")
+        
+        disk_percent = snap["disk_percent"]
+        self.disk_bar.setValue(int(disk_percent))
+        self.disk_label.setText(f"{disk_percent:.1f}%")
     
-    def _update_indicators(self):
+    def _update_indicators(self, is_healthy, has_apis):
         """Actualizar indicadores de componentes"""
-        try:
-            # Verificar health de API client
-            is_healthy = api_client.health_check()
-            
-            # Actualizar indicadores según estado
-            self.indicators["SkillVault"].set_status(is_healthy)
-            self.indicators["Agent Manager"].set_status(is_healthy)
-            self.indicators["CortexBus"].set_status(is_healthy)
-            
-            # API Registry - verificar si hay APIs configuradas
-            try:
-                registry = get_api_registry()
-                has_apis = len(registry.get_all_apis()) > 0
-                self.indicators["API Registry"].set_status(has_apis)
-            except:
-                self.indicators["API Registry"].set_status(False)
-            
-            # Memory y Watchdog - asumir ok si core está funcionando
-            self.indicators["Memory Core"].set_status(is_healthy)
-            self.indicators["System Watchdog"].set_status(is_healthy)
-            
-        except Exception as e:
-            print(f"Error actualizando indicadores: {e}")
+        self.indicators["SkillVault"].set_status(is_healthy)
+        self.indicators["Agent Manager"].set_status(is_healthy)
+        self.indicators["CortexBus"].set_status(is_healthy)
+        self.indicators["API Registry"].set_status(has_apis)
+        
+        # Memory y Watchdog - asumir ok si core está funcionando
+        self.indicators["Memory Core"].set_status(is_healthy)
+        self.indicators["System Watchdog"].set_status(is_healthy)
     
-    def _update_activities(self):
-        """Actualizar lista de actividades recientes"""
-        # Limpiar actividades actuales (excepto stretch)
-        while self.activity_layout.count() > 1:
-            item = self.activity_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        # Obtener actividades reales del sistema (simuladas por ahora)
-        activities = self._get_recent_activities()
-        
-        for activity in activities:
-            item = ActivityItem(
+    def _update_activities(self, activities):
+        """
+        Actualizar lista de actividades recientes (más nueva arriba).
+        Sólo se crean/eliminan los items que cambian; los demás se reordenan.
+        """
+        by_key = {activity_key(a): a for a in activities}
+        order = list(by_key)
+        removed, added = diff_keys(list(self._activity_widgets), order)
+        
+        for key in removed:
+            widget = self._activity_widgets.pop(key)
+            self.activity_layout.removeWidget(widget)
+            widget.deleteLater()
+        
+        for key in added:
+            activity = by_key[key]
+            self._activity_widgets[key] = ActivityItem(
                 activity["icon"],
                 activity["message"],
                 activity["time"]
             )
-            self.activity_layout.insertWidget(0, item)
-    
-    def _get_recent_activities(self):
-        """Obtener actividades recientes del sistema"""
-        activities = []
         
-        try:
-            # Verificar skills ejecutadas recientemente
-            works_dir = Path("data/works")
-            if works_dir.exists():
-                # Buscar archivos más recientes
-                files = sorted(works_dir.glob("**/*"), key=lambda x: x.stat().st_mtime, reverse=True)[:5]
-                for f in files:
-                    if f.is_file():
-                        mtime = datetime.fromtimestamp(f.stat().st_mtime)
-                        time_str = mtime.strftime("%H:%M:%S")
-                        activities.append({
-                            "icon": "📄",
-                            "message": f"Work generado: {f.name}",
-                            "time": time_str
-                        })
-        except:
-            pass
-        
-        # Si no hay actividades, mostrar mensaje de sistema
-        if not activities:
-            activities = [
-                {"icon": "✅", "message": "Sistema iniciado correctamente", "time": "Ahora"},
-                {"icon": "🔧", "message": "Dashboard cargado", "time": "Ahora"},
-            ]
-        
-        return activities[:10]  # Máximo 10 actividades
+        # El stretch queda al final del layout
+        for index, key in enumerate(order):
+            widget = self._activity_widgets[key]
+            if self.activity_layout.indexOf(widget) != index:
+                self.activity_layout.insertWidget(index, widget)
     
     def on_activated(self):
         """Llamado cuando la vista se activa"""
-        if not self.refresh_timer.isActive():
-            self.refresh_timer.start(8000)
-        self._refresh_data()
+        if not self._active:
+            self._active = True
+            self.collector.subscribe("system")
+            self.collector.subscribe("dashboard")
 
     def on_deactivated(self):
         """Llamado cuando la vista se desactiva"""
-        if self.refresh_timer.isActive():
-            self.refresh_timer.stop()
-
+        if self._active:
+            self._active = False
+            self.collector.unsubscribe("system")
+            self.collector.unsubscribe("dashboard")
@@ -398,18 +398,14 @@ class JobsView(QWidget):
         type_filter = self.type_filter.currentData()
         status_filter = self.status_filter.currentData()
         
-        # Obtener trabajos filtrados
-        jobs = self.jobs_manager.get_all_jobs()
+        # Obtener trabajos filtrados (búsqueda por el índice del manager)
+        if search_text:
+            jobs = self.jobs_manager.search_jobs(search_text)
+        else:
+            jobs = self.jobs_manager.get_all_jobs()
         
         filtered = []
         for job in jobs:
-            # Filtro de búsqueda
-            if search_text:
-                if not (search_text in job.name.lower() or 
-                        search_text in job.description.lower() or
-                        any(search_text in tag.lower() for tag in job.tags)):
-                    continue
-            
             # Filtro de tipo
             if type_filter != "all":
                 if job.job_type.value != type_filter:
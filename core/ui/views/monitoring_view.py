@@ -11,13 +11,14 @@ from PyQt5.QtWidgets import (
     QProgressBar, QTabWidget, QTextEdit, QTableWidget,
     QTableWidgetItem, QHeaderView, QSplitter
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QRect
+from PyQt5.QtCore import Qt, pyqtSignal, QRect
 from PyQt5.QtGui import QFont, QColor, QPainter, QPen, QBrush, QLinearGradient
-import psutil
 import time
 from datetime import datetime
 from collections import deque
 
+from core.ui.metrics_collector import get_metrics_collector
+
 
 class ResourceGraph(QFrame):
     """Widget de gráfico de recursos en tiempo real"""
@@ -226,12 +227,13 @@ class SystemMonitoringView(QWidget):
         
         self._setup_ui()
 
-        # Timers (se activan solo cuando la vista está visible)
-        self.fast_timer = QTimer(self)
-        self.fast_timer.timeout.connect(self._update_fast)
-
-        self.heavy_timer = QTimer(self)
-        self.heavy_timer.timeout.connect(self._update_heavy)
+        # Métricas del collector (hilo aparte) mientras la vista está visible
+        self._active = False
+        self._paused = False
+        self._hardware_shown = None
+        self.collector = get_metrics_collector()
+        self.collector.system_ready.connect(self._update_fast)
+        self.collector.monitor_ready.connect(self._update_heavy)
     
     def _setup_ui(self):
         """Configurar interfaz de monitoreo"""
@@ -477,144 +479,131 @@ class SystemMonitoringView(QWidget):
         
         return tab
     
-    def _update_fast(self):
-        """Actualizar métricas rápidas (bajo costo)"""
-        try:
-            # CPU
-            cpu_percent = psutil.cpu_percent(interval=None)
-            self.cpu_graph.add_value(cpu_percent)
-            
-            # RAM
-            ram = psutil.virtual_memory()
-            self.ram_graph.add_value(ram.percent)
-            
-            # Disco
-            disk = psutil.disk_usage('/')
-            disk_percent = (disk.used / disk.total) * 100
-            self.disk_bar.setValue(int(disk_percent))
-            
-            disk_gb_used = disk.used / (1024**3)
-            disk_gb_total = disk.total / (1024**3)
-            self.disk_info.setText(
-                f"Usado: {disk_gb_used:.1f} GB / Total: {disk_gb_total:.1f} GB ({disk_percent:.1f}%)"
-            )
-            
-            # Log periódico
-            if cpu_percent > 80:
-                self.log_viewer.add_log("WARN", f"Uso de CPU alto: {cpu_percent:.1f}%")
-            if ram.percent > 85:
-                self.log_viewer.add_log("WARN", f"Uso de RAM alto: {ram.percent:.1f}%")
-                
-        except Exception as e:
-            self.log_viewer.add_log("ERROR", f"Error en monitoreo: {str(e)}")
+    def _update_fast(self, snap):
+        """Pintar métricas rápidas (canal 'system')"""
+        if not self._active or self._paused:
+            return
+        if "error" in snap:
+            self.log_viewer.add_log("ERROR", f"Error en monitoreo: {snap['error']}")
+            return
+        cpu_percent = snap["cpu_percent"]
+        ram_percent = snap["ram_percent"]
+        self.cpu_graph.add_value(cpu_percent)
+        self.ram_graph.add_value(ram_percent)
+        
+        disk_percent = snap["disk_percent"]
+        self.disk_bar.setValue(int(disk_percent))
+        self.disk_info.setText(
+            f"Usado: {snap['disk_used_gb']:.1f} GB / Total: {snap['disk_total_gb']:.1f} GB ({disk_percent:.1f}%)"
+        )
+        
+        # Log periódico
+        if cpu_percent > 80:
+            self.log_viewer.add_log("WARN", f"Uso de CPU alto: {cpu_percent:.1f}%")
+        if ram_percent > 85:
+            self.log_viewer.add_log("WARN", f"Uso de RAM alto: {ram_percent:.1f}%")
 
-    def _update_heavy(self):
-        """Actualizar métricas pesadas (procesos/red/hardware)"""
-        try:
-            self._update_processes()
-            self._update_network()
-            self._update_hardware()
-        except Exception:
-            pass
+    def _update_heavy(self, snap):
+        """Pintar métricas pesadas (canal 'monitor': procesos/red/hardware)"""
+        if not self._active or self._paused or "error" in snap:
+            return
+        self._update_processes(snap.get("processes", []))
+        self._update_network(snap.get("network", {}))
+        self._update_hardware(snap.get("hardware", {}))
     
-    def _update_processes(self):
-        """Actualizar tabla de procesos"""
-        try:
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info', 'status']):
-                try:
-                    info = proc.info
-                    if info['cpu_percent'] is not None and info['cpu_percent'] > 0:
-                        processes.append(info)
-                except:
-                    pass
-            
-            # Ordenar por uso de CPU
-            processes.sort(key=lambda x: x['cpu_percent'] or 0, reverse=True)
-            
-            # Mostrar top 20
-            self.process_table.setRowCount(min(len(processes), 20))
-            
-            for i, proc in enumerate(processes[:20]):
-                self.process_table.setItem(i, 0, QTableWidgetItem(str(proc['pid'])))
-                self.process_table.setItem(i, 1, QTableWidgetItem(str(proc['name'])[:30]))
-                self.process_table.setItem(i, 2, QTableWidgetItem(f"{proc['cpu_percent']:.1f}%"))
-                
-                ram_mb = proc['memory_info'].rss / (1024**2) if proc['memory_info'] else 0
-                self.process_table.setItem(i, 3, QTableWidgetItem(f"{ram_mb:.1f}"))
-                self.process_table.setItem(i, 4, QTableWidgetItem(str(proc['status'])))
-                
-        except Exception as e:
-            pass  # Silenciar errores de procesos
+    def _set_cell(self, row, col, text):
+        """Cambiar el texto de una celda reutilizando el item existente"""
+        item = self.process_table.item(row, col)
+        if item is None:
+            self.process_table.setItem(row, col, QTableWidgetItem(text))
+        elif item.text() != text:
+            item.setText(text)
+    
+    def _update_processes(self, processes):
+        """Actualizar tabla de procesos (top 20 por CPU, ya ordenados)"""
+        if self.process_table.rowCount() != len(processes):
+            self.process_table.setRowCount(len(processes))
+        
+        for i, proc in enumerate(processes):
+            self._set_cell(i, 0, str(proc['pid']))
+            self._set_cell(i, 1, proc['name'])
+            self._set_cell(i, 2, f"{proc['cpu_percent']:.1f}%")
+            self._set_cell(i, 3, f"{proc['ram_mb']:.1f}")
+            self._set_cell(i, 4, proc['status'])
     
-    def _update_network(self):
+    def _update_network(self, net):
         """Actualizar info de red"""
-        try:
-            net_io = psutil.net_io_counters()
-            
-            sent_mb = net_io.bytes_sent / (1024**2)
-            recv_mb = net_io.bytes_recv / (1024**2)
-            
-            info_text = f"""
+        if "error" in net:
+            self.network_info.setText(f"Error obteniendo info de red: {net['error']}")
+            return
+        if not net:
+            return
+        
+        info_text = f"""
             <b>Estadísticas de Red:</b><br>
-            <b>Datos enviados:</b> {sent_mb:.2f} MB<br>
-            <b>Datos recibidos:</b> {recv_mb:.2f} MB<br>
-            <b>Paquetes enviados:</b> {net_io.packets_sent:,}<br>
-            <b>Paquetes recibidos:</b> {net_io.packets_recv:,}<br>
-            <b>Errores entrada:</b> {net_io.errin}<br>
-            <b>Errores salida:</b> {net_io.errout}<br>
-            <b>Drops entrada:</b> {net_io.dropin}<br>
-            <b>Drops salida:</b> {net_io.dropout}
+            <b>Datos enviados:</b> {net['sent_mb']:.2f} MB<br>
+            <b>Datos recibidos:</b> {net['recv_mb']:.2f} MB<br>
+            <b>Paquetes enviados:</b> {net['packets_sent']:,}<br>
+            <b>Paquetes recibidos:</b> {net['packets_recv']:,}<br>
+            <b>Errores entrada:</b> {net['errin']}<br>
+            <b>Errores salida:</b> {net['errout']}<br>
+            <b>Drops entrada:</b> {net['dropin']}<br>
+            <b>Drops salida:</b> {net['dropout']}
             """
-            
-            self.network_info.setText(info_text)
-            
-        except Exception as e:
-            self.network_info.setText(f"Error obteniendo info de red: {e}")
+        
+        self.network_info.setText(info_text)
     
-    def _update_hardware(self):
-        """Actualizar info de hardware"""
-        try:
-            cpu_count = psutil.cpu_count()
-            cpu_freq = psutil.cpu_freq()
-            
-            info_text = f"""
+    def _update_hardware(self, hw):
+        """Actualizar info de hardware (sólo cambia una vez)"""
+        if not hw or hw is self._hardware_shown:
+            return
+        self._hardware_shown = hw
+        if "error" in hw:
+            self.hardware_info.setText(f"Error: {hw['error']}")
+            return
+        
+        info_text = f"""
             <b>CPU:</b><br>
-            Núcleos físicos: {psutil.cpu_count(logical=False)}<br>
-            Núcleos lógicos: {cpu_count}<br>
-            Frecuencia: {cpu_freq.current:.0f} MHz (min: {cpu_freq.min:.0f}, max: {cpu_freq.max:.0f})<br><br>
+            Núcleos físicos: {hw['cores_physical']}<br>
+            Núcleos lógicos: {hw['cores_logical']}<br>
+            Frecuencia: {hw['freq_current']:.0f} MHz (min: {hw['freq_min']:.0f}, max: {hw['freq_max']:.0f})<br><br>
             
             <b>Memoria:</b><br>
-            Total: {psutil.virtual_memory().total / (1024**3):.2f} GB<br><br>
+            Total: {hw['ram_total_gb']:.2f} GB<br><br>
             
             <b>Disco:</b><br>
-            Particiones: {len(psutil.disk_partitions())}<br>
+            Particiones: {hw['partitions']}<br>
             """
-            
-            self.hardware_info.setText(info_text)
-            
-        except Exception as e:
-            self.hardware_info.setText(f"Error: {e}")
+        
+        self.hardware_info.setText(info_text)
     
     def _toggle_monitoring(self):
         """Pausar/reanudar monitoreo"""
-        if self.fast_timer.isActive() or self.heavy_timer.isActive():
-            if self.fast_timer.isActive():
-                self.fast_timer.stop()
-            if self.heavy_timer.isActive():
-                self.heavy_timer.stop()
+        if not self._paused:
+            self._paused = True
+            if self._active:
+                self._unsubscribe()
             self.pause_btn.setText("▶️ Reanudar")
             self.update_indicator.setText("● Pausado")
             self.update_indicator.setStyleSheet("color: #ef4444; font-size: 12px;")
             self.log_viewer.add_log("INFO", "Monitoreo pausado")
         else:
-            self.fast_timer.start(1000)
-            self.heavy_timer.start(4000)
+            self._paused = False
+            if self._active:
+                self._subscribe()
             self.pause_btn.setText("⏸️ Pausar")
             self.update_indicator.setText("● Live")
             self.update_indicator.setStyleSheet("color: #22c55e; font-size: 12px;")
             self.log_viewer.add_log("INFO", "Monitoreo reanudado")
     
+    def _subscribe(self):
+        self.collector.subscribe("system")
+        self.collector.subscribe("monitor")
+    
+    def _unsubscribe(self):
+        self.collector.unsubscribe("system")
+        self.collector.unsubscribe("monitor")
+    
     def _clear_logs(self):
         """Limpiar logs"""
         self.log_viewer.clear()
@@ -622,16 +611,14 @@ class SystemMonitoringView(QWidget):
     
     def on_activated(self):
         """Llamado cuando la vista se activa"""
-        if not self.fast_timer.isActive():
-            self.fast_timer.start(1000)
-        if not self.heavy_timer.isActive():
-            self.heavy_timer.start(4000)
-        self._update_fast()
+        if not self._active:
+            self._active = True
+            if not self._paused:
+                self._subscribe()
 
     def on_deactivated(self):
         """Llamado cuando la vista se desactiva"""
-        if self.fast_timer.isActive():
-            self.fast_timer.stop()
-        if self.heavy_timer.isActive():
-            self.heavy_timer.stop()
-
+        if self._active:
+            self._active = False
+            if not self._paused:
+                self._unsubscribe()
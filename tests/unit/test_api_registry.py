@@ -0,0 +1,67 @@
+"""Tests for the API registry index and intent matcher."""
+import json
+import os
+import random
+
+import core.api_registry as api_registry
+from core.api_registry import INTENT_API_MAP, APIRegistry, IntentMatcher
+
+
+def _naive_first(patterns, text):
+    for p in patterns:
+        if p in text.lower():
+            return p
+    return None
+
+
+class TestIntentMatcher:
+    """Test suite for IntentMatcher."""
+
+    def test_finds_overlapping_patterns(self):
+        """Test patterns sharing prefixes/suffixes are all reported."""
+        matcher = IntentMatcher(["he", "she", "his", "hers"])
+        found = {matcher.patterns[i] for i in matcher.find_all("ushers")}
+        assert found == {"he", "she", "hers"}
+
+    def test_matches_linear_scan(self):
+        """Test the first match agrees with the original substring scan."""
+        patterns = list(INTENT_API_MAP)
+        matcher = IntentMatcher(patterns)
+        rng = random.Random(7)
+        words = patterns + ["hola", "quiero", "el", "Chat", "CÓDIGO", "datos"]
+        for _ in range(300):
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 6)))
+            assert matcher.first(text) == _naive_first(patterns, text)
+
+
+class TestAPIRegistry:
+    """Test suite for APIRegistry."""
+
+    def test_lookups_use_index_until_config_changes(self, temp_dir, monkeypatch):
+        """Test the index is rebuilt only when api_config.json changes."""
+        monkeypatch.setattr(api_registry, "CONFIG_CHECK_INTERVAL", 0.0)
+        path = temp_dir / "api_config.json"
+        path.write_text(json.dumps({}), encoding="utf-8")
+        registry = APIRegistry(config_path=str(path))
+        builds = registry.index_builds
+
+        assert [a.id for a in registry.check_api_for_intent("abrir un chat")] == ["openai", "groq", "anthropic"]
+        assert not registry.is_api_available("groq")
+        assert registry.index_builds == builds
+
+        path.write_text(json.dumps({"ai": {"groq": {"api_key": "x"}}}), encoding="utf-8")
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 5))
+        assert registry.is_api_available("groq")
+        assert registry.index_builds == builds + 1
+        assert [a.id for a in registry.check_api_for_intent("abrir un chat")] == ["openai", "anthropic"]
+        assert registry.index_builds == builds + 1
+
+    def test_explicit_reload(self, temp_dir):
+        """Test reload() rebuilds the index immediately."""
+        path = temp_dir / "api_config.json"
+        registry = APIRegistry(config_path=str(path))
+        assert not registry.is_api_available("openai")
+        path.write_text(json.dumps({"ai": {"openai": {"api_key": "k"}}}), encoding="utf-8")
+        registry.reload()
+        assert registry.is_api_available("openai")
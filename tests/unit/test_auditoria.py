@@ -0,0 +1,87 @@
+"""Tests for the append-only audit log."""
+import json
+from datetime import datetime, timedelta
+
+from core.auditoria import AlmacenAuditoria, RegistroAuditoria
+
+
+def _registro(i, skill="skill_a", fecha=None):
+    fecha = fecha or datetime.now().strftime("%Y-%m-%d")
+    return RegistroAuditoria(
+        id=f"r{i}", skill_name=skill, skill_id=skill, action="run", status="running",
+        start_time=f"{fecha}T10:00:{i:02d}", end_time=None, duration_seconds=None,
+        details={}, created_at=fecha,
+    )
+
+
+class TestAlmacenAuditoria:
+    """Test suite for AlmacenAuditoria."""
+
+    def test_finalizar_appends_instead_of_rewriting(self, temp_dir):
+        """Test finishing an execution appends one line and updates counters."""
+        almacen = AlmacenAuditoria(temp_dir)
+        for i in range(3):
+            almacen.iniciar(_registro(i))
+        log = almacen._get_file_path(datetime.now().strftime("%Y-%m-%d"))
+        before = log.read_bytes()
+
+        reg = almacen.finalizar("r1", "failed", {"error": "x"})
+        assert reg.status == "failed" and reg.duration_seconds is not None
+        assert log.read_bytes().startswith(before)
+        assert len(log.read_text(encoding="utf-8").splitlines()) == 4
+        assert almacen.finalizar("r1", "completed") is None
+        assert almacen.estadisticas() == {"status": {"running": 2, "failed": 1}, "skills": {"skill_a": 3}}
+
+    def test_restart_replays_only_the_tail(self, temp_dir):
+        """Test counters survive a restart, including events not yet in the stats file."""
+        almacen = AlmacenAuditoria(temp_dir)
+        almacen.iniciar(_registro(0))
+        almacen.guardar_estadisticas()
+        almacen.iniciar(_registro(1, skill="skill_b"))
+        almacen.finalizar("r0", "completed")
+
+        reopened = AlmacenAuditoria(temp_dir)
+        assert reopened.estadisticas() == {
+            "status": {"running": 1, "completed": 1},
+            "skills": {"skill_a": 1, "skill_b": 1},
+        }
+        assert [r["id"] for r in reopened.pagina()["registros"]] == ["r1", "r0"]
+
+    def test_pagination_and_filters(self, temp_dir):
+        """Test cursor pages walk newest to oldest across days."""
+        almacen = AlmacenAuditoria(temp_dir)
+        hoy = datetime.now()
+        ayer = (hoy - timedelta(days=1)).strftime("%Y-%m-%d")
+        for i in range(3):
+            almacen.iniciar(_registro(i, fecha=ayer))
+        for i in range(3, 6):
+            almacen.iniciar(_registro(i, skill="skill_b"))
+        almacen.finalizar("r4", "completed")
+
+        seen, cursor = [], None
+        while True:
+            page = almacen.pagina(limit=2, cursor=cursor)
+            seen += [r["id"] for r in page["registros"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert seen == ["r5", "r4", "r3", "r2", "r1", "r0"]
+
+        assert [r["id"] for r in almacen.pagina(status="completed")["registros"]] == ["r4"]
+        assert [r["id"] for r in almacen.pagina(skill_id="skill_a")["registros"]] == ["r2", "r1", "r0"]
+        assert [r["id"] for r in almacen.pagina(fecha_hasta=ayer)["registros"]] == ["r2", "r1", "r0"]
+
+    def test_legacy_day_files_are_migrated_and_old_days_purged(self, temp_dir):
+        """Test old JSON day files are converted once and expired days deleted."""
+        fecha = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d")
+        antigua = (datetime.now() - timedelta(days=40)).strftime("%Y-%m-%d")
+        reg = _registro(0, fecha=fecha).to_dict()
+        reg["status"] = "completed"
+        (temp_dir / f"auditoria_{fecha}.json").write_text(json.dumps({"registros": [reg]}), encoding="utf-8")
+        (temp_dir / f"auditoria_{antigua}.jsonl").write_text("", encoding="utf-8")
+
+        almacen = AlmacenAuditoria(temp_dir)
+        assert not (temp_dir / f"auditoria_{fecha}.json").exists()
+        assert not (temp_dir / f"auditoria_{antigua}.jsonl").exists()
+        assert almacen.estadisticas()["status"] == {"completed": 1}
+        assert almacen.pagina()["registros"][0]["id"] == "r0"
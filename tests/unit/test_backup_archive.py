@@ -0,0 +1,160 @@
+"""Tests for incremental backup archives and chunked uploads."""
+import asyncio
+import os
+import threading
+
+import aiohttp
+from aiohttp import web
+
+from core.backup_archive import BackupArchiver
+from core.CloudStorageIntegrations import OneDriveIntegration, UploadSessionStore
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+def _backup(archiver, temp_dir, name, sources, **kwargs):
+    zip_path = archiver.backup_dir / f"miia_backup_{name}.zip"
+    result = archiver.create(zip_path, sources, **kwargs)
+    # Orden por mtime estable aunque los backups se creen en el mismo instante
+    os.utime(zip_path, (1000 + len(list(archiver.backup_dir.glob("*.zip"))),) * 2)
+    return zip_path, result
+
+
+class TestBackupArchiver:
+    """Test suite for BackupArchiver."""
+
+    def test_only_changed_files_are_stored(self, temp_dir):
+        """Test unchanged and duplicate content is referenced instead of re-compressed."""
+        src = temp_dir / "src"
+        a = _write(src / "a.json", b"a" * 5000)
+        b = _write(src / "b.py", b"print('b')\n")
+        archiver = BackupArchiver(temp_dir / "backups", compression_level=1)
+        archiver.backup_dir.mkdir()
+        sources = [("user_config/a.json", a), ("skills/b.py", b)]
+
+        first, result = _backup(archiver, temp_dir, "1", sources, extra={"tokens_indicator.txt": b"x"}, full=True)
+        assert sorted(result.stored) == ["skills/b.py", "tokens_indicator.txt", "user_config/a.json"]
+
+        _write(src / "b.py", b"print('b2')\n")
+        copy = _write(src / "copia.json", b"a" * 5000)
+        second, result = _backup(archiver, temp_dir, "2", sources + [("user_config/copia.json", copy)])
+        assert result.stored == ["skills/b.py"]
+        assert sorted(result.reused) == ["user_config/a.json", "user_config/copia.json"]
+        assert archiver.referenced(second) == {first.name, second.name}
+        assert archiver.chain_length() == 1
+
+        assert archiver.members(second) == ["skills/b.py", "user_config/a.json", "user_config/copia.json"]
+        archiver.extract(second, "user_config/copia.json", temp_dir / "out" / "copia.json")
+        assert (temp_dir / "out" / "copia.json").read_bytes() == b"a" * 5000
+        with archiver.open_member(second, "skills/b.py") as f:
+            assert f.read() == b"print('b2')\n"
+
+    def test_prune_keeps_archives_still_referenced(self, temp_dir):
+        """Test retention never deletes a backup a kept backup restores from."""
+        src = temp_dir / "src"
+        archiver = BackupArchiver(temp_dir / "backups")
+        archiver.backup_dir.mkdir()
+        base = _write(src / "base.txt", b"base")
+        changing = _write(src / "n.txt", b"0")
+        sources = [("user_config/base.txt", base), ("user_config/n.txt", changing)]
+
+        names = []
+        for i in range(4):
+            _write(src / "n.txt", str(i).encode())
+            path, _ = _backup(archiver, temp_dir, str(i), sources, full=(i == 0))
+            names.append(path.name)
+
+        removed = {p.name for p in archiver.prune(keep=2)}
+        # 0 guarda base.txt, que siguen usando 2 y 3; 1 ya no lo necesita nadie
+        assert removed == {names[1]}
+        assert sorted(p.name for p in archiver.archives()) == sorted([names[0], names[2], names[3]])
+
+
+class _UploadServer:
+    """Minimal Graph upload-session endpoint on its own thread."""
+
+    def __init__(self, total, received_until):
+        self.total = total
+        self.next_offset = received_until
+        self.ranges = []
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+
+        async def status(request):
+            return web.json_response({"nextExpectedRanges": [f"{self.next_offset}-"]})
+
+        async def put(request):
+            body = await request.read()
+            self.ranges.append((request.headers["Content-Range"], len(body)))
+            self.next_offset += len(body)
+            if self.next_offset >= self.total:
+                return web.json_response({"id": "item", "name": "b.zip"}, status=201)
+            return web.json_response({"nextExpectedRanges": [f"{self.next_offset}-"]}, status=202)
+
+        app = web.Application()
+        app.router.add_get("/session", status)
+        app.router.add_put("/session", put)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+class TestChunkedUpload:
+    """Test suite for resumable chunked uploads."""
+
+    def test_upload_resumes_in_bounded_chunks(self, temp_dir):
+        """Test a saved session resumes at the server offset and sends fixed-size chunks."""
+        total = 1_100_000
+        file_path = _write(temp_dir / "b.zip", os.urandom(total))
+        sessions = UploadSessionStore(temp_dir / "sessions.json")
+        progress = []
+
+        with _UploadServer(total, received_until=655360) as server:
+            key = "onedrive:folder/b.zip"
+            sessions.save(key, os.stat(file_path), upload_url=f"http://127.0.0.1:{server.port}/session")
+
+            async def run():
+                async with aiohttp.ClientSession() as session:
+                    response = await OneDriveIntegration._upload_session(
+                        session, "token", "folder", file_path, 320 * 1024,
+                        lambda sent, size: progress.append(sent), sessions,
+                    )
+                    async with response:
+                        return response.status
+
+            status = asyncio.run(run())
+
+        assert status == 201
+        assert server.ranges == [
+            (f"bytes 655360-983039/{total}", 327680),
+            (f"bytes 983040-{total - 1}/{total}", total - 983040),
+        ]
+        assert progress == [983040, total]
+        assert sessions.get(key, os.stat(file_path)) is None
+
+        # Una sesión de otra versión del archivo no se reutiliza
+        sessions.save(key, os.stat(file_path), upload_url="x")
+        _write(file_path, b"otro")
+        assert sessions.get(key, os.stat(file_path)) is None
@@ -0,0 +1,123 @@
+"""Tests for the content-addressed BlobStore and WorksManager deduplication."""
+import asyncio
+import io
+import stat
+import pytest
+from core.blob_store import BlobStore, hash_file
+from core.file_manager import WorksManager
+
+
+class TestBlobStore:
+    """Test suite for BlobStore."""
+
+    @pytest.fixture
+    def store(self, temp_dir):
+        """Create a BlobStore in a temporary directory."""
+        return BlobStore(temp_dir / "blobs")
+
+    def test_put_stream_hashes_content(self, store, temp_dir):
+        """Test streamed content is stored under its sha256."""
+        src = temp_dir / "a.bin"
+        src.write_bytes(b"x" * 3_000_000)
+
+        digest, size = store.put_stream(io.BytesIO(src.read_bytes()), chunk_size=4096)
+
+        assert digest == hash_file(src)
+        assert size == 3_000_000
+        assert store.exists(digest)
+        assert store.ref_count(digest) == 1
+
+    def test_duplicate_content_stored_once(self, store):
+        """Test identical content shares one blob with two references."""
+        d1, _ = store.put_bytes(b"same report")
+        d2, _ = store.put_bytes(b"same report")
+
+        assert d1 == d2
+        assert store.ref_count(d1) == 2
+        stats = store.get_stats()
+        assert stats["blobs"] == 1
+        assert stats["saved_bytes"] == len(b"same report")
+
+    def test_put_file_move_consumes_source(self, store, temp_dir):
+        """Test move=True renames the source into the store."""
+        src = temp_dir / "out.png"
+        src.write_bytes(b"png-bytes")
+
+        digest, _ = store.put_file(src, move=True)
+
+        assert not src.exists()
+        assert store.blob_path(digest).read_bytes() == b"png-bytes"
+
+    def test_aborted_writer_leaves_nothing(self, store):
+        """Test an interrupted incremental write removes its temp file and adds no ref."""
+        with store.open_writer() as writer:
+            writer.write(b"parcial")
+        assert list(store.tmp_path.iterdir()) == []
+        assert store.get_stats()["blobs"] == 0
+
+    def test_release_deletes_on_last_reference(self, store):
+        """Test the blob disappears only when its last reference is released."""
+        digest, _ = store.put_bytes(b"data")
+        store.put_bytes(b"data")
+
+        assert store.release(digest) is False
+        assert store.exists(digest)
+        assert store.release(digest) is True
+        assert not store.exists(digest)
+
+    def test_refs_persist_across_instances(self, store, temp_dir):
+        """Test reference counts are reloaded from disk."""
+        digest, _ = store.put_bytes(b"persisted")
+        reopened = BlobStore(temp_dir / "blobs")
+        assert reopened.ref_count(digest) == 1
+
+
+class TestWorksManagerDedup:
+    """Test WorksManager on top of BlobStore."""
+
+    def test_same_output_twice_shares_blob(self, temp_dir):
+        """Test two works with the same content reuse the stored blob."""
+        manager = WorksManager(base_path=temp_dir / "works")
+        w1 = manager.save_content(b"%PDF-1.4 report", "report.pdf", "reporter", "reporter")
+        w2 = manager.save_content(b"%PDF-1.4 report", "report.pdf", "reporter", "reporter")
+
+        assert w1.content_hash == w2.content_hash
+        assert manager.blob_store.ref_count(w1.content_hash) == 2
+        assert manager.get_file_path(w1.id).read_bytes() == b"%PDF-1.4 report"
+
+        assert manager.delete_work(w1.id)
+        assert manager.blob_store.exists(w1.content_hash)
+        # Borrar un trabajo no vuelve escribible el inodo que comparten los demás
+        assert stat.S_IMODE(manager.get_file_path(w2.id).stat().st_mode) == 0o444
+        assert manager.delete_work(w2.id)
+        assert not manager.blob_store.exists(w2.content_hash)
+
+    def test_upload_is_hashed_while_streaming(self, temp_dir):
+        """Test an async chunked upload lands as a deduplicated work."""
+        manager = WorksManager(base_path=temp_dir / "works")
+
+        async def body():
+            for part in (b"%PDF-1.4 ", b"subido"):
+                yield part
+
+        work = asyncio.run(manager.save_upload(body(), "subido.pdf", "upload", "upload"))
+        again = manager.save_stream(io.BytesIO(b"%PDF-1.4 subido"), "copia.pdf", "upload", "upload")
+
+        assert work.content_hash == again.content_hash
+        assert manager.blob_store.ref_count(work.content_hash) == 2
+        assert manager.get_file_path(work.id).read_bytes() == b"%PDF-1.4 subido"
+
+    def test_sandbox_output_is_moved_not_copied(self, temp_dir):
+        """Test save_output moves the file into the store and leaves a link in place."""
+        manager = WorksManager(base_path=temp_dir / "works")
+        out = temp_dir / "output" / "Imagenes" / "gato.png"
+        out.parent.mkdir(parents=True)
+        out.write_bytes(b"png")
+        inode = out.stat().st_ino
+
+        work = manager.save_output(str(out), "imagen", "imagen")
+
+        blob = manager.blob_store.blob_path(work.content_hash)
+        assert blob.stat().st_ino == inode
+        assert out.read_bytes() == b"png"
+        assert manager.get_file_path(work.id).read_bytes() == b"png"
@@ -0,0 +1,78 @@
+"""Tests for the in-memory skill credential vault."""
+import threading
+import time
+
+from core.SkillCredentialVault import ACCESS_LOG_SIZE, credential_vault
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestSkillCredentialVault:
+    """Test suite for SkillCredentialVault."""
+
+    def test_expiry_is_exact_not_periodic(self):
+        """Test sessions are wiped at their deadline without waiting for a sweep."""
+        vault = credential_vault
+        before = vault.get_stats()["expired_sessions"]
+        short = vault.store_credentials("exp_skill", {"token": "abcdef"}, ttl_seconds=0.1)
+        long = vault.store_credentials("exp_skill", {"token": "ghijkl"}, ttl_seconds=60)
+
+        assert vault.get_credentials(short, "exp_skill") == {"token": "abcdef"}
+        assert _wait_for(lambda: vault.get_stats()["expired_sessions"] == before + 1)
+        shard = vault._shard(short)
+        assert short not in shard.sessions and short not in shard.access_count
+        assert vault.get_credentials(long, "exp_skill") == {"token": "ghijkl"}
+
+        # Liberada antes de vencer: su entrada del heap se descarta sin contar como expirada
+        assert vault.release_credentials(long)
+        assert vault.release_credentials(long) is False
+
+    def test_failures_block_and_limits(self):
+        """Test wrong skill ids block the session and the access limit wipes it."""
+        vault = credential_vault
+        stats = vault.get_stats()
+        sid = vault.store_credentials("lim_skill", {"password": "secret"})
+        for _ in range(3):
+            assert vault.get_credentials(sid, "otra_skill") is None
+        assert vault.get_credentials(sid, "lim_skill") is None
+        after = vault.get_stats()
+        assert after["failed_attempts_total"] == stats["failed_attempts_total"] + 3
+        assert after["blocked_sessions"] == stats["blocked_sessions"] + 1
+
+        sid = vault.store_credentials("lim_skill", {"password": "secret"})
+        for _ in range(vault._max_access_count):
+            assert vault.get_credentials(sid, "lim_skill") == {"password": "secret"}
+        assert vault.get_credentials(sid, "lim_skill") is None
+        assert sid not in vault._shard(sid).sessions
+
+    def test_concurrent_access_and_bounded_log(self):
+        """Test concurrent skill runs and that the access log stays bounded."""
+        vault = credential_vault
+        errors = []
+
+        def run(n):
+            for i in range(150):
+                sid = vault.store_credentials(f"conc_{n}", {"api_key": f"key{n}-{i}"})
+                if vault.get_credentials(sid, f"conc_{n}") != {"api_key": f"key{n}-{i}"}:
+                    errors.append((n, i))
+                vault.release_credentials(sid)
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert len(vault.get_access_log()) == ACCESS_LOG_SIZE
+        assert vault.get_access_log(limit=1)[0]["action"] == "access"
+        stats = vault.get_stats()
+        assert stats["total_access_logged"] >= 1200
+        assert stats["shards"] > 1
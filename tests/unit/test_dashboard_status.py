@@ -0,0 +1,88 @@
+"""Tests for the incremental dashboard status aggregator."""
+import asyncio
+from datetime import date, datetime, timedelta
+import pytest
+from core.dashboard_status import DashboardStatusAggregator
+from core.UserObservabilityStore import UserObservabilityStore
+
+
+class TestDashboardStatusAggregator:
+    """Test suite for DashboardStatusAggregator."""
+
+    @pytest.fixture
+    def aggregator(self, temp_dir):
+        """Create an aggregator over a temporary output directory."""
+        (temp_dir / "Imagenes").mkdir()
+        (temp_dir / "Texto").mkdir()
+        return DashboardStatusAggregator(output_dir=temp_dir)
+
+    def test_agent_events_update_running_count(self, aggregator):
+        """Test SPAWNED/KILLED events maintain running_skills."""
+        async def run():
+            await aggregator._on_agent_spawned({"pid": 1})
+            await aggregator._on_agent_spawned({"pid": 2})
+            await aggregator._on_agent_killed({"pid": 1})
+        asyncio.run(run())
+
+        assert aggregator.get_snapshot()["running_skills"] == 1
+
+    def test_listeners_receive_only_changes(self, aggregator):
+        """Test deltas contain only fields whose value changed."""
+        deltas = []
+
+        async def listener(changes):
+            deltas.append(changes)
+
+        aggregator.add_listener(listener)
+
+        async def run():
+            await aggregator._on_agent_spawned({"pid": 7})
+            await aggregator._on_agent_spawned({"pid": 7})
+        asyncio.run(run())
+
+        assert deltas == [{"running_skills": 1}]
+
+    def test_file_scan_uses_directory_mtime(self, aggregator, temp_dir):
+        """Test folders are recounted only when their mtime changes."""
+        (temp_dir / "Imagenes" / "a.png").write_bytes(b"1")
+        (temp_dir / "Texto" / "b.txt").write_text("x")
+
+        asyncio.run(aggregator._refresh_files())
+        snap = aggregator.get_snapshot()
+        assert snap["files_count"]["imagenes"] == 1
+        assert snap["total_files"] == 2
+
+        assert aggregator._scan_files() is None
+
+    def test_today_actions_counts_tracked_topics(self, aggregator):
+        """Test only user-facing topics count as actions."""
+        async def run():
+            await aggregator._on_any_event({"topic": "user.SPEAK"})
+            await aggregator._on_any_event({"topic": "internal.TICK"})
+        asyncio.run(run())
+
+        assert aggregator.get_snapshot()["today_actions"] == 1
+
+    def test_today_actions_seeded_from_store(self, aggregator, temp_dir, monkeypatch):
+        """Test a restart keeps today's actions recorded by the observability store."""
+        store = UserObservabilityStore(db_path=temp_dir / "events.db")
+        store.initialize()
+        now = datetime.now()
+
+        async def record():
+            await store._on_any_event({"topic": "user.SPEAK", "timestamp": now.isoformat()})
+            await store._on_any_event({"topic": "agent.SPAWNED", "timestamp": now.isoformat()})
+            await store._on_any_event({"topic": "user.SPEAK",
+                                       "timestamp": (now - timedelta(days=1)).isoformat()})
+        asyncio.run(record())
+        monkeypatch.setattr("core.UserObservabilityStore.store", store)
+
+        asyncio.run(aggregator._seed_today_actions())
+        assert aggregator.get_snapshot()["today_actions"] == 2
+
+    def test_today_actions_reset_on_read_after_midnight(self, aggregator):
+        """Test the snapshot does not report yesterday's count once the day changes."""
+        asyncio.run(aggregator._on_any_event({"topic": "user.SPEAK"}))
+        aggregator._today = date.today() - timedelta(days=1)
+
+        assert aggregator.get_snapshot()["today_actions"] == 0
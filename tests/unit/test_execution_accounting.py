@@ -0,0 +1,145 @@
+"""Tests for per-execution resource accounting and limits."""
+import asyncio
+import multiprocessing as mp
+import sys
+
+import pytest
+
+from core.execution_accounting import (
+    ExecutionAccounting, ResourceLimits, ResourceUsage, exit_status_for, measure_self, memory_exceeded,
+)
+from core.supervisor.execution_supervisor import ExecutionSupervisor, ValidationResult
+
+
+def _limited_worker(limits, mode, path, q):
+    from core.execution_accounting import ResourceLimits, exit_status_for, measure_self
+
+    ResourceLimits(**limits).apply()
+    try:
+        if mode == "memory":
+            blocks = [bytearray(16 * 1024 * 1024) for _ in range(32)]
+            q.put({"exit_status": "ok", "blocks": len(blocks)})
+        elif mode == "threads":
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                # Cada hilo reserva algo (arena propia sin M_ARENA_MAX)
+                list(pool.map(lambda _: len(bytearray(1024 * 1024)), range(32)))
+                block = bytearray(100 * 1024 * 1024)
+            q.put({"exit_status": "ok", "blocks": len(block) // (1024 * 1024)})
+        else:
+            with open(path, "wb") as f:
+                f.write(b"x" * (2 * 1024 * 1024))
+                f.flush()
+            q.put({"exit_status": "ok"})
+    except BaseException as e:
+        q.put({"exit_status": exit_status_for(e), "usage": measure_self()})
+
+
+def _run_limited(limits, mode, path=None):
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    proc = ctx.Process(target=_limited_worker, args=(limits, mode, path, q))
+    proc.start()
+    try:
+        return q.get(timeout=60)
+    finally:
+        proc.join(timeout=10)
+
+
+class TestExecutionAccounting:
+    """Test suite for ExecutionAccounting and ResourceLimits."""
+
+    def test_per_skill_percentiles_and_anomalies(self):
+        """Test usage is aggregated per skill and outliers against its p95 are flagged."""
+        accounting = ExecutionAccounting(window=50, factor=3.0, min_samples=10)
+        for i in range(20):
+            anomalies = accounting.record(ResourceUsage(
+                "imagen", wall_seconds=1.0 + i / 100, cpu_user=0.5, peak_rss_mb=40.0 + i,
+            ))
+            assert anomalies == []
+        accounting.record(ResourceUsage("otra", wall_seconds=9.0))
+
+        stats = accounting.get_skill_stats("imagen")
+        assert stats["count"] == 20 and stats["statuses"] == {"ok": 20}
+        assert stats["metrics"]["peak_rss_mb"]["p50"] == 49.0
+        assert stats["metrics"]["peak_rss_mb"]["p95"] == 58.0
+        assert stats["metrics"]["peak_rss_mb"]["max"] == 59.0
+        assert accounting.percentile("imagen", "cpu_seconds", 99) == 0.5
+
+        spike = ResourceUsage("imagen", wall_seconds=1.0, cpu_user=0.5, peak_rss_mb=400.0, exit_status="memory_limit")
+        metrics = {a["metric"] for a in accounting.record(spike)}
+        assert metrics == {"peak_rss_mb", "exit_status"}
+        assert accounting.get_skill_stats("imagen")["statuses"]["memory_limit"] == 1
+        assert set(accounting.get_stats()) == {"imagen", "otra"}
+
+    def test_child_report_preferred_over_parent_samples(self):
+        """Test the child's own report wins and parent samples cover a killed child."""
+        child = {"cpu_user": 1.5, "cpu_system": 0.5, "peak_rss_mb": 80.0, "read_bytes": 10, "write_bytes": 20}
+        sampled = {"cpu_user": 1.0, "cpu_system": 0.2, "peak_rss_mb": 95.0}
+
+        usage = ResourceUsage.from_reports("s", 3.0, "ok", child=child, samples=sampled)
+        assert usage.source == "child" and usage.cpu_seconds == 2.0
+        assert usage.peak_rss_mb == 95.0 and usage.write_bytes == 20
+
+        killed = ResourceUsage.from_reports("s", 30.0, "timeout", samples=sampled, exitcode=-9)
+        assert killed.source == "sampled" and killed.exitcode == -9
+        assert killed.to_dict()["cpu_seconds"] == 1.2
+
+        me = measure_self()
+        assert me["cpu_user"] > 0 and me["peak_rss_mb"] > 0
+        assert exit_status_for(MemoryError()) == "memory_limit"
+        assert exit_status_for(ValueError()) == "error"
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="RLIMIT sólo en Linux")
+    def test_rlimits_stop_memory_and_file_size(self, temp_dir):
+        """Test the memory and file-size caps are enforced in a spawned child."""
+        limits = ResourceLimits(memory_mb=64).to_dict()
+        assert _run_limited(limits, "memory")["exit_status"] == "memory_limit"
+
+        report = _run_limited(ResourceLimits(file_size_mb=1).to_dict(), "file", str(temp_dir / "big.bin"))
+        assert report["exit_status"] == "file_size_limit"
+        assert (temp_dir / "big.bin").stat().st_size <= 1024 * 1024
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="RLIMIT sólo en Linux")
+    def test_threaded_skill_can_use_its_memory_budget(self):
+        """Test a skill with a thread pool can still allocate close to max_memory_mb."""
+        report = _run_limited(ResourceLimits(memory_mb=128).to_dict(), "threads")
+        assert report == {"exit_status": "ok", "blocks": 100}
+
+    def test_parent_enforces_budget_on_sampled_rss(self):
+        """Test the parent-side check compares sampled RSS with budget plus interpreter allowance."""
+        limits = ResourceLimits(memory_mb=128).to_dict()
+        assert not memory_exceeded(limits, {"rss_mb": 150.0})
+        assert memory_exceeded(limits, {"rss_mb": 300.0})
+        assert not memory_exceeded(ResourceLimits().to_dict(), {"rss_mb": 10_000.0})
+        assert not memory_exceeded(None, {"rss_mb": 300.0})
+
+    def test_supervisor_uses_measured_usage(self, monkeypatch):
+        """Test ExecutionSupervisor fills its metrics from usage and reports anomalies."""
+        from core.supervisor import execution_supervisor
+
+        published = []
+
+        class _RecordingBus:
+            async def publish(self, event):
+                published.append(event)
+
+        monkeypatch.setattr(execution_supervisor, "bus", _RecordingBus())
+        supervisor = ExecutionSupervisor()
+        usage = ResourceUsage("imagen", cpu_user=2.0, peak_rss_mb=64.0, exit_status="cpu_limit")
+        usage.anomalies = [{"metric": "exit_status", "value": "cpu_limit"}]
+
+        async def run():
+            await supervisor.monitor_execution("exec_usage", skill_name="imagen")
+            metrics = supervisor.active_executions["exec_usage"]
+            result = await supervisor.validate_result(
+                "exec_usage", {"success": True, "result": "ok", "usage": usage.to_dict()}
+            )
+            return metrics, result
+
+        metrics, result = asyncio.run(run())
+        assert result == ValidationResult.SUCCESS
+        assert metrics.cpu_usage == 2.0 and metrics.memory_usage == 64.0
+        anomalies = [e.payload for e in published if e.payload.get("type") == "resource_usage"]
+        assert anomalies == [{"execution_id": "exec_usage", "skill": "imagen", "type": "resource_usage",
+                              "metric": "exit_status", "value": "cpu_limit"}]
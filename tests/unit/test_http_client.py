@@ -0,0 +1,131 @@
+"""Tests for the shared HTTP client used by the integration managers."""
+import asyncio
+import threading
+import time
+
+from aiohttp import web
+
+from core.http_client import HttpClient, ProviderHttp, ProviderLimiter, parse_retry_after
+
+
+class _MockServer:
+    """Local aiohttp server on its own thread; records the peer port of each request."""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.peers = []
+        self.hits = {}
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+
+        async def handler(request):
+            self.peers.append(request.transport.get_extra_info("peername")[1])
+            key = request.path
+            self.hits[key] = self.hits.get(key, 0) + 1
+            return await self.routes[key](request, self.hits[key])
+
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handler)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+
+async def _ok(request, n):
+    return web.json_response({"ok": True, "n": n, "query": dict(request.query)})
+
+
+async def _throttled_once(request, n):
+    if n == 1:
+        return web.json_response({"ok": False}, status=429, headers={"Retry-After": "0.05"})
+    return web.json_response({"ok": True})
+
+
+async def _unavailable(request, n):
+    return web.Response(status=503)
+
+
+class TestHttpClient:
+    """Test suite for HttpClient."""
+
+    def test_sync_calls_reuse_one_connection(self):
+        """Test sync requests run on the shared loop and keep the connection alive."""
+        client = HttpClient(limits={})
+        http = ProviderHttp("test", client)
+        try:
+            with _MockServer({"/ok": _ok}) as server:
+                responses = [http.get(server.url("/ok"), params={"a": 1, "skip": None}) for _ in range(5)]
+        finally:
+            client.close()
+        assert [r.json()["n"] for r in responses] == [1, 2, 3, 4, 5]
+        assert responses[0].json()["query"] == {"a": "1"}
+        assert len(set(server.peers)) == 1
+        assert client.get_stats()["providers"]["test"]["requests"] == 5
+
+    def test_retry_after_is_honoured_for_post(self):
+        """Test a 429 is retried after Retry-After, even for non-idempotent methods."""
+        client = HttpClient(limits={})
+
+        async def run():
+            with _MockServer({"/throttled": _throttled_once}) as server:
+                response = await client.request_async("POST", server.url("/throttled"), provider="p", json={})
+            await client.aclose()
+            return response
+
+        response = asyncio.run(run())
+        assert response.status_code == 200 and response.attempts == 2
+        stats = client.get_stats()["providers"]["p"]
+        assert stats["throttled"] == 1 and stats["retries"] == 1
+        assert stats["waited_ms"] >= 40
+
+    def test_server_errors_only_retried_when_idempotent(self, monkeypatch):
+        """Test 503 is retried for GET but returned immediately for POST."""
+        monkeypatch.setattr("core.http_client.backoff_delay", lambda attempt: 0)
+        client = HttpClient(max_retries=2, limits={})
+
+        async def run():
+            with _MockServer({"/down": _unavailable}) as server:
+                get = await client.request_async("GET", server.url("/down"))
+                post = await client.request_async("POST", server.url("/down"))
+                hits = server.hits["/down"]
+            await client.aclose()
+            return get, post, hits
+
+        get, post, hits = asyncio.run(run())
+        assert get.status_code == 503 and get.attempts == 3
+        assert post.status_code == 503 and post.attempts == 1
+        assert hits == 4
+
+    def test_provider_limiter(self):
+        """Test the token bucket and server-driven pauses."""
+        limiter = ProviderLimiter(rate=2.0, burst=2)
+        now = time.monotonic()
+        assert limiter.reserve(now=now) == 0
+        assert limiter.reserve(now=now) == 0
+        assert limiter.reserve(now=now) == 0.5
+        limiter.observe(429, {"Retry-After": "3"}, now=now)
+        assert limiter.reserve(now=now + 1) >= 2.0
+
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470.0) == 10.0
+        assert parse_retry_after("nope") is None
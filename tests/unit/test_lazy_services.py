@@ -0,0 +1,87 @@
+"""Tests for lazy singleton construction and deferred imports."""
+import subprocess
+import sys
+from pathlib import Path
+from core.lazy_services import LazyService, lazy_import, lazy_service, get_service_stats, resolve
+
+
+class _Counter:
+    instances = 0
+
+    def __init__(self):
+        _Counter.instances += 1
+        self.value = 1
+
+    def bump(self):
+        self.value += 1
+        return self.value
+
+
+class TestLazyService:
+    """Test suite for LazyService proxies."""
+
+    def test_built_on_first_attribute_access(self):
+        """Test the factory runs only when the service is used."""
+        _Counter.instances = 0
+        proxy = LazyService("counter", _Counter)
+
+        assert _Counter.instances == 0
+        assert proxy.bump() == 2
+        assert proxy.bump() == 3
+        assert _Counter.instances == 1
+        assert isinstance(resolve(proxy), _Counter)
+
+    def test_setattr_forwards_to_instance(self):
+        """Test attribute writes reach the real instance."""
+        proxy = LazyService("counter_setattr", _Counter)
+        proxy.value = 10
+        assert resolve(proxy).value == 10
+
+    def test_special_methods_and_isinstance_forward(self):
+        """Test len/bool/iter/in/[]/== and isinstance see the real instance."""
+        proxy = LazyService("registry_dict", lambda: {"a": 1})
+        assert isinstance(proxy, dict) and isinstance(proxy, LazyService)
+        assert not LazyService("empty_list", list)
+        proxy["b"] = 2
+        assert len(proxy) == 2 and "b" in proxy
+        assert sorted(proxy) == ["a", "b"]
+        assert proxy == {"a": 1, "b": 2}
+        del proxy["a"]
+        assert resolve(proxy) == {"b": 2}
+
+    def test_registry_reports_state(self):
+        """Test the registry exposes initialization state."""
+        proxy = lazy_service("test_registry_counter", _Counter)
+        assert get_service_stats()["test_registry_counter"]["initialized"] is False
+        proxy.bump()
+        stats = get_service_stats()["test_registry_counter"]
+        assert stats["initialized"] is True
+        assert stats["init_ms"] is not None
+
+    def test_lazy_import_defers_module(self):
+        """Test lazy_import does not import until attribute access."""
+        mod = lazy_import("json")  # already loaded: returned as-is
+        assert mod is sys.modules["json"]
+
+        deferred = lazy_import("this_module_does_not_exist_xyz")
+        assert deferred.__dict__["_module"] is None
+
+
+class TestImportSideEffects:
+    """Importing service modules must not construct their singletons."""
+
+    def test_file_manager_import_is_side_effect_free(self, temp_dir):
+        """Test importing core.file_manager creates no data directories."""
+        root = Path(__file__).resolve().parents[2]
+        code = (
+            "import sys; sys.path.insert(0, %r); "
+            "import core.file_manager, core.api.github_manager; "
+            "from core.lazy_services import get_service_stats; "
+            "s = get_service_stats(); "
+            "assert not s['works_manager']['initialized']; "
+            "assert not s['github_manager']['initialized']; "
+            "assert 'requests' not in sys.modules"
+        ) % str(root)
+        proc = subprocess.run([sys.executable, "-c", code], cwd=temp_dir, capture_output=True, text=True)
+        assert proc.returncode == 0, proc.stderr
+        assert not (temp_dir / "data").exists()
@@ -0,0 +1,141 @@
+"""Tests for the LLM completion cache."""
+import asyncio
+import threading
+from core.LLMManager import DEFAULT_CACHE_SETTINGS, LLMManager
+from core.llm_cache import CompletionCache, cosine, hashing_embedding
+
+ARGS = ("groq", "llama-3.1-8b-instant", "sys")
+
+
+class TestCompletionCache:
+    """Test suite for CompletionCache."""
+
+    def test_exact_hit_requires_identical_parameters(self, temp_dir):
+        """Test the key covers prompt, temperature and max_tokens."""
+        cache = CompletionCache(temp_dir / "cache.json")
+        cache.put(*ARGS, "¿Qué hora es?", 0.7, 2000, "Son las 5")
+
+        hit = cache.get(*ARGS, "¿Qué hora es?", 0.7, 2000)
+        assert hit is not None and hit.tier == "exact" and hit.response == "Son las 5"
+        assert cache.get(*ARGS, "¿Qué hora es?", 0.2, 2000) is None
+        assert cache.get(*ARGS, "¿Qué hora es?", 0.7, 100) is None
+        assert cache.get("openai", "gpt-4o-mini", "sys", "¿Qué hora es?", 0.7, 2000) is None
+        stats = cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 3
+
+    def test_semantic_tier_matches_near_duplicates(self, temp_dir):
+        """Test near-duplicate prompts hit only when the semantic tier is on."""
+        exact_only = CompletionCache(None)
+        semantic = CompletionCache(None, semantic=True, similarity_threshold=0.85)
+        for cache in (exact_only, semantic):
+            cache.put(*ARGS, "Explica qué es una lista enlazada en Python", 0.7, 2000, "Una lista...")
+
+        near = "explica que es una lista enlazada en python?"
+        assert exact_only.get(*ARGS, near, 0.7, 2000) is None
+        hit = semantic.get(*ARGS, near, 0.7, 2000)
+        assert hit is not None and hit.tier == "semantic" and hit.similarity >= 0.85
+        assert semantic.get(*ARGS, "Dame la receta de una tortilla de patatas", 0.7, 2000) is None
+
+    def test_ttl_expiry(self):
+        """Test entries older than the TTL are dropped."""
+        now = [1000.0]
+        cache = CompletionCache(None, ttl_seconds=60, clock=lambda: now[0])
+        cache.put(*ARGS, "p", 0.7, 10, "r")
+        now[0] += 61
+        assert cache.get(*ARGS, "p", 0.7, 10) is None
+        assert cache.get_stats()["expired"] == 1
+
+    def test_lru_eviction_respects_byte_budget(self):
+        """Test least recently used entries are evicted first."""
+        cache = CompletionCache(None, max_bytes=30)
+        cache.put(*ARGS, "a", 0, 1, "x" * 9)   # 10 bytes
+        cache.put(*ARGS, "b", 0, 1, "x" * 9)
+        cache.get(*ARGS, "a", 0, 1)             # "a" pasa a ser el más reciente
+        cache.put(*ARGS, "c", 0, 1, "x" * 14)   # 15 bytes: expulsa "b"
+
+        assert cache.get(*ARGS, "b", 0, 1) is None
+        assert cache.get(*ARGS, "a", 0, 1) is not None
+        assert cache.get_stats()["bytes"] <= 30
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_persistence_roundtrip(self, temp_dir):
+        """Test the cache survives a restart."""
+        path = temp_dir / "cache.json"
+        cache = CompletionCache(path)
+        cache.put(*ARGS, "hola", 0.7, 2000, "¡Hola!")
+        assert cache.persist()
+
+        reloaded = CompletionCache(path)
+        assert reloaded.get(*ARGS, "hola", 0.7, 2000).response == "¡Hola!"
+
+    def test_persist_in_event_loop_writes_off_thread(self, temp_dir, monkeypatch):
+        """Test put() inside the loop hands json.dump to an executor thread."""
+        path = temp_dir / "cache.json"
+        cache = CompletionCache(path)
+        writers = []
+        real_write = cache._write
+
+        def spy(seq, payload):
+            writers.append(threading.get_ident())
+            return real_write(seq, payload)
+
+        monkeypatch.setattr(cache, "_write", spy)
+
+        async def run():
+            cache.put(*ARGS, "hola", 0.7, 2000, "¡Hola!")
+            await cache._pending_write
+            cache.put(*ARGS, "adiós", 0.7, 2000, "¡Adiós!")
+            await cache.persist_async()
+
+        asyncio.run(run())
+        assert writers and threading.get_ident() not in writers
+        reloaded = CompletionCache(path)
+        assert reloaded.get(*ARGS, "adiós", 0.7, 2000).response == "¡Adiós!"
+
+    def test_embedding_similarity_is_normalised(self):
+        """Test identical texts have cosine 1 and unrelated texts score low."""
+        a = hashing_embedding("resumen del documento")
+        assert abs(cosine(a, a) - 1.0) < 1e-9
+        assert cosine(a, hashing_embedding("clima en Madrid mañana")) < 0.5
+
+
+class TestManagerCachePolicy:
+    """Test suite for which LLMManager.generate calls use the cache."""
+
+    def _manager(self, temp_dir):
+        manager = object.__new__(LLMManager)
+        manager.cache_settings = dict(DEFAULT_CACHE_SETTINGS)
+        manager.cache = CompletionCache(temp_dir / "cache.json")
+        manager.live_calls = 0
+        manager._cache_identity = lambda: ("groq", "llama-3.1-8b-instant")
+        manager._report_cache = lambda *args: None
+
+        async def live(prompt, system, max_tokens, temperature, stream):
+            manager.live_calls += 1
+            yield f"respuesta {manager.live_calls}"
+
+        manager._generate_live = live
+        return manager
+
+    def _generate(self, manager, **kwargs):
+        async def run():
+            return "".join([chunk async for chunk in manager.generate("hola", **kwargs)])
+        return asyncio.run(run())
+
+    def test_sampled_calls_are_not_cached_by_default(self, temp_dir):
+        """Test temperature > 0 always reaches the provider unless the caller opts in."""
+        manager = self._manager(temp_dir)
+        assert self._generate(manager, temperature=0.7) == "respuesta 1"
+        assert self._generate(manager, temperature=0.7) == "respuesta 2"
+
+        assert self._generate(manager, temperature=0.7, use_cache=True) == "respuesta 3"
+        assert self._generate(manager, temperature=0.7, use_cache=True) == "respuesta 3"
+        assert manager.live_calls == 3
+
+    def test_deterministic_calls_are_cached_by_default(self, temp_dir):
+        """Test temperature 0 is served from the cache, and use_cache=False bypasses it."""
+        manager = self._manager(temp_dir)
+        assert self._generate(manager, temperature=0) == "respuesta 1"
+        assert self._generate(manager, temperature=0) == "respuesta 1"
+        assert self._generate(manager, temperature=0, use_cache=False) == "respuesta 2"
+        assert manager.live_calls == 2
@@ -0,0 +1,100 @@
+"""Tests for the multi-provider LLM router."""
+import asyncio
+from enum import Enum
+from core.llm_router import LLMRouter
+
+
+class P(Enum):
+    FAST = "fast"
+    SLOW = "slow"
+    BROKEN = "broken"
+
+
+class _FakeManager:
+    """Manager stand-in whose providers have scripted behaviour."""
+
+    def __init__(self, behaviour, mode="failover", active=None):
+        self.behaviour = behaviour
+        self.routing_mode = mode
+        self.active_provider = active
+        self.calls = []
+        self.cancelled = []
+
+    def routable_providers(self):
+        return list(self.behaviour)
+
+    async def _stream_provider(self, ptype, prompt, system, max_tokens, temperature, stream):
+        self.calls.append(ptype)
+        delay, chunks = self.behaviour[ptype]
+        try:
+            await asyncio.sleep(delay)
+            if isinstance(chunks, Exception):
+                raise chunks
+            for chunk in chunks:
+                yield chunk
+        except asyncio.CancelledError:
+            self.cancelled.append(ptype)
+            raise
+
+
+def _collect(router, **kwargs):
+    async def run():
+        return "".join([c async for c in router.generate("hola", **kwargs)])
+    return asyncio.run(run())
+
+
+class TestLLMRouter:
+    """Test suite for LLMRouter."""
+
+    def test_failover_on_error(self):
+        """Test an erroring provider is skipped and penalised."""
+        manager = _FakeManager({P.BROKEN: (0, RuntimeError("500")), P.FAST: (0, ["ok"])}, active=P.BROKEN)
+        router = LLMRouter(manager)
+
+        assert _collect(router) == "ok"
+        assert manager.calls == [P.BROKEN, P.FAST]
+        stats = router.get_stats()["providers"]
+        assert stats["broken"]["failures"] == 1
+        assert stats["fast"]["successes"] == 1
+        # La próxima vez el provider sano va primero
+        assert router.rank()[0] is P.FAST
+
+    def test_hedge_launches_backup_and_cancels_loser(self):
+        """Test a slow primary is hedged and the loser is cancelled."""
+        manager = _FakeManager({P.SLOW: (1.0, ["lento"]), P.FAST: (0, ["rápido"])}, mode="hedge", active=P.SLOW)
+        router = LLMRouter(manager, hedge_delay_ms=250)
+
+        assert _collect(router) == "rápido"
+        assert manager.calls == [P.SLOW, P.FAST]
+        assert manager.cancelled == [P.SLOW]
+        stats = router.get_stats()["providers"]
+        assert stats["fast"]["hedges_won"] == 1
+        assert stats["slow"]["hedges_lost"] == 1
+
+    def test_first_token_timeout_fails_over(self):
+        """Test a provider that never answers is abandoned after the timeout."""
+        manager = _FakeManager({P.SLOW: (5.0, ["tarde"]), P.FAST: (0, ["a", "b"])}, active=P.SLOW)
+        router = LLMRouter(manager, first_token_timeout=0.1)
+
+        assert _collect(router) == "ab"
+        assert "sin respuesta" in router.get_stats()["providers"]["slow"]["last_error"]
+
+    def test_all_providers_failing_returns_error_text(self):
+        """Test the router reports every failure when nothing answers."""
+        manager = _FakeManager({P.BROKEN: (0, RuntimeError("caído"))})
+        router = LLMRouter(manager)
+
+        out = _collect(router)
+        assert out.startswith("Error:")
+        assert "broken: caído" in out
+
+    def test_repeated_failures_put_provider_in_cooldown(self):
+        """Test the circuit breaker moves a failing provider to the back."""
+        now = [100.0]
+        manager = _FakeManager({P.BROKEN: (0, RuntimeError("x")), P.FAST: (0, ["ok"])})
+        router = LLMRouter(manager, clock=lambda: now[0])
+        for _ in range(3):
+            router._record_failure("broken", "x")
+
+        assert router.get_stats()["providers"]["broken"]["cooldown_s"] > 0
+        assert router.rank() == [P.FAST, P.BROKEN]
@@ -0,0 +1,189 @@
+"""Tests for LLM streaming helpers."""
+import asyncio
+import pytest
+from core.LLMManager import LLMProviderError
+from core.llm_streaming import LLMStreamMetrics, ThrottledMessageEditor, stream_chat, stream_completion
+
+
+class _FakeProvider:
+    value = "fake"
+
+
+class _FakeManager:
+    """LLM manager stand-in that yields fixed chunks."""
+
+    active_provider = _FakeProvider()
+
+    def __init__(self, chunks, delay=0.0, error=None):
+        self.chunks = chunks
+        self.delay = delay
+        self.error = error
+        self.closed = False
+        self.stream_flags = []
+
+    async def generate(self, prompt, system="", max_tokens=2000, temperature=0.7, stream=False,
+                       raise_errors=False):
+        self.stream_flags.append(stream)
+        try:
+            for chunk in self.chunks:
+                await asyncio.sleep(self.delay)
+                yield chunk
+            if self.error is not None:
+                if raise_errors:
+                    raise self.error
+                yield str(self.error)
+        finally:
+            self.closed = True
+
+
+class _FakeMemory:
+    """MemoryCore stand-in recording STM writes."""
+
+    def __init__(self):
+        self.stm = []
+
+    def get_stm_context(self, session_id, limit=50):
+        return []
+
+    def get_mtm_context(self, session_id, limit=20):
+        return []
+
+    def query_facts(self, subject=None):
+        return []
+
+    def search_ltm(self, query, limit=3):
+        return []
+
+    def add_to_stm(self, session_id, role, content):
+        self.stm.append((role, content))
+
+
+class TestStreamCompletion:
+    """Test suite for stream_completion."""
+
+    def test_forwards_chunks_and_records_latency(self):
+        """Test chunks pass through in order and metrics are recorded."""
+        manager = _FakeManager(["Ho", "la", " mundo"])
+        metrics = LLMStreamMetrics()
+
+        async def run():
+            return [c async for c in stream_completion("hi", manager=manager, metrics=metrics)]
+
+        assert asyncio.run(run()) == ["Ho", "la", " mundo"]
+        assert manager.stream_flags == [True]
+        stats = metrics.get_stats()["fake"]
+        assert stats["completed"] == 1
+        assert stats["chars"] == 10
+        assert stats["first_token_ms"]["p50"] is not None
+        assert stats["total_ms"]["last"] >= stats["first_token_ms"]["last"]
+
+    def test_cancellation_closes_provider_stream(self):
+        """Test cancelling the consumer closes the upstream generator."""
+        manager = _FakeManager(["a"] * 100, delay=0.01)
+        metrics = LLMStreamMetrics()
+
+        async def consume():
+            async for _ in stream_completion("hi", manager=manager, metrics=metrics):
+                pass
+
+        async def run():
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        assert manager.closed
+        stats = metrics.get_stats()["fake"]
+        assert stats["cancelled"] == 1
+        assert stats["completed"] == 0
+
+
+class TestStreamChat:
+    """Test suite for stream_chat."""
+
+    @pytest.fixture
+    def memory(self, monkeypatch):
+        """Route prompt building and STM writes to a fake memory."""
+        from core import prompt_builder as pb
+        memory = _FakeMemory()
+        monkeypatch.setattr(pb, "prompt_builder", pb.PromptBuilder(memory=memory))
+        monkeypatch.setattr(pb, "build_chat_prompt",
+                            lambda sid, msg, memory=None, **kw: pb.prompt_builder.build(
+                                sid, msg, budget=1000, memory=memory))
+        return memory
+
+    def _chat(self, manager, memory):
+        async def run():
+            return [c async for c in stream_chat("s1", "hola", manager=manager, memory=memory)]
+        return asyncio.run(run())
+
+    def test_completed_turn_is_saved(self, memory):
+        """Test a successful exchange lands in the session STM."""
+        assert self._chat(_FakeManager(["Ho", "la"]), memory) == ["Ho", "la"]
+        assert memory.stm == [("user", "hola"), ("assistant", "Hola")]
+
+    def test_provider_error_is_shown_but_not_saved(self, memory):
+        """Test an error string reaches the user without polluting the STM."""
+        error = LLMProviderError("Error OpenAI: 500 - boom", "openai", 500)
+        assert self._chat(_FakeManager([], error=error), memory) == ["Error OpenAI: 500 - boom"]
+        assert memory.stm == []
+
+
+class TestThrottledMessageEditor:
+    """Test suite for ThrottledMessageEditor."""
+
+    def test_edits_are_throttled_and_flushed(self):
+        """Test the first chunk is sent at once and edits respect the interval."""
+        now = [0.0]
+        sent, edits = [], []
+
+        async def send(text):
+            sent.append(text)
+            return "msg-1"
+
+        async def edit(handle, text):
+            edits.append((handle, text))
+
+        editor = ThrottledMessageEditor(send, edit, min_interval=1.0, clock=lambda: now[0])
+
+        async def run():
+            await editor.feed("Hola")
+            for step, word in [(0.3, " a"), (0.3, " b"), (0.6, " c"), (0.3, " d")]:
+                now[0] += step
+                await editor.feed(word)
+            return await editor.flush()
+
+        assert asyncio.run(run()) == "Hola a b c d"
+        assert sent == ["Hola"]
+        assert edits == [("msg-1", "Hola a b c"), ("msg-1", "Hola a b c d")]
+
+    def test_long_text_continues_in_new_message(self):
+        """Test text over the limit closes the message and continues in a new one."""
+        messages = {}
+
+        async def send(text):
+            handle = len(messages)
+            messages[handle] = text
+            return handle
+
+        async def edit(handle, text):
+            messages[handle] = text
+
+        now = [0.0]
+        editor = ThrottledMessageEditor(send, edit, min_interval=1.0, max_length=10, clock=lambda: now[0])
+        words = ["uno ", "dos ", "tres ", "cuatro ", "cinco ", "x" * 23]
+
+        async def run():
+            for word in words:
+                now[0] += 1.0
+                await editor.feed(word)
+            return await editor.flush()
+
+        full = asyncio.run(run())
+        assert full == "".join(words)
+        assert all(len(t) <= 10 for t in messages.values())
+        assert "".join(messages[i] for i in sorted(messages)) == full
+        assert messages[0] == "uno dos "
+        assert editor.messages == len(messages)
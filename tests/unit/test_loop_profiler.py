@@ -0,0 +1,80 @@
+"""Tests for the opt-in event-loop profiler."""
+import asyncio
+import time
+
+from core.CortexBus import CortexBus
+from core.loop_profiler import LoopProfiler
+
+
+def _use_profiler(monkeypatch, profiler):
+    import core.CortexBus as cortex_module
+    monkeypatch.setattr(cortex_module, "loop_profiler", profiler)
+
+
+class TestLoopProfiler:
+    """Test suite for LoopProfiler."""
+
+    def test_slow_callback_recorded_with_label_and_stack(self):
+        """Test a blocking step is attributed to the active label with a stack sample."""
+        profiler = LoopProfiler(slow_callback_ms=50)
+
+        async def blocking_work():
+            with profiler.label("http:GET /lento"):
+                time.sleep(0.12)
+            await asyncio.sleep(0)
+
+        async def run():
+            profiler.enable()
+            try:
+                await asyncio.create_task(blocking_work())
+                await asyncio.sleep(0.06)
+            finally:
+                profiler.disable()
+
+        asyncio.run(run())
+        report = profiler.get_report()
+        assert report["blocking_by_label"][0]["label"] == "http:GET /lento"
+        slow = report["slow_callbacks"][0]
+        assert slow["duration_ms"] >= 100
+        assert any("blocking_work" in line for line in slow["stack"])
+        assert report["loop_lag"]["max_ms"] >= 50
+
+    def test_bus_subscriber_latency(self, monkeypatch):
+        """Test CortexBus reports per-subscriber latency while profiling."""
+        profiler = LoopProfiler(slow_callback_ms=1000)
+        _use_profiler(monkeypatch, profiler)
+        bus = CortexBus()
+        seen = []
+
+        async def handler(data):
+            seen.append(data)
+
+        bus.subscribe("test.EVENT", handler)
+
+        async def run():
+            profiler.enable()
+            try:
+                for i in range(3):
+                    await bus.publish("test.EVENT", {"i": i}, sender="test")
+                await asyncio.sleep(0.01)
+            finally:
+                profiler.disable()
+
+        asyncio.run(run())
+        assert len(seen) == 3
+        subs = profiler.get_report()["bus_subscribers"]["test.EVENT"]
+        assert list(subs.values())[0]["count"] == 3
+
+    def test_disable_restores_loop(self):
+        """Test disabling puts back the original Handle._run."""
+        original = asyncio.events.Handle._run
+        profiler = LoopProfiler()
+
+        async def run():
+            profiler.enable()
+            assert asyncio.events.Handle._run is not original
+            profiler.disable()
+
+        asyncio.run(run())
+        assert asyncio.events.Handle._run is original
+        assert not profiler.enabled
@@ -0,0 +1,69 @@
+"""Tests for the Qt-free metrics sampler used by the dashboard views."""
+import os
+from types import SimpleNamespace
+
+from core.ui.metrics_sampler import MetricsSampler, diff_keys, recent_files, top_processes
+
+
+class _Client:
+    def get_skills(self):
+        return [{"id": "a"}, {"id": "b"}]
+
+    def get_works(self):
+        raise RuntimeError("sin works_manager")
+
+    def health_check(self):
+        return True
+
+
+class _Registry:
+    def __init__(self):
+        self.calls = 0
+
+    def get_all_apis(self):
+        self.calls += 1
+        return {"x": SimpleNamespace(is_configured=True), "y": SimpleNamespace(is_configured=False)}
+
+
+class TestMetricsSampler:
+    """Test suite for MetricsSampler helpers."""
+
+    def test_recent_files_newest_first(self, temp_dir):
+        """Test only the newest files are returned, across subdirectories."""
+        (temp_dir / "sub").mkdir()
+        for i in range(8):
+            path = temp_dir / ("sub" if i % 2 else ".") / f"w{i}.txt"
+            path.write_text("x")
+            os.utime(path, (1000 + i, 1000 + i))
+        assert [name for _, name in recent_files(temp_dir, 3)] == ["w7.txt", "w6.txt", "w5.txt"]
+        assert recent_files(temp_dir / "missing") == []
+
+    def test_diff_keys(self):
+        """Test only changed keys are reported for add/remove."""
+        removed, added = diff_keys(["a", "b", "c"], ["d", "a", "c"])
+        assert removed == ["b"]
+        assert added == ["d"]
+
+    def test_top_processes(self):
+        """Test idle processes are skipped and the rest ordered by CPU."""
+        procs = [
+            {"pid": 1, "name": "idle", "cpu_percent": 0.0, "memory_info": None, "status": "sleeping"},
+            {"pid": 2, "name": "a", "cpu_percent": 5.0, "memory_info": SimpleNamespace(rss=2 * 1024 ** 2), "status": "running"},
+            {"pid": 3, "name": "b", "cpu_percent": 50.0, "memory_info": None, "status": "running"},
+        ]
+        rows = top_processes(procs, limit=5)
+        assert [r["pid"] for r in rows] == [3, 2]
+        assert rows[1]["ram_mb"] == 2.0
+
+    def test_dashboard_snapshot_queries_registry_once(self, temp_dir):
+        """Test one dashboard sample derives counts and health from a single registry call."""
+        (temp_dir / "report.pdf").write_text("x")
+        registry = _Registry()
+        sampler = MetricsSampler(api_client=_Client(), registry_getter=lambda: registry, works_dir=temp_dir)
+        snap = sampler.sample("dashboard")
+        assert registry.calls == 1
+        assert snap["skills"] == 2
+        assert (snap["apis_configured"], snap["apis_total"]) == (1, 2)
+        assert snap["works"] == 1
+        assert snap["healthy"] is True
+        assert snap["activities"][0]["message"] == "Work generado: report.pdf"
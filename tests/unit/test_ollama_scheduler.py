@@ -0,0 +1,59 @@
+"""Tests for the Ollama request scheduler."""
+import asyncio
+from core.ollama_scheduler import BACKGROUND, INTERACTIVE, OllamaScheduler, llm_priority
+
+
+class TestOllamaScheduler:
+    """Test suite for OllamaScheduler."""
+
+    def test_concurrency_cap_and_priority_order(self):
+        """Test only max_parallel requests run and interactive ones jump the queue."""
+        sched = OllamaScheduler(max_parallel=2)
+        order = []
+        peak = [0]
+        running = [0]
+
+        async def job(name, priority):
+            with llm_priority(priority):
+                async with sched.slot("m"):
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                    order.append(name)
+                    await asyncio.sleep(0.01)
+                    running[0] -= 1
+
+        async def run():
+            tasks = [asyncio.create_task(job(f"bg{i}", BACKGROUND)) for i in range(4)]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(job("ui", INTERACTIVE)))
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        assert peak[0] == 2
+        assert order[:2] == ["bg0", "bg1"]
+        assert order[2] == "ui"
+        stats = sched.get_stats()
+        assert stats["served"] == {"interactive": 1, "background": 4}
+        assert stats["running"] == 0 and stats["queued"] == 0
+
+    def test_cancelled_waiter_does_not_leak_slot(self):
+        """Test cancelling a queued request keeps the slot count consistent."""
+        sched = OllamaScheduler(max_parallel=1)
+
+        async def run():
+            await sched.acquire()
+            waiter = asyncio.create_task(sched.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            sched.release()
+            # El slot vuelve a estar libre
+            await asyncio.wait_for(sched.acquire(), timeout=0.5)
+            sched.release()
+
+        asyncio.run(run())
+        assert sched.get_stats()["running"] == 0
+
+    def test_keep_alive_is_sent_with_every_request(self):
+        """Test the payload carries keep_alive so the model stays loaded."""
+        assert OllamaScheduler(keep_alive="45m").payload_options() == {"keep_alive": "45m"}
@@ -0,0 +1,149 @@
+"""Tests for the outbound message dispatcher."""
+import asyncio
+import time
+
+from core.outbound_dispatcher import OutboundDispatcher, RecentKeys, RetryLater
+
+
+class _FakeBot:
+    """Records sends/edits and can fail the first N calls of a chat."""
+
+    def __init__(self, delay=0.0, flood=None):
+        self.delay = delay
+        self.flood = dict(flood or {})
+        self.sent = []
+        self.edits = []
+        self.times = []
+        self.active = 0
+        self.max_active = 0
+
+    async def send(self, chat_id, text):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.flood.get(chat_id):
+                self.flood[chat_id] -= 1
+                raise RetryLater(0.05)
+            self.sent.append((chat_id, text))
+            self.times.append(time.monotonic())
+            return {"chat_id": chat_id, "text": text}
+        finally:
+            self.active -= 1
+
+    async def edit(self, handle, text):
+        self.edits.append((handle["chat_id"], text))
+        return handle
+
+
+class TestOutboundDispatcher:
+    """Test suite for OutboundDispatcher."""
+
+    def test_per_chat_rate_and_bounded_concurrency(self):
+        """Test one chat is paced by its bucket while many chats share a bounded pool."""
+        bot = _FakeBot(delay=0.02)
+        dispatcher = OutboundDispatcher("test", per_chat=(20.0, 1), global_limit=(1000.0, 1000), concurrency=3)
+
+        async def run():
+            await asyncio.gather(*(dispatcher.submit(1, lambda i=i: bot.send(1, f"m{i}")) for i in range(3)))
+            await dispatcher.broadcast(range(10, 22), lambda cid: bot.send(cid, "hola"))
+
+        asyncio.run(run())
+        same_chat = bot.times[:3]
+        assert same_chat[2] - same_chat[0] >= 0.09
+        assert bot.max_active <= 3
+        assert len(bot.sent) == 15
+
+    def test_retry_after_then_failure_is_reported(self):
+        """Test flood errors are retried after retry_after and other errors are counted."""
+        bot = _FakeBot(flood={1: 2})
+        dispatcher = OutboundDispatcher("test", per_chat=(1000.0, 10), max_retries=3)
+
+        async def broken(cid):
+            if cid == 2:
+                raise ValueError("chat not found")
+            return await bot.send(cid, "x")
+
+        async def run():
+            start = time.monotonic()
+            result = await dispatcher.broadcast([1, 2], broken)
+            return result, time.monotonic() - start
+
+        result, elapsed = asyncio.run(run())
+        assert result == {"sent": 1, "failed": 1}
+        assert bot.sent == [(1, "x")]
+        assert elapsed >= 0.1
+        stats = dispatcher.get_stats()
+        assert stats["retried"] == 2 and stats["failed"] == 1
+        assert stats["errors"] == {"ValueError": 1}
+
+    def test_progress_bursts_become_one_edited_message(self):
+        """Test a burst of progress messages is sent once and then edited."""
+        bot = _FakeBot()
+        dispatcher = OutboundDispatcher("test", per_chat=(1000.0, 10), coalesce_window=0.02)
+
+        async def run():
+            for i in range(4):
+                dispatcher.coalesce(7, f"paso {i}", send=lambda t: bot.send(7, t), edit=bot.edit)
+            await asyncio.sleep(0.06)
+            dispatcher.coalesce(7, "paso 4", send=lambda t: bot.send(7, t), edit=bot.edit)
+            await dispatcher.flush_all()
+
+        asyncio.run(run())
+        assert bot.sent == [(7, "paso 0\npaso 1\npaso 2\npaso 3")]
+        assert bot.edits == [(7, "paso 0\npaso 1\npaso 2\npaso 3\npaso 4")]
+        assert dispatcher.get_stats()["coalesced"] == 3
+
+    def test_dedup_is_lru_bounded(self):
+        """Test duplicate keys are skipped and old keys are forgotten."""
+        keys = RecentKeys(maxlen=2)
+        assert keys.add("a") and keys.add("b")
+        assert not keys.add("a")
+        assert keys.add("c")  # expulsa "b", la menos reciente
+        assert "b" not in keys and "a" in keys and len(keys) == 2
+
+        bot = _FakeBot()
+        dispatcher = OutboundDispatcher("test", per_chat=(1000.0, 10))
+
+        async def run():
+            await dispatcher.broadcast([1, 2], lambda cid: bot.send(cid, "w"), key="work:1")
+            await dispatcher.broadcast([1, 2], lambda cid: bot.send(cid, "w"), key="work:1")
+
+        asyncio.run(run())
+        assert len(bot.sent) == 2
+        assert dispatcher.get_stats()["deduped"] == 1
+
+    def test_failed_send_can_be_retried_with_same_key(self):
+        """Test a failed chat is not remembered as sent, while delivered ones stay deduped."""
+        bot = _FakeBot()
+        dispatcher = OutboundDispatcher("test", per_chat=(1000.0, 10))
+        down = {2}
+
+        async def flaky(cid):
+            if cid in down:
+                raise ConnectionError("timeout")
+            return await bot.send(cid, "w")
+
+        async def run():
+            first = await dispatcher.broadcast([1, 2], flaky, key="work:1")
+            down.clear()
+            second = await dispatcher.broadcast([1, 2], flaky, key="work:1")
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first == {"sent": 1, "failed": 1}
+        assert second == {"sent": 1, "failed": 0}
+        assert bot.sent == [(1, "w"), (2, "w")]
+
+    def test_chat_limiters_are_bounded(self):
+        """Test per-chat limiters are kept in a bounded LRU."""
+        bot = _FakeBot()
+        dispatcher = OutboundDispatcher("test", per_chat=(1000.0, 10), max_chats=3)
+
+        async def run():
+            for cid in range(10):
+                await dispatcher.submit(cid, lambda cid=cid: bot.send(cid, "x"))
+
+        asyncio.run(run())
+        assert dispatcher.get_stats()["chats"] == 3
+        assert list(dispatcher._chats) == [7, 8, 9]
@@ -0,0 +1,80 @@
+"""Tests for the paginated output file index."""
+import os
+import pytest
+from core.output_index import OutputIndex
+
+
+class TestOutputIndex:
+    """Test suite for OutputIndex."""
+
+    @pytest.fixture
+    def index(self, temp_dir):
+        """Create an output tree with files of known mtimes."""
+        for cat, count in (("Imagenes", 5), ("Texto", 3)):
+            (temp_dir / cat).mkdir()
+            for i in range(count):
+                f = temp_dir / cat / f"{cat.lower()}_{i}.bin"
+                f.write_bytes(b"x" * i)
+                ts = 1_700_000_000 + i * 10 + (1 if cat == "Texto" else 0)
+                os.utime(f, (ts, ts))
+        return OutputIndex(temp_dir)
+
+    def test_cursor_pagination_covers_all_files(self, index):
+        """Test pages are disjoint, ordered and exhaustive."""
+        seen = []
+        cursor = None
+        while True:
+            page = index.query(limit=3, cursor=cursor)
+            seen.extend(page["items"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        assert len(seen) == 8
+        assert len({(e["category"], e["name"]) for e in seen}) == 8
+        created = [e["created"] for e in seen]
+        assert created == sorted(created, reverse=True)
+
+    def test_filter_by_category_and_date(self, index):
+        """Test server-side category and date filters."""
+        page = index.query(category="Imagenes", since=1_700_000_020)
+        assert [e["name"] for e in page["items"]] == ["imagenes_4.bin", "imagenes_3.bin", "imagenes_2.bin"]
+        assert page["counts"] == {"Imagenes": 5, "Texto": 3}
+
+    def test_unchanged_directory_served_from_cache(self, index, temp_dir):
+        """Test a folder is rescanned only when its mtime changes."""
+        first = index.categories()["Texto"]
+        assert index.categories()["Texto"] is first
+
+        (temp_dir / "Texto" / "new.txt").write_text("n")
+        os.utime(temp_dir / "Texto", (1_800_000_000, 1_800_000_000))
+        assert len(index.categories()["Texto"]) == 4
+
+    def test_file_edited_in_place_refreshes_after_interval(self, index, temp_dir):
+        """Test an in-place edit is picked up by invalidate() or after the refresh interval."""
+        now = [0.0]
+        index._clock = lambda: now[0]
+        folder = temp_dir / "Texto"
+        index.categories()
+        folder_mtime = folder.stat().st_mtime_ns
+        edited = folder / "texto_0.bin"
+        edited.write_bytes(b"y" * 50)
+        os.utime(edited, (1_900_000_000, 1_900_000_000))
+        os.utime(folder, ns=(folder_mtime, folder_mtime))
+
+        # Dentro del intervalo se sirve la caché sin tocar el disco
+        assert index.categories()["Texto"][0]["name"] == "texto_2.bin"
+        now[0] += index.refresh_interval
+        entries = index.categories()["Texto"]
+        assert (entries[0]["name"], entries[0]["size"]) == ("texto_0.bin", 50)
+
+        edited.write_bytes(b"z")
+        os.utime(folder, ns=(folder_mtime, folder_mtime))
+        index.invalidate("Texto")
+        entries = index.categories()["Texto"]
+        assert (entries[0]["name"], entries[0]["size"]) == ("texto_0.bin", 1)
+
+    def test_iter_entries_streams_in_order(self, index):
+        """Test the streaming iterator yields every matching entry."""
+        names = [e["name"] for e in index.iter_entries(category="Texto")]
+        assert names == ["texto_2.bin", "texto_1.bin", "texto_0.bin"]
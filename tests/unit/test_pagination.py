@@ -0,0 +1,195 @@
+"""Tests for paginated, cached list iteration."""
+import asyncio
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+from core.http_client import HttpClient, ProviderHttp
+from core.pagination import (
+    ConditionalCache, CursorParam, LinkHeader, OffsetParams, PageError, PageNumber, PageRequest, Paginator,
+    project,
+)
+
+
+class _Server:
+    """Local aiohttp server on its own thread; counts hits per path."""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.hits = {}
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+
+        async def handler(request):
+            self.hits[request.path] = self.hits.get(request.path, 0) + 1
+            return await self.routes[request.path](request, self)
+
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handler)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+
+async def _linked(request, server):
+    """5 páginas de 3 elementos enlazadas con Link rel="next"."""
+    page = int(request.query.get("page", 1))
+    size = int(request.query["per_page"])
+    items = [{"id": (page - 1) * size + i, "name": f"r{(page - 1) * size + i}", "big": "x" * 100}
+             for i in range(size)]
+    headers = {}
+    if page < 5:
+        headers["Link"] = f'<{server.url(request.path)}?per_page={size}&page={page + 1}>; rel="next"'
+    return web.json_response(items, headers=headers)
+
+
+async def _etag(request, server):
+    if request.headers.get("If-None-Match") == '"v1"':
+        return web.Response(status=304, headers={"ETag": '"v1"'})
+    return web.json_response([{"id": 1, "title": "uno", "body": "..."}], headers={"ETag": '"v1"'})
+
+
+async def _cursor(request, server):
+    body = await request.json()
+    start = int(body.get("start_cursor") or 0)
+    results = [{"id": i} for i in range(start, min(start + body["page_size"], 7))]
+    more = start + body["page_size"] < 7
+    return web.json_response({"results": results, "has_more": more,
+                              "next_cursor": str(start + body["page_size"]) if more else None})
+
+
+async def _missing(request, server):
+    return web.json_response({"message": "Not Found"}, status=404)
+
+
+class TestPaginator:
+    """Test suite for Paginator and ConditionalCache."""
+
+    def setup_method(self):
+        self.client = HttpClient(limits={})
+        self.http = ProviderHttp("test", self.client)
+
+    def teardown_method(self):
+        self.client.close()
+
+    def test_lazy_iteration_stops_fetching_early(self):
+        """Test pages are fetched only as needed and items are projected."""
+        with _Server({"/repos": _linked}) as server:
+            pages = Paginator(self.http, server.url("/repos"), style=LinkHeader(), page_size=3,
+                              fields={"id": "id", "repo": "name"}, cache=ConditionalCache())
+            first = pages.collect(limit=4)
+            fetched_for_four = server.hits["/repos"]
+
+            async def take(n):
+                out = []
+                async for item in Paginator(self.http, server.url("/repos"), style=LinkHeader(), page_size=3,
+                                            fields=["id"], prefetch=2, cache=ConditionalCache()):
+                    out.append(item)
+                    if len(out) == n:
+                        break
+                return out
+
+            everything = Paginator(self.http, server.url("/repos"), style=LinkHeader(), page_size=3,
+                                   fields=["id"], cache=ConditionalCache()).collect(None)
+            partial = self.client.run(take(2))
+
+        assert first == [{"id": i, "repo": f"r{i}"} for i in range(4)]
+        # 2 páginas para 4 elementos, como mucho una más por adelantado
+        assert 2 <= fetched_for_four <= 3
+        assert [i["id"] for i in everything] == list(range(15))
+        assert partial == [{"id": 0}, {"id": 1}]
+
+    def test_early_break_closes_producer(self):
+        """Test closing the iterator with the prefetch queue full does not hang."""
+        with _Server({"/repos": _linked}) as server:
+            pages = Paginator(self.http, server.url("/repos"), style=LinkHeader(), page_size=3,
+                              prefetch=1, cache=ConditionalCache())
+
+            async def first_then_close():
+                gen = pages.__aiter__()
+                item = await gen.__anext__()
+                # Dar tiempo al productor a llenar la cola y quedarse esperando en put
+                await asyncio.sleep(0.2)
+                await gen.aclose()
+                return item
+
+            async def run():
+                return await asyncio.wait_for(first_then_close(), timeout=5)
+
+            start = time.monotonic()
+            item = self.client.run(run())
+            elapsed = time.monotonic() - start
+        assert item["id"] == 0
+        assert elapsed < 2
+
+    def test_conditional_cache_ttl_and_revalidation(self):
+        """Test fresh pages skip the network and stale ones revalidate with ETag."""
+        cache = ConditionalCache()
+        with _Server({"/issues": _etag}) as server:
+            fresh = Paginator(self.http, server.url("/issues"), fields=["id", "title"], ttl=60, cache=cache)
+            assert fresh.collect() == [{"id": 1, "title": "uno"}]
+            assert fresh.collect() == [{"id": 1, "title": "uno"}]
+            assert server.hits["/issues"] == 1
+
+            stale = Paginator(self.http, server.url("/issues"), fields=["id", "title"], ttl=0, cache=cache)
+            assert stale.collect() == [{"id": 1, "title": "uno"}]
+            assert server.hits["/issues"] == 2
+
+            # Otra identidad no comparte páginas
+            other = Paginator(self.http, server.url("/issues"), fields=["id", "title"], ttl=60, cache=cache,
+                              headers={"Authorization": "token otro"})
+            other.collect()
+            assert server.hits["/issues"] == 3
+
+        assert cache.get_stats() == {"hits": 1, "revalidated": 1, "misses": 2, "entries": 2}
+        assert cache.invalidate(server.url("/issues")) == 2
+
+    def test_body_cursor_and_errors(self):
+        """Test cursors in the POST body, offsets and HTTP errors."""
+        with _Server({"/query": _cursor, "/missing": _missing}) as server:
+            rows = Paginator(self.http, server.url("/query"), method="POST", json_body={"filter": {}},
+                             style=CursorParam("start_cursor", "next_cursor", size="page_size",
+                                               in_body=True, has_more="has_more"),
+                             items="results", page_size=3, cache=ConditionalCache()).collect(None)
+            with pytest.raises(PageError) as err:
+                Paginator(self.http, server.url("/missing"), cache=ConditionalCache()).collect()
+
+        assert [r["id"] for r in rows] == list(range(7))
+        assert server.hits["/query"] == 3
+        assert err.value.status_code == 404
+
+        offset = OffsetParams()
+        req = offset.first(PageRequest("u", {"jql": "x"}), 50)
+        assert offset.next(req, {"total": 120}, {}, 50, 50).params["startAt"] == 50
+        assert offset.next(PageRequest("u", {"startAt": 100}), {"total": 120}, {}, 20, 50) is None
+
+        pages = PageNumber("page", "limit", in_body="variables")
+        req = pages.first(PageRequest("u", body={"query": "q", "variables": {}}), 2)
+        assert req.body["variables"] == {"page": 1, "limit": 2}
+        assert pages.next(req, {}, {}, 2, 2).body["variables"]["page"] == 2
+        assert pages.next(req, {}, {}, 1, 2) is None
+
+        assert project({"a": {"b": 1}, "c": 2}, {"x": "a.b", "y": "a.z"}) == {"x": 1, "y": None}
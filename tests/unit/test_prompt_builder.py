@@ -0,0 +1,68 @@
+"""Tests for token-budgeted prompt assembly."""
+from core.prompt_builder import PromptBuilder, estimate_tokens, truncate_to_tokens
+
+
+def _memory(turns=10, facts=3, ltm=3, size=40):
+    filler = " ".join(["palabra"] * size)
+    return {
+        "stm": [f"{'Usuario' if i % 2 == 0 else 'MININA'}: turno {i} {filler}" for i in range(turns)],
+        "mtm": [f"Usuario: antiguo {i} {filler}" for i in range(5)],
+        "facts": [f"servidor{i} usa puerto {8000 + i}" for i in range(facts)],
+        "ltm": [f"nota {i} sobre servidores {filler}" for i in range(ltm)],
+    }
+
+
+class TestPromptBuilder:
+    """Test suite for PromptBuilder."""
+
+    def test_estimate_and_truncate(self):
+        """Test the estimator counts punctuation and truncation fits the budget."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("hola, mundo") == 4
+        text = " ".join(["contenido"] * 200)
+        cut = truncate_to_tokens(text, 50)
+        assert estimate_tokens(cut) <= 50
+        assert cut.endswith("[…]")
+
+    def test_everything_fits_with_large_budget(self):
+        """Test all sections are included when the budget allows."""
+        builder = PromptBuilder()
+        built = builder.build("s1", "¿qué puerto usa el servidor?", system="Eres MININA",
+                              budget=100_000, memory=_memory())
+        assert "[Hechos conocidos]" in built.prompt
+        assert "[Memoria relevante]" in built.prompt
+        assert "[Contexto previo]" in built.prompt
+        assert built.prompt.endswith("Usuario: ¿qué puerto usa el servidor?")
+        assert not built.dropped
+
+    def test_budget_respected_and_priority_order(self):
+        """Test a tight budget keeps recent turns and drops older history first."""
+        builder = PromptBuilder()
+        built = builder.build("s1", "¿qué puerto usa el servidor?", system="Eres MININA",
+                              budget=300, memory=_memory())
+        assert built.prompt_tokens <= 300
+        assert "turno 9" in built.prompt
+        assert "antiguo" not in built.prompt
+        assert built.dropped.get("history")
+        assert "message" not in built.dropped
+
+    def test_oversized_message_is_truncated_last(self):
+        """Test the user message is only cut when nothing else fits."""
+        builder = PromptBuilder()
+        message = " ".join(["pregunta"] * 500)
+        built = builder.build("s1", message, budget=256, memory=_memory())
+        assert built.prompt_tokens <= 256
+        assert built.dropped["message"] == 1
+        assert "[Conversación reciente]" not in built.prompt
+
+    def test_segment_counts_are_cached_per_session(self):
+        """Test rebuilding a growing conversation only tokenizes new segments."""
+        builder = PromptBuilder()
+        mem = _memory()
+        builder.build("s1", "hola", budget=100_000, memory=mem)
+        misses = builder.token_cache.misses
+        mem["stm"].append("MININA: nuevo turno")
+        builder.build("s1", "hola", budget=100_000, memory=mem)
+        # Sólo el turno nuevo (y el que sale de la ventana reciente) se cuenta de nuevo
+        assert builder.token_cache.misses - misses <= 2
+        assert builder.token_cache.hits > builder.token_cache.misses - misses
@@ -0,0 +1,58 @@
+"""Tests for the sandbox result transport."""
+import os
+import pickle
+import time
+
+from core.result_transport import (
+    ResultBlob, cleanup_spills, move_outputs, restore_spilled, spill_large_values,
+)
+
+
+class TestResultTransport:
+    """Test suite for spilling large results and moving outputs."""
+
+    def test_large_values_are_spilled_small_ones_stay_inline(self, temp_dir):
+        """Test only values over the limit leave the queue payload."""
+        big = os.urandom(4096)
+        text = "á" * 3000
+        result = {"image": big, "nested": [{"b64": text}], "message": "ok", "thumb": b"x" * 10}
+
+        packed = spill_large_values(result, temp_dir / "spill", limit=1024)
+        assert packed["message"] == "ok" and packed["thumb"] == b"x" * 10
+        assert packed["image"]["size"] == 4096
+        assert len(pickle.dumps(packed)) < 1024
+
+        restored = restore_spilled(pickle.loads(pickle.dumps(packed)))
+        assert restored == result
+
+    def test_lazy_blobs_move_without_copy(self, temp_dir):
+        """Test lazy restore returns blobs that can be renamed into place."""
+        data = os.urandom(2048)
+        packed = spill_large_values({"pdf": data}, temp_dir / "spill", limit=1024)
+        blob = restore_spilled(packed, materialize=False)["pdf"]
+        assert isinstance(blob, ResultBlob) and len(blob) == 2048
+        inode = os.stat(blob.path).st_ino
+
+        dest = blob.move_to(temp_dir / "works" / "doc.pdf")
+        assert os.stat(dest).st_ino == inode
+        assert bytes(blob) == data
+
+    def test_move_outputs_and_cleanup(self, temp_dir):
+        """Test outputs are moved (not copied) and stale spills are removed."""
+        out = temp_dir / "sandbox" / "output"
+        out.mkdir(parents=True)
+        (out / "a.png").write_bytes(b"a" * 100)
+        inode = os.stat(out / "a.png").st_ino
+
+        moved = move_outputs(out, temp_dir / "final")
+        assert moved == [str(temp_dir / "final" / "a.png")]
+        assert os.stat(moved[0]).st_ino == inode
+        assert not (out / "a.png").exists()
+
+        spills = temp_dir / "results"
+        (spills / "old").mkdir(parents=True)
+        (spills / "new").mkdir()
+        old = time.time() - 7200
+        os.utime(spills / "old", (old, old))
+        assert cleanup_spills(spills, max_age=3600) == 1
+        assert sorted(p.name for p in spills.iterdir()) == ["new"]
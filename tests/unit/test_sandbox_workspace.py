@@ -0,0 +1,72 @@
+"""Tests for the sandbox workspace pool."""
+import os
+import time
+
+import pytest
+
+from core.sandbox_workspace import WorkspacePool
+
+
+class TestWorkspacePool:
+    """Test suite for WorkspacePool."""
+
+    def test_released_workspaces_are_emptied_and_reused(self, temp_dir):
+        """Test a released workspace comes back empty with output/ and is reused."""
+        pool = WorkspacePool(temp_dir / "sandbox", size=2)
+        assert pool.wait_idle(5)
+
+        ws = pool.acquire()
+        assert (ws / "output").is_dir()
+        (ws / "output" / "img.png").write_bytes(b"x" * 10)
+        (ws / "__pycache__").mkdir()
+        (ws / "__pycache__" / "skill.pyc").write_bytes(b"c")
+
+        pool.release(ws)
+        assert pool.wait_idle(5)
+        reused = [pool.acquire() for _ in range(2)]
+        assert ws in reused
+        assert sorted(os.listdir(ws)) == ["output"] and not os.listdir(ws / "output")
+
+        stats = pool.get_stats()
+        assert stats["created"] == 2 and stats["reused"] == 3 and stats["in_use"] == 2
+
+    def test_unchanged_files_are_shared_read_only(self, temp_dir):
+        """Test identical content is stored once and linked into each workspace."""
+        pool = WorkspacePool(temp_dir / "sandbox", size=2)
+        a, b = pool.acquire(), pool.acquire()
+        code = b"def execute(context):\n    return 'ok'\n"
+
+        pool.share(a, "skill.py", code)
+        pool.share(b, "skill.py", code)
+        assert (a / "skill.py").read_bytes() == code
+        assert len(os.listdir(pool.shared_dir)) == 1
+        if hasattr(os, "link"):
+            assert os.stat(a / "skill.py").st_ino == os.stat(b / "skill.py").st_ino
+        if os.name == "posix" and os.geteuid() != 0:
+            with pytest.raises(PermissionError):
+                (a / "skill.py").write_bytes(b"otro")
+
+        pool.release(a)
+        pool.release(b)
+        assert pool.wait_idle(5)
+        assert next(pool.shared_dir.iterdir()).read_bytes() == code
+
+    def test_orphans_are_collected_on_startup(self, temp_dir):
+        """Test stale dirs from earlier runs are removed and fresh ones kept."""
+        base = temp_dir / "miia_skill_sim"
+        for name in ("sandbox_1", "extract_2", "skill_imagen_x", "fresh_extract"):
+            (base / name / "output").mkdir(parents=True)
+        (base / f"ws_{os.getpid()}_9_abc").mkdir()
+        (base / ".shared").mkdir()
+        (base / ".shared" / "unused").write_bytes(b"x")
+        old = time.time() - 7200
+        for name in ("sandbox_1", "extract_2", "skill_imagen_x", ".shared/unused"):
+            os.utime(base / name, (old, old))
+
+        pool = WorkspacePool(base, size=1, orphan_max_age=3600)
+        assert pool.wait_idle(5)
+        remaining = sorted(p.name for p in base.iterdir() if not p.name.startswith("ws_"))
+        assert remaining == [".shared", "fresh_extract"]
+        assert not (base / f"ws_{os.getpid()}_9_abc").exists()
+        assert not os.listdir(base / ".shared")
+        assert pool.get_stats()["collected"] == 5
@@ -0,0 +1,165 @@
+"""Tests for the indexed saved-jobs store and the recurring-job scheduler."""
+import asyncio
+import json
+from datetime import datetime
+
+from core.job_scheduler import JobScheduler, next_run_time
+from core.ollama_scheduler import BACKGROUND, current_priority
+from core.saved_jobs import JobStatus, JobType, SavedJob, SavedJobsManager
+
+
+def _job(job_id, **kwargs):
+    defaults = dict(name=f"Trabajo {job_id}", description="", objective=f"objetivo {job_id}",
+                    job_type=JobType.CUSTOM, status=JobStatus.ACTIVE, plan_template={}, skills_required=[])
+    defaults.update(kwargs)
+    return SavedJob(job_id=job_id, **defaults)
+
+
+class TestSavedJobsManager:
+    """Test suite for SavedJobsManager indexes and journal."""
+
+    def test_indexes_follow_updates(self, temp_dir):
+        """Test status/type/tag/text lookups and stats stay consistent with edits."""
+        manager = SavedJobsManager(data_dir=str(temp_dir))
+        assert manager is not SavedJobsManager(data_dir=str(temp_dir))
+        assert manager.get_stats()["total"] == 6
+        assert [j.job_id for j in manager.get_jobs_by_tag("stock")] == ["stock_supermarket_daily", "inventory_monthly"]
+        assert [j.job_id for j in manager.search_jobs("NEWSLETTER")] == ["send_newsletter"]
+        assert {j.job_id for j in manager.search_jobs("ve")} == {
+            j.job_id for j in manager.get_all_jobs()
+            if any("ve" in f.lower() for f in [j.name, j.description, j.objective, *j.tags])
+        }
+
+        assert manager.update_job("send_newsletter", {"status": "archived", "tags": ["boletín"],
+                                                      "job_type": JobType.REPORT})
+        assert manager.search_jobs("boletín")[0].job_id == "send_newsletter"
+        assert manager.get_jobs_by_tag("email") == []
+        assert "send_newsletter" not in {j.job_id for j in manager.get_active_jobs()}
+        assert "send_newsletter" in {j.job_id for j in manager.get_jobs_by_type(JobType.REPORT)}
+
+        manager.activate_job("backup_weekly")
+        assert manager.delete_job("social_media_post")
+        stats = manager.get_stats()
+        assert stats == {
+            "total": 5, "active": 4, "recurring": 5, "total_executions": 1,
+            "by_type": {"automation": 1, "report": 3, "integration": 0, "communication": 0,
+                        "data_processing": 1, "custom": 0},
+        }
+        assert manager.search_jobs("redes") == []
+
+    def test_journal_is_incremental_and_replayed(self, temp_dir):
+        """Test changes append to the journal, replay on load and compact atomically."""
+        manager = SavedJobsManager(data_dir=str(temp_dir), create_samples=False)
+        snapshot = temp_dir / "saved_jobs.json"
+        journal = temp_dir / "saved_jobs.journal.jsonl"
+        for i in range(5):
+            manager.create_job(_job(f"j{i}", tags=["lote"]))
+        manager.record_execution_result("j1", True)
+        manager.delete_job("j3")
+        assert not snapshot.exists()
+        assert len(journal.read_text().splitlines()) == 7
+
+        # Una línea cortada a medias al final no impide cargar
+        with open(journal, "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "job": {"job_id"')
+        reloaded = SavedJobsManager(data_dir=str(temp_dir), create_samples=False)
+        assert [j.job_id for j in reloaded.get_jobs_by_tag("lote")] == ["j0", "j1", "j2", "j4"]
+        assert reloaded.get_job("j1").success_count == 1
+        # Lo escrito después del corte sobrevive a la siguiente carga
+        reloaded.create_job(_job("j5", tags=["lote"]))
+        again = SavedJobsManager(data_dir=str(temp_dir), create_samples=False)
+        assert [j.job_id for j in again.get_jobs_by_tag("lote")] == ["j0", "j1", "j2", "j4", "j5"]
+
+        for i in range(300):
+            reloaded.update_job("j0", {"description": f"v{i}"})
+        assert snapshot.exists() and len(journal.read_text().splitlines()) < 300
+        assert json.loads(snapshot.read_text())["j0"]["description"].startswith("v")
+        final = SavedJobsManager(data_dir=str(temp_dir), create_samples=False)
+        assert final.get_job("j0").description == "v299"
+
+
+class TestJobScheduler:
+    """Test suite for JobScheduler."""
+
+    def test_next_run_time(self):
+        """Test daily, weekly and monthly occurrences."""
+        after = datetime(2026, 11, 20, 9, 30)  # viernes
+        daily = _job("d", is_recurring=True, frequency="daily", schedule_time="08:00")
+        assert next_run_time(daily, after) == datetime(2026, 11, 21, 8, 0)
+        weekly = _job("w", is_recurring=True, frequency="weekly", schedule_time="02:00", schedule_days=["domingo"])
+        assert next_run_time(weekly, after) == datetime(2026, 11, 22, 2, 0)
+        monthly = _job("m", is_recurring=True, frequency="monthly", schedule_time="10:00", schedule_days=["31"])
+        assert next_run_time(monthly, after) == datetime(2026, 11, 30, 10, 0)
+
+    def test_catch_up_misfire_and_reschedule(self, temp_dir):
+        """Test a recent missed run fires once, an old one is skipped, and edits reschedule."""
+        now = datetime(2026, 10, 18, 8, 30)
+        manager = SavedJobsManager(data_dir=str(temp_dir), create_samples=False)
+        daily = dict(is_recurring=True, frequency="daily", schedule_time="08:00")
+        manager.create_job(_job("reciente", last_executed="2026-10-17T08:00:05", **daily))
+        manager.create_job(_job("viejo", last_executed="2026-10-15T08:00:00", **daily))
+        manager.create_job(_job("manual"))
+        ran = []
+        priorities = []
+
+        async def runner(job_data):
+            ran.append(job_data["job_id"])
+            priorities.append(current_priority())
+            return {"success": True}
+
+        async def run():
+            scheduler = JobScheduler(manager, runner=runner, jitter=0, misfire_grace=3600,
+                                     clock=lambda: now.timestamp())
+            await scheduler.start()
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+                if scheduler.stats["succeeded"]:
+                    break
+            stats = scheduler.get_stats()
+            manager.update_job("viejo", {"status": JobStatus.ARCHIVED})
+            await asyncio.sleep(0.01)
+            after_archive = scheduler.get_stats()
+            await scheduler.stop()
+            return stats, after_archive
+
+        stats, after_archive = asyncio.run(run())
+        assert ran == ["reciente"]
+        assert priorities == [BACKGROUND]
+        assert (stats["fired"], stats["succeeded"], stats["misfired"]) == (1, 1, 1)
+        assert sorted(stats["next_runs"], key=lambda r: r["job_id"]) == [
+            {"job_id": "reciente", "run_at": "2026-10-19T08:00:00"},
+            {"job_id": "viejo", "run_at": "2026-10-19T08:00:00"},
+        ]
+        assert after_archive["scheduled"] == 1
+        job = manager.get_job("reciente")
+        assert (job.execution_count, job.success_count) == (1, 1)
+
+    def test_samples_are_not_scheduled_and_plans_are_not_successes(self, temp_dir):
+        """Test seeded samples stay idle and a plan-only run is recorded as planned."""
+        now = datetime(2026, 10, 18, 8, 30)
+        manager = SavedJobsManager(data_dir=str(temp_dir))
+        assert all(j.is_sample for j in manager.get_all_jobs())
+        manager.create_job(_job("propio", is_recurring=True, frequency="daily", schedule_time="08:00",
+                                last_executed="2026-10-17T08:00:05"))
+        ran = []
+
+        async def runner(job_data):
+            ran.append(job_data["job_id"])
+            return {"status": "planned", "plan_id": "p1"}
+
+        async def run():
+            scheduler = JobScheduler(manager, runner=runner, jitter=0, clock=lambda: now.timestamp())
+            await scheduler.start()
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+                if scheduler.stats["planned"]:
+                    break
+            stats = scheduler.get_stats()
+            await scheduler.stop()
+            return stats
+
+        stats = asyncio.run(run())
+        assert ran == ["propio"]
+        assert (stats["planned"], stats["succeeded"], stats["scheduled"]) == (1, 0, 1)
+        job = manager.get_job("propio")
+        assert (job.planned_count, job.success_count) == (1, 0)
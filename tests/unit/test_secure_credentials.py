@@ -0,0 +1,63 @@
+"""Tests for the unified write-behind credential store."""
+import json
+import time
+
+from core import llm_extension
+from core.SecureCredentials import SecureCredentialStore, credential_store
+
+
+def _read(store):
+    raw = store.creds_file.read_bytes()
+    if store._fernet:
+        raw = store._fernet.decrypt(raw)
+    return json.loads(raw)
+
+
+class TestSecureCredentialStore:
+    """Test suite for SecureCredentialStore."""
+
+    def test_writes_are_batched_and_atomic(self, temp_dir):
+        """Test a burst of writes becomes one file rewrite and reads stay in memory."""
+        store = SecureCredentialStore(config_dir=temp_dir, flush_delay=0.1)
+        store.set_api_key("groq", "gsk-1")
+        store.set_api_key("openai", "sk-2")
+        store.set_credential("telegram", "chat_id", "42")
+        assert store.delete_credential("telegram", "chat_id")
+        assert store.delete_credential("telegram", "chat_id") is False
+
+        assert store.has_key("groq") and not store.has_key("gemini")
+        assert store.get_stats()["pending"] and not store.creds_file.exists()
+
+        deadline = time.monotonic() + 2
+        while store.get_stats()["pending"] and time.monotonic() < deadline:
+            time.sleep(0.02)
+        stats = store.get_stats()
+        assert (stats["writes"], stats["flushes"]) == (4, 1)
+        assert sorted(_read(store)) == ["groq", "openai", "telegram"]
+        assert not list(temp_dir.glob("*.tmp"))
+
+        reloaded = SecureCredentialStore(config_dir=temp_dir)
+        assert reloaded.get_api_key("openai") == "sk-2"
+        assert reloaded.list_providers() == ["groq", "openai"]
+
+    def test_flush_and_unreadable_file(self, temp_dir):
+        """Test explicit flush and that an unreadable file is moved aside, not overwritten."""
+        store = SecureCredentialStore(config_dir=temp_dir, flush_delay=60)
+        store.set_api_key("gemini", "g-1")
+        assert store.flush() and store.get_stats()["flushes"] == 1
+        assert store.flush() and store.get_stats()["flushes"] == 1
+        assert store.delete_api_key("gemini")
+        store.flush()
+        assert _read(store) == {}
+
+        store.creds_file.write_bytes(b"\x00 no es json ni token")
+        broken = SecureCredentialStore(config_dir=temp_dir, flush_delay=0)
+        assert broken.list_services() == []
+        assert (temp_dir / "credentials.enc.bak").read_bytes() == b"\x00 no es json ni token"
+        broken.set_credential("svc", "k", "v")
+        assert _read(broken) == {"svc": {"k": "v"}}
+
+    def test_single_shared_instance(self):
+        """Test llm_extension exposes the same store as SecureCredentials."""
+        assert llm_extension.credential_store is credential_store
+        assert llm_extension.SecureCredentialStore is SecureCredentialStore
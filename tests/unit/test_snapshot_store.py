@@ -0,0 +1,98 @@
+"""Tests for content-addressed installation snapshots."""
+import os
+
+from core.snapshot_store import SnapshotStore
+
+
+def _tree(base, files):
+    for rel, data in files.items():
+        path = base / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+class TestSnapshotStore:
+    """Test suite for SnapshotStore."""
+
+    def test_unchanged_files_are_linked_not_copied(self, temp_dir):
+        """Test a second snapshot only stores what changed and shares the rest."""
+        app = temp_dir / "app"
+        _tree(app, {"core/a.py": b"a = 1\n", "core/b.py": b"b = 2\n", "core/__pycache__/a.pyc": b"x"})
+        version = app / "version.json"
+        version.write_text('{"version": "1.0.0"}')
+        store = SnapshotStore(temp_dir / "snapshots")
+        roots = {"core": app / "core", "version.json": version}
+
+        first = store.create("s1", roots, meta={"version": "1.0.0"})
+        assert first["stored"] == 3 and first["reused"] == 0
+
+        (app / "core" / "b.py").write_bytes(b"b = 3\n")
+        second = store.create("s2", roots)
+        assert second["stored"] == 1 and second["reused"] == 2
+        assert not (temp_dir / "snapshots" / "s2" / "core" / "__pycache__").exists()
+
+        if hasattr(os, "link"):
+            ino = lambda name: os.stat(temp_dir / "snapshots" / name / "core" / "a.py").st_ino
+            assert ino("s1") == ino("s2")
+        assert store.get_stats()["objects"] == 4
+        assert [s["name"] for s in store.list()] == ["s2", "s1"]
+        assert store.verify("s2", deep=True) == {"ok": True, "checked": 3, "missing": [], "corrupt": []}
+
+    def test_restore_copies_only_differences(self, temp_dir):
+        """Test rollback rewrites changed files, recreates deleted ones and drops new ones."""
+        app = temp_dir / "app"
+        _tree(app, {"core/a.py": b"a\n", "core/b.py": b"b\n", "core/sub/c.py": b"c\n"})
+        store = SnapshotStore(temp_dir / "snapshots")
+        store.create("s1", {"core": app / "core"})
+
+        (app / "core" / "a.py").write_bytes(b"a (update)\n")
+        (app / "core" / "sub" / "c.py").unlink()
+        (app / "core" / "nuevo.py").write_bytes(b"nuevo\n")
+
+        stats = store.restore("s1")
+        assert (stats["restored"], stats["removed"], stats["unchanged"]) == (2, 1, 1)
+        assert (app / "core" / "a.py").read_bytes() == b"a\n"
+        assert (app / "core" / "sub" / "c.py").read_bytes() == b"c\n"
+        assert not (app / "core" / "nuevo.py").exists()
+        # El archivo restaurado es una copia, no un enlace a la tienda
+        assert os.stat(app / "core" / "a.py").st_nlink == 1
+
+        # Sin cambios: nada que copiar
+        assert store.restore("s1")["restored"] == 0
+
+    def test_excluded_roots_are_left_alone(self, temp_dir):
+        """Test rollback neither rewrites nor cleans a preserved root."""
+        app = temp_dir / "app"
+        _tree(app, {"core/a.py": b"a\n", "user_config/prefs.json": b"{}"})
+        store = SnapshotStore(temp_dir / "snapshots")
+        store.create("s1", {"core": app / "core", "user_config": app / "user_config"})
+
+        (app / "core" / "a.py").write_bytes(b"a2\n")
+        (app / "user_config" / "prefs.json").write_bytes(b'{"tema": "oscuro"}')
+        (app / "user_config" / "credentials.enc").write_bytes(b"nuevo")
+
+        stats = store.restore("s1", exclude=("user_config",))
+        assert (stats["restored"], stats["removed"]) == (1, 0)
+        assert (app / "core" / "a.py").read_bytes() == b"a\n"
+        assert (app / "user_config" / "prefs.json").read_bytes() == b'{"tema": "oscuro"}'
+        assert (app / "user_config" / "credentials.enc").exists()
+
+    def test_retention_and_verification(self, temp_dir):
+        """Test pruning drops old snapshots and orphan objects; verify spots damage."""
+        app = temp_dir / "app"
+        store = SnapshotStore(temp_dir / "snapshots")
+        for i in range(3):
+            _tree(app, {"core/v.py": f"v = {i}\n".encode(), "core/fijo.py": b"fijo\n"})
+            store.create(f"s{i}", {"core": app / "core"})
+
+        assert store.prune(keep=2) == ["s0"]
+        assert store.get_stats() == {"snapshots": 2, "objects": 3, "bytes": 5 + 6 + 6}
+
+        entry = store.read_manifest("s2")["files"]["core/v.py"]
+        obj = store._object_path(entry["sha256"])
+        os.chmod(obj, 0o644)
+        obj.write_bytes(b"v = X\n")
+        assert store.verify("s2")["ok"]
+        assert store.verify("s2", deep=True)["corrupt"] == ["core/v.py"]
+        obj.unlink()
+        assert store.verify("s2")["missing"] == ["core/v.py"]
@@ -0,0 +1,81 @@
+"""Tests for the watchdog's non-blocking resource sampling and latency histograms."""
+import asyncio
+import time
+
+from core.SystemWatchdog import (
+    LatencyHistogram, LoopLagMonitor, MiIAWatchdog, ResourceSample, ResourceSampler,
+)
+
+
+def _fake_sample(values):
+    it = iter(values)
+
+    def sample():
+        cpu = next(it)
+        return ResourceSample(timestamp=time.time(), cpu_percent=cpu, memory_percent=50.0,
+                              disk_percent=10.0, process_rss_mb=100.0)
+    return sample
+
+
+class TestWatchdogSampling:
+    """Test suite for watchdog instrumentation."""
+
+    def test_histogram_percentiles(self):
+        """Test percentiles report the upper bound of the matching bucket."""
+        hist = LatencyHistogram(buckets=(10, 100, 1000))
+        for value in [1, 2, 3, 50, 60, 500, 5000]:
+            hist.observe(value)
+        data = hist.to_dict()
+        assert data["count"] == 7
+        assert data["p50_ms"] == 100.0
+        assert data["p99_ms"] == 5000.0
+        assert data["buckets"] == {"le_10": 3, "le_100": 2, "le_1000": 1, "inf": 1}
+
+    def test_sampler_ring_buffer_and_summary(self):
+        """Test the ring buffer keeps the last N samples and summarises them."""
+        sampler = ResourceSampler(window=3, sample_fn=_fake_sample([10, 20, 30, 40]))
+        for _ in range(4):
+            sampler.sample_once()
+        assert [s.cpu_percent for s in sampler.recent()] == [20, 30, 40]
+        summary = sampler.summary()
+        assert summary["latest"]["cpu_percent"] == 40
+        assert summary["window"]["cpu_max"] == 40
+        assert summary["window"]["cpu_avg"] == 30.0
+
+    def test_sampler_thread_runs_off_loop(self):
+        """Test the sampler thread collects samples on its own."""
+        sampler = ResourceSampler(interval=0.01, sample_fn=_fake_sample(iter(lambda: 5.0, None)))
+        sampler.start()
+        time.sleep(0.1)
+        sampler.stop()
+        assert len(sampler.recent()) >= 2
+        assert not sampler.running
+
+    def test_loop_lag_detects_blocking_call(self):
+        """Test a blocking call inside the loop shows up as lag."""
+        monitor = LoopLagMonitor(interval=0.01)
+
+        async def run():
+            task = asyncio.create_task(monitor.run())
+            await asyncio.sleep(0.02)
+            time.sleep(0.15)  # bloquea el loop
+            await asyncio.sleep(0.03)
+            task.cancel()
+
+        asyncio.run(run())
+        assert monitor.to_dict()["recent_max_ms"] >= 100
+
+    def test_status_summary_exposes_instrumentation(self, temp_dir, monkeypatch):
+        """Test get_status_summary includes resources, loop lag and heartbeat histograms."""
+        monkeypatch.setenv("HOME", str(temp_dir))
+        dog = MiIAWatchdog()
+        dog.resources = ResourceSampler(sample_fn=_fake_sample([95.0]))
+        dog.resources.sample_once()
+        dog.register_service("telegram")
+        dog.heartbeat("telegram")
+        dog._check_system_resources()
+        summary = dog.get_status_summary()
+        assert summary["resources"]["latest"]["cpu_percent"] == 95.0
+        assert summary["heartbeats"]["telegram"]["count"] == 1
+        assert "histogram" in summary["event_loop"]
+        assert dog._resource_alerts == {"CPU"}
@@ -0,0 +1,144 @@
+"""
+Benchmark del cliente HTTP compartido contra un servidor mock local.
+
+Compara tres formas de hacer N peticiones a una API que tarda --latency-ms:
+  per_call      urllib bloqueante, una conexión nueva por petición
+                (equivale al requests.get sin Session que usaban los managers)
+  shared_sync   ProviderHttp.get: puente sync sobre el pool keep-alive
+  shared_async  request_async concurrente (asyncio.gather) sobre el mismo pool
+
+Para cada escenario reporta tiempo total, peticiones/s y cuántas conexiones
+TCP distintas vio el servidor.
+
+Uso:
+    python tools/bench_http.py
+    python tools/bench_http.py --requests 500 --latency-ms 20 --save bench_http.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from typing import Dict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+class MockAPI:
+    """Servidor aiohttp en su propio thread que simula la latencia de una API"""
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.peers = set()
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        from aiohttp import web
+        asyncio.set_event_loop(self._loop)
+
+        async def handler(request):
+            self.peers.add(request.transport.get_extra_info("peername"))
+            await asyncio.sleep(self.latency)
+            return web.json_response({"ok": True, "path": request.path})
+
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self) -> "MockAPI":
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+
+def _measure(server: MockAPI, n: int, fn) -> Dict:
+    server.peers.clear()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(n / elapsed, 1),
+        "connections": len(server.peers),
+    }
+
+
+def run(args) -> Dict:
+    from core.http_client import HttpClient, ProviderHttp
+
+    server = MockAPI(args.latency_ms).start()
+    client = HttpClient(limits={})
+    http = ProviderHttp("bench", client)
+    url = server.url("/api/items")
+    report = {"config": vars(args)}
+    try:
+        def per_call():
+            for _ in range(args.requests):
+                with urllib.request.urlopen(url, timeout=30) as resp:
+                    json.loads(resp.read())
+
+        def shared_sync():
+            for _ in range(args.requests):
+                http.get(url, timeout=30).json()
+
+        def shared_async():
+            async def main():
+                sem = asyncio.Semaphore(args.concurrency)
+
+                async def one():
+                    async with sem:
+                        (await http.get_async(url, timeout=30)).json()
+
+                await asyncio.gather(*(one() for _ in range(args.requests)))
+                await client.aclose()
+            asyncio.run(main())
+
+        http.get(url)  # calentar el puente y el pool
+        report["per_call"] = _measure(server, args.requests, per_call)
+        report["shared_sync"] = _measure(server, args.requests, shared_sync)
+        report["shared_async"] = _measure(server, args.requests, shared_async)
+        report["client_stats"] = client.get_stats()["providers"].get("bench")
+    finally:
+        client.close()
+        server.stop()
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del cliente HTTP compartido")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="latencia simulada de la API")
+    parser.add_argument("--concurrency", type=int, default=10, help="peticiones en vuelo (shared_async)")
+    parser.add_argument("--save", help="guardar el reporte como JSON")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Benchmark de bloqueo del event loop con el perfilador activo.
+
+Publica eventos en un CortexBus real con suscriptores típicos del proyecto y
+mide el lag del loop mientras tanto:
+  blocking   un suscriptor async escribe en SQLite de forma síncrona
+  offloaded  el mismo trabajo vía asyncio.to_thread
+
+El reporte incluye los callbacks lentos con su pila y el suscriptor
+responsable. Con --max-lag-ms el proceso sale con código 1 si el p99 del lag
+del escenario indicado lo supera (para CI / pre-commit).
+
+Uso:
+    python tools/bench_loop.py
+    python tools/bench_loop.py --scenario offloaded --max-lag-ms 50 --save bench_loop.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Dict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def _sqlite_write(path: str, payload: Dict, rows: int) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS events (topic TEXT, data TEXT)")
+        for _ in range(rows):
+            conn.execute("INSERT INTO events VALUES (?, ?)", ("bench", json.dumps(payload)))
+            conn.commit()  # un commit por fila: fsync, como los stores reales
+    finally:
+        conn.close()
+
+
+async def run_scenario(name: str, events: int, rows: int, threshold_ms: float) -> Dict:
+    from core.CortexBus import CortexBus
+    from core.loop_profiler import LoopProfiler
+    import core.CortexBus as cortex_module
+    import core.loop_profiler as profiler_module
+
+    profiler = LoopProfiler(slow_callback_ms=threshold_ms)
+    # El bus consulta la instancia global: usar la del benchmark
+    cortex_module.loop_profiler = profiler
+    profiler_module.loop_profiler = profiler
+    bus = CortexBus()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_loop_"), "events.db")
+    received = {"n": 0}
+
+    async def store_event(data):
+        if name == "blocking":
+            _sqlite_write(db_path, data, rows)
+        else:
+            await asyncio.to_thread(_sqlite_write, db_path, data, rows)
+
+    async def count_event(data):
+        received["n"] += 1
+
+    def log_event(data):
+        time.sleep(0.001)
+
+    bus.subscribe("bench.EVENT", store_event)
+    bus.subscribe("bench.EVENT", count_event)
+    bus.subscribe("bench.EVENT", log_event)
+
+    # Tarea "interactiva": cuánto tarda en ser atendida mientras llegan eventos
+    waits = []
+
+    async def interactive():
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(0.01)
+            waits.append((loop.time() - start - 0.01) * 1000)
+
+    profiler.enable()
+    probe = asyncio.create_task(interactive())
+    start = time.perf_counter()
+    try:
+        for i in range(events):
+            await bus.publish("bench.EVENT", {"i": i, "text": "x" * 200}, sender="bench")
+            await asyncio.sleep(0)
+    finally:
+        elapsed = time.perf_counter() - start
+        probe.cancel()
+        profiler.disable()
+
+    report = profiler.get_report(top=5)
+    waits.sort()
+    return {
+        "events": events,
+        "elapsed_s": round(elapsed, 3),
+        "delivered": received["n"],
+        "interactive_p99_ms": round(waits[int(len(waits) * 0.99) - 1], 1) if waits else None,
+        "loop_lag": report["loop_lag"],
+        "blocking_by_label": report["blocking_by_label"],
+        "slowest": report["slow_callbacks"][:2],
+        "bus_subscribers": report["bus_subscribers"],
+    }
+
+
+async def run(args) -> Dict:
+    scenarios = ["blocking", "offloaded"] if args.scenario == "all" else [args.scenario]
+    report = {"config": vars(args)}
+    for name in scenarios:
+        report[name] = await run_scenario(name, args.events, args.rows, args.threshold_ms)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de bloqueo del event loop")
+    parser.add_argument("--scenario", choices=["all", "blocking", "offloaded"], default="all")
+    parser.add_argument("--events", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=20, help="filas SQLite por evento")
+    parser.add_argument("--threshold-ms", type=float, default=20.0, help="umbral de callback lento")
+    parser.add_argument("--max-lag-ms", type=float, help="fallar si el p99 del lag lo supera")
+    parser.add_argument("--save", help="guardar el reporte como JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.max_lag_ms is not None:
+        for name in ("offloaded", "blocking"):
+            if name in report:
+                p99 = report[name]["loop_lag"]["p99_ms"] or 0.0
+                if p99 > args.max_lag_ms:
+                    print(f"FALLO: p99 del lag en '{name}' = {p99} ms > {args.max_lag_ms} ms", file=sys.stderr)
+                    return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
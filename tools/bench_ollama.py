@@ -0,0 +1,121 @@
+"""
+Benchmark del planificador de Ollama contra el servidor de imitación.
+
+Escenarios:
+  burst      8 peticiones en segundo plano + 2 interactivas a la vez.
+             Compara la latencia de las interactivas con prioridad (planificador)
+             frente a mandar todo directamente al servidor (cola FIFO).
+  keepalive  peticiones espaciadas más que el keep_alive por defecto del
+             servidor: cuenta las recargas del modelo con y sin keep_alive.
+
+Uso:
+    python tools/bench_ollama.py
+    python tools/bench_ollama.py --parallel 2 --token-ms 10 --save bench_ollama.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ollama_standin import start_standin  # noqa: E402
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    return {"p50_ms": round(statistics.median(values), 1), "max_ms": round(max(values), 1)}
+
+
+async def _timed(manager, prompt: str, priority: int) -> float:
+    from core.ollama_scheduler import llm_priority
+    start = time.perf_counter()
+    with llm_priority(priority):
+        async for _ in manager.generate(prompt, stream=True, use_cache=False):
+            pass
+    return (time.perf_counter() - start) * 1000
+
+
+async def bench_burst(manager, scheduled: bool, parallel: int) -> Dict:
+    from core.ollama_scheduler import BACKGROUND, INTERACTIVE
+    sched = manager.ollama_scheduler
+    # Sin planificador: cupo ilimitado, todo va a la cola FIFO del servidor
+    sched.max_parallel = parallel if scheduled else 10_000
+    tasks = [asyncio.create_task(_timed(manager, f"bg{i}", BACKGROUND)) for i in range(8)]
+    await asyncio.sleep(0.01)
+    interactive = [asyncio.create_task(_timed(manager, f"ui{i}", INTERACTIVE)) for i in range(2)]
+    bg = await asyncio.gather(*tasks)
+    ui = await asyncio.gather(*interactive)
+    return {"interactive": _summary(ui), "background": _summary(bg)}
+
+
+async def bench_keepalive(manager, server, keep_alive: str, gap: float, calls: int) -> Dict:
+    manager.ollama_scheduler.keep_alive = keep_alive
+    await manager.preload_local_model()
+    loads_before = server.stats["loads"]
+    latencies = []
+    for i in range(calls):
+        latencies.append(await _timed(manager, f"k{i}", 0))
+        await asyncio.sleep(gap)
+    return {"reloads": server.stats["loads"] - loads_before, **_summary(latencies)}
+
+
+async def run(args) -> Dict:
+    from core.LLMManager import llm_manager, ProviderType
+
+    runner, server, base_url = await start_standin(
+        parallel=args.parallel, load_time=args.load_time, token_delay=args.token_ms / 1000,
+        tokens=args.tokens, default_keep_alive=args.server_keep_alive,
+    )
+    manager = llm_manager
+    manager.providers[ProviderType.OLLAMA].base_url = base_url
+    manager.active_provider = ProviderType.OLLAMA
+    manager.routing_mode = "single"
+    try:
+        await manager.preload_local_model()
+        report = {
+            "config": vars(args),
+            "burst_fifo": await bench_burst(manager, scheduled=False, parallel=args.parallel),
+            "burst_scheduled": await bench_burst(manager, scheduled=True, parallel=args.parallel),
+        }
+        gap = args.server_keep_alive + 0.3
+        # Antes no se enviaba keep_alive: el servidor aplica el suyo y, con huecos
+        # mayores, descarga el modelo y lo recarga en la siguiente llamada
+        server_default = f"{args.server_keep_alive}s"
+        report["keepalive_server_default"] = await bench_keepalive(manager, server, server_default, gap, args.calls)
+        report["keepalive_30m"] = await bench_keepalive(manager, server, "30m", gap, args.calls)
+        report["scheduler"] = manager.ollama_scheduler.get_stats()
+        return report
+    finally:
+        await manager.close()
+        await runner.cleanup()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del planificador de Ollama")
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument("--load-time", type=float, default=0.5)
+    parser.add_argument("--token-ms", type=float, default=5.0)
+    parser.add_argument("--tokens", type=int, default=30)
+    parser.add_argument("--server-keep-alive", type=float, default=0.5, help="keep_alive por defecto del servidor (s)")
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--save", help="guardar el reporte como JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Benchmark del transporte de resultados de skills (proceso sandbox -> padre).
+
+Un worker lanzado con multiprocessing "spawn" (como AgentLifecycleManager)
+genera un resultado binario de --payload-mb y --files archivos de --file-mb
+en su output/. Se mide desde que el resultado está listo en el hijo hasta que
+el padre lo tiene en memoria y los archivos están en el directorio final:
+
+  queue   bytes pickleados por la mp.Queue + shutil.copy2 de cada archivo
+  spill   bytes volcados a un archivo mapeado + os.replace de cada archivo
+  lazy    como spill, pero el padre recibe ResultBlob (restore_spilled(materialize=False))
+
+Uso:
+    python tools/bench_result_transport.py
+    python tools/bench_result_transport.py --payload-mb 64 --files 4 --file-mb 16 --save bench.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def _worker(mode: str, workdir: str, payload_mb: int, files: int, file_mb: int, q) -> None:
+    from core.result_transport import move_outputs, spill_large_values
+
+    work = Path(workdir)
+    output = work / "sandbox" / "output"
+    output.mkdir(parents=True, exist_ok=True)
+    for i in range(files):
+        (output / f"imagen_{i}.png").write_bytes(os.urandom(file_mb * 1024 * 1024))
+    result = {"image": os.urandom(payload_mb * 1024 * 1024), "message": "ok"}
+
+    ready = time.time()
+    final = work / "final"
+    if mode == "queue":
+        final.mkdir(parents=True, exist_ok=True)
+        names = []
+        for item in output.iterdir():
+            shutil.copy2(item, final / item.name)
+            names.append(str(final / item.name))
+    else:
+        names = move_outputs(output, final)
+        result = spill_large_values(result, work / "results")
+    q.put({"ready": ready, "result": result, "output_files": names})
+
+
+def run_once(mode: str, args) -> float:
+    from core.result_transport import restore_spilled
+
+    workdir = tempfile.mkdtemp(prefix="bench_results_")
+    try:
+        ctx = mp.get_context("spawn")
+        q = ctx.Queue()
+        worker_mode = "queue" if mode == "queue" else "spill"
+        proc = ctx.Process(target=_worker, args=(worker_mode, workdir, args.payload_mb, args.files, args.file_mb, q))
+        proc.start()
+        msg = q.get()
+        msg = restore_spilled(msg, materialize=(mode != "lazy"))
+        done = time.time()
+        proc.join()
+        assert len(msg["result"]["image"]) == args.payload_mb * 1024 * 1024
+        assert len(msg["output_files"]) == args.files
+        return (done - msg["ready"]) * 1000
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del transporte de resultados de skills")
+    parser.add_argument("--payload-mb", type=int, default=32, help="tamaño del resultado binario")
+    parser.add_argument("--files", type=int, default=3, help="archivos en output/")
+    parser.add_argument("--file-mb", type=int, default=8, help="tamaño de cada archivo")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--save", help="guardar el reporte como JSON")
+    args = parser.parse_args(argv)
+
+    report: Dict = {"config": vars(args)}
+    for mode in ("queue", "spill", "lazy"):
+        samples = [run_once(mode, args) for _ in range(args.runs)]
+        report[mode] = {
+            "median_ms": round(statistics.median(samples), 1),
+            "min_ms": round(min(samples), 1),
+        }
+    for mode in ("spill", "lazy"):
+        report[mode]["speedup"] = round(report["queue"]["median_ms"] / max(report[mode]["median_ms"], 0.1), 1)
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
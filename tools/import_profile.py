@@ -0,0 +1,137 @@
+"""
+Perfil de tiempo de importación (arranque en frío) de MININA.
+
+Ejecuta `python -X importtime -c "import <módulo>"` en procesos limpios,
+resume los imports más costosos y mide el tiempo total de arranque.
+
+Uso:
+    python tools/import_profile.py                       # módulos por defecto
+    python tools/import_profile.py core.ui.api_client -n 5 --top 15
+    python tools/import_profile.py --save bench_import.json
+    python tools/import_profile.py --compare bench_import.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lo que importan start.py (WebUI), iniciar_minina.py y la UI local
+DEFAULT_TARGETS = [
+    "core.config",
+    "core.ui.api_client",
+    "core.AgentLifecycleManager",
+    "core.LLMManager",
+    "core.MemoryCore",
+    "core.SystemWatchdog",
+]
+
+
+def _run_importtime(module: str) -> Tuple[float, List[Tuple[int, int, str]], str]:
+    """Importar un módulo en un proceso nuevo. Retorna (wall_ms, filas, error)"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    rows: List[Tuple[int, int, str]] = []
+    error_lines = []
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:"):
+            parts = line[len("import time:"):].split("|")
+            if len(parts) != 3 or not parts[0].strip().isdigit():
+                continue  # cabecera
+            rows.append((int(parts[0]), int(parts[1]), parts[2].rstrip()))
+        else:
+            error_lines.append(line)
+    error = "\n".join(error_lines[-3:]) if proc.returncode != 0 else ""
+    return wall_ms, rows, error
+
+
+def profile_module(module: str, runs: int = 3, top: int = 10) -> Dict:
+    """Perfil de un módulo: mediana de arranque y top de imports por tiempo acumulado"""
+    walls = []
+    cumulative_us = []
+    rows: List[Tuple[int, int, str]] = []
+    error = ""
+    for _ in range(max(1, runs)):
+        wall_ms, rows, error = _run_importtime(module)
+        if error:
+            break
+        walls.append(wall_ms)
+        cumulative_us.append(sum(r[0] for r in rows))
+
+    if error:
+        return {"module": module, "error": error}
+
+    heaviest = sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "runs": len(walls),
+        "wall_ms_median": round(statistics.median(walls), 1),
+        "import_ms_median": round(statistics.median(cumulative_us) / 1000, 1),
+        "modules_imported": len(rows),
+        "top": [
+            {"module": name.strip(), "self_ms": round(s / 1000, 2), "cumulative_ms": round(c / 1000, 2)}
+            for s, c, name in heaviest
+        ],
+    }
+
+
+def _print_report(reports: List[Dict], baseline: Dict = None):
+    for rep in reports:
+        print(f"\n=== {rep['module']}")
+        if "error" in rep:
+            print(f"  ERROR: {rep['error']}")
+            continue
+        line = (f"  arranque: {rep['wall_ms_median']} ms | imports: {rep['import_ms_median']} ms "
+                f"| módulos: {rep['modules_imported']}")
+        base = (baseline or {}).get(rep["module"])
+        if base and "wall_ms_median" in base:
+            delta = rep["wall_ms_median"] - base["wall_ms_median"]
+            line += f" | vs baseline: {delta:+.1f} ms"
+        print(line)
+        for item in rep["top"]:
+            print(f"    {item['cumulative_ms']:>9.2f} ms  {item['module']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Perfil de importación de MININA")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("-n", "--runs", type=int, default=3, help="procesos por módulo (mediana)")
+    parser.add_argument("--top", type=int, default=10, help="imports más costosos a mostrar")
+    parser.add_argument("--save", help="guardar el reporte como JSON (baseline)")
+    parser.add_argument("--compare", help="comparar contra un reporte JSON previo")
+    args = parser.parse_args(argv)
+
+    reports = [profile_module(m, runs=args.runs, top=args.top) for m in args.modules]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = {r["module"]: r for r in json.load(f)}
+
+    _print_report(reports, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+        print(f"\nIMPORT_PROFILE={args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
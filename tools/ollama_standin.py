@@ -0,0 +1,162 @@
+"""
+Servidor Ollama de imitación para benchmarks y pruebas sin GPU.
+
+Imita lo que importa para el planificador:
+- /api/generate con stream NDJSON (o respuesta única con "stream": false)
+- N slots paralelos (OLLAMA_NUM_PARALLEL); el resto espera en cola FIFO
+- Carga del modelo con coste fijo y descarga tras keep_alive sin uso
+- Petición sin prompt = precarga; keep_alive 0 = descarga
+- /api/tags y /_stats (cargas, concurrencia máxima)
+
+Uso:
+    python tools/ollama_standin.py --port 11435 --parallel 1 --load-time 2 --token-ms 20
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+DEFAULT_KEEP_ALIVE_S = 300.0
+
+
+def parse_keep_alive(value: Any, default: float = DEFAULT_KEEP_ALIVE_S) -> float:
+    """'30m', '5s', '1h', 300, -1 (para siempre) -> segundos"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    m = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*([smh]?)\s*", str(value))
+    if not m:
+        return default
+    num = float(m.group(1))
+    if num < 0:
+        return float("inf")
+    return num * {"": 1, "s": 1, "m": 60, "h": 3600}[m.group(2)]
+
+
+class StandInOllama:
+    def __init__(
+        self,
+        parallel: int = 1,
+        load_time: float = 2.0,
+        token_delay: float = 0.02,
+        tokens: int = 40,
+        default_keep_alive: float = DEFAULT_KEEP_ALIVE_S,
+        models=("llama3.1",),
+    ):
+        self.parallel = parallel
+        self.load_time = load_time
+        self.token_delay = token_delay
+        self.tokens = tokens
+        self.default_keep_alive = default_keep_alive
+        self.models = list(models)
+        self._slots = asyncio.Semaphore(parallel)
+        self._load_lock = asyncio.Lock()
+        self._loaded_until: Dict[str, float] = {}
+        self.stats = {"requests": 0, "loads": 0, "active": 0, "max_active": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/generate", self.generate)
+        app.router.add_get("/api/tags", self.tags)
+        app.router.add_get("/_stats", self.get_stats)
+        return app
+
+    async def _ensure_loaded(self, model: str) -> None:
+        async with self._load_lock:
+            if self._loaded_until.get(model, 0) > time.monotonic():
+                return
+            await asyncio.sleep(self.load_time)
+            self.stats["loads"] += 1
+            self._loaded_until[model] = float("inf")  # se fija al terminar la petición
+
+    def _touch(self, model: str, keep_alive: float) -> None:
+        self._loaded_until[model] = time.monotonic() + keep_alive
+
+    async def generate(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model") or self.models[0]
+        prompt = body.get("prompt") or ""
+        stream = body.get("stream", True)
+        keep_alive = parse_keep_alive(body.get("keep_alive"), self.default_keep_alive)
+        num_predict = int((body.get("options") or {}).get("num_predict") or self.tokens)
+        self.stats["requests"] += 1
+
+        if keep_alive == 0 and not prompt:
+            self._loaded_until.pop(model, None)
+            return web.json_response({"model": model, "done": True, "done_reason": "unload"})
+
+        async with self._slots:
+            self.stats["active"] += 1
+            self.stats["max_active"] = max(self.stats["max_active"], self.stats["active"])
+            try:
+                await self._ensure_loaded(model)
+                if not prompt:
+                    self._touch(model, keep_alive)
+                    return web.json_response({"model": model, "done": True, "done_reason": "load"})
+
+                n = min(num_predict, self.tokens)
+                if not stream:
+                    await asyncio.sleep(self.token_delay * n)
+                    self._touch(model, keep_alive)
+                    return web.json_response({
+                        "model": model, "response": " ".join(f"tok{i}" for i in range(n)),
+                        "done": True, "eval_count": n,
+                    })
+
+                resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+                await resp.prepare(request)
+                for i in range(n):
+                    await asyncio.sleep(self.token_delay)
+                    line = {"model": model, "response": f"tok{i} ", "done": False}
+                    await resp.write((json.dumps(line) + "\n").encode())
+                await resp.write((json.dumps({"model": model, "response": "", "done": True, "eval_count": n}) + "\n").encode())
+                await resp.write_eof()
+                self._touch(model, keep_alive)
+                return resp
+            finally:
+                self.stats["active"] -= 1
+
+    async def tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": m} for m in self.models]})
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+
+async def start_standin(port: int = 0, **kwargs) -> "tuple[web.AppRunner, StandInOllama, str]":
+    """Arrancar en segundo plano (para benchmarks). Retorna (runner, server, base_url)"""
+    server = StandInOllama(**kwargs)
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    sockets = site._server.sockets  # type: ignore[union-attr]
+    real_port = sockets[0].getsockname()[1]
+    return runner, server, f"http://127.0.0.1:{real_port}"
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ollama de imitación")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument("--load-time", type=float, default=2.0, help="segundos de carga del modelo")
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--keep-alive", type=float, default=DEFAULT_KEEP_ALIVE_S, help="keep_alive por defecto (s)")
+    args = parser.parse_args(argv)
+
+    server = StandInOllama(
+        parallel=args.parallel, load_time=args.load_time, token_delay=args.token_ms / 1000,
+        tokens=args.tokens, default_keep_alive=args.keep_alive,
+    )
+    web.run_app(server.app(), host="127.0.0.1", port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())